@@ -0,0 +1,29 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+"""
+This subpackage provides reproducible performance benchmarks for GIANT.
+
+Description
+-----------
+
+The benchmarks are intended to tell whether a change to GIANT (or to the machine or libraries it runs on) makes it
+faster or slower.  They are built from synthetic shapes that can be generated at any scale from a seed
+(:mod:`.synthetic_shapes`), so no data files are needed and the same shapes are used every time.  The results are
+reported in machine readable JSON that can be stored as a baseline and compared against later runs
+(:mod:`.ray_tracer_benchmarks`).
+
+Typically you will run the benchmarks using the :mod:`.benchmark_ray_tracer` script.
+"""
+
+from giant.benchmarks.synthetic_shapes import SHAPE_KINDS, tessellate_ellipsoid, asteroid_mesh, make_surface
+from giant.benchmarks.ray_tracer_benchmarks import (BENCHMARKS, BenchmarkConfig, run_case, run_suite, save_report,
+                                                    load_report, compare_reports, format_results)
+
+from giant.benchmarks import synthetic_shapes, ray_tracer_benchmarks
+
+
+__all__ = ['SHAPE_KINDS', 'tessellate_ellipsoid', 'asteroid_mesh', 'make_surface', 'BENCHMARKS', 'BenchmarkConfig',
+           'run_case', 'run_suite', 'save_report', 'load_report', 'compare_reports', 'format_results',
+           'synthetic_shapes', 'ray_tracer_benchmarks']
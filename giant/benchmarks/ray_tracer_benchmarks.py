@@ -0,0 +1,541 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+"""
+This module provides a reproducible benchmark suite for the ray tracer.
+
+Description
+-----------
+
+The suite generates synthetic shapes (see :mod:`.synthetic_shapes`) at several scales and times the most expensive
+ray tracing operations in GIANT on them:
+
+* ``'build'`` -- building the :class:`.KDTree` acceleration structure (:meth:`.KDTree.build`)
+* ``'trace'`` -- tracing a square grid of camera rays through the tree (:meth:`.KDTree.trace`)
+* ``'illumination'`` -- the single bounce trace with shadowing (:meth:`.Scene.get_illumination_inputs`)
+* ``'limbs'`` -- finding the limbs of the shape along a fan of scan lines (:meth:`.Surface.find_limbs`)
+
+Each case (shape kind, number of facets, and number of threads) is run in its own freshly spawned process by default,
+so that the peak resident set size (RSS) reported for each case is not polluted by the cases that ran before it.  The
+number of threads for each case is set using :func:`.parallel_config.parallel_config`.  Each timing is
+the best of :attr:`~BenchmarkConfig.repeats` runs (except for the tree build, which is only run once because it is
+so expensive for large shapes).
+
+The results are collected into a report (a plain dictionary) that includes information about the machine and software
+versions along with the results for each case, which can be written to and read from JSON using :func:`save_report`
+and :func:`load_report`.  Two reports can be compared using :func:`compare_reports` to identify any cases that have
+gotten slower (or use more memory) than a stored baseline by more than a given tolerance.
+
+Use
+---
+
+The simplest way to run the benchmarks is through the :mod:`.benchmark_ray_tracer` script, which provides a command
+line interface to :func:`run_suite` and :func:`compare_reports`.  From python you can do
+
+    >>> from giant.benchmarks.ray_tracer_benchmarks import BenchmarkConfig, run_suite, save_report
+    >>> report = run_suite(BenchmarkConfig(facet_counts=(10000, 100000), thread_counts=(1, 4)))
+    >>> save_report(report, 'ray_tracer_benchmarks.json')
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import multiprocessing
+from importlib import metadata
+from datetime import datetime, timezone
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Tuple, Optional, Dict, Any, List, Callable, Union
+
+import numpy as np
+
+from giant.ray_tracer.kdtree import KDTree
+from giant.ray_tracer.scene import Scene, SceneObject
+from giant.ray_tracer.shapes import Point
+from giant.ray_tracer.rays import Rays
+from giant.ray_tracer.parallel_config import parallel_config, get_num_threads
+from giant.benchmarks.synthetic_shapes import SHAPE_KINDS, make_surface
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+import psutil
+
+
+BENCHMARKS: Tuple[str, ...] = ('build', 'trace', 'illumination', 'limbs')
+"""
+The operations that can be benchmarked.
+"""
+
+HIGHER_IS_BETTER: Tuple[str, ...] = ('trace_rays_per_second', 'illumination_rays_per_second',
+                                     'limb_scan_lines_per_second')
+"""
+The metrics in the results for which a larger value is better.
+"""
+
+LOWER_IS_BETTER: Tuple[str, ...] = ('build_time', 'peak_rss_bytes')
+"""
+The metrics in the results for which a smaller value is better.
+"""
+
+REPORT_VERSION: int = 1
+"""
+The version of the report format produced by :func:`run_suite`.
+"""
+
+
+@dataclass
+class BenchmarkConfig:
+    """
+    This dataclass specifies which benchmark cases to run and how.
+
+    Every combination of :attr:`shape_kinds`, :attr:`facet_counts`, and :attr:`thread_counts` is run as a separate case.
+    """
+
+    shape_kinds: Tuple[str, ...] = SHAPE_KINDS
+    """
+    The kinds of synthetic shapes to benchmark (see :data:`.SHAPE_KINDS`)
+    """
+
+    facet_counts: Tuple[int, ...] = (10000, 100000, 1000000, 5000000)
+    """
+    The approximate number of facets in the shapes to benchmark
+    """
+
+    thread_counts: Tuple[int, ...] = (1,)
+    """
+    The number of OpenMP threads to benchmark with
+    """
+
+    benchmarks: Tuple[str, ...] = BENCHMARKS
+    """
+    The operations to benchmark (see :data:`BENCHMARKS`)
+    """
+
+    image_size: int = 512
+    """
+    The number of rows and columns of camera rays to trace for the ``'trace'`` and ``'illumination'`` benchmarks
+    """
+
+    num_scan_lines: int = 720
+    """
+    The number of scan lines to find the limbs along for the ``'limbs'`` benchmark
+    """
+
+    repeats: int = 3
+    """
+    The number of times to repeat each timing (the best time is reported)
+    """
+
+    max_depth: Optional[int] = None
+    """
+    The maximum depth of the KD trees.
+
+    If ``None`` then the depth is chosen so that the leaves contain about 8 facets (limited to between 1 and 18).
+    """
+
+    seed: int = 0
+    """
+    The seed used to generate the asteroid shapes
+    """
+
+    distance: float = 10.0
+    """
+    The distance from the observer to the center of the shapes, in units of the radius of the shapes.
+    """
+
+
+def _default_depth(num_facets: int) -> int:
+    """
+    Computes the depth of the KD tree so that the leaves contain about 8 facets.
+
+    :param num_facets: The number of facets in the shape
+    :return: The depth for the tree
+    """
+
+    return int(np.clip(np.ceil(np.log2(max(num_facets, 1) / 8)), 1, 18))
+
+
+def _peak_rss() -> int:
+    """
+    Returns the peak resident set size of the current process in bytes.
+
+    If the peak is not available on this platform then the current resident set size is returned instead.
+
+    :return: The peak resident set size in bytes
+    """
+
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # linux reports kilobytes while mac reports bytes
+        if sys.platform.startswith('darwin'):
+            return int(peak)
+
+        return int(peak) * 1024
+
+    return int(psutil.Process().memory_info().rss)
+
+
+def _giant_version() -> Optional[str]:
+    """
+    Returns the installed version of GIANT, or ``None`` if it is not installed as a package.
+
+    :return: The version string
+    """
+
+    try:
+        return metadata.version('giant')
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _best_time(function: Callable[[], Any], repeats: int) -> float:
+    """
+    Returns the best wall clock time for calling ``function`` out of ``repeats`` tries.
+
+    :param function: The function to time
+    :param repeats: The number of times to call the function
+    :return: The best time in seconds
+    """
+
+    best = np.inf
+
+    for _ in range(max(repeats, 1)):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    return float(best)
+
+
+def _camera_rays(center: np.ndarray, radius: float, image_size: int) -> Rays:
+    """
+    Creates a square grid of rays from the origin that covers a sphere of ``radius`` located at ``center``.
+
+    :param center: The center of the shape as a length 3 array along the z axis
+    :param radius: The radius of a sphere enclosing the shape
+    :param image_size: The number of rows and columns of rays
+    :return: The rays
+    """
+
+    # slightly more than the body so that some of the rays miss
+    extent = 1.2 * radius / center[2]
+
+    # offset the grid so that no rays hit exactly along a facet edge
+    grid = np.linspace(-extent, extent, image_size) + 1e-7
+
+    x_grid, y_grid = np.meshgrid(grid, grid)
+
+    directions = np.vstack([x_grid.ravel(), y_grid.ravel(), np.ones(x_grid.size)])
+    directions /= np.linalg.norm(directions, axis=0, keepdims=True)
+
+    return Rays(np.zeros(3), directions)
+
+
+def run_case(shape_kind: str, num_facets: int, config: Optional[BenchmarkConfig] = None) -> Dict[str, Any]:
+    """
+    Runs the benchmarks for a single shape in the current process.
+
+    The number of threads used is whatever GIANT has already been configured with (see :mod:`.parallel_config`).
+
+    The returned dictionary contains the shape kind, the actual number of facets, the time to generate the shape, and
+    then a key for each metric that was benchmarked (see :data:`HIGHER_IS_BETTER` and :data:`LOWER_IS_BETTER`).
+
+    :param shape_kind: The kind of synthetic shape to generate (see :data:`.SHAPE_KINDS`)
+    :param num_facets: The approximate number of facets for the shape
+    :param config: The configuration for the benchmarks.  If ``None`` then the default configuration is used
+    :return: The results for the case as a dictionary
+    :raises ValueError: If any of the requested benchmarks are not in :data:`BENCHMARKS`
+    """
+
+    if config is None:
+        config = BenchmarkConfig()
+
+    unknown = set(config.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError('Unknown benchmarks {}.  Must be from {}'.format(sorted(unknown), BENCHMARKS))
+
+    start = time.perf_counter()
+    surface = make_surface(shape_kind, num_facets, seed=config.seed)
+    generate_time = time.perf_counter() - start
+
+    num_facets = int(surface.num_faces)
+
+    results = {'shape_kind': shape_kind,
+               'num_facets': num_facets,
+               'omp_num_threads': os.environ.get('OMP_NUM_THREADS'),
+               'giant_num_threads': get_num_threads(),
+               'generate_time': generate_time}
+
+    max_depth = config.max_depth if config.max_depth is not None else _default_depth(num_facets)
+
+    results['max_depth'] = max_depth
+
+    tree = KDTree(surface, max_depth=max_depth)
+
+    start = time.perf_counter()
+    tree.build(force=True, print_progress=False)
+    build_time = time.perf_counter() - start
+
+    if 'build' in config.benchmarks:
+        results['build_time'] = build_time
+
+    radius = float(np.linalg.norm(surface.vertices, axis=-1).max())
+    center = np.array([0, 0, config.distance * radius])
+
+    tree.translate(center)
+
+    rays = _camera_rays(center, radius, config.image_size)
+
+    if 'trace' in config.benchmarks:
+        best = _best_time(lambda: tree.trace(rays), config.repeats)
+
+        results['trace_rays_per_second'] = rays.num_rays / best
+
+    if 'illumination' in config.benchmarks:
+        light = SceneObject(Point(center + 1e6 * np.array([0.6, 0.3, -0.74])))
+
+        scene = Scene(target_objs=[SceneObject(tree)], light_obj=light)
+
+        best = _best_time(lambda: scene.get_illumination_inputs(rays), config.repeats)
+
+        results['illumination_rays_per_second'] = rays.num_rays / best
+
+    if 'limbs' in config.benchmarks:
+        angles = np.linspace(0, 2 * np.pi, config.num_scan_lines, endpoint=False)
+
+        scan_dirs = np.vstack([np.cos(angles), np.sin(angles), np.zeros(angles.size)])
+
+        scan_center = center / np.linalg.norm(center)
+
+        best = _best_time(lambda: tree.find_limbs(scan_center, scan_dirs), config.repeats)
+
+        results['limb_scan_lines_per_second'] = config.num_scan_lines / best
+
+    results['peak_rss_bytes'] = _peak_rss()
+
+    return results
+
+
+def _case_worker(queue: multiprocessing.Queue, shape_kind: str, num_facets: int, num_threads: int,
+                 config: BenchmarkConfig):
+    """
+    Runs a single case in a child process, putting the results (or the error message) onto ``queue``.
+
+    :param queue: The queue to return the results with
+    :param shape_kind: The kind of synthetic shape to generate
+    :param num_facets: The approximate number of facets for the shape
+    :param num_threads: The number of OpenMP threads to use
+    :param config: The configuration for the benchmarks
+    """
+
+    try:
+        with parallel_config(num_threads=num_threads):
+            queue.put(run_case(shape_kind, num_facets, config))
+    except Exception as error:
+        queue.put({'shape_kind': shape_kind, 'num_facets': num_facets, 'error': repr(error)})
+
+
+def _run_isolated(shape_kind: str, num_facets: int, num_threads: int, config: BenchmarkConfig) -> Dict[str, Any]:
+    """
+    Runs a single case in a freshly spawned process using ``num_threads`` threads.
+
+    ``OMP_NUM_THREADS`` is also set for the process so that any other OpenMP code (like the linear algebra libraries
+    used by numpy) uses the same number of threads.
+
+    :param shape_kind: The kind of synthetic shape to generate
+    :param num_facets: The approximate number of facets for the shape
+    :param num_threads: The number of OpenMP threads to use
+    :param config: The configuration for the benchmarks
+    :return: The results for the case
+    """
+
+    context = multiprocessing.get_context('spawn')
+
+    queue = context.Queue()
+
+    # the spawned process copies the environment at the time it is started
+    previous = os.environ.get('OMP_NUM_THREADS')
+    os.environ['OMP_NUM_THREADS'] = str(num_threads)
+
+    try:
+        process = context.Process(target=_case_worker, args=(queue, shape_kind, num_facets, num_threads, config))
+        process.start()
+    finally:
+        if previous is None:
+            del os.environ['OMP_NUM_THREADS']
+        else:
+            os.environ['OMP_NUM_THREADS'] = previous
+
+    # get the results before joining so a large result can't block the child from exiting
+    try:
+        results = queue.get()
+    finally:
+        process.join()
+
+    return results
+
+
+def run_suite(config: Optional[BenchmarkConfig] = None, isolate: bool = True,
+              print_progress: bool = False) -> Dict[str, Any]:
+    """
+    Runs every case specified by ``config`` and collects the results into a report.
+
+    If ``isolate`` is ``True`` then each case is run in its own spawned process.  Otherwise the cases are all run in
+    the current process, in which case the peak RSS is the peak for the whole process up to that point.  In either
+    case the number of threads is set for each case using :func:`.parallel_config.parallel_config`.
+
+    The report is a dictionary with keys ``'version'``, ``'created'``, ``'machine'`` (information about the machine and
+    software versions), ``'config'`` (the configuration as a dictionary), and ``'results'`` (a list of the result
+    dictionaries from :func:`run_case` with an additional ``'num_threads'`` key).
+
+    :param config: The configuration for the benchmarks.  If ``None`` then the default configuration is used
+    :param isolate: A flag specifying whether to run each case in its own process
+    :param print_progress: A flag specifying whether to print the results of each case as it completes
+    :return: The report
+    """
+
+    if config is None:
+        config = BenchmarkConfig()
+
+    report = {'version': REPORT_VERSION,
+              'created': datetime.now(timezone.utc).isoformat(),
+              'machine': {'platform': platform.platform(),
+                          'processor': platform.processor(),
+                          'cpu_count': os.cpu_count(),
+                          'python': platform.python_version(),
+                          'numpy': np.__version__,
+                          'giant': _giant_version()},
+              'config': asdict(config),
+              'results': []}
+
+    for num_threads in config.thread_counts:
+        for shape_kind in config.shape_kinds:
+            for num_facets in config.facet_counts:
+
+                if isolate:
+                    results = _run_isolated(shape_kind, num_facets, num_threads, config)
+                else:
+                    with parallel_config(num_threads=num_threads):
+                        results = run_case(shape_kind, num_facets, config)
+
+                results['num_threads'] = num_threads
+
+                report['results'].append(results)
+
+                if print_progress:
+                    print(format_results(results), flush=True)
+
+    return report
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """
+    Formats the results of a single case as a human readable line of text.
+
+    :param results: The results for the case
+    :return: The formatted results
+    """
+
+    text = '{:>10s} {:>9d} facets {:>4s} threads:'.format(results['shape_kind'], results['num_facets'],
+                                                         str(results.get('num_threads')))
+
+    if 'error' in results:
+        return text + ' FAILED {}'.format(results['error'])
+
+    if 'build_time' in results:
+        text += ' build {:.3f} s'.format(results['build_time'])
+    if 'trace_rays_per_second' in results:
+        text += ', trace {:.3g} rays/s'.format(results['trace_rays_per_second'])
+    if 'illumination_rays_per_second' in results:
+        text += ', illumination {:.3g} rays/s'.format(results['illumination_rays_per_second'])
+    if 'limb_scan_lines_per_second' in results:
+        text += ', limbs {:.3g} lines/s'.format(results['limb_scan_lines_per_second'])
+
+    return text + ', peak RSS {:.1f} MB'.format(results['peak_rss_bytes'] / 2 ** 20)
+
+
+def save_report(report: Dict[str, Any], file: Union[str, Path]):
+    """
+    Writes a report from :func:`run_suite` to a JSON file.
+
+    :param report: The report to save
+    :param file: The file to save the report to
+    """
+
+    with open(file, 'w') as out_file:
+        json.dump(report, out_file, indent=2)
+
+
+def load_report(file: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Reads a report that was saved using :func:`save_report`.
+
+    :param file: The file to read the report from
+    :return: The report
+    """
+
+    with open(file, 'r') as in_file:
+        return json.load(in_file)
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any],
+                    tolerance: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Compares the results in a report against a baseline report.
+
+    Cases are matched by their shape kind, number of facets, and number of threads.  For each metric present in both
+    matched cases the relative change is computed so that a positive change is always an improvement (faster, or less
+    memory).  A metric is flagged as a regression if it got worse by more than ``tolerance`` (as a fraction of the
+    baseline value).  Cases that are only in one of the reports are skipped.
+
+    :param current: The report to check
+    :param baseline: The report to compare against
+    :param tolerance: The fractional change that is tolerated before flagging a regression
+    :return: A list of dictionaries (one per compared metric) with keys ``'shape_kind'``, ``'num_facets'``,
+             ``'num_threads'``, ``'metric'``, ``'baseline'``, ``'current'``, ``'change'``, and ``'regression'``
+    """
+
+    def key(results: Dict[str, Any]) -> Tuple[str, int, Any]:
+        return results['shape_kind'], results['num_facets'], results.get('num_threads')
+
+    baseline_results = {key(results): results for results in baseline['results'] if 'error' not in results}
+
+    comparisons = []
+
+    for results in current['results']:
+
+        if 'error' in results:
+            continue
+
+        reference = baseline_results.get(key(results))
+
+        if reference is None:
+            continue
+
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+
+            if (metric not in results) or (metric not in reference):
+                continue
+
+            if metric in HIGHER_IS_BETTER:
+                change = results[metric] / reference[metric] - 1
+            else:
+                change = reference[metric] / results[metric] - 1
+
+            comparisons.append({'shape_kind': results['shape_kind'],
+                                'num_facets': results['num_facets'],
+                                'num_threads': results.get('num_threads'),
+                                'metric': metric,
+                                'baseline': reference[metric],
+                                'current': results[metric],
+                                'change': change,
+                                'regression': change < -tolerance})
+
+    return comparisons
@@ -0,0 +1,189 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+"""
+This module provides functions for generating reproducible synthetic shape models for benchmarking.
+
+Description
+-----------
+
+Two kinds of shapes are provided.  The first is a tessellated triaxial ellipsoid (:func:`tessellate_ellipsoid`), which
+is smooth and has a very regular facet layout.  The second is a noisy "asteroid" (:func:`asteroid_mesh`), which is an
+ellipsoid whose radius has been perturbed by a random set of hills, craters, and small scale roughness so that it has
+concavities, self shadowing, and an irregular limb like a real small body.  Both are generated on the same latitude
+longitude grid so the number of facets can be chosen freely (from thousands to many millions) and both are completely
+determined by their inputs (including the ``seed`` for the asteroid), so the same shape is generated every time.
+
+Use
+---
+
+Typically you will use :func:`make_surface` to get a :class:`.Triangle64` surface directly by kind and (approximate)
+number of facets, which is what the :mod:`.ray_tracer_benchmarks` module does.  The other functions are provided for
+when you need the raw vertices and facets.
+"""
+
+from typing import Tuple, Optional
+
+import numpy as np
+
+from giant.ray_tracer.shapes import Triangle64
+from giant._typing import ARRAY_LIKE
+
+
+SHAPE_KINDS: Tuple[str, ...] = ('ellipsoid', 'asteroid')
+"""
+The kinds of synthetic shapes that can be generated by :func:`make_surface`.
+"""
+
+
+def _grid_size(num_facets: int) -> Tuple[int, int]:
+    """
+    Determines the number of latitude rings (excluding the poles) and longitude samples required to get approximately
+    the requested number of facets.
+
+    A grid with ``m`` rings and ``2m`` longitudes has ``4m**2`` facets.
+
+    :param num_facets: The requested number of facets
+    :return: The number of rings and the number of longitudes
+    """
+
+    rings = max(int(round(np.sqrt(num_facets / 4))), 2)
+
+    return rings, 2 * rings
+
+
+def _unit_sphere_grid(num_facets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds the unit vectors and facets of a closed latitude/longitude tessellation of the unit sphere with a single
+    vertex at each pole (so there are no degenerate facets).
+
+    :param num_facets: The approximate number of facets to generate
+    :return: The unit vertices as a nx3 array and the facets as a mx3 array with outward (counter clockwise) winding
+    """
+
+    rings, longitudes = _grid_size(num_facets)
+
+    lat = np.linspace(-np.pi / 2, np.pi / 2, rings + 2)[1:-1]
+    lon = np.linspace(0, 2 * np.pi, longitudes, endpoint=False)
+
+    lat, lon = np.meshgrid(lat, lon, indexing='ij')
+
+    ring_vertices = np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)],
+                             axis=-1).reshape(-1, 3)
+
+    vertices = np.vstack([ring_vertices, [[0, 0, -1], [0, 0, 1]]])
+
+    south = ring_vertices.shape[0]
+    north = south + 1
+
+    ring = np.arange(rings - 1).reshape(-1, 1) * longitudes
+    column = np.arange(longitudes).reshape(1, -1)
+    next_column = (column + 1) % longitudes
+
+    lower_left = (ring + column).ravel()
+    lower_right = (ring + next_column).ravel()
+    upper_left = lower_left + longitudes
+    upper_right = lower_right + longitudes
+
+    body = np.vstack([np.stack([lower_left, lower_right, upper_right], axis=-1),
+                      np.stack([lower_left, upper_right, upper_left], axis=-1)])
+
+    top = (rings - 1) * longitudes
+
+    south_cap = np.stack([np.full(longitudes, south), next_column.ravel(), column.ravel()], axis=-1)
+    north_cap = np.stack([np.full(longitudes, north), top + column.ravel(), top + next_column.ravel()], axis=-1)
+
+    return vertices, np.vstack([south_cap, body, north_cap]).astype(np.uint32)
+
+
+def tessellate_ellipsoid(principal_axes: ARRAY_LIKE = (1.0, 0.8, 0.6),
+                         num_facets: int = 10000) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tessellates a triaxial ellipsoid centered at the origin and aligned with the frame axes.
+
+    The tessellation is a latitude/longitude grid with a single vertex at each pole, so the actual number of facets is
+    the closest number of the form ``4m**2`` to ``num_facets``.
+
+    :param principal_axes: The lengths of the 3 principal semi-axes of the ellipsoid
+    :param num_facets: The approximate number of facets to generate
+    :return: The vertices as a nx3 array and the facets as a mx3 array of indices into the vertices
+    """
+
+    vertices, facets = _unit_sphere_grid(num_facets)
+
+    return vertices * np.asarray(principal_axes, dtype=np.float64).reshape(1, 3), facets
+
+
+def asteroid_mesh(num_facets: int = 10000, principal_axes: ARRAY_LIKE = (1.0, 0.8, 0.6), num_features: int = 60,
+                  roughness: float = 0.02, seed: Optional[int] = 0,
+                  chunk_size: int = 262144) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generates a reproducible irregular "asteroid" shape by perturbing the radius of a tessellated ellipsoid.
+
+    The radius at each vertex is scaled by ``1 + sum(bumps) + noise`` where the bumps are ``num_features`` randomly
+    placed Gaussian hills and (negative) craters with random sizes and heights up to 15% of the radius, and the noise
+    is a sum of random low order sinusoids of the vertex direction with an amplitude of ``roughness``.  All random
+    values are drawn from :func:`numpy.random.default_rng` using ``seed``, so the same inputs always produce the same
+    shape.
+
+    :param num_facets: The approximate number of facets to generate
+    :param principal_axes: The lengths of the 3 principal semi-axes of the underlying ellipsoid
+    :param num_features: The number of hills and craters to add
+    :param roughness: The relative amplitude of the small scale roughness
+    :param seed: The seed for the random number generator
+    :param chunk_size: The number of vertices to perturb at a time (to limit the memory used for very large shapes)
+    :return: The vertices as a nx3 array and the facets as a mx3 array of indices into the vertices
+    """
+
+    rng = np.random.default_rng(seed)
+
+    unit_vertices, facets = _unit_sphere_grid(num_facets)
+
+    centers = rng.normal(size=(num_features, 3))
+    centers /= np.linalg.norm(centers, axis=-1, keepdims=True)
+
+    widths = rng.uniform(0.1, 0.5, num_features)
+    heights = rng.uniform(0.02, 0.15, num_features) * rng.choice([-1, 1], num_features)
+
+    frequencies = rng.normal(scale=6, size=(8, 3))
+    phases = rng.uniform(0, 2 * np.pi, 8)
+
+    scale = np.empty(unit_vertices.shape[0], dtype=np.float64)
+
+    for start in range(0, unit_vertices.shape[0], chunk_size):
+        chunk = unit_vertices[start:start + chunk_size]
+
+        angles = np.arccos(np.clip(chunk @ centers.T, -1, 1))
+
+        bumps = (heights * np.exp(-(angles / widths) ** 2)).sum(axis=-1)
+        noise = roughness * np.sin(chunk @ frequencies.T + phases).mean(axis=-1)
+
+        scale[start:start + chunk_size] = 1 + bumps + noise
+
+    vertices = unit_vertices * np.asarray(principal_axes, dtype=np.float64).reshape(1, 3) * scale.reshape(-1, 1)
+
+    return vertices, facets
+
+
+def make_surface(kind: str = 'ellipsoid', num_facets: int = 10000, seed: Optional[int] = 0,
+                 albedo: float = 1.0) -> Triangle64:
+    """
+    Generates a synthetic surface of the requested kind.
+
+    :param kind: The kind of shape to generate, one of :data:`SHAPE_KINDS`
+    :param num_facets: The approximate number of facets to generate
+    :param seed: The seed for the random number generator (only used for the ``'asteroid'`` kind)
+    :param albedo: The albedo to assign to the surface
+    :return: The generated surface
+    :raises ValueError: If ``kind`` is not one of :data:`SHAPE_KINDS`
+    """
+
+    if kind == 'ellipsoid':
+        vertices, facets = tessellate_ellipsoid(num_facets=num_facets)
+    elif kind == 'asteroid':
+        vertices, facets = asteroid_mesh(num_facets=num_facets, seed=seed)
+    else:
+        raise ValueError('kind must be one of {} not {}'.format(SHAPE_KINDS, kind))
+
+    return Triangle64(vertices, albedo, facets)
@@ -21,12 +21,16 @@ A general user will usually not directly interact with the classes and functions
 the OpNav classes to interact for them.
 """
 
-from typing import Callable, Iterable, Tuple, Union, List, Dict, Optional
+from typing import Callable, Iterable, Tuple, Union, List, Dict, Optional, Sequence
 from enum import Enum
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import os
 
 import cv2
 import numpy as np
 import scipy.signal as sig
+import scipy.fft as spfft
 from scipy.optimize import fmin
 try:
     from scipy.fftpack import next_fast_len
@@ -172,10 +176,10 @@ class ImageFlatteningNoiseApprox(Enum):
 
     In this the image in flattened by splitting it into regions, estimating a linear background gradient in each region,
     and the subtracting the estimated background gradient from the region to get the flattened region.  An individual 
-    noise level is estimated for each of these regions through sampling.
+    noise level is estimated for each of these regions after rejecting outliers.
 
     This technique allows much dimmer points of interest to be extracted without overwhelming with noise, but it is 
-    generally much slower and is unnecessary for all but detailed analyses.
+    generally slower and is unnecessary for all but detailed analyses.
     """
 
 
@@ -383,10 +387,15 @@ def fft_correlator_2d(image: ARRAY_LIKE_2D, template: ARRAY_LIKE_2D) -> np.ndarr
 
     The correlation in this method is roughly performed by
 
-    #. take the 2D fourier transform of the image and the fliplr/flipud template
+    #. take the 2D real fourier transform of the image and the fliplr/flipud template, zero padded to an efficient
+       size (see :func:`scipy.fft.next_fast_len`)
     #. multiply each term of the frequency image and template together
     #. take the inverse fourier transform of the product from step 2.
-    #. normalize the correlation coefficients
+    #. normalize the correlation coefficients using the integral images of the image
+
+    If you are correlating many templates against the same image, or correlating against the same image repeatedly,
+    consider using :class:`FFTCorrelator2D` instead, which caches the spectrum and integral images of the image and can
+    correlate many templates in a single batched call.
 
     Each pixel of the correlation surface returned by this function represents the correlation value when the center of
     the template is placed at this location.  Thus, the location of any point in the template can be found by
@@ -406,30 +415,357 @@ def fft_correlator_2d(image: ARRAY_LIKE_2D, template: ARRAY_LIKE_2D) -> np.ndarr
     :return: A surface of the correlation coefficients for each overlap between the template and the image.
     """
 
-    # perform the correlation in the frequency domain.  Note that template needs to be fliplr/flipud due to the
+    # perform the correlation in the frequency domain using a real FFT of an efficient size.  This is the same as
+    # FFTCorrelator2D without any of the caching, which would just waste memory for a single correlation
+    image = np.asarray(image, dtype=np.float64)
+    template = np.asarray(template, dtype=np.float64)
+
+    fft_shape = _fft_correlation_shape(image.shape, template.shape)
+
+    image_spectrum = spfft.rfft2(image, s=fft_shape)
+
+    return _fft_correlate_templates(image_spectrum, _local_inverse_std(_integral_images(image), template.shape),
+                                    template[np.newaxis], fft_shape)[0]
+
+
+def _fft_correlation_shape(image_shape: Tuple[int, ...], template_shape: Tuple[int, ...]) -> Tuple[int, int]:
+    """
+    This function computes the size of the FFTs to use for correlating a template with an image.
+
+    The FFTs must be at least as large as the full linear correlation (so that the circular correlation doesn't wrap)
+    and are grown to the next size that the FFT routines can compute efficiently (see
+    :func:`scipy.fft.next_fast_len`).
+
+    :param image_shape: The shape of the image
+    :param template_shape: The shape of the template
+    :return: The shape of the FFTs
+    """
+
+    return (spfft.next_fast_len(image_shape[0] + template_shape[0] - 1, real=True),
+            spfft.next_fast_len(image_shape[1] + template_shape[1] - 1, real=True))
+
+
+def _integral_images(image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    This function computes the integral images (summed area tables) of an image and of the square of an image.
+
+    Each integral image is padded with a leading row and column of zeros so that element ``[r, c]`` is the sum of
+    ``image[:r, :c]``.
+
+    :param image: The image as a float64 array
+    :return: The integral image of the image and the integral image of the square of the image
+    """
+
+    integral, integral_squares = cv2.integral2(np.ascontiguousarray(image), sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+
+    return integral, integral_squares
+
+
+def _local_sums(integrals: Tuple[np.ndarray, np.ndarray],
+                template_shape: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    This function computes the sum of the image and the sum of the square of the image under the template for each
+    placement of the center of the template on the image from the integral images.
+
+    Pixels of the template that fall outside of the image are treated as zeros, the same as in
+    :func:`_normalize_xcorr_2d`.
+
+    :param integrals: The integral images from :func:`_integral_images`
+    :param template_shape: The shape of the template
+    :return: The local sums of the image and of the square of the image, each the same shape as the image
+    """
+
+    integral, integral_squares = integrals
+
+    limits = []
+    for size, template_size in zip(np.array(integral.shape) - 1, template_shape):
+        # the last pixel (exclusive) under the template when its center is placed on each pixel
+        end = np.arange(size) + (template_size - 1) // 2 + 1
+        limits.append((np.clip(end - template_size, 0, size), np.clip(end, 0, size)))
+
+    (row_start, row_end), (col_start, col_end) = limits
+
+    local_sums = []
+    for table in (integral, integral_squares):
+        # difference the rows first and then the columns so that each gather is along a single axis
+        row_sums = table[row_end] - table[row_start]
+        local_sums.append(row_sums[:, col_end] - row_sums[:, col_start])
+
+    return local_sums[0], local_sums[1]
+
+
+def _local_inverse_std(integrals: Tuple[np.ndarray, np.ndarray], template_shape: Tuple[int, ...]) -> np.ndarray:
+    """
+    This function computes the inverse of the standard deviation of the image under the template (times the square
+    root of the number of pixels in the template) for each placement of the center of the template on the image from
+    the integral images.
+
+    Locations where the image has no variance under the template are set to 0 so that the correlation there is 0.
+
+    :param integrals: The integral images from :func:`_integral_images`
+    :param template_shape: The shape of the template
+    :return: The local inverse standard deviation of the image, the same shape as the image
+    """
+
+    local_means, local_sum_squares = _local_sums(integrals, template_shape)
+
+    # calculate the variance of the image under the template for the area overlaid under each image.  It will only
+    # be negative due to numerical precision issues so these locations are treated as having no variance
+    local_variance = local_sum_squares - local_means ** 2 / (template_shape[0] * template_shape[1])
+
+    positive = local_variance > 0
+
+    inverse_std = np.zeros_like(local_variance)
+    np.sqrt(local_variance, out=inverse_std, where=positive)
+    np.divide(1, inverse_std, out=inverse_std, where=positive)
+
+    return inverse_std
+
+
+def _fft_correlate_templates(image_spectrum: np.ndarray, inverse_std: np.ndarray, templates: np.ndarray,
+                             fft_shape: Tuple[int, int], workers: Optional[int] = None) -> np.ndarray:
+    """
+    This function computes the normalized cross correlation surfaces between a stack of templates of the same shape
+    and an image using the spectrum and local inverse standard deviation of the image.
+
+    The normalization follows :func:`_normalize_xcorr_2d` and the surfaces are the same as those returned by
+    :func:`fft_correlator_2d`.
+
+    :param image_spectrum: The real FFT of the image of shape ``fft_shape``
+    :param inverse_std: The local inverse standard deviation of the image for the template shape from
+                        :func:`_local_inverse_std`
+    :param templates: The templates as a n x rows x cols float64 array
+    :param fft_shape: The shape of the FFTs from :func:`_fft_correlation_shape`
+    :param workers: The number of workers to use to compute the FFTs (see :mod:`scipy.fft`)
+    :return: The normalized correlation surfaces as a n x image rows x image cols array
+    """
+
+    image_shape = inverse_std.shape
+
+    # use the zero mean templates to simplify the normalization.  The templates need to be flipped due to the
     # definition of correlation
+    zero_mean_temps = templates - templates.mean(axis=(1, 2), keepdims=True)
 
-    # use the zero mean template to simplify some steps later
-    zero_mean_temp = template - template.mean()
-    corr_surf = sig.fftconvolve(image, zero_mean_temp[::-1, ::-1], 'full')
-    # the preceding is mostly equivalent to the following but it does a better job of handling the shapes to make things
-    # faster
-    # fft_shape = np.array(image.shape)+np.array(template.shape)-1
-    # image_fft = np.fft.rfft2(image, s=fft_shape)
-    # template_fft = np.fft.rfft2(template[::-1, ::-1], s=fft_shape)
-    # corr_surf = np.fft.irfft2(image_fft*template_fft, s=fft_shape)
+    # transform along the rows first so that only the rows of the templates (and not the zero padding) are
+    # transformed.  This is the same as rfft2 with s=fft_shape
+    template_spectra = spfft.fft(spfft.rfft(zero_mean_temps[:, ::-1, ::-1], n=fft_shape[1], axis=-1, workers=workers),
+                                 n=fft_shape[0], axis=-2, workers=workers)
+    template_spectra *= image_spectrum
 
-    # this forms the un-normalized correlation surface.  Now we need to normalize:
-    res = _normalize_xcorr_2d(image, zero_mean_temp, corr_surf)
+    lower = (np.array(templates.shape[1:]) - 1) // 2
 
-    # get the output size for output type of "same"
-    diff = (np.array(res.shape) - np.array(image.shape)) / 2
+    # only keep the part of the full correlation that corresponds to the center of the template on the image
+    corr_surf = spfft.irfft2(template_spectra, s=fft_shape,
+                             workers=workers)[:, lower[0]:lower[0] + image_shape[0], lower[1]:lower[1] + image_shape[1]]
 
-    lower = np.floor(diff).astype(int)
-    upper = np.ceil(diff).astype(int)
+    # calculate the standard deviation of each template itself, ignoring templates with no variance (which will have a
+    # correlation of 0 everywhere)
+    temp_std = np.sqrt((zero_mean_temps ** 2).sum(axis=(1, 2))).reshape(-1, 1, 1)
+    temp_std[temp_std == 0] = np.inf
 
-    # return the correlation surface for type "same"
-    return res[lower[0]:-upper[0], lower[1]:-upper[1]]
+    # calculate the normalized correlation coefficients
+    res = corr_surf * inverse_std
+    res /= temp_std
+
+    # check to make sure that machine precision errors haven't given us any invalid answers
+    res[np.abs(res) > 1 + np.sqrt(np.finfo(np.float64).eps)] = 0
+
+    return res
+
+
+class FFTCorrelator2D:
+    """
+    A normalized cross correlation engine in the frequency domain that caches the spectra and integral images of the
+    images it correlates against.
+
+    This computes the same correlation surfaces as :func:`fft_correlator_2d`, but the real FFT of each image (for each
+    FFT size that is needed) and the integral images used to normalize the correlation are stored and reused when the
+    same image is correlated against again.  This makes correlating many templates against the same image (for
+    instance many surface features against one image, or a sequence of templates of one target) much cheaper since only
+    the template spectra and one inverse FFT need to be computed for each template.  Many templates can also be
+    correlated against an image in a single batched call using :meth:`correlate_batch`, which computes the FFTs of all
+    of the templates with the same shape at once.
+
+    Images are identified by the array object itself (not its contents), so the cache must be cleared using
+    :meth:`clear` if an image is modified in place between correlations.  The cache holds up to :attr:`max_entries`
+    images, discarding the least recently used image once this is exceeded.
+
+    Since instances are callable with an image and a template they can be used directly as the
+    :attr:`.ImageProcessing.correlator`
+
+        >>> from giant.image_processing import ImageProcessing, FFTCorrelator2D
+        >>> ip = ImageProcessing(correlator=FFTCorrelator2D())
+    """
+
+    def __init__(self, max_entries: int = 4, batch_size: int = 16, workers: Optional[int] = None):
+        """
+        :param max_entries: The maximum number of images to keep in the cache
+        :param batch_size: The maximum number of templates to transform at once in :meth:`correlate_batch`
+        :param workers: The number of workers to use to compute the FFTs (see :mod:`scipy.fft`).  ``None`` uses 1
+        :raises ValueError: If max_entries or batch_size is less than 1
+        """
+
+        if max_entries < 1:
+            raise ValueError("The cache must be able to hold at least 1 entry")
+
+        if batch_size < 1:
+            raise ValueError("The batch size must be at least 1")
+
+        self.max_entries: int = max_entries
+        """
+        The maximum number of images to keep in the cache.
+
+        Once the cache exceeds this size the least recently used images are discarded.
+        """
+
+        self.batch_size: int = batch_size
+        """
+        The maximum number of templates to transform at once in :meth:`correlate_batch`.
+
+        Larger batches make fewer calls to the FFT routines but need memory for ``batch_size`` correlation surfaces of
+        the FFT size at once.
+        """
+
+        self.workers: Optional[int] = workers
+        """
+        The number of workers to use to compute the FFTs (see :mod:`scipy.fft`).
+        """
+
+        self._entries: OrderedDict = OrderedDict()
+        """
+        The cached images.
+
+        The keys are the ids of the images and the values are dictionaries containing the image itself (to make sure
+        the id isn't reused while the entry exists), the integral images, the spectra of the image keyed by the FFT
+        shape, and the local inverse standard deviations of the image keyed by the template shape.
+        """
+
+    def __len__(self) -> int:
+        """
+        Returns the number of images currently stored in the cache
+        """
+
+        return len(self._entries)
+
+    def __call__(self, image: ARRAY_LIKE_2D, template: ARRAY_LIKE_2D) -> np.ndarray:
+        """
+        This performs normalized cross correlation between a template and an image, reusing the cached spectrum and
+        integral images of the image if it has been correlated against before.
+
+        :param image: The image that the template is to be matched against
+        :param template: the template that is to be matched against the image
+        :return: A surface of the correlation coefficients for each overlap between the template and the image.
+        """
+
+        return self.correlate_batch(image, [template])[0]
+
+    def clear(self):
+        """
+        Removes all images from the cache.
+        """
+
+        self._entries.clear()
+
+    def _get_entry(self, image: ARRAY_LIKE_2D) -> dict:
+        """
+        Returns the cache entry for an image, creating it if it doesn't already exist.
+
+        :param image: The image to get the entry for
+        :return: The cache entry for the image
+        """
+
+        key = id(image)
+
+        entry = self._entries.get(key)
+
+        if entry is None or entry['image'] is not image:
+            data = np.asarray(image, dtype=np.float64)
+
+            if data.ndim != 2:
+                raise ValueError('The image must be 2 dimensional')
+
+            entry = {'image': image, 'data': data, 'integrals': _integral_images(data), 'spectra': {},
+                     'inverse_stds': {}}
+
+            self._entries[key] = entry
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        else:
+            self._entries.move_to_end(key)
+
+        return entry
+
+    def correlate_batch(self, image: ARRAY_LIKE_2D, templates: Sequence[ARRAY_LIKE_2D]) -> List[np.ndarray]:
+        """
+        This performs normalized cross correlation between many templates and an image.
+
+        The templates can have different shapes.  Templates with the same shape are transformed together in batches of
+        up to :attr:`batch_size`, and the spectrum of the image for each FFT size that is needed is computed once and
+        cached along with the integral images of the image and the local standard deviation of the image for the
+        template shape.
+
+        Each surface is the same as would be returned by :func:`fft_correlator_2d` for the template.
+
+        :param image: The image that the templates are to be matched against
+        :param templates: The templates that are to be matched against the image
+        :return: A list of the correlation surfaces for each template in the same order as ``templates``
+        :raises ValueError: If the image or any of the templates is not 2 dimensional
+        """
+
+        entry = self._get_entry(image)
+
+        templates = [np.asarray(template, dtype=np.float64) for template in templates]
+
+        # group the templates by shape so they can be transformed together
+        groups = {}
+        for index, template in enumerate(templates):
+            if template.ndim != 2:
+                raise ValueError('The templates must be 2 dimensional')
+
+            groups.setdefault(template.shape, []).append(index)
+
+        surfaces = [None] * len(templates)
+
+        for template_shape, indices in groups.items():
+
+            fft_shape = _fft_correlation_shape(entry['data'].shape, template_shape)
+
+            image_spectrum = entry['spectra'].get(fft_shape)
+
+            if image_spectrum is None:
+                image_spectrum = spfft.rfft2(entry['data'], s=fft_shape, workers=self.workers)
+                entry['spectra'][fft_shape] = image_spectrum
+
+            inverse_std = entry['inverse_stds'].get(template_shape)
+
+            if inverse_std is None:
+                inverse_std = _local_inverse_std(entry['integrals'], template_shape)
+                entry['inverse_stds'][template_shape] = inverse_std
+
+            for start in range(0, len(indices), self.batch_size):
+                batch = indices[start:start + self.batch_size]
+
+                batch_surfaces = _fft_correlate_templates(image_spectrum, inverse_std,
+                                                          np.stack([templates[index] for index in batch]), fft_shape,
+                                                          workers=self.workers)
+
+                for index, surface in zip(batch, batch_surfaces):
+                    surfaces[index] = surface
+
+        return surfaces
+
+    def __getstate__(self) -> dict:
+        """
+        Used to control how this class is pickled/copied so that the cached images are not included
+        """
+
+        state = self.__dict__.copy()
+
+        state["_entries"] = OrderedDict()
+
+        return state
 
 
 def spatial_correlator_2d(image: np.ndarray, template: np.ndarray) -> np.ndarray:
@@ -979,7 +1315,8 @@ class ImageProcessing:
                  save_psf: bool = False, return_stats: bool = False, zernike_edge_width: float = 0.5,
                  otsu_levels: int = 2, minimum_segment_area: int = 10, minimum_segment_dn: Real = 200,
                  image_flattening_noise_approximation: ImageFlatteningNoiseApprox = ImageFlatteningNoiseApprox.GLOBAL,
-                 flattening_kernel_size: int = 7):
+                 flattening_kernel_size: int = 7, poi_tile_size: Optional[int] = None,
+                 poi_tile_overlap: Optional[int] = None, poi_num_threads: Optional[int] = None):
         """
         :param centroiding: A callable object which takes 3 positional arguments and estimates the centers of a ROI
         :param image_denoising: A callable object with takes an image as the first positional argument and returns the
@@ -1009,6 +1346,12 @@ class ImageProcessing:
         :param minimum_segment_area: The minimum area for a segment to be considered foreground instead of
                                      noise in pixels squared.
         :param image_flattening_noise_approximation: A
+        :param flattening_kernel_size: Half the size of the regions used when locally flattening an image
+        :param poi_tile_size: The size of the square tiles to split the image into when identifying points of interest
+                              or ``None`` to process the whole image at once
+        :param poi_tile_overlap: The number of extra pixels around each tile to process to handle points of interest on
+                                 the tile boundaries or ``None`` to choose automatically
+        :param poi_num_threads: The number of threads to use to process the tiles or ``None`` to use the number of CPUs
         """
 
         self.centroiding = centroiding  # type: PointSpreadFunction
@@ -1221,7 +1564,7 @@ class ImageProcessing:
         
         Generally global is sufficient for star identification purposes.  If you are trying to extract very dim stars 
         (or particles) then you may need to use the ``'LOCAL'`` option, which is much better for low SNR targets but 
-        much slower.
+        slower.
         
         This is used in :meth:`find_poi_in_roi` and :meth:`flatten_image_and_get_noise_level`
         """
@@ -1237,6 +1580,43 @@ class ImageProcessing:
         This is used in :meth:`flatten_image_and_get_noise_level`.
         """
 
+        self.poi_tile_size: Optional[int] = poi_tile_size
+        """
+        The size of the square tiles the image (or region of interest) is split into when identifying points of
+        interest.
+
+        If this is ``None`` then the whole image is processed at once.  Otherwise each tile (plus the
+        :attr:`poi_tile_overlap` border around it) is flattened, thresholded, and searched for points of interest
+        separately, with the tiles processed in parallel using :attr:`poi_num_threads` threads.  This bounds the memory
+        used to the size of the tiles, which allows very large images to be processed, including memory-mapped images
+        (for instance from ``numpy.load(file, mmap_mode='r')``) where only the tiles being processed are read from disk.
+
+        When using :attr:`.ImageFlatteningNoiseApprox.GLOBAL` flattening the noise level is estimated separately for
+        each tile.  When using :attr:`.ImageFlatteningNoiseApprox.LOCAL` flattening this is rounded up to a multiple of
+        the flattening region size so that the results are the same as processing the whole image at once.
+
+        This is used in :meth:`find_poi_in_roi`.
+        """
+
+        self.poi_tile_overlap: Optional[int] = poi_tile_overlap
+        """
+        The number of pixels around each tile that are also processed when identifying points of interest in tiles.
+
+        A point of interest is reported by the tile that contains its peak pixel, so the overlap should be large enough
+        to contain any point of interest that starts in the tile.  If this is ``None`` then it is set to
+        :attr:`poi_max_size` plus 2 pixels for the median filter used in flattening the image, which guarantees this.
+
+        This is ignored if :attr:`poi_tile_size` is ``None``.  This is used in :meth:`find_poi_in_roi`.
+        """
+
+        self.poi_num_threads: Optional[int] = poi_num_threads
+        """
+        The number of threads to use to process the tiles when identifying points of interest in tiles.
+
+        If this is ``None`` then the number of CPUs is used.  This is ignored if :attr:`poi_tile_size` is ``None``.  This
+        is used in :meth:`find_poi_in_roi`.
+        """
+
 
     def __repr__(self) -> str:
 
@@ -1388,92 +1768,125 @@ class ImageProcessing:
 
         return flat_image, standard_deviation
 
-    # TODO: This would probably be better as a cython function where we can do parallel processing
-    def _local_flat_image_and_noise(self, image) -> Tuple[np.ndarray, List[float], List[Tuple[slice, slice]]]:
-        """
+    def _local_flat_image_and_noise(self, image) -> Tuple[np.ndarray, np.ndarray]:
+        r"""
         This method flattens the image and approximates the noise over regions of the image.
 
         This is not intended by the user, instead use :meth:`flatten_image_and_get_noise_level`.
 
+        The image is split into square tiles of size ``2*flattening_kernel_size+1`` (the last row/column of tiles are
+        truncated at the edge of the image).  A plane is fit to each tile using least squares, where the required sums
+        for all of the tiles are computed at once from summed area tables (integral images) of the image and the image
+        weighted by the column and row coordinates.  Because the tiles are rectangular, in coordinates centered on each
+        tile the normal equations are diagonal so the plane coefficients are simply
+
+        .. math::
+            A = \frac{\sum I}{n} \qquad B = \frac{\sum \tilde{x}I}{\sum \tilde{x}^2} \qquad
+            C = \frac{\sum \tilde{y}I}{\sum \tilde{y}^2}
+
+        where :math:`\tilde{x}` and :math:`\tilde{y}` are the column and row relative to the center of the tile.  The
+        fit planes are subtracted from the image, and then the result is flattened further by subtracting a median
+        blurred copy of it.
+
+        The noise in each tile is then estimated as the standard deviation of the flattened tile after rejecting
+        outliers using the median absolute deviation (as in :func:`.get_outliers`), computed for all tiles at once.
+
         :param image: The image which is to be flattened and have noise levels estimated for
-        :return: The flattened image, a list of noise values for regions of the image, and a list of tuples of slices
-                 describing the regions of the image
+        :return: The flattened image and a noise map the same shape as the image giving the noise level of the tile
+                 each pixel belongs to
         """
 
-        # get the shape of the image
         img_shape = image.shape
 
-        # make sure that the image is double, also copy it to ensure that we don't mess up the original
-        flat_image = image.astype(np.float32).copy()
+        tile_size = 2 * self.flattening_kernel_size + 1
+
+        # the bounds of the tiles
+        row_starts = np.arange(0, img_shape[0], tile_size)
+        col_starts = np.arange(0, img_shape[1], tile_size)
+        row_stops = np.minimum(row_starts + tile_size, img_shape[0])
+        col_stops = np.minimum(col_starts + tile_size, img_shape[1])
 
-        # start the region center at the kernel size
-        current_row = self.flattening_kernel_size
-        current_col = self.flattening_kernel_size
+        # the center of each tile and the number of rows/columns in each tile
+        row_centers = (row_starts + row_stops - 1) / 2
+        col_centers = (col_starts + col_stops - 1) / 2
+        num_rows = (row_stops - row_starts).astype(np.float64)
+        num_cols = (col_stops - col_starts).astype(np.float64)
 
-        # initialize the lists for return
-        noises, slices = [], []
+        rows = np.arange(img_shape[0], dtype=np.float64).reshape(-1, 1)
+        cols = np.arange(img_shape[1], dtype=np.float64).reshape(1, -1)
 
-        # loop rows through until we've processed the whole image
-        while current_row < img_shape[0]:
-            # get the row bounds and slice
-            lower_row = current_row - self.flattening_kernel_size
-            upper_row = min(current_row + self.flattening_kernel_size + 1, img_shape[0])
-            row_slice = slice(lower_row, upper_row)
+        values = image.astype(np.float64)
 
-            # loop through columns until we've processed the whole image
-            while current_col < img_shape[1]:
-                # get the column bounds and slice
-                lower_column = current_col - self.flattening_kernel_size
-                upper_column = min(current_col + self.flattening_kernel_size + 1, img_shape[1])
-                column_slice = slice(lower_column, upper_column)
+        def tile_sums(data: np.ndarray) -> np.ndarray:
+            # compute the sum of data over each tile using a summed area table
+            table = np.zeros((img_shape[0] + 1, img_shape[1] + 1), dtype=np.float64)
+            np.cumsum(np.cumsum(data, axis=0), axis=1, out=table[1:, 1:])
 
-                # get the row/column labels that we are working with
-                rows, cols = np.mgrid[row_slice, column_slice]
+            return (table[row_stops.reshape(-1, 1), col_stops] - table[row_starts.reshape(-1, 1), col_stops] -
+                    table[row_stops.reshape(-1, 1), col_starts] + table[row_starts.reshape(-1, 1), col_starts])
 
-                # get the region from the original image we are editing
-                region = image[row_slice, column_slice].astype(np.float32)
+        sum_values = tile_sums(values)
+        sum_col_values = tile_sums(cols * values)
+        sum_row_values = tile_sums(rows * values)
 
-                # compute the background of the region using least squares [1, x, y] @ [A, B, C] = bg
-                h_matrix = np.vstack([np.ones(rows.size), cols.ravel(), rows.ravel()]).T.astype(np.float32)
-                background = np.linalg.lstsq(h_matrix, region.ravel(), rcond=None)[0].ravel()
+        # the sums over the tiles of 1, x~^2, and y~^2 are known for rectangles
+        num_pix = num_rows.reshape(-1, 1) * num_cols
+        sum_col_sq = num_rows.reshape(-1, 1) * (num_cols * (num_cols ** 2 - 1) / 12)
+        sum_row_sq = (num_rows * (num_rows ** 2 - 1) / 12).reshape(-1, 1) * num_cols
 
-                # flatten the region by subtracting the linear background approximation
-                flat_image[row_slice, column_slice] -= (h_matrix@background.reshape(3, 1)).reshape(region.shape)
+        # compute the background plane for each tile in centered coordinates [1, x~, y~] @ [A, B, C] = bg
+        offset = sum_values / num_pix
 
-                # store the slices
-                slices.append((row_slice, column_slice))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            col_slope = np.where(sum_col_sq > 0,
+                                 (sum_col_values - col_centers * sum_values) / sum_col_sq, 0)
+            row_slope = np.where(sum_row_sq > 0,
+                                 (sum_row_values - row_centers.reshape(-1, 1) * sum_values) / sum_row_sq, 0)
 
-                # update the current column we're centered on
-                current_col += 2 * self.flattening_kernel_size + 1
+        # map each pixel to its tile
+        tile_rows = np.arange(img_shape[0]) // tile_size
+        tile_cols = np.arange(img_shape[1]) // tile_size
 
-            # update the current row/column we're centered on
-            current_row += 2 * self.flattening_kernel_size + 1
-            current_col = self.flattening_kernel_size
+        # flatten the image by subtracting the linear background approximation from each tile
+        background = (offset[tile_rows][:, tile_cols] +
+                      col_slope[tile_rows][:, tile_cols] * (cols - col_centers[tile_cols]) +
+                      row_slope[tile_rows][:, tile_cols] * (rows - row_centers[tile_rows].reshape(-1, 1)))
+
+        flat_image = (values - background).astype(np.float32)
 
         # make sure we're extra flat by flattening the flat image with a median blur.
         flat_image: np.ndarray = (flat_image - cv2.medianBlur(flat_image.copy(), 5))
 
-        for local_slice in slices:
-            region = flat_image[local_slice[0], local_slice[1]].ravel()
-            selections = np.random.choice(np.arange(int(region.size)), int(region.size//2), replace=False)
+        # gather the tiles into a (tile row, tile column, pixel) array, padding the partial tiles with NaN
+        padded = np.full((row_starts.size * tile_size, col_starts.size * tile_size), np.nan, dtype=np.float64)
+        padded[:img_shape[0], :img_shape[1]] = flat_image
+
+        tiles = padded.reshape(row_starts.size, tile_size, col_starts.size, tile_size).swapaxes(1, 2).reshape(
+            row_starts.size, col_starts.size, -1
+        )
 
-            selected_region: np.ndarray = region[selections]
+        valid = np.isfinite(tiles)
 
-            outliers = get_outliers(selected_region)
+        # reject outliers in each tile using the median absolute deviation
+        median_distances = np.abs(tiles - np.nanmedian(tiles, axis=-1, keepdims=True))
+        median_distance = np.nanmedian(median_distances, axis=-1, keepdims=True)
 
-            if outliers.sum() > selections.size//2:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            median_sigmas = np.where(median_distance > 0, 1.4826 * median_distances / median_distance,
+                                     median_distances / np.nanmean(median_distances, axis=-1, keepdims=True))
 
-                local_std: float = selected_region.std()
-            else:
-                local_std: float = selected_region[~outliers].std()
+        inliers = valid & ~(median_sigmas >= 4)
 
-            noises.append(local_std)
+        # if most of the tile is outliers then just use the whole tile
+        use_all = (valid.sum(axis=-1) - inliers.sum(axis=-1)) > (valid.sum(axis=-1) // 2)
+        inliers[use_all] = valid[use_all]
 
-        return flat_image, noises, slices
+        noises = np.sqrt(np.nanvar(np.where(inliers, tiles, np.nan), axis=-1))
+
+        return flat_image, noises[tile_rows][:, tile_cols]
 
     def flatten_image_and_get_noise_level(self, image: np.ndarray) -> Union[Tuple[np.ndarray, float],
-                                                                            Tuple[np.ndarray, List[float],
-                                                                                  List[Tuple[slice, slice]]]]:
+                                                                            Tuple[np.ndarray, np.ndarray]]:
         """
         This method is used to sample the noise level of an image, as well as return a flattened version of the image.
 
@@ -1491,17 +1904,17 @@ class ImageProcessing:
         For each region, a linear background gradient is estimated and subtracted from the region.  The global flattened
         image is then flattened further by subtracting off a median filtered copy of the flattened image.
 
-        The standard deviation of the noise level is then computed for each region by sampling about half of the points
-        in the flattened region and computing the standard deviation of the flattened intensity values.  In this case
-        3 values are returned, the flattened image, the list of noise values for each region, and a list of slices
-        defining the regions that were processed.
+        The standard deviation of the noise level is then computed for each region by computing the standard deviation
+        of the flattened intensity values in the region after rejecting outliers.  In this case the noise level is
+        returned as a noise map, which is the same shape as the image and gives the noise level of the region each pixel
+        belongs to.
 
         This method is used by :meth:`locate_subpixel_poi_in_roi` in order to make the point of interest identification
         easier.
 
         :param image: The image to be flattened and have the noise level estimated for
-        :return: The flattened image and the noise level as a tuple, or the flattened image, the noise levels as a list,
-                 and a list of slices of tuples specifying the regions of the image the noise levels apply to.
+        :return: The flattened image and the noise level as a tuple, or the flattened image and the noise map as a
+                 tuple.
         """
 
         if self.image_flattening_noise_approximation == ImageFlatteningNoiseApprox.GLOBAL:
@@ -1574,6 +1987,13 @@ class ImageProcessing:
         #ga107a78bf7cd25dec05fb4dfc5c9e765f>`_
         for details) and the peak signal to noise ratio for each detection.
 
+        If :attr:`poi_tile_size` is not ``None`` then the image is processed in square tiles (with an overlapping border
+        of :attr:`poi_tile_overlap` pixels) in parallel using :attr:`poi_num_threads` threads.  Each point of interest is
+        reported by the tile that contains its peak pixel and the results are returned in the same order as when the
+        whole image is processed at once.  This limits the memory required for very large images, and allows
+        memory-mapped images to be processed without reading the full image into memory.  In this case the region of
+        interest is treated as the rectangle bounding ``region``.
+
         :param image: The image being considered
         :param region: The region of the image to consider
         :return: the pixel level locations of the points of interest in the region of interest (row, col).  Optionally
@@ -1586,71 +2006,179 @@ class ImageProcessing:
         if region is not None:
             roi_start = [np.min(region[1]), np.min(region[0])]
 
-            big_roi = image[tuple(region)]
+            if self.poi_tile_size is None:
+                big_roi = image[tuple(region)]
+
+            else:
+                # only slice so that memory mapped images are not read in full
+                big_roi = image[roi_start[1]:np.max(region[0]) + 1, roi_start[0]:np.max(region[1]) + 1]
 
         else:
             roi_start = [0, 0]
 
             big_roi = image
 
+        saturation = getattr(image, 'saturation', None) if self.reject_saturation else None
+
+        # determine the tiles to process as (row start, row stop, column start, column stop) for the tile itself and
+        # the window around it which is processed
+        if self.poi_tile_size is None:
+            cores = [(0, big_roi.shape[0], 0, big_roi.shape[1])]
+            windows = cores
+
+        else:
+            tile_size, overlap = self._poi_tile_size_and_overlap()
+
+            cores = [(row, min(row + tile_size, big_roi.shape[0]), col, min(col + tile_size, big_roi.shape[1]))
+                     for row in range(0, big_roi.shape[0], tile_size) for col in range(0, big_roi.shape[1], tile_size)]
+
+            windows = [(max(row_start - overlap, 0), min(row_stop + overlap, big_roi.shape[0]),
+                        max(col_start - overlap, 0), min(col_stop + overlap, big_roi.shape[1]))
+                       for row_start, row_stop, col_start, col_stop in cores]
+
+        def process(tile: Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]) -> Tuple[np.ndarray, ...]:
+            return self._find_poi_in_tile(big_roi, tile[0], tile[1], saturation)
+
+        if len(cores) == 1:
+            results = [process((cores[0], windows[0]))]
+        else:
+            num_threads = self.poi_num_threads if self.poi_num_threads is not None else (os.cpu_count() or 1)
+
+            with ThreadPoolExecutor(max_workers=max(min(num_threads, len(cores)), 1)) as executor:
+                results = list(executor.map(process, zip(cores, windows)))
+
+        # put the points of interest in the order that a single connected components pass over the image would find them
+        first_pixels, subs, stats, snrs = (np.concatenate(result) for result in zip(*results))
+
+        order = np.argsort(first_pixels, kind='stable')
+
+        poi_subs = list(subs[order] + np.asarray(roi_start, dtype=subs.dtype))
+
+        if self.return_stats:
+            return poi_subs, list(stats[order]), list(snrs[order])
+        else:
+            return poi_subs
+
+    def _poi_tile_size_and_overlap(self) -> Tuple[int, int]:
+        """
+        This determines the size of the tiles and the overlap between tiles to use when identifying points of interest
+        in tiles.
+
+        When locally flattening the image both are rounded up to a multiple of the flattening region size so that the
+        flattening regions line up with the regions used when processing the whole image at once.
+
+        :return: The tile size and the tile overlap in pixels
+        """
+
+        tile_size = max(int(self.poi_tile_size), 1)
+
+        if self.poi_tile_overlap is None:
+            overlap = int(self.poi_max_size) + 2
+        else:
+            overlap = max(int(self.poi_tile_overlap), 0)
+
+        if self.image_flattening_noise_approximation == ImageFlatteningNoiseApprox.LOCAL:
+            region_size = 2 * self.flattening_kernel_size + 1
+
+            tile_size = -(-tile_size // region_size) * region_size
+            overlap = max(-(-overlap // region_size), 1) * region_size
+
+        return tile_size, overlap
+
+    def _find_poi_in_tile(self, image: np.ndarray, core: Tuple[int, int, int, int], window: Tuple[int, int, int, int],
+                          saturation: Optional[Real]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        This identifies the points of interest whose peak pixel is within a tile of an image.
+
+        This is not intended to be used by the user, instead use :meth:`find_poi_in_roi`.
+
+        The window around the tile is flattened, thresholded, and grouped using connected components.  The peak
+        location, peak SNR, and saturation flag for each blob are then computed at once from the label image.
+
+        :param image: The image (or region of interest) being considered
+        :param core: The bounds of the tile as (row start, row stop, column start, column stop)
+        :param window: The bounds of the window around the tile to process as (row start, row stop, column start,
+                       column stop)
+        :param saturation: The saturation level to reject blobs at, or ``None`` to not reject saturated blobs
+        :return: The index of the first pixel of each blob in raster order, the location of the peak of each blob as
+                 an nx2 array of (col, row), the connected components stats for each blob as an nx5 array, and the peak
+                 SNR of each blob, all with respect to the upper left corner of ``image``
+        """
+
+        tile = image[window[0]:window[1], window[2]:window[3]]
+
         # get the flat image and approximate noise level(s) in the image
         if self.image_flattening_noise_approximation == ImageFlatteningNoiseApprox.GLOBAL:
-            roi, standard_deviation = self.flatten_image_and_get_noise_level(big_roi)
+            roi, standard_deviation = self.flatten_image_and_get_noise_level(tile)
 
             # detect pixels of interest by thresholding the flattened image at some multiple of the noise level
             snr = roi / standard_deviation
         else:
             # if we're doing local flattening and noise estimation
-            roi, noise_estimates, slices = self.flatten_image_and_get_noise_level(big_roi)
+            roi, noise_map = self.flatten_image_and_get_noise_level(tile)
 
-            # detect pixels of interest by thresholding the flattened image at some multiple of the noise level
-            snr = np.zeros(big_roi.shape, dtype=np.float64)
+            # detect pixels of interest by thresholding the flattened image at some multiple of the noise level,
+            # ignoring regions where there isn't any noise
+            snr = np.zeros(roi.shape, dtype=np.float64)
 
-            # for each region, compute the "snr" for each detection
-            for noise, slices in zip(noise_estimates, slices):
-                if noise < 1e-6:
-                    continue
-                flat_sliced = roi[slices[0], slices[1]]
-                snr[slices[0], slices[1]] = flat_sliced / noise
+            noisy = noise_map >= 1e-6
+            snr[noisy] = roi[noisy] / noise_map[noisy]
 
         interesting_pix = snr > self.poi_threshold
 
         # use connected components to blob the pixels together into single objects
-        _, __, stats, ___ = cv2.connectedComponentsWithStats(interesting_pix.astype(np.uint8))
+        _, labels, stats, __ = cv2.connectedComponentsWithStats(interesting_pix.astype(np.uint8))
 
-        poi_subs = []
-        out_stats = []
-        out_snrs = []
+        # only consider blobs of the right size (label 0 is the background)
+        keep = (stats[:, -1] >= self.poi_min_size) & (stats[:, -1] <= self.poi_max_size)
+        keep[0] = False
 
-        # loop through each grouping of pixels
-        for blob in stats:
+        pixel_mask = keep[labels]
 
-            if self.poi_max_size >= blob[-1] >= self.poi_min_size:
+        # the pixels in each blob, in raster order
+        pixel_indices = np.flatnonzero(pixel_mask)
+        pixel_labels = labels.ravel()[pixel_indices]
 
-                # if we want to reject blobs that are affected by saturation
-                if self.reject_saturation and hasattr(image, 'saturation'):
+        blob_labels, blob_starts = np.unique(pixel_labels, return_index=True)
 
-                    # ignore blobs where a portion of the blob is saturated
-                    if (big_roi[blob[1]:blob[1] + blob[3], blob[0]:blob[0] + blob[2]] >= image.saturation).any():
-                        continue
+        # get the maximum illumination value within each blob, taking the first one in raster order for ties
+        by_peak = np.lexsort((-roi.ravel()[pixel_indices], pixel_labels))
+        peak_indices = pixel_indices[by_peak[np.searchsorted(pixel_labels[by_peak], blob_labels)]]
 
-                # get the subscript to the maximum illumination value within the current component and append it to the
-                # return list
-                poi_roi = roi[blob[1]:blob[1] + blob[3],
-                              blob[0]:blob[0] + blob[2]]
+        peak_rows, peak_cols = np.divmod(peak_indices, roi.shape[1])
 
-                # get the x/y location by unraveling the index (and reversing the order
-                local_subs = np.unravel_index(np.nanargmax(poi_roi), poi_roi.shape)[::-1]  # type: np.ndarray
-                # store the results translated back to the full image and the statistics
-                poi_subs.append(local_subs + blob[[0, 1]] + roi_start)
-                out_stats.append(blob)
-                out_snrs.append(snr[blob[1]:blob[1] + blob[3],
-                                    blob[0]:blob[0] + blob[2]].max())
+        # group the pixels by blob for the reductions
+        by_blob = np.argsort(pixel_labels, kind='stable')
+        group_starts = np.searchsorted(pixel_labels[by_blob], blob_labels)
 
-        if self.return_stats:
-            return poi_subs, out_stats, out_snrs
+        if pixel_indices.size:
+            peak_snrs = np.maximum.reduceat(snr.ravel()[pixel_indices][by_blob], group_starts)
         else:
-            return poi_subs
+            peak_snrs = np.zeros(0, dtype=np.float64)
+
+        # only keep blobs whose peak is in the tile itself
+        valid = ((peak_rows >= core[0] - window[0]) & (peak_rows < core[1] - window[0]) &
+                 (peak_cols >= core[2] - window[2]) & (peak_cols < core[3] - window[2]))
+
+        # ignore blobs where a portion of the blob is saturated
+        if (saturation is not None) and pixel_indices.size:
+            saturated = np.logical_or.reduceat(np.asarray(tile).ravel()[pixel_indices][by_blob] >= saturation,
+                                               group_starts)
+
+            valid &= ~saturated
+
+        # translate everything back to the full image
+        first_rows, first_cols = np.divmod(pixel_indices[blob_starts[valid]], roi.shape[1])
+
+        first_pixels = (first_rows + window[0]) * image.shape[1] + first_cols + window[2]
+
+        subs = np.stack([peak_cols[valid] + window[2], peak_rows[valid] + window[0]], axis=-1)
+
+        blob_stats = stats[blob_labels[valid]]
+        blob_stats[:, 0] += window[2]
+        blob_stats[:, 1] += window[0]
+
+        return first_pixels, subs, blob_stats, peak_snrs[valid]
 
     def refine_locations(self, image: np.ndarray, image_subs: Iterable[np.ndarray],
                          stats: Optional[List[np.ndarray]] = None,
@@ -1675,6 +2203,12 @@ class ImageProcessing:
         the centroid was fit to and then full centroid fit can be returned if ``stats`` and ``snrs`` are not
         None and :attr:`.save_psf` is set to True, respectively.
 
+        If the centroiding algorithm also provides a ``fit_batch`` method (like the PSF classes in
+        :mod:`.point_spread_functions`, see :meth:`.PointSpreadFunction.fit_batch`) then all of the points of interest
+        whose full centroiding area is contained in the image are fit together in a single vectorized call, which is
+        much faster than fitting them one at a time when there are many points of interest.  Points of interest near the
+        edge of the image are still fit individually using ``fit``.
+
         Note that if a centroid fit is unsuccessful then no information is returned for that point.  Therefore the
         output arrays lengths will be less than or equal to the length of the input array.
 
@@ -1697,53 +2231,71 @@ class ImageProcessing:
         out_stats = []
         out_snrs = []
 
+        centers = [np.asarray(center) for center in image_subs]
+
+        # the centroid fit for each point of interest as (x0, y0, psf)
+        fits = [None] * len(centers)
+
+        offsets = np.arange(-self.centroid_size, self.centroid_size + 1)
+
+        # fit all of the points of interest whose sampled area is fully contained in the image at once if we can
+        if hasattr(self.centroiding, 'fit_batch') and centers:
+            center_array = np.array(centers).reshape(len(centers), -1)
+
+            if np.issubdtype(center_array.dtype, np.integer):
+                interior = np.flatnonzero((center_array[:, :2] >= self.centroid_size).all(axis=-1) &
+                                          (center_array[:, 0] <= image.shape[1] - 1 - self.centroid_size) &
+                                          (center_array[:, 1] <= image.shape[0] - 1 - self.centroid_size))
+
+                if interior.size:
+                    cols = center_array[interior, 0, None, None] + offsets.reshape(1, 1, -1)
+                    rows = center_array[interior, 1, None, None] + offsets.reshape(1, -1, 1)
+                    cols, rows = np.broadcast_arrays(cols, rows)
+
+                    batch = self.centroiding.fit_batch(cols, rows, image[rows, cols].astype(np.float64),
+                                                       return_psfs=self.save_psf)
+
+                    for bind, ind in enumerate(interior):
+                        fits[ind] = (batch.centroids[bind, 0], batch.centroids[bind, 1],
+                                     batch.psfs[bind] if batch.psfs is not None else None)
+
         # loop through the pixel level points of interest
-        for ind, center in enumerate(image_subs):
+        for ind, center in enumerate(centers):
 
-            column_array = np.arange(center[0] - self.centroid_size,
-                                     center[0] + self.centroid_size + 1)
-            row_array = np.arange(center[1] - self.centroid_size,
-                                  center[1] + self.centroid_size + 1)
-            col_check = (column_array >= 0) & (column_array <= image.shape[1] - 1)
-            row_check = (row_array >= 0) & (row_array <= image.shape[0] - 1)
-            # valid_check = col_check & row_check
-            cols, rows = np.meshgrid(column_array[col_check],
-                                     row_array[row_check])
+            if fits[ind] is None:
+                column_array = center[0] + offsets
+                row_array = center[1] + offsets
+                col_check = (column_array >= 0) & (column_array <= image.shape[1] - 1)
+                row_check = (row_array >= 0) & (row_array <= image.shape[0] - 1)
+                cols, rows = np.meshgrid(column_array[col_check],
+                                         row_array[row_check])
 
-            # if col_check and row_check:
-            if cols.size >= 0.5*(2*self.centroid_size + 1)**2:
+                if cols.size < 0.5*(2*self.centroid_size + 1)**2:
+                    continue
 
                 sampled_image = image[rows, cols].astype(np.float64)
 
                 # perform the fit
-                # if self.save_psf:
-                #     [x0, y0], psf, rss = self.centroiding(cols,
-                #                                           rows,
-                #                                           sampled_image,
-                #                                           save_psf=self.save_psf)
-                # else:
-                #     x0, y0 = self.centroiding(cols,
-                #                               rows,
-                #                               sampled_image,
-                #                               save_psf=self.save_psf)
-
                 psf = self.centroiding.fit(cols, rows, sampled_image)
 
                 x0, y0 = psf.centroid
 
-                # if we're outside the image or the fit failed skip this one
-                if (x0 < 0) or (y0 < 0) or (np.isnan((x0, y0)).any()):
-                    continue
+            else:
+                x0, y0, psf = fits[ind]
+
+            # if we're outside the image or the fit failed skip this one
+            if (x0 < 0) or (y0 < 0) or (np.isnan((x0, y0)).any()):
+                continue
 
-                # check to be sure we haven't deviated too far from the original peak of interest (avoid poorly
-                # conditioned systems)
-                if (np.abs(np.asarray(center) - np.asarray([x0, y0]).flatten()) <= 3).all():
-                    star_points.append([x0, y0])
-                    star_illums.append(image[tuple(center[::-1])])
-                    star_psfs.append(psf)
-                    if stats is not None:
-                        out_stats.append(stats[ind])
-                        out_snrs.append(snrs[ind])
+            # check to be sure we haven't deviated too far from the original peak of interest (avoid poorly
+            # conditioned systems)
+            if (np.abs(center - np.asarray([x0, y0]).flatten()) <= 3).all():
+                star_points.append([x0, y0])
+                star_illums.append(image[tuple(center[::-1])])
+                star_psfs.append(psf)
+                if stats is not None:
+                    out_stats.append(stats[ind])
+                    out_snrs.append(snrs[ind])
 
         # determine which form the output should take
         if self.save_psf:
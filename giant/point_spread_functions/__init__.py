@@ -31,7 +31,7 @@ from .psf_meta import (PointSpreadFunction, SizedPSF,
                        InitialGuessIterativeNonlinearLSTSQPSF,
                        InitialGuessIterativeNonlinearLSTSQPSFwBackground,
                        IterativeNonlinearLSTSQwBackground,
-                       IterativeNonlinearLSTSQPSF, KernelBasedCallPSF, KernelBasedApply1DPSF)
+                       IterativeNonlinearLSTSQPSF, KernelBasedCallPSF, KernelBasedApply1DPSF, PSFBatchFit)
 
 from .gaussians import (Gaussian, GeneralizedGaussian, IterativeGaussian, IterativeGeneralizedGaussian,
                         IterativeGaussianWBackground, IterativeGeneralizedGaussianWBackground)
@@ -43,4 +43,4 @@ __all__ = ['PointSpreadFunction', 'SizedPSF', 'InitialGuessIterativeNonlinearLST
            'InitialGuessIterativeNonlinearLSTSQPSFwBackground', 'IterativeNonlinearLSTSQwBackground',
            'IterativeNonlinearLSTSQPSF', 'KernelBasedCallPSF', 'KernelBasedApply1DPSF', 'Gaussian',
            'GeneralizedGaussian', 'IterativeGaussian', 'IterativeGeneralizedGaussianWBackground',
-           'IterativeGeneralizedGaussian', 'IterativeGaussianWBackground', 'Moment']
+           'IterativeGeneralizedGaussian', 'IterativeGaussianWBackground', 'Moment', 'PSFBatchFit']
@@ -24,7 +24,8 @@ import cv2
 
 from .psf_meta import (KernelBasedApply1DPSF, KernelBasedCallPSF,
                        InitialGuessIterativeNonlinearLSTSQPSF, SizedPSF,
-                       InitialGuessIterativeNonlinearLSTSQPSFwBackground)
+                       InitialGuessIterativeNonlinearLSTSQPSFwBackground, PSFBatchFit, _stack_stamps, _batch_lstsq,
+                       _batch_fit_results)
 
 from .._typing import ARRAY_LIKE, Real, NONEARRAY
 
@@ -389,6 +390,134 @@ class Gaussian(_GaussianSkeleton):
 
         return out
 
+    @classmethod
+    def fit_batch(cls, x: ARRAY_LIKE, y: ARRAY_LIKE, z: ARRAY_LIKE, return_psfs: bool = False) -> PSFBatchFit:
+        r"""
+        This fits a 2d gaussian function to each sub-image in a stack using least squares estimation.
+
+        This is the vectorized version of :meth:`fit`, which performs the logarithmic transformation fit for all of the
+        sub-images at once.  The state vectors of the results are in the order
+        :math:`[x_0, y_0, \sigma_x, \sigma_y, A]`.
+
+        :param x: The x values underlying each sub-image as a nxkxk or nxp array
+        :param y: The y values underlying each sub-image as a nxkxk or nxp array
+        :param z: The z or "height" values of each sub-image as a nxkxk or nxp array
+        :param return_psfs: A flag specifying whether to return the fit PSF objects as well
+        :return: The results of the fits
+        """
+
+        x, y, z, _ = _stack_stamps(x, y, z)
+
+        states = cls._fit_states_batch(x, y, z)
+
+        states[cls._invalid_states(states)] = np.nan
+
+        computed = cls._evaluate_batch(states, x, y)
+
+        return _batch_fit_results(cls, cls._from_state, states, z - computed,
+                                  cls._jacobian_batch(states, x, y, computed), return_psfs)
+
+    @staticmethod
+    def _fit_states_batch(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+        r"""
+        This performs the logarithmic transformation fit for a stack of sub-images at once, returning the states.
+
+        The fit for each sub-image is done in coordinates relative to the mean x and y of the sub-image to keep the
+        problem well conditioned.  Fits that are unsuccessful are returned as NaN.
+
+        :param x: The x values underlying each sub-image as a nxp array
+        :param y: The y values underlying each sub-image as a nxp array
+        :param z: The values of each sub-image as a nxp array
+        :return: The states :math:`[x_0, y_0, \sigma_x, \sigma_y, A]` as a nx5 array
+        """
+
+        x_offset = x.mean(axis=-1, keepdims=True)
+        y_offset = y.mean(axis=-1, keepdims=True)
+
+        delta_x = x - x_offset
+        delta_y = y - y_offset
+
+        coefficients = np.stack([delta_x ** 2, delta_x, delta_y ** 2, delta_y, np.ones(x.shape)], axis=-1)
+
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            solution = _batch_lstsq(coefficients, np.log(z))
+
+            sigma_x = np.sqrt(-1 / (2 * solution[:, 0]))
+            sigma_y = np.sqrt(-1 / (2 * solution[:, 2]))
+
+            x0 = solution[:, 1] * sigma_x ** 2
+            y0 = solution[:, 3] * sigma_y ** 2
+
+            amplitude = np.exp(solution[:, 4] + x0 ** 2 / (2 * sigma_x ** 2) + y0 ** 2 / (2 * sigma_y ** 2))
+
+        states = np.stack([x0 + x_offset[:, 0], y0 + y_offset[:, 0], sigma_x, sigma_y, amplitude], axis=-1)
+
+        states[~np.isfinite(states).all(axis=-1)] = np.nan
+
+        return states
+
+    @staticmethod
+    def _evaluate_batch(states: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        r"""
+        This evaluates the PSF for a stack of states.
+
+        :param states: The states :math:`[x_0, y_0, \sigma_x, \sigma_y, A]` as a nx5 array
+        :param x: The x values to evaluate at as a nxp array
+        :param y: The y values to evaluate at as a nxp array
+        :return: The PSF evaluated for each state at the corresponding x and y values as a nxp array
+        """
+
+        return states[:, 4:5] * np.exp(-(x - states[:, 0:1]) ** 2 / (2 * states[:, 2:3] ** 2) -
+                                       (y - states[:, 1:2]) ** 2 / (2 * states[:, 3:4] ** 2))
+
+    @staticmethod
+    def _jacobian_batch(states: np.ndarray, x: np.ndarray, y: np.ndarray, computed: np.ndarray) -> np.ndarray:
+        r"""
+        This computes the Jacobian of the PSF with respect to a change in the state for a stack of states.
+
+        This is the vectorized version of :meth:`compute_jacobian`.
+
+        :param states: The states :math:`[x_0, y_0, \sigma_x, \sigma_y, A]` as a nx5 array
+        :param x: The x values to evaluate at as a nxp array
+        :param y: The y values to evaluate at as a nxp array
+        :param computed: The PSF evaluated at x and y as a nxp array
+        :return: The Jacobian matrices as a nxpx5 array
+        """
+
+        delta_x = x - states[:, 0:1]
+        delta_y = y - states[:, 1:2]
+
+        sigma_x = states[:, 2:3]
+        sigma_y = states[:, 3:4]
+
+        return np.stack([computed * delta_x / sigma_x ** 2,
+                         computed * delta_y / sigma_y ** 2,
+                         computed * delta_x ** 2 / sigma_x ** 3,
+                         computed * delta_y ** 2 / sigma_y ** 3,
+                         computed / states[:, 4:5]], axis=-1)
+
+    @staticmethod
+    def _invalid_states(states: np.ndarray) -> np.ndarray:
+        """
+        This identifies fit states that are not valid (negative widths).
+
+        :param states: The states as a nxm array
+        :return: A boolean array which is ``True`` for invalid states
+        """
+
+        return (states[:, 2] < 0) | (states[:, 3] < 0)
+
+    @classmethod
+    def _from_state(cls, state: np.ndarray) -> 'Gaussian':
+        r"""
+        This creates an instance of the class from a state vector.
+
+        :param state: The state :math:`[x_0, y_0, \sigma_x, \sigma_y, A]` as a length 5 array
+        :return: The initialized PSF
+        """
+
+        return cls(sigma_x=state[2], sigma_y=state[3], amplitude=state[4], centroid_x=state[0], centroid_y=state[1])
+
     def compute_jacobian(self, x: np.ndarray, y: np.ndarray, computed: np.ndarray):
         r"""
         This method computes the Jacobian of the PSF with respect to a change in the state.
@@ -540,6 +669,25 @@ class IterativeGaussian(Gaussian, InitialGuessIterativeNonlinearLSTSQPSF):
 
         return out
 
+    @classmethod
+    def fit_batch(cls, x: ARRAY_LIKE, y: ARRAY_LIKE, z: ARRAY_LIKE, return_psfs: bool = False) -> PSFBatchFit:
+        r"""
+        This fits a 2d gaussian function to each sub-image in a stack using iterative non-linear least squares
+        estimation.
+
+        This is the vectorized version of :meth:`fit`, which fits all of the sub-images at once using
+        :meth:`.fit_lstsq_batch`.  The state vectors of the results are in the order
+        :math:`[x_0, y_0, \sigma_x, \sigma_y, A]`.
+
+        :param x: The x values underlying each sub-image as a nxkxk or nxp array
+        :param y: The y values underlying each sub-image as a nxkxk or nxp array
+        :param z: The z or "height" values of each sub-image as a nxkxk or nxp array
+        :param return_psfs: A flag specifying whether to return the fit PSF objects as well
+        :return: The results of the fits
+        """
+
+        return cls.fit_lstsq_batch(x, y, z, return_psfs=return_psfs)
+
 
 class IterativeGaussianWBackground(Gaussian, InitialGuessIterativeNonlinearLSTSQPSFwBackground):
     r"""
@@ -621,6 +769,25 @@ class IterativeGaussianWBackground(Gaussian, InitialGuessIterativeNonlinearLSTSQ
 
         return out
 
+    @classmethod
+    def fit_batch(cls, x: ARRAY_LIKE, y: ARRAY_LIKE, z: ARRAY_LIKE, return_psfs: bool = False) -> PSFBatchFit:
+        r"""
+        This fits a 2d gaussian function plus a background gradient to each sub-image in a stack using iterative
+        non-linear least squares estimation.
+
+        This is the vectorized version of :meth:`fit`, which fits all of the sub-images at once using
+        :meth:`.fit_lstsq_batch`.  The state vectors of the results are in the order
+        :math:`[x_0, y_0, \sigma_x, \sigma_y, A, B, C, D]`.
+
+        :param x: The x values underlying each sub-image as a nxkxk or nxp array
+        :param y: The y values underlying each sub-image as a nxkxk or nxp array
+        :param z: The z or "height" values of each sub-image as a nxkxk or nxp array
+        :param return_psfs: A flag specifying whether to return the fit PSF objects as well
+        :return: The results of the fits
+        """
+
+        return cls.fit_lstsq_batch(x, y, z, return_psfs=return_psfs)
+
     def update_state(self, update: NONEARRAY) -> None:
         r"""
         Updates the current values based on the provided update vector.
@@ -908,6 +1075,145 @@ class GeneralizedGaussian(KernelBasedCallPSF, _GaussianSkeleton):
 
         return out
 
+    @classmethod
+    def fit_batch(cls, x: ARRAY_LIKE, y: ARRAY_LIKE, z: ARRAY_LIKE, return_psfs: bool = False) -> PSFBatchFit:
+        """
+        This fits a generalized (rotated) 2d gaussian function to each sub-image in a stack using least squares
+        estimation.
+
+        This is the vectorized version of :meth:`fit`, which performs the logarithmic transformation fit for all of the
+        sub-images at once.  The state vectors of the results are in the order :math:`[x_0, y_0, a, b, c, A]`.
+
+        :param x: The x values underlying each sub-image as a nxkxk or nxp array
+        :param y: The y values underlying each sub-image as a nxkxk or nxp array
+        :param z: The z or "height" values of each sub-image as a nxkxk or nxp array
+        :param return_psfs: A flag specifying whether to return the fit PSF objects as well
+        :return: The results of the fits
+        """
+
+        x, y, z, _ = _stack_stamps(x, y, z)
+
+        states = cls._fit_states_batch(x, y, z)
+
+        states[cls._invalid_states(states)] = np.nan
+
+        computed = cls._evaluate_batch(states, x, y)
+
+        return _batch_fit_results(cls, cls._from_state, states, z - computed,
+                                  cls._jacobian_batch(states, x, y, computed), return_psfs)
+
+    @staticmethod
+    def _fit_states_batch(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """
+        This performs the logarithmic transformation fit for a stack of sub-images at once, returning the states.
+
+        The fit for each sub-image is done in coordinates relative to the mean x and y of the sub-image to keep the
+        problem well conditioned.  Fits that are unsuccessful or that result in a hyperbolic surface are returned as
+        NaN.
+
+        :param x: The x values underlying each sub-image as a nxp array
+        :param y: The y values underlying each sub-image as a nxp array
+        :param z: The values of each sub-image as a nxp array
+        :return: The states :math:`[x_0, y_0, a, b, c, A]` as a nx6 array
+        """
+
+        x_offset = x.mean(axis=-1, keepdims=True)
+        y_offset = y.mean(axis=-1, keepdims=True)
+
+        delta_x = x - x_offset
+        delta_y = y - y_offset
+
+        coefficients = np.stack([delta_x ** 2, delta_x, delta_x * delta_y, delta_y, delta_y ** 2, np.ones(x.shape)],
+                                axis=-1)
+
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            solution = _batch_lstsq(coefficients, np.log(z))
+
+            # extract the meaningful parts from the solution vector
+            a = -solution[:, 0]
+            b = -solution[:, 2] / 2
+            c = -solution[:, 4]
+
+            y0 = (b * solution[:, 1] - a * solution[:, 3]) / (2 * (b ** 2 - a * c))
+            x0 = (solution[:, 1] - 2 * b * y0) / (2 * a)
+
+            amplitude = np.exp(solution[:, 5] + a * x0 ** 2 + 2 * b * x0 * y0 + c * y0 ** 2)
+
+        states = np.stack([x0 + x_offset[:, 0], y0 + y_offset[:, 0], a, b, c, amplitude], axis=-1)
+
+        # if we fit a hyperbolic surface then return nans
+        states[~np.isfinite(states).all(axis=-1) | (a < 0) | (c < 0)] = np.nan
+
+        return states
+
+    @staticmethod
+    def _evaluate_batch(states: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        This evaluates the PSF for a stack of states.
+
+        :param states: The states :math:`[x_0, y_0, a, b, c, A]` as a nx6 array
+        :param x: The x values to evaluate at as a nxp array
+        :param y: The y values to evaluate at as a nxp array
+        :return: The PSF evaluated for each state at the corresponding x and y values as a nxp array
+        """
+
+        delta_x = x - states[:, 0:1]
+        delta_y = y - states[:, 1:2]
+
+        return states[:, 5:6] * np.exp(-(states[:, 2:3] * delta_x ** 2 + 2 * states[:, 3:4] * delta_x * delta_y +
+                                         states[:, 4:5] * delta_y ** 2))
+
+    @staticmethod
+    def _jacobian_batch(states: np.ndarray, x: np.ndarray, y: np.ndarray, computed: np.ndarray) -> np.ndarray:
+        """
+        This computes the Jacobian of the PSF with respect to a change in the state for a stack of states.
+
+        This is the vectorized version of :meth:`compute_jacobian`.
+
+        :param states: The states :math:`[x_0, y_0, a, b, c, A]` as a nx6 array
+        :param x: The x values to evaluate at as a nxp array
+        :param y: The y values to evaluate at as a nxp array
+        :param computed: The PSF evaluated at x and y as a nxp array
+        :return: The Jacobian matrices as a nxpx6 array
+        """
+
+        delta_x = x - states[:, 0:1]
+        delta_y = y - states[:, 1:2]
+
+        a_coef = states[:, 2:3]
+        b_coef = states[:, 3:4]
+        c_coef = states[:, 4:5]
+
+        return np.stack([computed * (2 * a_coef * delta_x + 2 * b_coef * delta_y),
+                         computed * (2 * c_coef * delta_y + 2 * b_coef * delta_x),
+                         computed * (-delta_x ** 2),
+                         computed * (-2 * delta_x * delta_y),
+                         computed * (-delta_y ** 2),
+                         computed / states[:, 5:6]], axis=-1)
+
+    @staticmethod
+    def _invalid_states(states: np.ndarray) -> np.ndarray:
+        """
+        This identifies fit states that are not valid (hyperbolic surfaces).
+
+        :param states: The states as a nxm array
+        :return: A boolean array which is ``True`` for invalid states
+        """
+
+        return (states[:, 2] < 0) | (states[:, 4] < 0)
+
+    @classmethod
+    def _from_state(cls, state: np.ndarray) -> 'GeneralizedGaussian':
+        """
+        This creates an instance of the class from a state vector.
+
+        :param state: The state :math:`[x_0, y_0, a, b, c, A]` as a length 6 array
+        :return: The initialized PSF
+        """
+
+        return cls(a_coef=float(state[2]), b_coef=float(state[3]), c_coef=float(state[4]), amplitude=state[5],
+                   centroid_x=state[0], centroid_y=state[1])
+
     def compute_jacobian(self, x: np.ndarray, y: np.ndarray, computed: np.ndarray):
         r"""
         This method computes the Jacobian of the PSF with respect to a change in the state.
@@ -1076,6 +1382,35 @@ class IterativeGeneralizedGaussian(GeneralizedGaussian, InitialGuessIterativeNon
 
         return out
 
+    @classmethod
+    def fit_batch(cls, x: ARRAY_LIKE, y: ARRAY_LIKE, z: ARRAY_LIKE, return_psfs: bool = False) -> PSFBatchFit:
+        """
+        This fits a generalized (rotated) 2d gaussian function to each sub-image in a stack using iterative non-linear
+        least squares estimation.
+
+        This is the vectorized version of :meth:`fit`, which fits all of the sub-images at once using
+        :meth:`.fit_lstsq_batch`.  The state vectors of the results are in the order :math:`[x_0, y_0, a, b, c, A]`.
+
+        :param x: The x values underlying each sub-image as a nxkxk or nxp array
+        :param y: The y values underlying each sub-image as a nxkxk or nxp array
+        :param z: The z or "height" values of each sub-image as a nxkxk or nxp array
+        :param return_psfs: A flag specifying whether to return the fit PSF objects as well
+        :return: The results of the fits
+        """
+
+        return cls.fit_lstsq_batch(x, y, z, return_psfs=return_psfs)
+
+    @staticmethod
+    def _invalid_states(states: np.ndarray) -> np.ndarray:
+        """
+        This identifies fit states that are not valid, using the same check as :meth:`fit`.
+
+        :param states: The states as a nxm array
+        :return: A boolean array which is ``True`` for invalid states
+        """
+
+        return (states[:, 2] < 0) | (states[:, 3] < 0)
+
 
 class IterativeGeneralizedGaussianWBackground(GeneralizedGaussian, InitialGuessIterativeNonlinearLSTSQPSFwBackground):
     r"""
@@ -1162,6 +1497,25 @@ class IterativeGeneralizedGaussianWBackground(GeneralizedGaussian, InitialGuessI
 
         return out
 
+    @classmethod
+    def fit_batch(cls, x: ARRAY_LIKE, y: ARRAY_LIKE, z: ARRAY_LIKE, return_psfs: bool = False) -> PSFBatchFit:
+        r"""
+        This fits a 2d gaussian function plus a background gradient to each sub-image in a stack using iterative
+        non-linear least squares estimation.
+
+        This is the vectorized version of :meth:`fit`, which fits all of the sub-images at once using
+        :meth:`.fit_lstsq_batch`.  The state vectors of the results are in the order
+        :math:`[x_0, y_0, a, b, c, A, B, C, D]`.
+
+        :param x: The x values underlying each sub-image as a nxkxk or nxp array
+        :param y: The y values underlying each sub-image as a nxkxk or nxp array
+        :param z: The z or "height" values of each sub-image as a nxkxk or nxp array
+        :param return_psfs: A flag specifying whether to return the fit PSF objects as well
+        :return: The results of the fits
+        """
+
+        return cls.fit_lstsq_batch(x, y, z, return_psfs=return_psfs)
+
     def update_state(self, update: NONEARRAY) -> None:
         r"""
         Updates the current values based on the provided update vector.
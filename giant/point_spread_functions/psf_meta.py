@@ -63,12 +63,20 @@ Method/Attribute                                  Use
 Implementing these, plus whatever else is needed internally for the functionality of the PSF, will result in a PSF class
 that can be used throughout GIANT.
 
+Every PSF also has a :meth:`~PointSpreadFunction.fit_batch` class method which fits the PSF to a stack of equally sized
+sub-images at once, returning the results as arrays in a :class:`PSFBatchFit`.  By default this simply calls
+:meth:`~PointSpreadFunction.fit` for each sub-image, but PSFs which are fit using iterative non-linear least squares can
+instead implement the vectorized methods ``_evaluate_batch``, ``_jacobian_batch``, ``_fit_states_batch``,
+``_from_state``, and ``_invalid_states`` (see :class:`.Gaussian` for an example) and then use
+:meth:`~IterativeNonlinearLSTSQPSF.converge_batch` to fit all of the sub-images at the same time, which is much faster
+when there are many sub-images (for instance when centroiding all of the stars in an image).
+
 For examples of how this is done, refer to the pre-defined PSFs in :mod:`.gaussians`.
 """
 
 from abc import ABCMeta, abstractmethod
 
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, NamedTuple, Callable
 
 import numpy as np
 
@@ -108,6 +116,187 @@ def _fft_convolve_1d(a: np.ndarray, b: np.ndarray) -> np.ndarray:
     return cc[..., dif:dif + a.shape[-1]]
 
 
+class PSFBatchFit(NamedTuple):
+    """
+    The results of fitting a PSF to a stack of sub-images using :meth:`.PointSpreadFunction.fit_batch`.
+
+    Each array has the number of sub-images as its first axis.  Fits that failed have NaN for their centroids and states
+    and ``False`` for :attr:`success`.
+    """
+
+    centroids: np.ndarray
+    """
+    The (x, y) centroids of the fit PSFs as a nx2 array
+    """
+
+    states: Optional[np.ndarray]
+    """
+    The fit state vectors as a nxm array in the order of the Jacobian of the PSF, or ``None`` if the PSF does not 
+    provide a state vector
+    """
+
+    covariances: Optional[np.ndarray]
+    """
+    The formal covariances of the fit states as a nxmxm array, or ``None`` if they are not available
+    """
+
+    residual_rss: np.ndarray
+    """
+    The sum of squares of the post-fit residuals for each fit as a length n array
+    """
+
+    residual_mean: np.ndarray
+    """
+    The mean of the post-fit residuals for each fit as a length n array
+    """
+
+    residual_std: np.ndarray
+    """
+    The standard deviation of the post-fit residuals for each fit as a length n array
+    """
+
+    success: np.ndarray
+    """
+    A boolean array specifying which fits were successful
+    """
+
+    psfs: Optional[List['PointSpreadFunction']] = None
+    """
+    The fit PSF objects, only created if requested
+    """
+
+
+def _stack_stamps(x: ARRAY_LIKE, y: ARRAY_LIKE,
+                  z: ARRAY_LIKE) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[Tuple[int, int]]]:
+    """
+    This function converts a stack of sub-images into flat 2D arrays, one row per sub-image.
+
+    :param x: The x values of each pixel as a nxkxk or nxp array (or something that broadcasts to the shape of z)
+    :param y: The y values of each pixel as a nxkxk or nxp array (or something that broadcasts to the shape of z)
+    :param z: The values of each pixel as a nxkxk or nxp array
+    :return: The x, y, and z values as nxp float64 arrays and the shape of each sub-image if z was 3D
+    :raises ValueError: If z is not 2D or 3D
+    """
+
+    z = np.asarray(z, dtype=np.float64)
+
+    if z.ndim == 3:
+        stamp_shape = z.shape[1:]
+    elif z.ndim == 2:
+        stamp_shape = None
+    else:
+        raise ValueError('z must be a nxkxk stack of sub-images or a nxp array of flattened sub-images')
+
+    x = np.broadcast_to(np.asarray(x, dtype=np.float64), z.shape).reshape(z.shape[0], -1)
+    y = np.broadcast_to(np.asarray(y, dtype=np.float64), z.shape).reshape(z.shape[0], -1)
+
+    return x, y, z.reshape(z.shape[0], -1), stamp_shape
+
+
+def _center_indices(stamp_shape: Optional[Tuple[int, int]]) -> Optional[np.ndarray]:
+    """
+    This function returns the flat indices of the 9 pixels closest to the center of a sub-image if the sub-image is
+    larger than 5 pixels along either axis, matching what is used for the initial guess in the single sub-image fits.
+
+    :param stamp_shape: The shape of the sub-images or ``None`` if they were flat
+    :return: The flat indices of the central 3x3 pixels or ``None`` if all of the pixels should be used
+    """
+
+    if (stamp_shape is None) or (max(stamp_shape) <= 5):
+        return None
+
+    pix_center = np.array(stamp_shape) // 2
+
+    rows, cols = np.meshgrid(np.arange(pix_center[0] - 1, pix_center[0] + 2),
+                             np.arange(pix_center[1] - 1, pix_center[1] + 2), indexing='ij')
+
+    return (rows * stamp_shape[1] + cols).ravel()
+
+
+def _batch_lstsq(jacobians: np.ndarray, residuals: np.ndarray) -> np.ndarray:
+    """
+    This function solves a stack of small linear least squares problems using the normal equations.
+
+    The columns of each problem are scaled to unit norm before solving (which greatly improves the conditioning when
+    the columns have very different magnitudes, like for the background terms) and the pseudo inverse is used if any of
+    the systems are singular.
+
+    :param jacobians: The coefficient matrices as a nxpxm array
+    :param residuals: The right hand sides as a nxp array
+    :return: The least squares solutions as a nxm array
+    """
+
+    normal = np.einsum('npi,npj->nij', jacobians, jacobians)
+    rhs = np.einsum('npi,np->ni', jacobians, residuals)
+
+    scale = np.sqrt(np.diagonal(normal, axis1=1, axis2=2)).copy()
+    scale[~(scale > 0)] = 1
+    scale = 1 / scale
+
+    normal *= scale[:, :, None] * scale[:, None, :]
+    rhs *= scale
+
+    try:
+        solution = np.linalg.solve(normal, rhs[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        solution = (np.linalg.pinv(normal) @ rhs[..., None])[..., 0]
+
+    return solution * scale
+
+
+def _batch_fit_results(cls, to_psf: Callable[[np.ndarray], 'PointSpreadFunction'], states: np.ndarray,
+                       residuals: np.ndarray, jacobians: np.ndarray, return_psfs: bool) -> PSFBatchFit:
+    """
+    This function packages the results of a batch of fits into a :class:`PSFBatchFit`.
+
+    The covariance of each successful fit is computed as the pseudo inverse of the normal matrix times the variance of
+    the residuals, the same as for the single fits.
+
+    :param cls: The PSF class that was fit
+    :param to_psf: A callable which creates a PSF instance from a single state vector
+    :param states: The fit states as a nxm array with NaN for failed fits
+    :param residuals: The post-fit residuals as a nxp array
+    :param jacobians: The Jacobians at the fit states as a nxpxm array
+    :param return_psfs: A flag specifying whether to create the PSF objects
+    :return: The packaged results
+    """
+
+    success = np.isfinite(states).all(axis=-1)
+
+    num_states = states.shape[-1]
+
+    covariances = np.full((states.shape[0], num_states, num_states), np.nan, dtype=np.float64)
+
+    valid = success & np.isfinite(jacobians).all(axis=(1, 2)) & np.isfinite(residuals).all(axis=-1)
+
+    if valid.any():
+        normal = np.einsum('npi,npj->nij', jacobians[valid], jacobians[valid])
+        covariances[valid] = np.linalg.pinv(normal) * residuals[valid].var(axis=-1).reshape(-1, 1, 1)
+
+    psfs = None
+    if return_psfs:
+        psfs = []
+        for ind, state in enumerate(states):
+            psf = to_psf(state)
+
+            if not success[ind]:
+                psf.update_state(None)
+
+            if cls.save_residuals:
+                if np.isfinite(residuals[ind]).all():
+                    psf._residuals = residuals[ind]
+                    psf._covariance = covariances[ind]
+                else:
+                    psf._residuals = None
+                    psf._covariance = None
+
+            psfs.append(psf)
+
+    return PSFBatchFit(centroids=states[:, :2].copy(), states=states, covariances=covariances,
+                       residual_rss=np.square(residuals).sum(axis=-1), residual_mean=residuals.mean(axis=-1),
+                       residual_std=residuals.std(axis=-1), success=success, psfs=psfs)
+
+
 class PointSpreadFunction(metaclass=ABCMeta):
     """
     This abstract base class serves as the template for implementing a point spread function in GIANT.
@@ -212,6 +401,50 @@ class PointSpreadFunction(metaclass=ABCMeta):
         :return: An instance of the PSF that best fits the provided data
         """
 
+    @classmethod
+    def fit_batch(cls, x: ARRAY_LIKE, y: ARRAY_LIKE, z: ARRAY_LIKE, return_psfs: bool = False) -> PSFBatchFit:
+        """
+        This fits the PSF to each sub-image in a stack of sub-images.
+
+        The sub-images can be input as a nxkxk stack of square (or rectangular) sub-images or as a nxp array where each
+        row is a flattened sub-image.  ``x`` and ``y`` can be the same shape as ``z`` or anything that broadcasts to it.
+
+        This default implementation simply calls :meth:`fit` for each sub-image and collects the results into arrays.
+        Subclasses which can fit many sub-images at once (like the iterative Gaussian PSFs) override this with a
+        vectorized implementation.  In either case, the PSF objects themselves are only returned if ``return_psfs`` is
+        ``True``.
+
+        :param x: The x values underlying each sub-image the PSF is to be fit to
+        :param y: The y values underlying each sub-image the PSF is to be fit to
+        :param z: The z or "height" values of each sub-image the PSF is to be fit to
+        :param return_psfs: A flag specifying whether to return the fit PSF objects as well
+        :return: The results of the fits
+        """
+
+        z = np.asarray(z, dtype=np.float64)
+
+        x = np.broadcast_to(np.asarray(x, dtype=np.float64), z.shape)
+        y = np.broadcast_to(np.asarray(y, dtype=np.float64), z.shape)
+
+        fits = [cls.fit(x[ind], y[ind], z[ind]) for ind in range(z.shape[0])]
+
+        centroids = np.array([fit.centroid for fit in fits], dtype=np.float64).reshape(-1, 2)
+
+        covariances = [fit.covariance for fit in fits]
+        if covariances and all(cov is not None for cov in covariances):
+            covariances = np.array(covariances, dtype=np.float64)
+        else:
+            covariances = None
+
+        def stat(name: str) -> np.ndarray:
+            values = [getattr(fit, name) for fit in fits]
+            return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+        return PSFBatchFit(centroids=centroids, states=None, covariances=covariances,
+                           residual_rss=stat('residual_rss'), residual_mean=stat('residual_mean'),
+                           residual_std=stat('residual_std'), success=np.isfinite(centroids).all(axis=-1),
+                           psfs=fits if return_psfs else None)
+
     @property
     @abstractmethod
     def centroid(self) -> np.ndarray:
@@ -633,6 +866,128 @@ class IterativeNonlinearLSTSQPSF(PointSpreadFunction, metaclass=ABCMeta):
             return None, None
 
 
+    @classmethod
+    def _model_batch(cls, states: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        This evaluates the full model being fit for a stack of state vectors.
+
+        By default this is just the PSF itself (``_evaluate_batch``), but subclasses can add extra terms (like a
+        background).
+
+        :param states: The state vectors as a nxm array
+        :param x: The x values to evaluate at as a nxp array
+        :param y: The y values to evaluate at as a nxp array
+        :return: The model evaluated for each state at the corresponding x and y values as a nxp array
+        """
+
+        return cls._evaluate_batch(states, x, y)
+
+    @classmethod
+    def _model_jacobian_batch(cls, states: np.ndarray, x: np.ndarray, y: np.ndarray,
+                              computed: np.ndarray) -> np.ndarray:
+        """
+        This computes the Jacobian of the full model being fit for a stack of state vectors.
+
+        :param states: The state vectors as a nxm array
+        :param x: The x values to evaluate at as a nxp array
+        :param y: The y values to evaluate at as a nxp array
+        :param computed: The model evaluated at x and y as a nxp array
+        :return: The Jacobian matrices as a nxpxm array
+        """
+
+        return cls._jacobian_batch(states, x, y, computed)
+
+    @classmethod
+    def _state_to_psf(cls, state: np.ndarray) -> __qualname__:
+        """
+        This creates an instance of the class from a single state vector of the full model.
+
+        :param state: The state vector as a length m array
+        :return: The initialized PSF
+        """
+
+        return cls._from_state(state)
+
+    @classmethod
+    def converge_batch(cls, states: np.ndarray, x: np.ndarray,
+                       y: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Performs iterative non-linear least squares for a stack of independent fits at once.
+
+        This follows exactly the same steps and convergence/divergence criteria as :meth:`converge` for each fit, but
+        all of the fits that have not yet converged are updated together at each iteration using stacked Jacobian
+        matrices and batched solutions of the (small) normal equations.  Fits which converge or diverge drop out of the
+        iteration while the rest continue.
+
+        The model is evaluated using the vectorized class methods ``_model_batch`` and ``_model_jacobian_batch`` (which
+        default to ``_evaluate_batch`` and ``_jacobian_batch``) so the class does not need to be initialized.  Fits that
+        diverge or that produce a non-finite Jacobian have their state set to NaN.  The residuals of fits with a
+        non-finite Jacobian are also set to NaN.
+
+        :param states: The initial guess for the state vectors as a nxm array
+        :param x: The x locations of the expected values as a nxp array
+        :param y: The y locations of the expected values as a nxp array
+        :param z: The expected values to fit to as a nxp array
+        :return: The converged states (nxm), the post-fit residuals (nxp), and the Jacobians at the converged states
+                 (nxpxm)
+        """
+
+        states = np.array(states, dtype=np.float64)
+
+        computed = cls._model_batch(states, x, y)
+        residuals = z - computed
+        jacobians = cls._model_jacobian_batch(states, x, y, computed)
+
+        residual_norm_old = np.full(states.shape[0], np.inf)
+
+        active = np.isfinite(states).all(axis=-1)
+
+        # fits that start out bad are failures with no residuals
+        residuals[~active] = np.nan
+
+        for _ in range(cls.max_iter):
+            if not active.any():
+                break
+
+            # break out any fits with a bad Jacobian
+            bad = active & ~np.isfinite(jacobians).all(axis=(1, 2))
+            states[bad] = np.nan
+            residuals[bad] = np.nan
+            active &= ~bad
+
+            current = np.flatnonzero(active)
+
+            if current.size == 0:
+                break
+
+            # compute and apply the updates
+            update = _batch_lstsq(jacobians[current], residuals[current])
+
+            states[current] += update
+
+            # compute the residuals and Jacobians after the update
+            computed = cls._model_batch(states[current], x[current], y[current])
+            residuals[current] = z[current] - computed
+            jacobians[current] = cls._model_jacobian_batch(states[current], x[current], y[current], computed)
+
+            residual_norm_new = np.linalg.norm(residuals[current], axis=-1)
+
+            # check for convergence/divergence
+            with np.errstate(invalid='ignore', divide='ignore'):
+                converged = ((np.abs(update) <= cls.atol).all(axis=-1) |
+                             (np.abs(residual_norm_new - residual_norm_old[current]) / residual_norm_new < cls.rtol))
+
+            diverged = ~converged & (residual_norm_old[current] < residual_norm_new)
+
+            states[current[diverged]] = np.nan
+
+            active[current[converged | diverged]] = False
+
+            residual_norm_old[current] = residual_norm_new
+
+        return states, residuals, jacobians
+
+
 class IterativeNonlinearLSTSQwBackground(IterativeNonlinearLSTSQPSF, metaclass=ABCMeta):
     r"""
     This class provides support for estimating the superposition of the PSF and a linear background gradient.
@@ -784,6 +1139,97 @@ class IterativeNonlinearLSTSQwBackground(IterativeNonlinearLSTSQPSF, metaclass=A
         return out
 
 
+    @staticmethod
+    def compute_jacobian_bg_batch(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        This computes the Jacobian matrices for the background terms for a stack of fits.
+
+        This is the vectorized version of :meth:`compute_jacobian_bg`.
+
+        :param x: The x values underlying each fit as a nxp array
+        :param y: The y values underlying each fit as a nxp array
+        :return: The Jacobians for the background as a nxpx3 array
+        """
+
+        return np.stack([x, y, np.ones(x.shape, dtype=np.float64)], axis=-1)
+
+    @staticmethod
+    def evaluate_bg_batch(bg_states: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        This computes the background component for a stack of background states.
+
+        :param bg_states: The background states (B, C, D) as a nx3 array
+        :param x: The x values where the background is to be computed at as a nxp array
+        :param y: The y values where the background is to be computed at as a nxp array
+        :return: The background according to the model as a nxp array
+        """
+
+        return bg_states[:, 0:1] * x + bg_states[:, 1:2] * y + bg_states[:, 2:3]
+
+    @classmethod
+    def fit_bg_batch(cls, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """
+        This fits just the background to a stack of sub-images using linear least squares.
+
+        This is the vectorized version of :meth:`fit_bg`.
+
+        :param x: The x values underlying each sub-image as a nxp array
+        :param y: The y values underlying each sub-image as a nxp array
+        :param z: The values of each sub-image as a nxp array
+        :return: The background states (B, C, D) as a nx3 array
+        """
+
+        return _batch_lstsq(cls.compute_jacobian_bg_batch(x, y), z)
+
+    @classmethod
+    def _model_batch(cls, states: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        This evaluates the PSF plus the background for a stack of state vectors.
+
+        The last 3 elements of each state vector are the background terms.
+
+        :param states: The state vectors as a nxm array
+        :param x: The x values to evaluate at as a nxp array
+        :param y: The y values to evaluate at as a nxp array
+        :return: The model evaluated for each state at the corresponding x and y values as a nxp array
+        """
+
+        return cls._evaluate_batch(states[:, :-3], x, y) + cls.evaluate_bg_batch(states[:, -3:], x, y)
+
+    @classmethod
+    def _model_jacobian_batch(cls, states: np.ndarray, x: np.ndarray, y: np.ndarray,
+                              computed: np.ndarray) -> np.ndarray:
+        """
+        This computes the Jacobian of the PSF plus the background for a stack of state vectors.
+
+        :param states: The state vectors as a nxm array
+        :param x: The x values to evaluate at as a nxp array
+        :param y: The y values to evaluate at as a nxp array
+        :param computed: The model evaluated at x and y as a nxp array
+        :return: The Jacobian matrices as a nxpxm array
+        """
+
+        computed_no_bg = computed - cls.evaluate_bg_batch(states[:, -3:], x, y)
+
+        return np.concatenate([cls._jacobian_batch(states[:, :-3], x, y, computed_no_bg),
+                               cls.compute_jacobian_bg_batch(x, y)], axis=-1)
+
+    @classmethod
+    def _state_to_psf(cls, state: np.ndarray) -> __qualname__:
+        """
+        This creates an instance of the class from a single state vector of the PSF plus the background.
+
+        :param state: The state vector as a length m array
+        :return: The initialized PSF
+        """
+
+        out = cls._from_state(state[:-3])
+
+        out.bg_b_coef, out.bg_c_coef, out.bg_d_coef = (float(value) for value in state[-3:])
+
+        return out
+
+
 class InitialGuessIterativeNonlinearLSTSQPSF(IterativeNonlinearLSTSQPSF, metaclass=ABCMeta):
     """
     This class provides a fit class method which generates the initial guess from a subclass and then converges to a
@@ -863,6 +1309,39 @@ class InitialGuessIterativeNonlinearLSTSQPSF(IterativeNonlinearLSTSQPSF, metacla
         return out
 
 
+    @classmethod
+    def fit_lstsq_batch(cls, x: ARRAY_LIKE, y: ARRAY_LIKE, z: ARRAY_LIKE, return_psfs: bool = False) -> PSFBatchFit:
+        """
+        This fits a PSF to each sub-image in a stack using iterative non-linear least squares estimation.
+
+        This is the vectorized version of :meth:`fit_lstsq`.  The initial guess for every sub-image is made at once
+        using the vectorized non-iterative fit of the PSF (``_fit_states_batch``, only using the 9 pixels closest to
+        the center for sub-images larger than 5 pixels), and then all of the fits are refined together using
+        :meth:`~IterativeNonlinearLSTSQPSF.converge_batch`.
+
+        :param x: The x values underlying each sub-image as a nxkxk or nxp array
+        :param y: The y values underlying each sub-image as a nxkxk or nxp array
+        :param z: The z or "height" values of each sub-image as a nxkxk or nxp array
+        :param return_psfs: A flag specifying whether to return the fit PSF objects as well
+        :return: The results of the fits
+        """
+
+        x, y, z, stamp_shape = _stack_stamps(x, y, z)
+
+        center = _center_indices(stamp_shape)
+
+        if center is not None:
+            states = cls._fit_states_batch(x[:, center], y[:, center], z[:, center])
+        else:
+            states = cls._fit_states_batch(x, y, z)
+
+        states, residuals, jacobians = cls.converge_batch(states, x, y, z)
+
+        states[cls._invalid_states(states)] = np.nan
+
+        return _batch_fit_results(cls, cls._state_to_psf, states, residuals, jacobians, return_psfs)
+
+
 class InitialGuessIterativeNonlinearLSTSQPSFwBackground(IterativeNonlinearLSTSQwBackground, metaclass=ABCMeta):
     """
     This class provides a fit class method which generates the initial guess from a subclass and then converges to a
@@ -964,6 +1443,47 @@ class InitialGuessIterativeNonlinearLSTSQPSFwBackground(IterativeNonlinearLSTSQw
 
         return out
 
+    @classmethod
+    def fit_lstsq_batch(cls, x: ARRAY_LIKE, y: ARRAY_LIKE, z: ARRAY_LIKE, return_psfs: bool = False) -> PSFBatchFit:
+        """
+        This fits a PSF plus a background gradient to each sub-image in a stack using iterative non-linear least
+        squares estimation.
+
+        This is the vectorized version of :meth:`fit_lstsq`.  The rough background of every sub-image is estimated and
+        removed at once, the initial guess for the PSF is made using the vectorized non-iterative fit
+        (``_fit_states_batch``), and then all of the fits are refined together using
+        :meth:`~IterativeNonlinearLSTSQPSF.converge_batch`.
+
+        :param x: The x values underlying each sub-image as a nxkxk or nxp array
+        :param y: The y values underlying each sub-image as a nxkxk or nxp array
+        :param z: The z or "height" values of each sub-image as a nxkxk or nxp array
+        :param return_psfs: A flag specifying whether to return the fit PSF objects as well
+        :return: The results of the fits
+        """
+
+        x, y, z, stamp_shape = _stack_stamps(x, y, z)
+
+        # fit just the background and subtract it off
+        bg_states = cls.fit_bg_batch(x, y, z)
+
+        z_no_bg = z - cls.evaluate_bg_batch(bg_states, x, y)
+
+        center = _center_indices(stamp_shape)
+
+        if center is not None:
+            use_z = z_no_bg[:, center]
+
+            states = cls._fit_states_batch(x[:, center], y[:, center],
+                                           use_z - use_z.min(axis=-1, keepdims=True) + 1)
+        else:
+            states = cls._fit_states_batch(x, y, z_no_bg)
+
+        states, residuals, jacobians = cls.converge_batch(np.hstack([states, bg_states]), x, y, z)
+
+        states[cls._invalid_states(states)] = np.nan
+
+        return _batch_fit_results(cls, cls._state_to_psf, states, residuals, jacobians, return_psfs)
+
     def compute_jacobian_all(self, x: np.ndarray, y: np.ndarray, computed: np.ndarray) -> np.ndarray:
         r"""
         This method computes the Jacobian of the PSF with respect to a change in the state.
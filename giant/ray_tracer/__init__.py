@@ -25,13 +25,24 @@ primitive in the surface.  This allows us to represent arbitrary topography with
 normally takes many many geometry primitives for a single surface tracing can be very slow.  Therefore, we also provide
 an acceleration structure in the form of a :class:`.KDTree` which limits the number of triangles we need to check each
 ray against using :class:`.AxisAlignedBoundingBox`.
+A flat, array based version of the tree which can be memory mapped from disk, :class:`.FlatKDTree`, is also provided
+for very large surfaces.
 
 Once a surface is represented in GIANT it is usually wrapped in a :class:`.SceneObject` and added to a :class:`.Scene`.
 The :class:`.Scene` in GIANT is used to define the locations and orientations of multiple objects with respect to each
-other.  It also provides functionality for automatically updating these locations and orientations for a new time and
+other (a single shape can be placed multiple times in a scene without copying it using :class:`.ShapeInstance`, and a
+shape can be replaced by coarser versions of itself when it is far away using :class:`.LODShape`).
+It also provides functionality for automatically updating these locations and orientations for a new time and
 for doing the single bounce ray trace for rendering.  Once the ray trace is complete, the subclasses of
 :class:`.IlluminationModel` are used to convert the ray trace geometry into intensity values for each ray (typically)
-the :class:`.McEwenIllumination` class).
+the :class:`.McEwenIllumination` class).  When only the rendered template image is needed, :func:`.render_template`
+does the trace, shadowing, illumination, and accumulation into pixels all at once in compiled code, while
+:func:`.rasterize_template` renders the same template by projecting the triangles of the shapes onto the image with a
+z-buffer and a shadow map instead of tracing rays.
+
+All of the compiled kernels in this subpackage (and the surface feature correlators) are parallelized using OpenMP.  The
+number of threads, loop schedule, and chunk size they use can be controlled at run time using the functions in
+:mod:`.parallel_config` or the ``GIANT_NUM_THREADS`` and ``GIANT_SCHEDULE`` environment variables.
 
 When creating a surface in GIANT, you will usually use the :mod:`.ingest_shape` script which will create the surface and
 build the acceleration structure automatically for you.
@@ -39,16 +50,24 @@ build the acceleration structure automatically for you.
 For more details, please refer to the following module documentation, which provides much more detail.
 """
 
+import giant.ray_tracer.parallel_config as parallel_config
 import giant.ray_tracer.shapes as shapes
 import giant.ray_tracer.kdtree as kdtree
+import giant.ray_tracer.flat_kdtree as flat_kdtree
 
 import giant.ray_tracer.rays as rays
 import giant.ray_tracer.scene as scene
+import giant.ray_tracer.shadow_cache as shadow_cache
+import giant.ray_tracer.lod as lod
 
 import giant.ray_tracer.illumination as illumination
+import giant.ray_tracer.render as render
+import giant.ray_tracer.raster as raster
 
-from giant.ray_tracer.rays import Rays, compute_rays, INTERSECT_DTYPE
-from giant.ray_tracer.scene import SceneObject, Scene, CorrectionsType
+from giant.ray_tracer.rays import Rays, Rays32, RayBatch, TraceWorkspace, compute_rays, INTERSECT_DTYPE, INTERSECT32_DTYPE
+from giant.ray_tracer.scene import SceneObject, Scene, CorrectionsType, ShapeInstance
+from giant.ray_tracer.shadow_cache import ShadowCache
+from giant.ray_tracer.lod import LODShape, decimate_surface
 from giant.ray_tracer.illumination import IlluminationModel, AshikhminShirleyDiffuseIllumination, GaskellIllumination, \
     McEwenIllumination, LambertianIllumination, LommelSeeligerIllumination, ILLUM_DTYPE
 
@@ -60,9 +79,16 @@ from giant.ray_tracer.shapes.shape import Shape
 from giant.ray_tracer.shapes.point import Point
 from giant.ray_tracer.shapes.axis_aligned_bounding_box import AxisAlignedBoundingBox
 from giant.ray_tracer.kdtree import KDTree
+from giant.ray_tracer.flat_kdtree import FlatKDTree
+from giant.ray_tracer.render import render_template
+from giant.ray_tracer.raster import rasterize_template, triangulate
+from giant.ray_tracer.parallel_config import set_num_threads, get_num_threads, set_schedule, get_schedule
 
-__all__ = ["Rays", "compute_rays", "INTERSECT_DTYPE", "Scene", "SceneObject", "IlluminationModel",
-           "AshikhminShirleyDiffuseIllumination", "McEwenIllumination", "LambertianIllumination", "GaskellIllumination",
+__all__ = ["Rays", "Rays32", "RayBatch", "TraceWorkspace", "compute_rays", "INTERSECT_DTYPE", "INTERSECT32_DTYPE", "Scene",
+           "SceneObject", "IlluminationModel", "AshikhminShirleyDiffuseIllumination", "McEwenIllumination", "LambertianIllumination", "GaskellIllumination",
            "LommelSeeligerIllumination", "ILLUM_DTYPE", "Triangle32", "Triangle64", "Ellipsoid", "Surface", "Surface64",
-           "Surface32", "Solid", "Shape", "Point", "AxisAlignedBoundingBox", "KDTree", "CorrectionsType",
-           "shapes", "kdtree", "illumination", "rays", "scene"]
+           "Surface32", "Solid", "Shape", "Point", "AxisAlignedBoundingBox", "KDTree", "FlatKDTree",
+           "CorrectionsType", "ShapeInstance", "ShadowCache", "LODShape", "decimate_surface", "render_template",
+           "rasterize_template", "triangulate", "set_num_threads", "get_num_threads", "set_schedule",
+           "get_schedule", "parallel_config", "shapes", "kdtree", "flat_kdtree",
+           "illumination", "shadow_cache", "lod", "rays", "scene", "render", "raster"]
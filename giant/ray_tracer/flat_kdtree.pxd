@@ -0,0 +1,59 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+cimport numpy as cnp
+
+from giant.ray_tracer.shapes.surface cimport Surface
+
+
+cdef class FlatKDTree(Surface):
+
+    cdef readonly:
+        const double[:, :] _node_bounds
+        const cnp.int64_t[:, :] _node_children
+        const cnp.int64_t[:, :] _node_ranges
+        const cnp.int64_t[:] _node_axes
+        const double[:] _node_values
+        const cnp.uint32_t[:, :] _facets
+        const double[:, :] _normals
+        const double[:, :] _vertices
+        const double[:] _albedo_array
+        const cnp.int64_t[:] _facet_map
+        double _albedo
+        bint _single_albedo
+        cnp.int64_t depth
+
+    cdef:
+        object _rotation
+        double[:] _position
+        const float[:, :] _node_bounds32
+        const float[:, :] _normals32
+        const float[:, :] _vertices32
+        bint _has_float32
+
+    cdef double _get_albedo(self, const double[3] rhs, const cnp.int64_t face) noexcept nogil
+
+    cdef bint _intersect_facet(self, const cnp.int64_t face, const double[:] start, const double[:] direction,
+                               double[3] solution) noexcept nogil
+
+    cdef bint _intersect_facet32(self, const cnp.int64_t face, const float[:] start, const int *axes,
+                                 const float *shear, float *solution) noexcept nogil
+
+    cdef void _compute_intersect32(self, const float[:] start, const float[:] direction,
+                                   const float[:] inv_direction, const cnp.int64_t[] ignore,
+                                   const cnp.uint32_t num_ignore, cnp.uint8_t *hit, float[:] intersect,
+                                   float[:] normal, float *albedo, cnp.int64_t *facet,
+                                   float *hit_distance) noexcept nogil
+
+    cdef bint _is_occluded32(self, const float[:] start, const float[:] direction, const float[:] inv_direction,
+                             const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore) noexcept nogil
+
+    cdef void _trace32(self, const float[:, :] starts, const float[:, :] directions, const float[:, :] inv_directions,
+                       const cnp.int64_t[:, :] ignore, const cnp.uint32_t num_rays, const bint omp,
+                       cnp.uint8_t[:] hit, float[:, :] intersect, float[:, :] normal, float[:] albedo,
+                       cnp.int64_t[:] facet, float[:] hit_distances) noexcept nogil
+
+    cdef void _trace_occlusion32(self, const float[:, :] starts, const float[:, :] directions,
+                                 const float[:, :] inv_directions, const cnp.int64_t[:, :] ignore,
+                                 const cnp.uint32_t num_rays, const bint omp, cnp.uint8_t[:] occluded) noexcept nogil
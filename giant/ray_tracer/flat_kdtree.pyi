@@ -0,0 +1,120 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from giant.ray_tracer.shapes import Surface, AxisAlignedBoundingBox, Ellipsoid
+from giant.ray_tracer.shapes.surface import RawSurface
+from giant.ray_tracer.kdtree import KDTree, SplitMethods
+from giant.ray_tracer.rays import Rays, TraceWorkspace
+from giant.rotations import Rotation
+from giant._typing import ARRAY_LIKE, PATH
+
+
+FLAT_KDTREE_MAGIC: bytes
+FLAT_KDTREE_VERSION: int
+FLAT_KDTREE_ARRAYS: Tuple[str, ...]
+FLAT_KDTREE_HEADER_DTYPE: np.dtype
+
+
+class FlatKDTree(Surface):
+
+    depth: int
+    bounding_box: AxisAlignedBoundingBox
+    reference_ellipsoid: Optional[Ellipsoid]
+
+    def __init__(self,
+                 node_bounds: np.ndarray,
+                 node_children: np.ndarray,
+                 node_ranges: np.ndarray,
+                 node_axes: np.ndarray,
+                 node_values: np.ndarray,
+                 facets: np.ndarray,
+                 normals: np.ndarray,
+                 vertices: np.ndarray,
+                 albedos: Union[float, np.ndarray],
+                 facet_map: Optional[np.ndarray] = None,
+                 _rotation: Optional[Rotation] = None,
+                 _position: Optional[np.ndarray] = None,
+                 _bounding_box: Optional[AxisAlignedBoundingBox] = None,
+                 _reference_ellipsoid: Optional[Ellipsoid] = None): ...
+
+    def __reduce__(self) -> tuple: ...
+
+    @property
+    def node_bounds(self) -> np.ndarray: ...
+
+    @property
+    def node_children(self) -> np.ndarray: ...
+
+    @property
+    def node_ranges(self) -> np.ndarray: ...
+
+    @property
+    def node_axes(self) -> np.ndarray: ...
+
+    @property
+    def node_values(self) -> np.ndarray: ...
+
+    @property
+    def facets(self) -> np.ndarray: ...
+
+    @property
+    def normals(self) -> np.ndarray: ...
+
+    @property
+    def vertices(self) -> np.ndarray: ...
+
+    @property
+    def albedos(self) -> Union[float, np.ndarray]: ...
+
+    @property
+    def facet_map(self) -> np.ndarray: ...
+
+    @property
+    def num_faces(self) -> int: ...
+
+    @property
+    def num_nodes(self) -> int: ...
+
+    @property
+    def position(self) -> Optional[np.ndarray]: ...
+
+    @property
+    def rotation(self) -> Optional[Rotation]: ...
+
+    @property
+    def order(self) -> int: ...
+
+    @classmethod
+    def from_kdtree(cls, tree: KDTree) -> 'FlatKDTree': ...
+
+    @classmethod
+    def from_surface(cls,
+                     surface: RawSurface,
+                     max_depth: int = 10,
+                     force: bool = True,
+                     print_progress: bool = False,
+                     split_method: Union[SplitMethods, str] = SplitMethods.MEDIAN,
+                     sah_bins: int = 32,
+                     traversal_cost: float = 1.0,
+                     intersection_cost: float = 1.5) -> 'FlatKDTree': ...
+
+    def compute_intersect(self, ray: Rays) -> np.ndarray: ...
+
+    def trace(self, rays: Rays, omp: bool = True,
+              out: Optional[TraceWorkspace] = None) -> Union[np.ndarray, TraceWorkspace]: ...
+
+    def is_occluded(self, rays: Rays, omp: bool = True) -> np.ndarray: ...
+
+    def translate(self, translation: ARRAY_LIKE): ...
+
+    def rotate(self, rotation: Union[Rotation, ARRAY_LIKE]): ...
+
+    def save(self, filename: PATH): ...
+
+    @classmethod
+    def load(cls, filename: PATH, memory_map: bool = True) -> 'FlatKDTree': ...
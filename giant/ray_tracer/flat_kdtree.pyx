@@ -0,0 +1,1620 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+"""
+This cython module provides a flat, array backed version of the :class:`.KDTree` which can be memory mapped from disk.
+
+Description
+-----------
+
+The :class:`.KDTree` stores its structure as a graph of :class:`.KDNode` python objects, each of which holds its own
+leaf surface.  This is convenient for building and inspecting the tree, but it means that saving and loading a tree
+requires pickling/unpickling the entire object graph, which can be very slow for large shapes.
+
+The :class:`.FlatKDTree` stores the exact same information in a handful of contiguous arrays instead.  The nodes are
+described by arrays giving the bounds of each node, the indices of the children of each node, the axis and value each
+node was split on, and the range of facets belonging to each node, while the geometry is stored in a single facet
+buffer which has been permuted so that every node owns a contiguous block of facets.  Because of this, the tree can be
+written to a simple binary file (see :meth:`.FlatKDTree.save`) which can be memory mapped and traced immediately (see
+:meth:`.FlatKDTree.load`) without any unpickling.  This makes loading a tree nearly instantaneous regardless of its size
+and allows multiple processes to share the same pages of the tree in memory.
+
+File Format
+-----------
+
+The binary file begins with a fixed length header described by :data:`FLAT_KDTREE_HEADER_DTYPE`, which contains the
+:data:`FLAT_KDTREE_MAGIC` string, the :data:`FLAT_KDTREE_VERSION` the file was written with, the sizes of the arrays,
+the information needed to restore the bounding box, reference ellipsoid, and current location/orientation of the tree,
+and the byte offset to each array.  The arrays follow the header in the order given by :data:`FLAT_KDTREE_ARRAYS`,
+each starting on a 64 byte boundary, stored in little endian C order.
+
+Use
+---
+
+You can create a :class:`.FlatKDTree` either from a :class:`.KDTree` that has already been built using
+:meth:`.FlatKDTree.from_kdtree` or directly from a :class:`.RawSurface` using :meth:`.FlatKDTree.from_surface`.  Once
+created, it can be used anywhere a :class:`.Surface` is expected in GIANT.  Note that the facet numbers returned when
+tracing a :class:`.FlatKDTree` are the indices into the permuted facet buffer.  The :attr:`.FlatKDTree.facet_map`
+attribute can be used to map these back to the facet numbers of the original surface (or the facet IDs of the original
+:class:`.KDTree`).
+
+Single Precision Tracing
+------------------------
+
+When :class:`.Rays32` are traced through a :class:`.FlatKDTree`, the tree is traversed and the triangles are
+intersected entirely in single precision, and the results are returned with dtype :data:`.INTERSECT32_DTYPE`.  The
+single precision copies of the node bounds and geometry are created the first time they are needed, with the node
+bounds rounded outward so that they always contain the double precision bounds.  The triangles are intersected using
+the watertight algorithm of Woop, Benthin, and Wald (2013) so that rays striking an edge or vertex shared by multiple
+triangles cannot slip through the surface due to rounding, and the slab test for the node bounds is made conservative
+by the same amount of rounding error so that no node containing an intersect is ever skipped.
+"""
+
+import copy
+
+import numpy as np
+cimport numpy as cnp
+
+import cython
+from cython.parallel import prange, parallel
+from libc.float cimport DBL_MAX, FLT_MAX, FLT_EPSILON
+from libc.math cimport fabs, fabsf
+
+from giant.ray_tracer.shapes.axis_aligned_bounding_box import AxisAlignedBoundingBox
+from giant.ray_tracer.shapes.ellipsoid import Ellipsoid
+from giant.ray_tracer.shapes.surface import RawSurface, Surface
+from giant.ray_tracer.shapes.surface cimport rays_to_frame, results_from_frame
+from giant.ray_tracer.shapes.triangle cimport _solve_3x3sys
+from giant.ray_tracer.parallel_config cimport get_thread_count, apply_schedule, SCHEDULE_DYNAMIC
+from giant.ray_tracer.kdtree import KDTree, SplitMethods, _build_node_arrays
+from giant.ray_tracer.rays import Rays32, INTERSECT32_DTYPE, TraceWorkspace
+from giant.ray_tracer.utilities import to_block
+
+from giant.rotations import Rotation
+
+
+cdef enum:
+    MAX_STACK_DEPTH = 128
+
+
+FLAT_KDTREE_MAGIC = b'GIANTFKD'
+"""
+The magic string at the beginning of every flat kdtree file.
+"""
+
+FLAT_KDTREE_VERSION = 1
+"""
+The current version of the flat kdtree file format.
+
+This is incremented any time the layout of the file changes.  Files written with a different version cannot be loaded.
+"""
+
+FLAT_KDTREE_ARRAYS = ('node_bounds', 'node_children', 'node_ranges', 'node_axes', 'node_values', 'facets', 'normals',
+                      'vertices', 'albedos', 'facet_map')
+"""
+The arrays stored in a flat kdtree file in the order they are stored.
+"""
+
+FLAT_KDTREE_HEADER_DTYPE = np.dtype([('magic', 'S8'),
+                                     ('version', '<u4'),
+                                     ('single_albedo', '<u4'),
+                                     ('num_nodes', '<u8'),
+                                     ('num_facets', '<u8'),
+                                     ('num_vertices', '<u8'),
+                                     ('num_albedos', '<u8'),
+                                     ('num_facet_map', '<u8'),
+                                     ('albedo', '<f8'),
+                                     ('min_sides', '<f8', (3,)),
+                                     ('max_sides', '<f8', (3,)),
+                                     ('has_bounding_box_rotation', '<u4'),
+                                     ('has_reference_ellipsoid', '<u4'),
+                                     ('has_rotation', '<u4'),
+                                     ('has_position', '<u4'),
+                                     ('bounding_box_rotation', '<f8', (4,)),
+                                     ('ellipsoid_center', '<f8', (3,)),
+                                     ('ellipsoid_principal_axes', '<f8', (3,)),
+                                     ('ellipsoid_orientation', '<f8', (3, 3)),
+                                     ('rotation', '<f8', (4,)),
+                                     ('position', '<f8', (3,)),
+                                     ('offsets', '<u8', (len(FLAT_KDTREE_ARRAYS),))])
+"""
+The numpy structured data type of the header of a flat kdtree file.
+"""
+
+_ALIGNMENT = 64
+"""
+The byte boundary each array in a flat kdtree file is aligned to
+"""
+
+
+def _array_layout(num_nodes, num_facets, num_vertices, num_albedos, num_facet_map):
+    """
+    This helper returns the data type and shape for each of the arrays in a flat kdtree file.
+    """
+
+    return {'node_bounds': (np.dtype('<f8'), (num_nodes, 6)),
+            'node_children': (np.dtype('<i8'), (num_nodes, 2)),
+            'node_ranges': (np.dtype('<i8'), (num_nodes, 2)),
+            'node_axes': (np.dtype('<i8'), (num_nodes,)),
+            'node_values': (np.dtype('<f8'), (num_nodes,)),
+            'facets': (np.dtype('<u4'), (num_facets, 3)),
+            'normals': (np.dtype('<f8'), (num_facets, 3)),
+            'vertices': (np.dtype('<f8'), (num_vertices, 3)),
+            'albedos': (np.dtype('<f8'), (num_albedos,)),
+            'facet_map': (np.dtype('<i8'), (num_facet_map,))}
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline bint _ray_box(const double *bounds, const double[:] start, const double[:] inv_direction,
+                          double *near_distance) noexcept nogil:
+    """
+    This C function checks whether a ray intersects the bounds of a node stored as
+    ``[min_x, min_y, min_z, max_x, max_y, max_z]``.
+
+    This is the same slab test used by :class:`.AxisAlignedBoundingBox`.
+    """
+
+    cdef:
+        size_t i
+        double t1, t2, tmin, tmax
+
+    t1 = (bounds[0] - start[0]) * inv_direction[0]
+    t2 = (bounds[3] - start[0]) * inv_direction[0]
+
+    tmin = min(t1, t2)
+    tmax = max(t1, t2)
+
+    for i in range(1, 3):
+        t1 = (bounds[i] - start[i]) * inv_direction[i]
+        t2 = (bounds[i + 3] - start[i]) * inv_direction[i]
+
+        tmin = max(tmin, min(t1, t2))
+        tmax = min(tmax, max(t1, t2))
+
+    near_distance[0] = tmin
+
+    return tmax >= max(tmin, 0)
+
+
+cdef float BOX_TOLERANCE32 = 1 + 2 * (3 * FLT_EPSILON / 2) / (1 - 3 * FLT_EPSILON / 2)
+"""
+The amount to scale the far distance by in the single precision slab test so that it is conservative.
+
+This is 1 + 2 gamma(3) which bounds the rounding error in the far distance (see Ize, "Robust BVH Ray Traversal", 2013)
+"""
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline bint _ray_box32(const float *bounds, const float[:] start, const float[:] inv_direction,
+                            float *near_distance) noexcept nogil:
+    """
+    This C function is the single precision version of :func:`_ray_box`.
+
+    The far distance is scaled by :data:`BOX_TOLERANCE32` so that rounding can never cause a box that is actually
+    struck to be missed.
+    """
+
+    cdef:
+        size_t i
+        float t1, t2, tmin, tmax
+
+    t1 = (bounds[0] - start[0]) * inv_direction[0]
+    t2 = (bounds[3] - start[0]) * inv_direction[0]
+
+    tmin = min(t1, t2)
+    tmax = max(t1, t2)
+
+    for i in range(1, 3):
+        t1 = (bounds[i] - start[i]) * inv_direction[i]
+        t2 = (bounds[i + 3] - start[i]) * inv_direction[i]
+
+        tmin = max(tmin, min(t1, t2))
+        tmax = min(tmax, max(t1, t2))
+
+    near_distance[0] = tmin
+
+    return tmax * BOX_TOLERANCE32 >= max(tmin, 0)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline void _watertight_setup(const float[:] direction, int *axes, float *shear) noexcept nogil:
+    """
+    This C function computes the per ray constants for the watertight ray/triangle intersection.
+
+    ``axes`` is set to the axes (kx, ky, kz) where kz is the dimension where the direction is largest in magnitude and
+    kx, ky are chosen to preserve the winding direction.  ``shear`` is set to the shear constants that transform the ray
+    direction to the unit z axis.
+    """
+
+    cdef int kx, ky, kz = 0
+
+    if fabsf(direction[1]) > fabsf(direction[kz]):
+        kz = 1
+    if fabsf(direction[2]) > fabsf(direction[kz]):
+        kz = 2
+
+    kx = (kz + 1) % 3
+    ky = (kx + 1) % 3
+
+    # swap kx and ky to preserve the winding direction of the triangles
+    if direction[kz] < 0:
+        kx, ky = ky, kx
+
+    axes[0] = kx
+    axes[1] = ky
+    axes[2] = kz
+
+    shear[0] = direction[kx] / direction[kz]
+    shear[1] = direction[ky] / direction[kz]
+    shear[2] = 1 / direction[kz]
+
+
+def _tree_depth(node_children):
+    """
+    This helper determines the depth of a tree (the number of nodes from the root to the deepest leaf) given the
+    children array.
+    """
+
+    depth = 0
+    frontier = np.zeros(1, dtype=np.int64)
+
+    while frontier.size:
+        depth += 1
+        children = node_children[frontier]
+        frontier = children[children >= 0]
+
+    return depth
+
+
+cdef class FlatKDTree(Surface):
+    """
+    __init__(self, node_bounds, node_children, node_ranges, node_axes, node_values, facets, normals, vertices, albedos, facet_map=None, _rotation=None, _position=None, _bounding_box=None, _reference_ellipsoid=None)
+
+    A flat, array backed representation of a :class:`.KDTree` which can be memory mapped from disk.
+
+    The tree is described by arrays, where row ``i`` of each of the node arrays describes node ``i`` (the root is node
+    0):
+
+    * :attr:`node_bounds` gives the ``[min_x, min_y, min_z, max_x, max_y, max_z]`` bounds of each node
+    * :attr:`node_children` gives the index of the left and right child of each node (-1 for leaf nodes)
+    * :attr:`node_ranges` gives the start and stop of the block of facets belonging to each node
+    * :attr:`node_axes` and :attr:`node_values` give the axis and value each node was split on (-1 for the axis of a
+      leaf node)
+
+    The geometry is stored in the :attr:`facets`, :attr:`normals`, :attr:`vertices`, and :attr:`albedos` arrays just like
+    a :class:`.Triangle64`, except that the facets are ordered so that each node owns a contiguous block.
+
+    When tracing, the tree is traversed without recursion using a fixed size stack, visiting the child on the near side
+    of the split first so that the search can be stopped early once a closer intersection has been found.  Just like the
+    :class:`.KDTree`, rotations and translations are applied to the rays instead of the tree.
+
+    Typically you won't create this class directly.  Instead use :meth:`from_kdtree`, :meth:`from_surface`, or
+    :meth:`load`.
+    """
+
+    def __init__(self, node_bounds, node_children, node_ranges, node_axes, node_values, facets, normals, vertices,
+                 albedos, facet_map=None, _rotation=None, _position=None, _bounding_box=None,
+                 _reference_ellipsoid=None):
+        """
+        :param node_bounds: The bounds of each node as a nx6 array
+        :type node_bounds: np.ndarray
+        :param node_children: The left/right child of each node as a nx2 array (-1 for leaf nodes)
+        :type node_children: np.ndarray
+        :param node_ranges: The start/stop of the block of facets for each node as a nx2 array
+        :type node_ranges: np.ndarray
+        :param node_axes: The axis each node was split on as a length n array (-1 for leaf nodes)
+        :type node_axes: np.ndarray
+        :param node_values: The value each node was split at as a length n array
+        :type node_values: np.ndarray
+        :param facets: The permuted facets as a mx3 array of indices into the vertices
+        :type facets: np.ndarray
+        :param normals: The normal vector for each facet as a mx3 array
+        :type normals: np.ndarray
+        :param vertices: The vertices as a vx3 array
+        :type vertices: np.ndarray
+        :param albedos: The albedo for each vertex as a length v array or a single scalar albedo
+        :type albedos: Union[float, np.ndarray]
+        :param facet_map: The facet number (or ID) in the source of each facet in the permuted facet buffer
+        :type facet_map: Optional[np.ndarray]
+        :param _rotation: The current orientation from the world frame to the local tree frame as a :class:`.Rotation`.
+                          This is typically not used by the user.
+        :type _rotation: Optional[Rotation]
+        :param _position: The negative of the current location of the tree in the world frame.  This is typically not
+                          used by the user.
+        :type _position: Optional[np.ndarray]
+        :param _bounding_box: The bounding box for the tree in the world frame.  If ``None`` then it is formed from the
+                              bounds of the root node.
+        :type _bounding_box: Optional[AxisAlignedBoundingBox]
+        :param _reference_ellipsoid: The reference ellipsoid for the tree.
+        :type _reference_ellipsoid: Optional[Ellipsoid]
+        """
+
+        self._node_bounds = node_bounds
+        self._node_children = node_children
+        self._node_ranges = node_ranges
+        self._node_axes = node_axes
+        self._node_values = node_values
+        self._facets = facets
+        self._normals = normals
+        self._vertices = vertices
+
+        if np.isscalar(albedos) or (np.size(albedos) == 1):
+            self._single_albedo = True
+            self._albedo = float(np.asarray(albedos).ravel()[0])
+            self._albedo_array = np.zeros(0, dtype=np.float64)
+        else:
+            self._single_albedo = False
+            self._albedo = np.nan
+            self._albedo_array = albedos
+
+        if facet_map is None:
+            facet_map = np.zeros(0, dtype=np.int64)
+
+        self._facet_map = facet_map
+
+        self._has_float32 = False
+
+        self.depth = _tree_depth(self.node_children)
+
+        if self.depth >= MAX_STACK_DEPTH:
+            raise ValueError('The tree is too deep to be flattened ({} levels).  '
+                             'It must have fewer than {} levels'.format(self.depth, int(MAX_STACK_DEPTH)))
+
+        self._rotation = _rotation
+        """
+        The rotation to rotate into the tree's frame
+        """
+
+        self._position = _position
+        """
+        The position vector to translate to the origin of the tree's frame
+        """
+
+        if _bounding_box is None:
+            self.bounding_box = AxisAlignedBoundingBox(self.node_bounds[0, :3], self.node_bounds[0, 3:])
+        else:
+            self.bounding_box = _bounding_box
+
+        self.reference_ellipsoid = _reference_ellipsoid
+
+    def __reduce__(self):
+        """
+        Used to package the tree for pickling/unpickling.
+        """
+
+        return self.__class__, (self.node_bounds, self.node_children, self.node_ranges, self.node_axes,
+                                self.node_values, self.facets, self.normals, self.vertices, self.albedos,
+                                self.facet_map, self._rotation, self.position, self.bounding_box,
+                                self.reference_ellipsoid)
+
+    @property
+    def node_bounds(self):
+        """
+        The ``[min_x, min_y, min_z, max_x, max_y, max_z]`` bounds of each node in the tree frame as a nx6 array
+        """
+        return np.asarray(self._node_bounds)
+
+    @property
+    def node_children(self):
+        """
+        The index of the left and right child of each node as a nx2 array.  Leaf nodes have children of -1
+        """
+        return np.asarray(self._node_children)
+
+    @property
+    def node_ranges(self):
+        """
+        The start and stop index of the block of facets belonging to each node as a nx2 array
+        """
+        return np.asarray(self._node_ranges)
+
+    @property
+    def node_axes(self):
+        """
+        The axis each node was split along as a length n array.  Leaf nodes have an axis of -1
+        """
+        return np.asarray(self._node_axes)
+
+    @property
+    def node_values(self):
+        """
+        The value along :attr:`node_axes` each node was split at as a length n array
+        """
+        return np.asarray(self._node_values)
+
+    @property
+    def facets(self):
+        """
+        The permuted facets as a mx3 array of indices into :attr:`vertices`
+        """
+        return np.asarray(self._facets)
+
+    @property
+    def normals(self):
+        """
+        The normal vector for each facet in the tree frame as a mx3 array
+        """
+        return np.asarray(self._normals)
+
+    @property
+    def vertices(self):
+        """
+        The vertices of the surface in the tree frame as a vx3 array
+        """
+        return np.asarray(self._vertices)
+
+    @property
+    def albedos(self):
+        """
+        The albedo for the surface, either as a scalar or as a length v array with the albedo of each vertex
+        """
+        if self._single_albedo:
+            return self._albedo
+        else:
+            return np.asarray(self._albedo_array)
+
+    @property
+    def facet_map(self):
+        """
+        The facet number in the source surface (or the facet ID in the source :class:`.KDTree`) of each facet in the
+        permuted facet buffer.
+
+        This is empty if the source of each facet is unknown.
+        """
+        return np.asarray(self._facet_map)
+
+    @property
+    def num_faces(self):
+        """
+        The number of faces in the tree
+        """
+        return self._facets.shape[0]
+
+    @property
+    def num_nodes(self):
+        """
+        The number of nodes in the tree
+        """
+        return self._node_bounds.shape[0]
+
+    @property
+    def position(self):
+        """
+        The current location of the center of the tree in the world frame as a numpy array.
+
+        This is used to translate the rays into the tree frame (using the opposite) which is typically more
+        computationally more efficient than translating the entire tree
+        """
+
+        if self._position is None:
+            return None
+        else:
+            return np.asarray(self._position)
+
+    @property
+    def rotation(self):
+        """
+        The current orientation of the tree with respect to the world frame as a :class:`.Rotation`
+
+        This is used to rotate the rays into the tree frame (using the inverse) which is typically more
+        computationally more efficient than rotating the entire tree
+        """
+        return self._rotation
+
+    @property
+    def order(self):
+        """
+        The number of digits (minus 1) required to represent the facet number of any facet in the tree.
+        """
+
+        return int(np.log10(max(self.num_faces, 1)))
+
+    @classmethod
+    def from_kdtree(cls, tree):
+        """
+        from_kdtree(cls, tree)
+
+        This class method creates a flat tree from a :class:`.KDTree` that has already been built.
+
+        The structure of the tree is preserved exactly.  The :attr:`facet_map` of the result contains the facet ID each
+        facet would have been assigned by the :class:`.KDTree` so that results can be converted between the two.  The
+        current location and orientation of the tree are also preserved.
+
+        :param tree: The built tree to flatten
+        :type tree: KDTree
+        :return: The flattened tree
+        :rtype: FlatKDTree
+        """
+
+        if tree.root is None:
+            raise ValueError('The tree must be built before it can be flattened')
+
+        # number the nodes in breadth first order
+        nodes = [tree.root]
+        node_children = []
+        index = 0
+        while index < len(nodes):
+            node = nodes[index]
+            if node.has_surface:
+                node_children.append((-1, -1))
+            else:
+                node_children.append((len(nodes), len(nodes) + 1))
+                nodes.append(node.left)
+                nodes.append(node.right)
+            index += 1
+
+        node_children = np.array(node_children, dtype=np.int64)
+        node_bounds = np.array([np.concatenate([node.bounding_box.min_sides, node.bounding_box.max_sides])
+                                for node in nodes], dtype=np.float64)
+
+        # determine the split axis and value from the children so that we can still visit the near child first
+        node_axes = -np.ones(len(nodes), dtype=np.int64)
+        node_values = np.zeros(len(nodes), dtype=np.float64)
+
+        branches = node_children[:, 0] >= 0
+        left_centers = node_bounds[node_children[branches, 0]].reshape(-1, 2, 3).mean(axis=1)
+        right_centers = node_bounds[node_children[branches, 1]].reshape(-1, 2, 3).mean(axis=1)
+        axes = np.abs(right_centers - left_centers).argmax(axis=1)
+        rows = np.arange(axes.size)
+
+        node_axes[branches] = axes
+        node_values[branches] = (left_centers[rows, axes] + right_centers[rows, axes]) / 2
+
+        # gather the facets in depth first order so that every node owns a contiguous block
+        node_ranges = np.zeros((len(nodes), 2), dtype=np.int64)
+        facets = []
+        normals = []
+        facet_map = []
+        count = 0
+        sizer = 10 ** (tree.root.order + 1)
+
+        stack = [(0, False)]
+        while stack:
+            index, visited = stack.pop()
+            node = nodes[index]
+
+            if node.has_surface:
+                node_ranges[index] = (count, count + node.surface.num_faces)
+                facets.append(node.surface.facets)
+                normals.append(node.surface.normals)
+                facet_map.append(np.arange(node.surface.num_faces, dtype=np.int64) + node.id * sizer)
+                count += node.surface.num_faces
+
+            elif visited:
+                node_ranges[index] = (node_ranges[node_children[index, 0], 0],
+                                      node_ranges[node_children[index, 1], 1])
+
+            else:
+                stack.append((index, True))
+                stack.append((node_children[index, 1], False))
+                stack.append((node_children[index, 0], False))
+
+        surface = tree.surface
+
+        if surface._single_albedo:
+            albedos = surface.albedos
+        else:
+            albedos = np.asarray(surface.albedos, dtype=np.float64)
+
+        return cls(node_bounds, node_children, node_ranges, node_axes, node_values,
+                   np.vstack(facets).astype(np.uint32), np.vstack(normals).astype(np.float64),
+                   np.asarray(surface.vertices, dtype=np.float64), albedos, np.concatenate(facet_map),
+                   _rotation=copy.deepcopy(tree.rotation), _position=copy.deepcopy(tree.position),
+                   _bounding_box=copy.deepcopy(tree.bounding_box),
+                   _reference_ellipsoid=copy.deepcopy(tree.reference_ellipsoid))
+
+    @classmethod
+    def from_surface(cls, surface, max_depth=10, force=True, print_progress=False,
+                     split_method=SplitMethods.MEDIAN, sah_bins=32, traversal_cost=1.0, intersection_cost=1.5):
+        """
+        from_surface(cls, surface, max_depth=10, force=True, print_progress=False, split_method=SplitMethods.MEDIAN, sah_bins=32, traversal_cost=1.0, intersection_cost=1.5)
+
+        This class method builds a flat tree directly from a surface without creating any :class:`.KDNode` objects.
+
+        The tree is built in the same way as :meth:`.KDTree.build_parallel`, and the arguments have the same meaning.
+        The :attr:`facet_map` of the result contains the row of each facet in the facets of the original surface.
+
+        :param surface: The surface to build the tree for
+        :type surface: RawSurface
+        :param max_depth: The maximum depth of the tree
+        :type max_depth: int
+        :param force: A flag specifying that we should split nodes even when there are less than 10 geometry
+                      primitives in them
+        :type force: bool
+        :param print_progress: A flag specifying that we should print out the progress in building the tree.
+        :type print_progress: bool
+        :param split_method: The method to use to choose how to split each node
+        :type split_method: Union[SplitMethods, str]
+        :param sah_bins: The number of bins to use along each axis when evaluating the surface area heuristic
+        :type sah_bins: int
+        :param traversal_cost: The relative cost of traversing a node for the surface area heuristic
+        :type traversal_cost: float
+        :param intersection_cost: The relative cost of tracing a single geometry primitive for the surface area
+                                  heuristic
+        :type intersection_cost: float
+        :return: The flat tree
+        :rtype: FlatKDTree
+        """
+
+        if not isinstance(surface, RawSurface):
+            raise ValueError("surface must be a surface instance.")
+
+        permutation, starts, stops, bounds, children, axes, values = _build_node_arrays(surface, max_depth, force,
+                                                                                        print_progress,
+                                                                                        split_method, sah_bins,
+                                                                                        traversal_cost,
+                                                                                        intersection_cost)
+
+        if surface._single_albedo:
+            albedos = surface.albedos
+        else:
+            albedos = np.asarray(surface.albedos, dtype=np.float64)
+
+        return cls(bounds, children, np.column_stack([starts, stops]), axes, values,
+                   surface.facets[permutation], np.asarray(surface.normals, dtype=np.float64)[permutation],
+                   np.asarray(surface.vertices, dtype=np.float64), albedos, permutation,
+                   _reference_ellipsoid=copy.deepcopy(surface.reference_ellipsoid))
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef double _get_albedo(self, const double[3] rhs, const cnp.int64_t face) noexcept nogil:
+        """
+        This C method determines the interpolated albedo for an intersection point using the barycentric coordinates
+        in ``rhs`` in the same way as :class:`.Triangle64`.
+        """
+
+        cdef:
+            int i
+            double alb
+
+        if self._single_albedo:
+            return self._albedo
+
+        alb = self._albedo_array[self._facets[face, 0]]
+
+        for i in range(2):
+            alb += rhs[i] * (self._albedo_array[self._facets[face, i + 1]] - self._albedo_array[self._facets[face, 0]])
+
+        return alb
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef bint _intersect_facet(self, const cnp.int64_t face, const double[:] start, const double[:] direction,
+                               double[3] solution) noexcept nogil:
+        """
+        This C method checks whether a ray intersects a single facet, storing the barycentric coordinates and distance
+        in ``solution``.
+
+        This uses the same approach as :class:`.Triangle64` so that the results are identical.
+        """
+
+        cdef:
+            int i
+            double ldot = 0
+            double[3][3] coef_mat
+            double[3] rhs
+
+        # check to see if the ray is parallel to the face
+        for i in range(3):
+            ldot += direction[i] * self._normals[face, i]
+
+        if fabs(ldot) <= 1e-12:
+            return False
+
+        # build the system to solve for the barycentric coordinates and the distance along the ray
+        for i in range(3):
+            coef_mat[i][0] = self._vertices[self._facets[face, 1], i] - self._vertices[self._facets[face, 0], i]
+            coef_mat[i][1] = self._vertices[self._facets[face, 2], i] - self._vertices[self._facets[face, 0], i]
+            coef_mat[i][2] = -direction[i]
+            rhs[i] = start[i] - self._vertices[self._facets[face, 0], i]
+
+        _solve_3x3sys(coef_mat, rhs, solution)
+
+        return (solution[0] >= 0) & (solution[1] >= 0) & (solution[2] > 0) & ((solution[0] + solution[1]) <= 1)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef void _compute_intersect(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
+                                 const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore,
+                                 cnp.uint8_t *hit, double[:] intersect, double[:] normal, double *albedo,
+                                 cnp.int64_t *facet, double *hit_distance) noexcept nogil:
+        """
+        This C method is used to compute the intersect between a single ray and the tree.
+
+        The tree is traversed using a fixed size stack, visiting the near child of each branch first and skipping any
+        node whose bounds are farther away than the closest intersection found so far.
+
+        The python version of this method :meth:`.compute_intersect` should be used unless working from Cython
+        """
+
+        cdef:
+            cnp.int64_t[MAX_STACK_DEPTH] stack
+            Py_ssize_t top = 1
+            cnp.int64_t node, face, axis, best_face = -1
+            double near_distance
+            double best_distance = hit_distance[0]
+            double[3] solution
+            double[3] best_solution
+            size_t i
+            bint ignore_face
+
+        if best_distance != best_distance:
+            best_distance = DBL_MAX
+
+        stack[0] = 0
+
+        while top > 0:
+
+            top -= 1
+            node = stack[top]
+
+            if not _ray_box(&self._node_bounds[node, 0], start, inv_direction, &near_distance):
+                continue
+
+            if near_distance > best_distance:
+                continue
+
+            if self._node_children[node, 0] < 0:
+
+                for face in range(self._node_ranges[node, 0], self._node_ranges[node, 1]):
+
+                    # check to see if we should be ignoring this face
+                    ignore_face = False
+                    for i in range(num_ignore):
+                        if face == ignore[i]:
+                            ignore_face = True
+                            break
+
+                    if ignore_face:
+                        continue
+
+                    if self._intersect_facet(face, start, direction, solution):
+
+                        if solution[2] < best_distance:
+                            best_distance = solution[2]
+                            best_face = face
+                            for i in range(3):
+                                best_solution[i] = solution[i]
+
+            else:
+                # push the far child first so that the near child is visited first
+                axis = self._node_axes[node]
+                if (axis >= 0) and (direction[axis] < 0):
+                    stack[top] = self._node_children[node, 0]
+                    stack[top + 1] = self._node_children[node, 1]
+                else:
+                    stack[top] = self._node_children[node, 1]
+                    stack[top + 1] = self._node_children[node, 0]
+
+                top += 2
+
+        if best_face >= 0:
+            hit[0] = True
+            for i in range(3):
+                intersect[i] = start[i] + best_distance * direction[i]
+                normal[i] = self._normals[best_face, i]
+
+            facet[0] = best_face
+            albedo[0] = self._get_albedo(best_solution, best_face)
+            hit_distance[0] = best_distance
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef bint _is_occluded(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
+                           const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore) noexcept nogil:
+        """
+        This C method is used to check whether a single ray strikes anything in the tree, stopping as soon as anything
+        is struck.
+
+        The python version of this method :meth:`.is_occluded` should be used unless working from Cython
+        """
+
+        cdef:
+            cnp.int64_t[MAX_STACK_DEPTH] stack
+            Py_ssize_t top = 1
+            cnp.int64_t node, face
+            double near_distance
+            double[3] solution
+            size_t i
+            bint ignore_face
+
+        stack[0] = 0
+
+        while top > 0:
+
+            top -= 1
+            node = stack[top]
+
+            if not _ray_box(&self._node_bounds[node, 0], start, inv_direction, &near_distance):
+                continue
+
+            if self._node_children[node, 0] < 0:
+
+                for face in range(self._node_ranges[node, 0], self._node_ranges[node, 1]):
+
+                    ignore_face = False
+                    for i in range(num_ignore):
+                        if face == ignore[i]:
+                            ignore_face = True
+                            break
+
+                    if ignore_face:
+                        continue
+
+                    if self._intersect_facet(face, start, direction, solution):
+                        return True
+
+            else:
+                stack[top] = self._node_children[node, 1]
+                stack[top + 1] = self._node_children[node, 0]
+
+                top += 2
+
+        return False
+
+    def _ensure_float32(self):
+        """
+        This helper creates the single precision copies of the node bounds and geometry used when tracing
+        :class:`.Rays32`, if they haven't been created already.
+
+        The node bounds are rounded outward so that the single precision bounds always contain the double precision
+        bounds.
+        """
+
+        if self._has_float32:
+            return
+
+        bounds = self.node_bounds
+
+        bounds32 = np.empty(bounds.shape, dtype=np.float32)
+        bounds32[:, :3] = np.nextafter(bounds[:, :3].astype(np.float32), np.float32(-np.inf))
+        bounds32[:, 3:] = np.nextafter(bounds[:, 3:].astype(np.float32), np.float32(np.inf))
+
+        self._node_bounds32 = bounds32
+        self._normals32 = np.ascontiguousarray(self.normals, dtype=np.float32)
+        self._vertices32 = np.ascontiguousarray(self.vertices, dtype=np.float32)
+
+        self._has_float32 = True
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.cdivision(True)
+    cdef bint _intersect_facet32(self, const cnp.int64_t face, const float[:] start, const int *axes,
+                                 const float *shear, float *solution) noexcept nogil:
+        """
+        This C method checks whether a ray intersects a single facet in single precision, storing the barycentric
+        coordinates and distance in ``solution`` in the same form as :meth:`_intersect_facet`.
+
+        This uses the watertight algorithm from Woop, Benthin, and Wald (2013) "Watertight Ray/Triangle Intersection".
+        The ray is transformed so that it points along the z axis and then the 2D edge functions are evaluated for
+        the triangle.  Because the edge functions are computed the same way for an edge shared by 2 triangles, a ray
+        can never pass between them.  If any edge function is exactly 0 it is recomputed in double precision to resolve
+        the tie consistently.
+        """
+
+        cdef:
+            int i
+            int kx = axes[0]
+            int ky = axes[1]
+            int kz = axes[2]
+            float[3] a
+            float[3] b
+            float[3] c
+            float ax, ay, bx, by, cx, cy, az, bz, cz
+            float u, v, w, det, distance, inv_det
+
+        for i in range(3):
+            a[i] = self._vertices32[self._facets[face, 0], i] - start[i]
+            b[i] = self._vertices32[self._facets[face, 1], i] - start[i]
+            c[i] = self._vertices32[self._facets[face, 2], i] - start[i]
+
+        # shear the vertices so the ray points along the z axis
+        ax = a[kx] - shear[0] * a[kz]
+        ay = a[ky] - shear[1] * a[kz]
+        bx = b[kx] - shear[0] * b[kz]
+        by = b[ky] - shear[1] * b[kz]
+        cx = c[kx] - shear[0] * c[kz]
+        cy = c[ky] - shear[1] * c[kz]
+
+        # compute the scaled barycentric coordinates (the edge functions)
+        u = cx * by - cy * bx
+        v = ax * cy - ay * cx
+        w = bx * ay - by * ax
+
+        # fall back to double precision for the edge functions on the edges
+        if (u == 0) or (v == 0) or (w == 0):
+            u = <float> (<double> cx * <double> by - <double> cy * <double> bx)
+            v = <float> (<double> ax * <double> cy - <double> ay * <double> cx)
+            w = <float> (<double> bx * <double> ay - <double> by * <double> ax)
+
+        # the ray is outside of an edge
+        if ((u < 0) or (v < 0) or (w < 0)) and ((u > 0) or (v > 0) or (w > 0)):
+            return False
+
+        det = u + v + w
+
+        # the ray is parallel to the triangle
+        if det == 0:
+            return False
+
+        az = shear[2] * a[kz]
+        bz = shear[2] * b[kz]
+        cz = shear[2] * c[kz]
+
+        distance = u * az + v * bz + w * cz
+
+        # the intersect is behind the start of the ray
+        if ((det < 0) and (distance >= 0)) or ((det > 0) and (distance <= 0)):
+            return False
+
+        inv_det = 1 / det
+
+        solution[0] = v * inv_det
+        solution[1] = w * inv_det
+        solution[2] = distance * inv_det
+
+        return True
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef void _compute_intersect32(self, const float[:] start, const float[:] direction,
+                                   const float[:] inv_direction, const cnp.int64_t[] ignore,
+                                   const cnp.uint32_t num_ignore, cnp.uint8_t *hit, float[:] intersect,
+                                   float[:] normal, float *albedo, cnp.int64_t *facet,
+                                   float *hit_distance) noexcept nogil:
+        """
+        This C method is the single precision version of :meth:`_compute_intersect`.
+
+        :meth:`_ensure_float32` must have been called before this is used.
+        """
+
+        cdef:
+            cnp.int64_t[MAX_STACK_DEPTH] stack
+            Py_ssize_t top = 1
+            cnp.int64_t node, face, axis, best_face = -1
+            float near_distance
+            float best_distance = hit_distance[0]
+            float[3] solution
+            double[3] best_solution
+            int[3] axes
+            float[3] shear
+            size_t i
+            bint ignore_face
+
+        if best_distance != best_distance:
+            best_distance = FLT_MAX
+
+        _watertight_setup(direction, axes, shear)
+
+        stack[0] = 0
+
+        while top > 0:
+
+            top -= 1
+            node = stack[top]
+
+            if not _ray_box32(&self._node_bounds32[node, 0], start, inv_direction, &near_distance):
+                continue
+
+            if near_distance > best_distance:
+                continue
+
+            if self._node_children[node, 0] < 0:
+
+                for face in range(self._node_ranges[node, 0], self._node_ranges[node, 1]):
+
+                    # check to see if we should be ignoring this face
+                    ignore_face = False
+                    for i in range(num_ignore):
+                        if face == ignore[i]:
+                            ignore_face = True
+                            break
+
+                    if ignore_face:
+                        continue
+
+                    if self._intersect_facet32(face, start, axes, shear, solution):
+
+                        if solution[2] < best_distance:
+                            best_distance = solution[2]
+                            best_face = face
+                            for i in range(3):
+                                best_solution[i] = solution[i]
+
+            else:
+                # push the far child first so that the near child is visited first
+                axis = self._node_axes[node]
+                if (axis >= 0) and (direction[axis] < 0):
+                    stack[top] = self._node_children[node, 0]
+                    stack[top + 1] = self._node_children[node, 1]
+                else:
+                    stack[top] = self._node_children[node, 1]
+                    stack[top + 1] = self._node_children[node, 0]
+
+                top += 2
+
+        if best_face >= 0:
+            hit[0] = True
+            for i in range(3):
+                intersect[i] = start[i] + best_distance * direction[i]
+                normal[i] = self._normals32[best_face, i]
+
+            facet[0] = best_face
+            albedo[0] = <float> self._get_albedo(best_solution, best_face)
+            hit_distance[0] = best_distance
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef bint _is_occluded32(self, const float[:] start, const float[:] direction, const float[:] inv_direction,
+                             const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore) noexcept nogil:
+        """
+        This C method is the single precision version of :meth:`_is_occluded`.
+
+        :meth:`_ensure_float32` must have been called before this is used.
+        """
+
+        cdef:
+            cnp.int64_t[MAX_STACK_DEPTH] stack
+            Py_ssize_t top = 1
+            cnp.int64_t node, face
+            float near_distance
+            float[3] solution
+            int[3] axes
+            float[3] shear
+            size_t i
+            bint ignore_face
+
+        _watertight_setup(direction, axes, shear)
+
+        stack[0] = 0
+
+        while top > 0:
+
+            top -= 1
+            node = stack[top]
+
+            if not _ray_box32(&self._node_bounds32[node, 0], start, inv_direction, &near_distance):
+                continue
+
+            if self._node_children[node, 0] < 0:
+
+                for face in range(self._node_ranges[node, 0], self._node_ranges[node, 1]):
+
+                    ignore_face = False
+                    for i in range(num_ignore):
+                        if face == ignore[i]:
+                            ignore_face = True
+                            break
+
+                    if ignore_face:
+                        continue
+
+                    if self._intersect_facet32(face, start, axes, shear, solution):
+                        return True
+
+            else:
+                stack[top] = self._node_children[node, 1]
+                stack[top + 1] = self._node_children[node, 0]
+
+                top += 2
+
+        return False
+
+    @cython.boundscheck(False)
+    cdef void _trace32(self, const float[:, :] starts, const float[:, :] directions, const float[:, :] inv_directions,
+                       const cnp.int64_t[:, :] ignore, const cnp.uint32_t num_rays, const bint omp,
+                       cnp.uint8_t[:] hit, float[:, :] intersect, float[:, :] normal, float[:] albedo,
+                       cnp.int64_t[:] facet, float[:] hit_distances) noexcept nogil:
+        """
+        This C method is the single precision version of :meth:`_trace`.
+
+        Unless specifically requested to the contrary, this method uses OpenMP to parallelize the tracing
+        """
+
+        cdef int ray
+        cdef long long num_ignore = ignore.shape[1]
+
+        if omp:
+
+            apply_schedule(SCHEDULE_DYNAMIC)
+            with nogil, parallel(num_threads=get_thread_count()):
+                for ray in prange(num_rays, schedule='runtime'):
+
+                    self._compute_intersect32(starts[:, ray], directions[:, ray], inv_directions[:, ray],
+                                              &ignore[ray, 0], num_ignore,
+                                              &hit[ray], intersect[ray], normal[ray], &albedo[ray], &facet[ray],
+                                              &hit_distances[ray])
+        else:
+
+            with nogil:
+                for ray in range(num_rays):
+                    self._compute_intersect32(starts[:, ray], directions[:, ray], inv_directions[:, ray],
+                                              &ignore[ray, 0], num_ignore,
+                                              &hit[ray], intersect[ray], normal[ray], &albedo[ray], &facet[ray],
+                                              &hit_distances[ray])
+
+    @cython.boundscheck(False)
+    cdef void _trace_occlusion32(self, const float[:, :] starts, const float[:, :] directions,
+                                 const float[:, :] inv_directions, const cnp.int64_t[:, :] ignore,
+                                 const cnp.uint32_t num_rays, const bint omp, cnp.uint8_t[:] occluded) noexcept nogil:
+        """
+        This C method is the single precision version of :meth:`_trace_occlusion`.
+
+        Unless specifically requested to the contrary, this method uses OpenMP to parallelize the checks
+        """
+
+        cdef int ray
+        cdef long long num_ignore = ignore.shape[1]
+
+        if omp:
+
+            apply_schedule(SCHEDULE_DYNAMIC)
+            with nogil, parallel(num_threads=get_thread_count()):
+                for ray in prange(num_rays, schedule='runtime'):
+
+                    occluded[ray] = self._is_occluded32(starts[:, ray], directions[:, ray], inv_directions[:, ray],
+                                                        &ignore[ray, 0], num_ignore)
+        else:
+
+            with nogil:
+                for ray in range(num_rays):
+                    occluded[ray] = self._is_occluded32(starts[:, ray], directions[:, ray], inv_directions[:, ray],
+                                                        &ignore[ray, 0], num_ignore)
+
+    def _trace_single(self, rays, omp):
+        """
+        This helper traces single precision rays that are already expressed in the tree frame, returning the results
+        as an array with dtype :data:`.INTERSECT32_DTYPE`.
+        """
+
+        self._ensure_float32()
+
+        starts = np.asarray(rays.start, dtype=np.float32).reshape(3, -1)
+        directions = np.asarray(rays.direction, dtype=np.float32).reshape(3, -1)
+        inv_directions = np.asarray(rays.inv_direction, dtype=np.float32).reshape(3, -1)
+
+        results = np.zeros(rays.num_rays, INTERSECT32_DTYPE)
+
+        hits = results["check"].astype(np.uint8)  # use integer dtype since cython doesn't like bool arrays
+        intersects = results["intersect"]
+        distances = results["distance"]
+        normals = results["normal"]
+        albedos = results["albedo"]
+        facets = results["facet"]
+
+        intersects[:] = np.nan
+        distances[:] = np.inf
+        normals[:] = np.nan
+        albedos[:] = np.nan
+        facets[:] = -1
+
+        if rays.ignore is None:
+            ignore = -np.ones((rays.num_rays, 1), dtype=np.int64)
+        else:
+            ignore = to_block(rays.ignore)
+
+        self._trace32(starts, directions, inv_directions, ignore, rays.num_rays, omp,
+                      hits, intersects, normals, albedos, facets, distances)
+
+        results["check"] = hits
+
+        return results
+
+    def _is_occluded_single(self, rays, omp):
+        """
+        This helper checks whether single precision rays that are already expressed in the tree frame strike anything
+        in the tree.
+        """
+
+        self._ensure_float32()
+
+        starts = np.asarray(rays.start, dtype=np.float32).reshape(3, -1)
+        directions = np.asarray(rays.direction, dtype=np.float32).reshape(3, -1)
+        inv_directions = np.asarray(rays.inv_direction, dtype=np.float32).reshape(3, -1)
+
+        occluded = np.zeros(rays.num_rays, dtype=np.uint8)
+
+        if rays.ignore is None:
+            ignore = -np.ones((rays.num_rays, 1), dtype=np.int64)
+        else:
+            ignore = to_block(rays.ignore)
+
+        self._trace_occlusion32(starts, directions, inv_directions, ignore, rays.num_rays, omp, occluded)
+
+        return occluded.astype(bool)
+
+    def is_occluded(self, rays, omp=True):
+        """
+        is_occluded(self, rays, omp=True)
+
+        This python method checks whether each ray strikes anything in the tree.
+
+        The traversal for each ray stops as soon as anything is struck and none of the intersection geometry is
+        computed, making this much cheaper than :meth:`trace` for shadow checks.
+
+        This method also translates/rotates the rays into the tree frame first, for efficiency in tracing.  If the rays
+        are :class:`.Rays32` then the checks are done entirely in single precision.
+
+        :param rays: The rays to check against the tree
+        :type rays: Union[Rays, Rays32]
+        :param omp: A boolean flag specifying whether to use parallel processing (``True``) or not
+        :type omp: bool
+        :return: A length n boolean numpy array which is ``True`` where the ray struck something
+        :rtype: np.ndarray
+        """
+
+        if (self._rotation is not None) or (self._position is not None):
+
+            rays = copy.copy(rays)
+
+        if self._rotation is not None:
+            rays.rotate(self._rotation)
+
+        if self._position is not None:
+            rays.translate(np.asarray(self._position))
+
+        if isinstance(rays, Rays32):
+            return self._is_occluded_single(rays, omp)
+
+        return super().is_occluded(rays, omp)
+
+    def compute_intersect(self, ray):
+        """
+        compute_intersect(self, ray)
+
+        This method computes the intersects between a single ray and the surface describe by this object.
+
+        This method also translates/rotates the ray into the tree frame first, for efficiency in tracing.
+
+        In general, if you are tracing multiple rays you should use the :meth:`trace` method which is more optimized
+        for multi ray tracing.
+
+        :param ray: The ray to trace to the surface
+        :type ray: Rays
+        :return: a length 1 numpy array with a dtype of :attr:`.INTERSECT_DTYPE`
+        :rtype: np.ndarray
+        """
+
+        if (self._rotation is not None) or (self._position is not None):
+
+            ray = copy.copy(ray)
+
+        if self._rotation is not None:
+            ray.rotate(self._rotation)
+
+        if self._position is not None:
+            ray.translate(np.asarray(self._position))
+
+        results = super().compute_intersect(ray)
+
+        self._transform_results(results)
+
+        return results
+
+    def trace(self, rays, omp=True, out=None):
+        """
+        trace(self, rays, omp=True, out=None)
+
+        This python method provides an easy interface to trace a number of Rays through the surface.
+
+        It packages all of the ray inputs and the required output arrays automatically and dispatches to the c version
+        of the method for efficient computation.  It then packages the output into the expected structured array.
+
+        This method also translates/rotates the rays into the tree frame first, for efficiency in tracing.
+
+        If the rays are :class:`.Rays32` then the tracing is done entirely in single precision and the results are
+        returned with a data type of :data:`.INTERSECT32_DTYPE`.
+
+        If ``out`` is provided as a :class:`.TraceWorkspace` then the results are written directly into the
+        (preallocated) buffers of the workspace and the workspace is returned instead of a new structured array.  The
+        rays are transformed into the tree frame in the workspace buffers (without copying the :class:`.Rays`) and the
+        results are transformed back in place.  Single precision rays are still traced in single precision, but the
+        results are stored in the double precision workspace.
+
+        Parallel processing can be turned off by setting the omp flag to False
+
+        :param rays: The rays to trace to the surface
+        :type rays: Union[Rays, Rays32]
+        :param omp: A boolean flag specifying whether to use parallel processing (``True``) or not
+        :type omp: bool
+        :param out: A workspace to write the results into, or ``None`` to return a new structured array
+        :type out: Optional[TraceWorkspace]
+        :return: A length n numpy array with a data type of :data:`.INTERSECT_DTYPE` (or :data:`.INTERSECT32_DTYPE` for
+                 :class:`.Rays32`) or ``out`` if it was provided
+        :rtype: Union[np.ndarray, TraceWorkspace]
+        """
+
+        if isinstance(rays, Rays32):
+
+            if (self._rotation is not None) or (self._position is not None):
+
+                rays = copy.copy(rays)
+
+            if self._rotation is not None:
+                rays.rotate(self._rotation)
+
+            if self._position is not None:
+                rays.translate(np.asarray(self._position))
+
+            results = self._trace_single(rays, omp)
+
+            if out is None:
+                self._transform_results(results)
+
+                return results
+
+            out.reset(rays.num_rays)
+
+            out.hit[:] = results["check"]
+            out.distance[:] = results["distance"]
+            out.intersect[:] = results["intersect"]
+            out.normal[:] = results["normal"]
+            out.albedo[:] = results["albedo"]
+            out.facet[:] = results["facet"]
+
+            results_from_frame(out, self._rotation, self._position, omp)
+
+            return out
+
+        workspace = TraceWorkspace() if out is None else out
+
+        workspace.reset(rays.num_rays)
+
+        starts, directions, inv_directions = rays_to_frame(rays, self._rotation, self._position, workspace, omp)
+
+        if rays.ignore is None:
+            ignore = -np.ones((rays.num_rays, 1), dtype=np.int64)
+        else:
+            ignore = to_block(rays.ignore)
+
+        self._trace(starts, directions, inv_directions, ignore, rays.num_rays, omp,
+                    workspace.hit, workspace.intersect, workspace.normal, workspace.albedo, workspace.facet,
+                    workspace.distance)
+
+        results_from_frame(workspace, self._rotation, self._position, omp)
+
+        if out is None:
+            return workspace.to_intersect_array()
+
+        return out
+
+    def _transform_results(self, results):
+        """
+        This helper transforms the intersects/normals in ``results`` from the tree frame back into the world frame in
+        place.
+        """
+
+        hits = results['check']
+
+        if self._position is not None:
+
+            results["intersect"][hits] -= np.asarray(self._position)
+
+        if self._rotation is not None:
+
+            intersects = results[hits]["intersect"]
+            normals = results[hits]["normal"]
+
+            results["intersect"][hits] = (self._rotation.inv().matrix @
+                                          intersects.squeeze().T).T.reshape(intersects.shape)
+            results["normal"][hits] = (self._rotation.inv().matrix @
+                                       normals.squeeze().T).T.reshape(normals.shape)
+
+    def translate(self, translation):
+        """
+        translate(self, translation)
+
+        Translate the tree by translation.
+
+        The tree is not actually translated, but its current location is stored so that we can translate rays when we
+        trace them through the tree.
+
+        :param translation: A size 3 array that the tree is to be translated by
+        :type translation: ARRAY_LIKE
+        """
+
+        translation = np.asarray(translation, dtype=np.float64).ravel()
+
+        if self.reference_ellipsoid:
+            self.reference_ellipsoid.translate(translation)
+
+        if self.bounding_box:
+            self.bounding_box.translate(translation)
+
+        if self._rotation is not None:
+
+            translation = self._rotation.matrix @ translation
+
+        if self._position is not None:
+            self._position = np.asarray(self._position) - translation
+        else:
+            self._position = -translation
+
+    def rotate(self, rotation):
+        """
+        rotate(self, rotation)
+
+        Rotate the tree by ``rotation``.
+
+        The tree is not actually rotated, but its current orientation is stored so that we can rotate rays when we
+        trace them through the tree.
+
+        :param rotation: The rotation with which to rotate the tree
+        :type rotation: Union[Rotation, ARRAY_LIKE]
+        """
+
+        if not isinstance(rotation, Rotation):
+            rotation = Rotation(rotation)
+
+        if self._rotation is None:
+            self._rotation = rotation.inv()
+
+        else:
+            self._rotation = self._rotation*rotation.inv()
+
+        if self.reference_ellipsoid:
+            self.reference_ellipsoid.rotate(rotation)
+
+        if self.bounding_box:
+            self.bounding_box.rotate(rotation)
+
+    def save(self, filename):
+        """
+        save(self, filename)
+
+        This method writes the tree to a binary file which can be memory mapped using :meth:`load`.
+
+        The format of the file is described in the :mod:`.flat_kdtree` documentation.  Unlike :meth:`.KDTree.save` this
+        does not use pickle, so the file can be safely shared.
+
+        :param filename: The name of the file to save the tree to
+        :type filename: PATH
+        """
+
+        arrays = {'node_bounds': self.node_bounds,
+                  'node_children': self.node_children,
+                  'node_ranges': self.node_ranges,
+                  'node_axes': self.node_axes,
+                  'node_values': self.node_values,
+                  'facets': self.facets,
+                  'normals': self.normals,
+                  'vertices': self.vertices,
+                  'albedos': np.asarray(self._albedo_array),
+                  'facet_map': self.facet_map}
+
+        header = np.zeros(1, dtype=FLAT_KDTREE_HEADER_DTYPE)
+        header['magic'] = FLAT_KDTREE_MAGIC
+        header['version'] = FLAT_KDTREE_VERSION
+        header['single_albedo'] = self._single_albedo
+        header['num_nodes'] = self.num_nodes
+        header['num_facets'] = self.num_faces
+        header['num_vertices'] = self._vertices.shape[0]
+        header['num_albedos'] = arrays['albedos'].size
+        header['num_facet_map'] = arrays['facet_map'].size
+        header['albedo'] = self._albedo
+
+        if self.bounding_box is not None:
+            header['min_sides'] = self.bounding_box.min_sides
+            header['max_sides'] = self.bounding_box.max_sides
+            if self.bounding_box._rotation is not None:
+                header['has_bounding_box_rotation'] = True
+                header['bounding_box_rotation'] = self.bounding_box._rotation.quaternion
+
+        if self.reference_ellipsoid is not None:
+            header['has_reference_ellipsoid'] = True
+            header['ellipsoid_center'] = self.reference_ellipsoid.center
+            header['ellipsoid_principal_axes'] = self.reference_ellipsoid.principal_axes
+            header['ellipsoid_orientation'] = self.reference_ellipsoid.orientation
+
+        if self._rotation is not None:
+            header['has_rotation'] = True
+            header['rotation'] = self._rotation.quaternion
+
+        if self._position is not None:
+            header['has_position'] = True
+            header['position'] = self.position
+
+        # determine where each array goes
+        offset = FLAT_KDTREE_HEADER_DTYPE.itemsize
+        layout = _array_layout(self.num_nodes, self.num_faces, self._vertices.shape[0], arrays['albedos'].size,
+                               arrays['facet_map'].size)
+        offsets = []
+        for name in FLAT_KDTREE_ARRAYS:
+            offset += (-offset) % _ALIGNMENT
+            offsets.append(offset)
+            dtype, shape = layout[name]
+            offset += dtype.itemsize * int(np.prod(shape))
+
+        header['offsets'] = offsets
+
+        with open(filename, 'wb') as out_file:
+            out_file.write(header.tobytes())
+
+            for name, array_offset in zip(FLAT_KDTREE_ARRAYS, offsets):
+                dtype, shape = layout[name]
+                out_file.write(b'\0' * (array_offset - out_file.tell()))
+                out_file.write(np.ascontiguousarray(arrays[name], dtype=dtype).reshape(shape).tobytes())
+
+    @classmethod
+    def load(cls, filename, memory_map=True):
+        """
+        load(cls, filename, memory_map=True)
+
+        This class method loads a tree that was written using :meth:`save`.
+
+        By default the file is memory mapped read only using :class:`numpy.memmap`, so the tree can be traced
+        immediately and only the pages of the file that are actually needed are read from disk.  Multiple processes
+        which load the same file will share these pages.  If ``memory_map`` is ``False`` then the file is instead read
+        entirely into memory.
+
+        :param filename: The name of the file to load the tree from
+        :type filename: PATH
+        :param memory_map: A flag specifying whether to memory map the file (``True``) or read it into memory
+        :type memory_map: bool
+        :return: The loaded tree
+        :rtype: FlatKDTree
+        :raises ValueError: If the file is not a flat kdtree file or was written with an unsupported version
+        """
+
+        if memory_map:
+            buffer = np.memmap(filename, dtype=np.uint8, mode='r')
+        else:
+            buffer = np.fromfile(filename, dtype=np.uint8)
+
+        if buffer.size < FLAT_KDTREE_HEADER_DTYPE.itemsize:
+            raise ValueError('{} is not a flat kdtree file'.format(filename))
+
+        header = np.frombuffer(buffer, dtype=FLAT_KDTREE_HEADER_DTYPE, count=1)[0]
+
+        if header['magic'] != FLAT_KDTREE_MAGIC:
+            raise ValueError('{} is not a flat kdtree file'.format(filename))
+
+        if header['version'] != FLAT_KDTREE_VERSION:
+            raise ValueError('{} was written with version {} of the flat kdtree format but only version {} is '
+                             'supported'.format(filename, header['version'], FLAT_KDTREE_VERSION))
+
+        layout = _array_layout(int(header['num_nodes']), int(header['num_facets']), int(header['num_vertices']),
+                               int(header['num_albedos']), int(header['num_facet_map']))
+
+        arrays = {}
+        for name, offset in zip(FLAT_KDTREE_ARRAYS, header['offsets']):
+            dtype, shape = layout[name]
+            arrays[name] = np.frombuffer(buffer, dtype=dtype, count=int(np.prod(shape)),
+                                         offset=int(offset)).reshape(shape)
+
+        if header['single_albedo']:
+            albedos = float(header['albedo'])
+        else:
+            albedos = arrays['albedos']
+
+        bounding_box_rotation = None
+        if header['has_bounding_box_rotation']:
+            bounding_box_rotation = Rotation(header['bounding_box_rotation'].copy())
+
+        bounding_box = AxisAlignedBoundingBox(header['min_sides'].copy(), header['max_sides'].copy(),
+                                              _rotation=bounding_box_rotation)
+
+        reference_ellipsoid = None
+        if header['has_reference_ellipsoid']:
+            reference_ellipsoid = Ellipsoid(center=header['ellipsoid_center'].copy(),
+                                            principal_axes=header['ellipsoid_principal_axes'].copy(),
+                                            orientation=header['ellipsoid_orientation'].copy())
+
+        rotation = None
+        if header['has_rotation']:
+            rotation = Rotation(header['rotation'].copy())
+
+        position = None
+        if header['has_position']:
+            position = header['position'].copy()
+
+        facet_map = arrays['facet_map'] if arrays['facet_map'].size else None
+
+        return cls(arrays['node_bounds'], arrays['node_children'], arrays['node_ranges'], arrays['node_axes'],
+                   arrays['node_values'], arrays['facets'], arrays['normals'], arrays['vertices'], albedos,
+                   facet_map, _rotation=rotation, _position=position, _bounding_box=bounding_box,
+                   _reference_ellipsoid=reference_ellipsoid)
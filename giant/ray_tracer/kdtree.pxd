@@ -27,6 +27,17 @@ cdef class KDNode:
                                   cnp.uint8_t *hit, double[:] intersect, double[:] normal, double *albedo,
                                   cnp.int64_t *facet, double *previous_hit_distance) noexcept nogil
 
+    cdef void _compute_intersect_packet(self, const double[:] start, const double[:, :] directions,
+                                        const double[:, :] inv_directions, const cnp.int64_t[] ignore,
+                                        const cnp.uint32_t num_ignore, cnp.int64_t[] shape_ignore,
+                                        const cnp.uint32_t num_rays, const cnp.uint8_t[] active,
+                                        cnp.uint8_t[:] hit, double[:, :] intersect, double[:, :] normal,
+                                        double[:] albedo, cnp.int64_t[:] facet, double[:] hit_distance) noexcept nogil
+
+    cdef bint _is_occluded(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
+                           const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore,
+                           cnp.int64_t[] shape_ignore) noexcept nogil
+
     cpdef compute_bounding_box(self)
 
         
@@ -41,6 +52,18 @@ cdef class KDTree(Surface):
         double[:] _position
         cnp.int64_t[:, :] _shape_ignore
 
+    cdef void _trace_packets(self, const double[:] start, const double[:, :] directions,
+                             const double[:, :] inv_directions, const cnp.int64_t[:, :] ignore,
+                             const cnp.uint32_t num_rays, const cnp.uint32_t packet_size, const bint omp,
+                             cnp.uint8_t[:] hit, double[:, :] intersect, double[:, :] normal, double[:] albedo,
+                             cnp.int64_t[:] facet, double[:] hit_distances) noexcept nogil
+
+    cdef void _trace_packet(self, const double[:] start, const double[:, :] directions,
+                            const double[:, :] inv_directions, const cnp.int64_t[:, :] ignore,
+                            const cnp.uint32_t num_rays, const cnp.uint32_t packet_size, const Py_ssize_t packet,
+                            cnp.uint8_t[:] hit, double[:, :] intersect, double[:, :] normal, double[:] albedo,
+                            cnp.int64_t[:] facet, double[:] hit_distances) noexcept nogil
+
 cpdef list get_ignore_inds(KDNode node, size_t vertex_id)
 
 cpdef cnp.ndarray get_facet_vertices(KDNode node, size_t facet_id)
@@ -2,15 +2,32 @@
 # Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
 
 
-from typing import Optional, Tuple, Union, Type
+from enum import Enum
+from typing import Optional, Tuple, Union, Type, NamedTuple
 
 import numpy as np
 
 from giant.ray_tracer.shapes import Surface, AxisAlignedBoundingBox, Ellipsoid
 from giant.ray_tracer.shapes.surface import RawSurface
+from giant.ray_tracer.rays import Rays, TraceWorkspace
 from giant.rotations import Rotation
 from giant._typing import ARRAY_LIKE, PATH
 
+class SplitMethods(Enum):
+
+    MEDIAN: str
+    SAH: str
+
+
+class BuildStatistics(NamedTuple):
+
+    build_time: float
+    peak_memory: int
+    num_nodes: int
+    num_leaves: int
+    max_leaf_size: int
+
+
 class KDNode:
 
     left: KDNode
@@ -45,7 +62,11 @@ class KDNode:
     def split(self,
               force: bool = False,
               flip: bool = False,
-              print_progress: bool = True) -> Union[Tuple[KDNode, KDNode], Tuple[None, None]]: ...
+              print_progress: bool = True,
+              split_method: Union[SplitMethods, str] = SplitMethods.MEDIAN,
+              sah_bins: int = 32,
+              traversal_cost: float = 1.0,
+              intersection_cost: float = 1.5) -> Union[Tuple[KDNode, KDNode], Tuple[None, None]]: ...
 
     def __eq__(self, other: KDNode) -> bool: ...
 
@@ -86,7 +107,25 @@ class KDTree(Surface):
 
     def build(self,
               force: bool = True,
-              print_progress: bool = True): ...
+              print_progress: bool = True,
+              split_method: Union[SplitMethods, str] = SplitMethods.MEDIAN,
+              sah_bins: int = 32,
+              traversal_cost: float = 1.0,
+              intersection_cost: float = 1.5): ...
+
+    def build_parallel(self,
+                       force: bool = True,
+                       print_progress: bool = True,
+                       split_method: Union[SplitMethods, str] = SplitMethods.MEDIAN,
+                       sah_bins: int = 32,
+                       traversal_cost: float = 1.0,
+                       intersection_cost: float = 1.5) -> BuildStatistics: ...
+
+    def trace(self,
+              rays: Rays,
+              omp: bool = True,
+              packet_size: int = 16,
+              out: Optional[TraceWorkspace] = None) -> Union[np.ndarray, TraceWorkspace]: ...
 
     def translate(self,
                   translation: ARRAY_LIKE): ...
@@ -107,4 +146,8 @@ def get_ignore_inds(node: KDNode,
 def get_facet_vertices(node: KDNode,
                        facet_id: int) -> np.ndarray: ...
 
+def compute_sah_cost(tree: KDTree,
+                     traversal_cost: float = 1.0,
+                     intersection_cost: float = 1.5) -> float: ...
+
 def describe_tree(tree: KDTree): ...
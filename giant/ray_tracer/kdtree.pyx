@@ -59,14 +59,32 @@ import pickle
 
 import copy
 
-from typing import Union, Tuple, Optional, Callable
+import time
+
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import psutil
+
+from enum import Enum
+
+from typing import Union, Tuple, Optional, Callable, NamedTuple
 
 import cython
 from cython.parallel import prange, parallel
 from libc.stdlib cimport malloc, free
+from libc.math cimport INFINITY
 
 from giant.ray_tracer.shapes.axis_aligned_bounding_box import AxisAlignedBoundingBox
 from giant.ray_tracer.shapes.surface import RawSurface, find_limbs_surface, Surface
+from giant.ray_tracer.utilities import to_block
+from giant.ray_tracer.shapes.surface cimport rays_to_frame, results_from_frame
+from giant.ray_tracer.parallel_config cimport get_thread_count, apply_schedule, SCHEDULE_DYNAMIC
+from giant.ray_tracer.rays import INTERSECT_DTYPE, TraceWorkspace
 
 from giant._typing import ARRAY_LIKE, PATH
 from giant.rotations import Rotation
@@ -78,6 +96,593 @@ This is used to give a unique identifier to each node
 """
 
 
+cdef enum:
+    MAX_PACKET_SIZE = 16
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """
+    This helper spreads the lower 16 bits of each value so that there is a 0 bit between each of them, which is used to
+    form morton codes.
+    """
+
+    values = values.astype(np.uint64) & 0xFFFF
+
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    values = (values | (values << 1)) & 0x55555555
+
+    return values
+
+
+def _coherent_order(directions: np.ndarray) -> np.ndarray:
+    """
+    This helper determines an order for rays which share a start so that neighboring rays point in similar directions.
+
+    The directions are projected onto the plane perpendicular to their mean direction (which for rays from a camera is
+    essentially the pixel grid) and then sorted along a morton (z-order) curve in this plane, so that each consecutive
+    group of rays forms a compact tile.
+
+    :param directions: The directions of the rays as a 3xn array
+    :return: The order to visit the rays in as a length n array of indices
+    """
+
+    mean_direction = directions.mean(axis=1)
+    mean_norm = np.linalg.norm(mean_direction)
+
+    if (not np.isfinite(mean_norm)) or (mean_norm == 0):
+        return np.arange(directions.shape[1])
+
+    mean_direction /= mean_norm
+
+    # form a basis for the plane perpendicular to the mean direction
+    x_axis = np.cross(mean_direction, np.eye(3)[np.abs(mean_direction).argmin()])
+    x_axis /= np.linalg.norm(x_axis)
+    y_axis = np.cross(mean_direction, x_axis)
+
+    codes = np.zeros(directions.shape[1], dtype=np.uint64)
+
+    for shift, axis in enumerate([x_axis, y_axis]):
+        projection = axis @ directions
+        extent = np.ptp(projection)
+        if extent == 0 or not np.isfinite(extent):
+            continue
+        quantized = ((projection - projection.min()) / extent * 0xFFFF).astype(np.uint64)
+        codes |= _spread_bits(quantized) << np.uint64(shift)
+
+    return np.argsort(codes, kind='stable')
+
+
+class SplitMethods(Enum):
+    """
+    This enumeration provides the valid options for how nodes are split when building a :class:`.KDTree`.
+
+    You should be sure to use one of these values (or the equivalent string) when calling :meth:`.KDTree.build` or
+    :meth:`.KDNode.split`.
+    """
+
+    MEDIAN = "MEDIAN"
+    """
+    Split at the median facet center along the axis with the widest separation of facet centers.
+
+    Splitting stops once there are 10 or fewer facets in a node (unless forced).  This is the default and produces
+    trees with (roughly) balanced numbers of facets on each side of a split.
+    """
+
+    SAH = "SAH"
+    """
+    Split using a binned surface area heuristic (SAH).
+
+    Candidate split planes are evaluated along all 3 axes by binning the facet centers and the plane with the lowest
+    expected traversal cost is chosen.  Splitting stops when the expected cost of splitting is not less than the cost
+    of tracing all of the facets in the node directly.  This typically produces trees that require fewer bounding box
+    and facet intersection tests per ray, especially for shapes with non-uniform facet density.
+    """
+
+
+@cython.cdivision(True)
+cdef inline size_t _sah_bin(const double center, const double center_min, const double scale,
+                            const size_t num_bins) noexcept nogil:
+    """
+    This C function determines which surface area heuristic bin a facet center falls into.
+    """
+
+    cdef size_t bin_ind = <size_t> ((center - center_min) * scale)
+
+    if bin_ind >= num_bins:
+        bin_ind = num_bins - 1
+
+    return bin_ind
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void _sah_split_plane(const double[:, :] vertices, const cnp.uint32_t[:, :] facets, const double[:, :] centers,
+                           const cnp.int64_t[:] permutation, const size_t start, const size_t stop,
+                           const double *center_min, const double *center_max, const double node_area,
+                           const size_t num_bins, const double traversal_cost, const double intersection_cost,
+                           cnp.int64_t *best_axis, size_t *best_plane, double *best_cost) noexcept nogil:
+    """
+    This C function evaluates the binned surface area heuristic for each candidate split plane along each axis.
+
+    Only the facets ``permutation[start:stop]`` are considered.  The facet centers are placed into ``num_bins`` equally spaced bins spanning the extent of the centers along each
+    axis.  The bounding box of the facets in each bin is accumulated and then swept from the left and the right to
+    determine the surface area and number of facets on each side of each bin boundary.  The cost of a split is then
+
+    .. math::
+        C = C_t + C_i\\frac{A_L N_L + A_R N_R}{A}
+
+    where :math:`C_t` is the traversal cost, :math:`C_i` is the intersection cost, :math:`A_{L,R}` are the surface
+    areas of the left and right bounding boxes, :math:`N_{L,R}` are the number of facets on the left and right, and
+    :math:`A` is the surface area of the node being split.
+
+    The best axis, plane (the index of the first bin that belongs to the right side), and cost are returned through the
+    pointers.  If no valid split is found then ``best_axis`` is set to -1.
+    """
+
+    cdef:
+        size_t axis, face, vert, bin_ind, side, ind
+        Py_ssize_t plane
+        double extent, scale, value, cost, area, extent_x, extent_y, extent_z
+
+        size_t *bin_counts = <size_t *> malloc(num_bins * sizeof(size_t))
+        double *bin_min = <double *> malloc(3 * num_bins * sizeof(double))
+        double *bin_max = <double *> malloc(3 * num_bins * sizeof(double))
+        double *left_areas = <double *> malloc(num_bins * sizeof(double))
+        size_t *left_counts = <size_t *> malloc(num_bins * sizeof(size_t))
+
+        double[3] sweep_min
+        double[3] sweep_max
+        size_t sweep_count
+
+    best_axis[0] = -1
+    best_plane[0] = 0
+    best_cost[0] = INFINITY
+
+    for axis in range(3):
+
+        extent = center_max[axis] - center_min[axis]
+
+        # if all of the centers are at the same location along this axis we can't split on it
+        if extent <= 0:
+            continue
+
+        scale = num_bins / extent
+
+        # reset the bins
+        for bin_ind in range(num_bins):
+            bin_counts[bin_ind] = 0
+            for side in range(3):
+                bin_min[3 * bin_ind + side] = INFINITY
+                bin_max[3 * bin_ind + side] = -INFINITY
+
+        # accumulate the facets into the bins
+        for ind in range(start, stop):
+            face = permutation[ind]
+            bin_ind = _sah_bin(centers[face, axis], center_min[axis], scale, num_bins)
+
+            bin_counts[bin_ind] += 1
+
+            for vert in range(3):
+                for side in range(3):
+                    value = vertices[facets[face, vert], side]
+                    if value < bin_min[3 * bin_ind + side]:
+                        bin_min[3 * bin_ind + side] = value
+                    if value > bin_max[3 * bin_ind + side]:
+                        bin_max[3 * bin_ind + side] = value
+
+        # sweep from the left to get the area/count to the left of each plane
+        sweep_count = 0
+        for side in range(3):
+            sweep_min[side] = INFINITY
+            sweep_max[side] = -INFINITY
+
+        for plane in range(1, num_bins):
+            bin_ind = plane - 1
+            sweep_count += bin_counts[bin_ind]
+            if bin_counts[bin_ind] > 0:
+                for side in range(3):
+                    sweep_min[side] = min(sweep_min[side], bin_min[3 * bin_ind + side])
+                    sweep_max[side] = max(sweep_max[side], bin_max[3 * bin_ind + side])
+
+            left_counts[plane] = sweep_count
+            if sweep_count > 0:
+                extent_x = sweep_max[0] - sweep_min[0]
+                extent_y = sweep_max[1] - sweep_min[1]
+                extent_z = sweep_max[2] - sweep_min[2]
+                left_areas[plane] = 2 * (extent_x * extent_y + extent_y * extent_z + extent_z * extent_x)
+            else:
+                left_areas[plane] = 0
+
+        # sweep from the right and evaluate the cost of each plane
+        sweep_count = 0
+        for side in range(3):
+            sweep_min[side] = INFINITY
+            sweep_max[side] = -INFINITY
+
+        for plane in range(num_bins - 1, 0, -1):
+            bin_ind = plane
+            sweep_count += bin_counts[bin_ind]
+            if bin_counts[bin_ind] > 0:
+                for side in range(3):
+                    sweep_min[side] = min(sweep_min[side], bin_min[3 * bin_ind + side])
+                    sweep_max[side] = max(sweep_max[side], bin_max[3 * bin_ind + side])
+
+            # we need facets on both sides for a valid split
+            if (sweep_count == 0) or (left_counts[plane] == 0):
+                continue
+
+            extent_x = sweep_max[0] - sweep_min[0]
+            extent_y = sweep_max[1] - sweep_min[1]
+            extent_z = sweep_max[2] - sweep_min[2]
+            area = 2 * (extent_x * extent_y + extent_y * extent_z + extent_z * extent_x)
+
+            cost = traversal_cost + intersection_cost * (left_areas[plane] * left_counts[plane] +
+                                                         area * sweep_count) / node_area
+
+            if cost < best_cost[0]:
+                best_cost[0] = cost
+                best_axis[0] = axis
+                best_plane[0] = <size_t> plane
+
+    free(bin_counts)
+    free(bin_min)
+    free(bin_max)
+    free(left_areas)
+    free(left_counts)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _select_nth(const double[:, :] centers, cnp.int64_t[:] permutation, Py_ssize_t left, Py_ssize_t right,
+                      const Py_ssize_t nth, const size_t axis) noexcept nogil:
+    """
+    This C function rearranges ``permutation[left:right+1]`` in place so that ``permutation[nth]`` is the facet whose
+    center would be there if the range was sorted along ``axis``.
+
+    Every facet before ``nth`` has a center less than or equal to the center of the ``nth`` facet and every facet after
+    has a center greater than or equal to it.  This is done using an iterative quick select so no copies are made.
+    """
+
+    cdef:
+        Py_ssize_t i, j
+        double pivot
+        cnp.int64_t temp
+
+    while right > left:
+
+        pivot = centers[permutation[left + (right - left) // 2], axis]
+
+        i = left
+        j = right
+
+        while i <= j:
+
+            while centers[permutation[i], axis] < pivot:
+                i += 1
+
+            while centers[permutation[j], axis] > pivot:
+                j -= 1
+
+            if i <= j:
+                temp = permutation[i]
+                permutation[i] = permutation[j]
+                permutation[j] = temp
+                i += 1
+                j -= 1
+
+        # continue into the side that contains the nth element
+        if nth <= j:
+            right = j
+        elif nth >= i:
+            left = i
+        else:
+            break
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef Py_ssize_t _split_range(const double[:, :] vertices, const cnp.uint32_t[:, :] facets, const double[:, :] centers,
+                             cnp.int64_t[:] permutation, const size_t start, const size_t stop, const bint leaf_only,
+                             const bint force, const bint use_sah, const size_t sah_bins, const double traversal_cost,
+                             const double intersection_cost, double *node_bounds, cnp.int64_t *split_axis,
+                             double *split_value) noexcept nogil:
+    """
+    This C function splits the facets ``permutation[start:stop]`` in place into a left and right group.
+
+    The bounds of the node (the minimum and maximum of the vertices of the facets in the range) are returned in
+    ``node_bounds`` as ``[min_x, min_y, min_z, max_x, max_y, max_z]``.  If the node should be split then the facets
+    belonging to the left side are moved to the beginning of the range, the facets belonging to the right side are moved
+    to the end of the range, and the index of the first right facet is returned along with the split axis and value.
+    If the node should be a leaf then -1 is returned.
+
+    The same rules are used to decide when to split and where as :meth:`.KDNode.split`.
+    """
+
+    cdef:
+        size_t ind, face, vert, axis, best_plane
+        Py_ssize_t i, j, mid
+        cnp.int64_t best_axis, temp
+        double best_cost, node_area, scale, extent
+        double[3] center_min
+        double[3] center_max
+        size_t n_facets = stop - start
+
+    for axis in range(3):
+        node_bounds[axis] = INFINITY
+        node_bounds[axis + 3] = -INFINITY
+        center_min[axis] = INFINITY
+        center_max[axis] = -INFINITY
+
+    # compute the bounds of the node and of the facet centers
+    for ind in range(start, stop):
+        face = permutation[ind]
+        for axis in range(3):
+            center_min[axis] = min(center_min[axis], centers[face, axis])
+            center_max[axis] = max(center_max[axis], centers[face, axis])
+            for vert in range(3):
+                node_bounds[axis] = min(node_bounds[axis], vertices[facets[face, vert], axis])
+                node_bounds[axis + 3] = max(node_bounds[axis + 3], vertices[facets[face, vert], axis])
+
+    split_axis[0] = -1
+    split_value[0] = 0
+
+    if leaf_only or (n_facets <= 1):
+        return -1
+
+    if use_sah:
+
+        node_area = 2 * ((node_bounds[3] - node_bounds[0]) * (node_bounds[4] - node_bounds[1]) +
+                         (node_bounds[4] - node_bounds[1]) * (node_bounds[5] - node_bounds[2]) +
+                         (node_bounds[5] - node_bounds[2]) * (node_bounds[3] - node_bounds[0]))
+
+        if node_area <= 0:
+            return -1
+
+        _sah_split_plane(vertices, facets, centers, permutation, start, stop, center_min, center_max, node_area,
+                         sah_bins, traversal_cost, intersection_cost, &best_axis, &best_plane, &best_cost)
+
+        if (best_axis < 0) or (best_cost >= intersection_cost * n_facets):
+            return -1
+
+        extent = center_max[best_axis] - center_min[best_axis]
+        scale = sah_bins / extent
+
+        # partition the range so that the facets in bins before the best plane are on the left
+        i = start
+        j = stop - 1
+        while i <= j:
+            if _sah_bin(centers[permutation[i], best_axis], center_min[best_axis], scale, sah_bins) < best_plane:
+                i += 1
+            else:
+                temp = permutation[i]
+                permutation[i] = permutation[j]
+                permutation[j] = temp
+                j -= 1
+
+        mid = i
+        split_axis[0] = best_axis
+        split_value[0] = center_min[best_axis] + best_plane * extent / sah_bins
+
+    else:
+
+        if (not force) and (n_facets <= 10):
+            return -1
+
+        best_axis = 0
+        for axis in range(1, 3):
+            if (center_max[axis] - center_min[axis]) > (center_max[best_axis] - center_min[best_axis]):
+                best_axis = axis
+
+        # all of the centers are at the same location so there is nothing to split
+        if center_max[best_axis] <= center_min[best_axis]:
+            return -1
+
+        # put the median facet in the middle of the range with smaller centers before it and larger after
+        mid = start + n_facets // 2
+        _select_nth(centers, permutation, start, stop - 1, mid, best_axis)
+
+        split_axis[0] = best_axis
+        split_value[0] = centers[permutation[mid], best_axis]
+
+    if (mid <= <Py_ssize_t> start) or (mid >= <Py_ssize_t> stop):
+        split_axis[0] = -1
+        return -1
+
+    return mid
+
+
+def _peak_memory() -> int:
+    """
+    Returns the peak resident set size of the current process in bytes.
+
+    On unix systems this uses the :mod:`resource` module.  On windows this uses the peak working set from
+    :mod:`psutil`.
+    """
+
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # mac reports the peak in bytes while linux reports it in kilobytes
+        if sys.platform == 'darwin':
+            return peak
+
+        return peak * 1024
+
+    memory_info = psutil.Process().memory_info()
+
+    return getattr(memory_info, 'peak_wset', memory_info.rss)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def _build_node_arrays(surface, max_depth, force, print_progress, split_method, sah_bins, traversal_cost,
+                       intersection_cost):
+    """
+    _build_node_arrays(surface, max_depth, force, print_progress, split_method, sah_bins, traversal_cost, intersection_cost)
+
+    This helper function determines the structure of a tree for ``surface`` by sorting an index permutation of the
+    facets in place.
+
+    The levels of the tree are split one at a time using :func:`_split_range` with the nodes in each level split in
+    parallel.  Nodes are numbered in breadth first order (the root is node 0).  The results are returned as flat arrays
+    where row ``i`` of each describes node ``i``:
+
+    * ``permutation`` the facet indices sorted so that each node owns the contiguous range ``starts[i]:stops[i]``
+    * ``starts``/``stops`` the range of the permutation belonging to each node
+    * ``bounds`` the ``[min_x, min_y, min_z, max_x, max_y, max_z]`` bounds of each node
+    * ``children`` the indices of the left/right children of each node (-1 for leaf nodes)
+    * ``axes``/``values`` the axis/value each node was split on (-1 for the axis of leaf nodes)
+
+    This is used by :meth:`.KDTree.build_parallel` and :meth:`.FlatKDTree.from_surface`.
+    """
+
+    cdef:
+        size_t n_facets, n_level, node
+        bint use_sah, do_force = force
+        size_t bins = sah_bins
+        double t_cost = traversal_cost, i_cost = intersection_cost
+        double[:, :] _vertices
+        double[:, :] _centers
+        double[:, :] _bounds
+        cnp.uint32_t[:, :] _facets
+        cnp.int64_t[:] _permutation
+        cnp.int64_t[:] _starts
+        cnp.int64_t[:] _stops
+        cnp.int64_t[:] _mids
+        cnp.int64_t[:] _axes
+        double[:] _values
+        size_t i, j, k
+        bint last_level
+
+    if isinstance(split_method, str):
+        split_method = split_method.upper()
+
+    use_sah = SplitMethods(split_method) is SplitMethods.SAH
+
+    n_facets = surface.num_faces
+
+    vertices = np.asarray(surface.vertices, dtype=np.float64)
+    _vertices = vertices
+    _facets = surface._facets
+
+    # compute the center of each facet
+    centers = np.zeros((n_facets, 3), dtype=np.float64)
+    _centers = centers
+    apply_schedule(SCHEDULE_DYNAMIC)
+    with nogil, parallel(num_threads=get_thread_count()):
+        for i in prange(n_facets, schedule='runtime'):
+            for j in range(3):
+                for k in range(3):
+                    _centers[i, j] += _vertices[_facets[i, k], j] / 3
+
+    permutation = np.arange(n_facets, dtype=np.int64)
+    _permutation = permutation
+
+    # each level is stored as the start/stop of each node's range in the permutation along with the results of
+    # splitting it
+    level_starts = np.zeros(1, dtype=np.int64)
+    level_stops = np.array([n_facets], dtype=np.int64)
+
+    all_starts = []
+    all_stops = []
+    all_bounds = []
+    all_children = []
+    all_axes = []
+    all_values = []
+
+    n_nodes = 0
+
+    for depth in range(max_depth):
+
+        n_level = level_starts.size
+
+        if print_progress:
+            print('splitting {} nodes at depth {}'.format(n_level, depth), flush=True)
+
+        bounds = np.empty((n_level, 6), dtype=np.float64)
+        mids = np.empty(n_level, dtype=np.int64)
+        axes = np.empty(n_level, dtype=np.int64)
+        values = np.empty(n_level, dtype=np.float64)
+
+        _bounds = bounds
+        _mids = mids
+        _axes = axes
+        _values = values
+        _starts = level_starts
+        _stops = level_stops
+
+        last_level = depth == (max_depth - 1)
+
+        # split every node in this level in parallel.  Each node owns its own range of the permutation so this
+        # is safe
+        apply_schedule(SCHEDULE_DYNAMIC)
+        with nogil, parallel(num_threads=get_thread_count()):
+            for node in prange(n_level, schedule='runtime'):
+                _mids[node] = _split_range(_vertices, _facets, _centers, _permutation, _starts[node],
+                                           _stops[node], last_level, do_force, use_sah, bins, t_cost, i_cost,
+                                           &_bounds[node, 0], &_axes[node], &_values[node])
+
+        branches = mids >= 0
+
+        # children of this level are numbered after all of the nodes in this level in order
+        children = np.full((n_level, 2), -1, dtype=np.int64)
+        children[branches, 0] = n_nodes + n_level + 2 * np.arange(branches.sum())
+        children[branches, 1] = children[branches, 0] + 1
+
+        all_starts.append(level_starts)
+        all_stops.append(level_stops)
+        all_bounds.append(bounds)
+        all_children.append(children)
+        all_axes.append(axes)
+        all_values.append(values)
+
+        n_nodes += n_level
+
+        if not branches.any():
+            break
+
+        level_starts = np.column_stack([level_starts[branches], mids[branches]]).ravel()
+        level_stops = np.column_stack([mids[branches], level_stops[branches]]).ravel()
+
+    return (permutation, np.concatenate(all_starts), np.concatenate(all_stops), np.concatenate(all_bounds),
+            np.concatenate(all_children), np.concatenate(all_axes), np.concatenate(all_values))
+
+
+class BuildStatistics(NamedTuple):
+    """
+    This named tuple summarizes the results of building a tree with :meth:`.KDTree.build_parallel`.
+    """
+
+    build_time: float
+    """
+    The wall clock time required to build the tree in seconds
+    """
+
+    peak_memory: int
+    """
+    The peak resident memory of the process at the end of the build in bytes
+    """
+
+    num_nodes: int
+    """
+    The total number of nodes in the tree
+    """
+
+    num_leaves: int
+    """
+    The number of leaf nodes in the tree
+    """
+
+    max_leaf_size: int
+    """
+    The maximum number of geometry primitives contained in any leaf node
+    """
+
+
 cdef class KDNode:
     """
     __init__(self, surface=None, _left=None, _right=None, _bounding_box=None, _order=0, _id=None, _id_order=None, _centers=None)
@@ -254,17 +859,25 @@ cdef class KDNode:
 
     @cython.boundscheck(False)
     @cython.wraparound(False)
-    def split(self, force=False, flip=False, print_progress=True):
+    def split(self, force=False, flip=False, print_progress=True, split_method=SplitMethods.MEDIAN, sah_bins=32,
+              traversal_cost=1.0, intersection_cost=1.5):
         """
-        split(self, force=False, flip=False, print_progress=True)
+        split(self, force=False, flip=False, print_progress=True, split_method=SplitMethods.MEDIAN, sah_bins=32, traversal_cost=1.0, intersection_cost=1.5)
 
         This method is used to "grow" the tree.  It takes the geometry primitives contained in this node, and
-        distributes them to the left and right using the median value of the center of each facet along the axis with
-        the widest separation.
+        distributes them to the left and right.
 
-        Normally this method won't split once there are less than 10 geometry primitives contained in the node.  This
-        can be over ridden by setting the force flag to True, which will split until there is only 1 geometry primitive
-        in the node.
+        How the split is chosen is controlled by ``split_method`` (see :class:`.SplitMethods`).  For
+        :attr:`.SplitMethods.MEDIAN` the primitives are distributed using the median value of the center of each facet
+        along the axis with the widest separation.  Normally this won't split once there are less than 10 geometry
+        primitives contained in the node.  This can be over ridden by setting the force flag to True, which will split
+        until there is only 1 geometry primitive in the node.
+
+        For :attr:`.SplitMethods.SAH` the split plane is chosen from ``sah_bins`` candidate planes along each axis by
+        minimizing the binned surface area heuristic cost using ``traversal_cost`` and ``intersection_cost``.  The node
+        is only split if the expected cost of the split is less than ``intersection_cost`` times the number of
+        primitives in the node (the cost of leaving the node as a leaf).  The ``force`` and ``flip`` flags are ignored
+        in this case since the cost based cutoff determines when to stop.
 
         The results are stored in the :attr:`left` and :attr:`right` attributes of the current node as well as returned
         as a tuple.  The local surface is also removed from this node since the primitives are distributed to the
@@ -281,6 +894,16 @@ cdef class KDNode:
         :param print_progress: A flag specifying whether to print the progress of the splitting as we go.  This prints a
                                a lot to the screen but at least lets you know that things are not stuck somewhere
         :type print_progress: bool
+        :param split_method: The method to use to choose the split
+        :type split_method: Union[SplitMethods, str]
+        :param sah_bins: The number of bins to use along each axis when evaluating the surface area heuristic
+        :type sah_bins: int
+        :param traversal_cost: The relative cost of traversing a node (tracing its bounding box) for the surface area
+                               heuristic
+        :type traversal_cost: float
+        :param intersection_cost: The relative cost of tracing a single geometry primitive for the surface area
+                                  heuristic
+        :type intersection_cost: float
         :return: A tuple of the new left and right nodes (in order) or a tuple of None, None if we have already split as
                  far as possible
         :rtype: Union[Tuple[KDNode, KDNode], Tuple[None, None]]
@@ -289,6 +912,15 @@ cdef class KDNode:
         cdef size_t i, j, k, n_shapes
         cdef double[:, :] _centers
         cdef double[:, :] _npverts
+        cdef cnp.int64_t best_axis
+        cdef size_t best_plane
+        cdef double best_cost, node_area
+        cdef double[:] _center_min, _center_max
+
+        if isinstance(split_method, str):
+            split_method = split_method.upper()
+
+        split_method = SplitMethods(split_method)
 
         if self.has_surface:
             # check to be sure we actually have geometry primitives
@@ -300,34 +932,64 @@ cdef class KDNode:
             if print_progress:
                 print('splitting {} shapes'.format(n_shapes))
 
-            if (not force) and (self.surface.num_faces <= 10):  # if we have split as much as possible
-                # the calling function will know what to do with the Nones
+            if (split_method is SplitMethods.MEDIAN) and (not force) and (self.surface.num_faces <= 10):
+                # if we have split as much as possible the calling function will know what to do with the Nones
                 return None, None
 
             normals = self.surface.normals  # type: np.ndarray
 
-            if self._centers is None:
-                # find the median of the vertices to use as the split point
-                npverts = self.surface.vertices
-                _npverts = npverts.astype(np.float64)
+            npverts = self.surface.vertices
+            _npverts = np.asarray(npverts, dtype=np.float64)
 
+            if self._centers is None:
+                # find the center of each facet
                 centers = np.zeros((self.surface.num_faces, 3), dtype=np.float64)
                 _centers = centers
-                with nogil, parallel():
-                    for i in prange(n_shapes, schedule='dynamic'):
+                apply_schedule(SCHEDULE_DYNAMIC)
+                with nogil, parallel(num_threads=get_thread_count()):
+                    for i in prange(n_shapes, schedule='runtime'):
                         for j in range(3):
                             for k in range(3):
                                 _centers[i, j] += _npverts[self.surface._facets[i, k], j] / 3
             else:
                 centers = self._centers.base
 
-            split_axis = (centers.max(axis=0) - centers.min(axis=0)).argmax()
-            median = np.median(centers[:, split_axis])
+            if split_method is SplitMethods.SAH:
+
+                center_min = centers.min(axis=0)
+                center_max = centers.max(axis=0)
+
+                node_sides = self.bounding_box.max_sides - self.bounding_box.min_sides
+                node_area = 2 * (node_sides[0] * node_sides[1] + node_sides[1] * node_sides[2] +
+                                 node_sides[2] * node_sides[0])
+
+                if node_area <= 0:
+                    # a degenerate node has no meaningful surface area so we can't evaluate the heuristic
+                    return None, None
+
+                _center_min = center_min
+                _center_max = center_max
+                _sah_split_plane(_npverts, self.surface._facets, centers, np.arange(n_shapes, dtype=np.int64),
+                                 0, n_shapes, &_center_min[0], &_center_max[0], node_area, sah_bins,
+                                 traversal_cost, intersection_cost, &best_axis, &best_plane, &best_cost)
+
+                # check if it is cheaper to leave this as a leaf
+                if (best_axis < 0) or (best_cost >= intersection_cost * n_shapes):
+                    return None, None
+
+                # use the same binning as the cost evaluation so that the partition matches the evaluated split
+                bins = ((centers[:, best_axis] - center_min[best_axis]) *
+                        (sah_bins / (center_max[best_axis] - center_min[best_axis]))).astype(np.int64)
+                left_test = np.minimum(bins, sah_bins - 1) < best_plane
 
-            if flip:
-                left_test = centers[:, split_axis] < median
             else:
-                left_test = centers[:, split_axis] <= median
+                split_axis = (centers.max(axis=0) - centers.min(axis=0)).argmax()
+                median = np.median(centers[:, split_axis])
+
+                if flip:
+                    left_test = centers[:, split_axis] < median
+                else:
+                    left_test = centers[:, split_axis] <= median
 
             # need to use the "hidden" attributes here to ensure that pickling happens correctly
             vertices = np.asanyarray(self.surface._vertices.base)
@@ -513,6 +1175,131 @@ cdef class KDNode:
                         normal[i] = right_normal[i]
                     previous_hit_distance[0] = right_distance
 
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef void _compute_intersect_packet(self, const double[:] start, const double[:, :] directions,
+                                        const double[:, :] inv_directions, const cnp.int64_t[] ignore,
+                                        const cnp.uint32_t num_ignore, cnp.int64_t[] shape_ignore,
+                                        const cnp.uint32_t num_rays, const cnp.uint8_t[] active,
+                                        cnp.uint8_t[:] hit, double[:, :] intersect, double[:, :] normal,
+                                        double[:] albedo, cnp.int64_t[:] facet, double[:] hit_distance) noexcept nogil:
+        """
+        This method is used to compute the intersect of a packet of rays which all share the same start with this node.
+
+        The bounding box of the node is checked once for the whole packet.  Any rays in the packet which are active,
+        strike the bounding box, and haven't already struck something closer are then traced through either the
+        geometry primitives (if this is a leaf node) or the children nodes (if this is a branch node).  If none of the
+        rays in the packet remain then the node is skipped entirely.  The results are accumulated in the output arrays,
+        which are only updated for a ray if a closer intersection is found.
+
+        The ignores are stored as a flat array with ``num_ignore`` values for each ray and ``shape_ignore`` must have
+        room for ``num_rays*num_ignore`` values.
+
+        This method makes no calls back to python so it can be run without the GIL, allowing for parallelization
+        """
+
+        cdef:
+            cnp.uint8_t[MAX_PACKET_SIZE] node_active
+            double[MAX_PACKET_SIZE] near_distance
+            double[MAX_PACKET_SIZE] previous_distance
+
+            bint any_active = False
+
+            cnp.uint32_t sizer = <cnp.uint32_t>(10 ** (self._order + 1))
+            cnp.int64_t offset = self.id*<cnp.int64_t>(10**(self._order+1))
+
+            cnp.uint32_t ray
+            size_t i
+
+        # check the bounding box for the entire packet at once
+        if not self.bounding_box._compute_intersect_packet(start, inv_directions, num_rays, node_active,
+                                                           near_distance):
+            return
+
+        # only keep the rays that were already active and haven't struck something closer
+        for ray in range(num_rays):
+            node_active[ray] = node_active[ray] & active[ray] & (near_distance[ray] <= hit_distance[ray])
+            any_active = any_active | node_active[ray]
+
+        if not any_active:
+            return
+
+        if self.has_surface:
+
+            for ray in range(num_rays):
+
+                if not node_active[ray]:
+                    continue
+
+                # check to see if the ray is to ignore certain faces from within this node
+                for i in range(num_ignore):
+                    if (ignore[ray * num_ignore + i] // sizer) == self.id:
+                        shape_ignore[ray * num_ignore + i] = ignore[ray * num_ignore + i] % sizer
+                    else:
+                        shape_ignore[ray * num_ignore + i] = -1
+
+                previous_distance[ray] = hit_distance[ray]
+
+            self.surface._compute_intersect_packet(start, directions, inv_directions, shape_ignore, num_ignore,
+                                                   num_rays, node_active, hit, intersect, normal, albedo, facet,
+                                                   hit_distance)
+
+            # convert the facet numbers for anything we struck into ids
+            for ray in range(num_rays):
+                if node_active[ray] and (hit_distance[ray] < previous_distance[ray]):
+                    facet[ray] += offset
+
+        else:
+            self.left._compute_intersect_packet(start, directions, inv_directions, ignore, num_ignore, shape_ignore,
+                                                num_rays, node_active, hit, intersect, normal, albedo, facet,
+                                                hit_distance)
+
+            self.right._compute_intersect_packet(start, directions, inv_directions, ignore, num_ignore, shape_ignore,
+                                                 num_rays, node_active, hit, intersect, normal, albedo, facet,
+                                                 hit_distance)
+
+    @cython.boundscheck(False)
+    cdef bint _is_occluded(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
+                           const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore,
+                           cnp.int64_t[] shape_ignore) noexcept nogil:
+        """
+        This method is used to check whether a single ray strikes anything contained in this node.
+
+        The bounding box of the node is checked first.  If the ray intersects it then either the geometry primitives
+        (if this is a leaf node) or the children nodes (if this is a branch node) are checked, stopping as soon as
+        anything is struck.
+
+        This method makes no calls back to python so it can be run without the GIL, allowing for parallelization
+        """
+
+        cdef:
+            cnp.uint8_t bb_check = 0
+            cnp.uint32_t sizer = <cnp.uint32_t>(10 ** (self._order + 1))
+            size_t i
+            double near_distance
+            double far_distance
+
+        self.bounding_box._compute_intersect(start, inv_direction, &bb_check, &near_distance, &far_distance)
+
+        if not bb_check:
+            return False
+
+        if self.has_surface:
+
+            # check to see if we are to ignore certain faces from within this node
+            for i in range(num_ignore):
+
+                if (ignore[i] // sizer) == self.id:
+                    shape_ignore[i] = ignore[i] % sizer
+
+                else:
+                    shape_ignore[i] = -1
+
+            return self.surface._is_occluded(start, direction, inv_direction, shape_ignore, num_ignore)
+
+        return (self.left._is_occluded(start, direction, inv_direction, ignore, num_ignore, shape_ignore) or
+                self.right._is_occluded(start, direction, inv_direction, ignore, num_ignore, shape_ignore))
+
     def __eq__(self, other):
         """
         __eq__(self, other)
@@ -755,9 +1542,10 @@ cdef class KDTree(Surface):
         """
         return self._rotation
 
-    def build(self, force=True, print_progress=True):
+    def build(self, force=True, print_progress=True, split_method=SplitMethods.MEDIAN, sah_bins=32,
+              traversal_cost=1.0, intersection_cost=1.5):
         """
-        build(self, force=True, print_progress=True)
+        build(self, force=True, print_progress=True, split_method=SplitMethods.MEDIAN, sah_bins=32, traversal_cost=1.0, intersection_cost=1.5)
 
         This method performs the branching of the tree down to the maximum depth.
 
@@ -768,6 +1556,13 @@ cdef class KDTree(Surface):
         The force argument can be used to continue splitting nodes even when there are less than 10 geometry primitives
         contained in the node.  It is passed to the :meth:`KDNode.split` method.
 
+        The ``split_method`` argument controls how each node is split (see :class:`.SplitMethods`).  When using
+        :attr:`.SplitMethods.SAH` the nodes are split using a binned surface area heuristic with ``sah_bins`` bins per
+        axis, and splitting stops for a node once the expected cost of splitting (computed from ``traversal_cost`` and
+        ``intersection_cost``) is no better than leaving the node as a leaf.  In this case the ``force`` flag is
+        ignored.  You can compare the expected costs of trees built with different methods using
+        :func:`.compute_sah_cost`.
+
         The maximum depth is controlled through :attr:`max_depth`.  Typically this should be set so that the number of
         geometry primitives in each leaf node is between 10-100.
 
@@ -778,6 +1573,15 @@ cdef class KDTree(Surface):
                                 helps you be confident the build is continuing but can slow things down because a lot of
                                 text is printed to the screen.
         :type print_progress: bool
+        :param split_method: The method to use to choose how to split each node
+        :type split_method: Union[SplitMethods, str]
+        :param sah_bins: The number of bins to use along each axis when evaluating the surface area heuristic
+        :type sah_bins: int
+        :param traversal_cost: The relative cost of traversing a node for the surface area heuristic
+        :type traversal_cost: float
+        :param intersection_cost: The relative cost of tracing a single geometry primitive for the surface area
+                                  heuristic
+        :type intersection_cost: float
         """
 
         # form the root node
@@ -798,7 +1602,9 @@ cdef class KDTree(Surface):
             for node in nodes[depth - 1]:
 
                 # call their split method passing the force argument
-                split_nodes = node.split(force=force, flip=flip, print_progress=print_progress)
+                split_nodes = node.split(force=force, flip=flip, print_progress=print_progress,
+                                         split_method=split_method, sah_bins=sah_bins,
+                                         traversal_cost=traversal_cost, intersection_cost=intersection_cost)
 
                 # if we successfully split then append these nodes to the list of current nodes
                 if (split_nodes[0] is not None) and (split_nodes[1] is not None):
@@ -837,6 +1643,120 @@ cdef class KDTree(Surface):
 
         self.bounding_box = copy.deepcopy(self.root.bounding_box)
 
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def build_parallel(self, force=True, print_progress=True, split_method=SplitMethods.MEDIAN, sah_bins=32,
+                       traversal_cost=1.0, intersection_cost=1.5):
+        """
+        build_parallel(self, force=True, print_progress=True, split_method=SplitMethods.MEDIAN, sah_bins=32, traversal_cost=1.0, intersection_cost=1.5)
+
+        This method builds the tree down to the maximum depth without creating intermediate surfaces.
+
+        The result is the same kind of tree as :meth:`build` using the same splitting rules (see :meth:`.KDNode.split`),
+        but instead of creating new surface objects for each node as it is split, the facets are sorted in place in a
+        single index permutation array where each node owns a contiguous range.  Each level of the tree is split in C
+        without the GIL, with the nodes in the level distributed across the available cores.  Only once the structure
+        of the tree is known are the :class:`.KDNode` objects and the surfaces for the leaf nodes created.  This is
+        typically much faster than :meth:`build` and never holds more than a single copy of the facets for large shapes.
+
+        Note that the median split used here places exactly half of the facets (rounding down) on the left side, rather
+        than all facets less than or equal to the median, so the resulting nodes may differ slightly from :meth:`build`
+        when multiple facets share the median center.
+
+        The time required to build the tree and the peak resident memory of the process are returned (and printed if
+        ``print_progress`` is ``True``).
+
+        :param force: A flag specifying that we should build the tree even when there are less than 10 geometry
+                      primitives in the current level of nodes
+        :type force: bool
+        :param print_progress:  A flag specifying that we should print out the progress in building the tree.
+        :type print_progress: bool
+        :param split_method: The method to use to choose how to split each node
+        :type split_method: Union[SplitMethods, str]
+        :param sah_bins: The number of bins to use along each axis when evaluating the surface area heuristic
+        :type sah_bins: int
+        :param traversal_cost: The relative cost of traversing a node for the surface area heuristic
+        :type traversal_cost: float
+        :param intersection_cost: The relative cost of tracing a single geometry primitive for the surface area
+                                  heuristic
+        :type intersection_cost: float
+        :return: The statistics summarizing the build
+        :rtype: BuildStatistics
+        """
+
+        start_time = time.perf_counter()
+
+        surface = self.surface
+
+        permutation, starts, stops, bounds, children, _, _ = _build_node_arrays(surface, self.max_depth, force,
+                                                                                print_progress, split_method,
+                                                                                sah_bins, traversal_cost,
+                                                                                intersection_cost)
+
+        n_nodes = starts.size
+
+        # now form the nodes and the leaf surfaces
+        # need to use the "hidden" attributes here to ensure that pickling happens correctly
+        surface_vertices = np.asanyarray(surface._vertices.base)
+        if surface._single_albedo:
+            albedos = surface._albedo
+        else:
+            albedos = np.asanyarray(surface._albedo_array.base)
+
+        normals = surface.normals
+        facets = surface.facets
+
+        nodes = []
+        max_leaf_size = 0
+        num_leaves = 0
+        for node in range(n_nodes):
+
+            bounding_box = AxisAlignedBoundingBox(bounds[node, :3], bounds[node, 3:])
+
+            if children[node, 0] < 0:
+                leaf_facets = permutation[starts[node]:stops[node]]
+                leaf_surface = type(surface)(surface_vertices, albedos, facets[leaf_facets],
+                                             normals=normals[leaf_facets], compute_bounding_box=False,
+                                             compute_reference_ellipsoid=False)
+
+                nodes.append(KDNode(leaf_surface, _bounding_box=bounding_box))
+
+                max_leaf_size = max(max_leaf_size, leaf_facets.size)
+                num_leaves += 1
+
+            else:
+                nodes.append(KDNode(_bounding_box=bounding_box))
+
+        for node in range(n_nodes):
+            if children[node, 0] >= 0:
+                nodes[node].left = nodes[children[node, 0]]
+                nodes[node].right = nodes[children[node, 1]]
+
+        self.root = nodes[0]
+
+        # determine the order as the order of the maximum number of faces in any of the leaf nodes
+        self.root.order = np.int64(np.log10(max_leaf_size))
+
+        global _CID
+
+        # store the id order as the order of the _CID variable at this time
+        self.root.id_order = np.int64(np.log10(_CID))
+
+        self.bounding_box = copy.deepcopy(self.root.bounding_box)
+
+        build_time = time.perf_counter() - start_time
+
+        peak_memory = _peak_memory()
+
+        stats = BuildStatistics(build_time, peak_memory, n_nodes, num_leaves, max_leaf_size)
+
+        if print_progress:
+            print('built tree with {} nodes ({} leaves, at most {} facets per leaf) in {:.3f} seconds with a peak '
+                  'memory of {:.1f} MB'.format(n_nodes, num_leaves, max_leaf_size, build_time, peak_memory / 2 ** 20),
+                  flush=True)
+
+        return stats
+
     cdef void _compute_intersect(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
                                  const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore,
                                  cnp.uint8_t *hit, double[:] intersect, double[:] normal, double *albedo,
@@ -857,6 +1777,156 @@ cdef class KDTree(Surface):
 
         free(shape_ignore_data)
 
+    cdef bint _is_occluded(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
+                           const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore) noexcept nogil:
+        """
+        This C method is used to check whether a single ray strikes anything in this object.
+
+        The python version of this method :meth:`.is_occluded` should be used unless working from Cython
+        """
+
+        cdef:
+            bint occluded
+            cnp.int64_t* shape_ignore_data = <cnp.int64_t*> malloc(num_ignore * sizeof(cnp.int64_t))
+
+        occluded = self.root._is_occluded(start, direction, inv_direction, ignore, num_ignore, shape_ignore_data)
+
+        free(shape_ignore_data)
+
+        return occluded
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef void _trace_packets(self, const double[:] start, const double[:, :] directions,
+                             const double[:, :] inv_directions, const cnp.int64_t[:, :] ignore,
+                             const cnp.uint32_t num_rays, const cnp.uint32_t packet_size, const bint omp,
+                             cnp.uint8_t[:] hit, double[:, :] intersect, double[:, :] normal, double[:] albedo,
+                             cnp.int64_t[:] facet, double[:] hit_distances) noexcept nogil:
+        """
+        This C method is used to trace rays which all share the same start through the tree in packets of
+        ``packet_size`` consecutive rays.
+
+        The ignores must be C contiguous.  Unless specifically requested to the contrary, this method uses OpenMP to
+        parallelize over the packets.
+
+        The python version of this method :meth:`.trace` should be used unless working from Cython
+        """
+
+        cdef:
+            Py_ssize_t packet
+            Py_ssize_t num_packets = (num_rays + packet_size - 1) // packet_size
+
+        if omp:
+            apply_schedule(SCHEDULE_DYNAMIC)
+            with nogil, parallel(num_threads=get_thread_count()):
+                for packet in prange(num_packets, schedule='runtime'):
+                    self._trace_packet(start, directions, inv_directions, ignore, num_rays, packet_size, packet,
+                                       hit, intersect, normal, albedo, facet, hit_distances)
+
+        else:
+            for packet in range(num_packets):
+                self._trace_packet(start, directions, inv_directions, ignore, num_rays, packet_size, packet,
+                                   hit, intersect, normal, albedo, facet, hit_distances)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef void _trace_packet(self, const double[:] start, const double[:, :] directions,
+                            const double[:, :] inv_directions, const cnp.int64_t[:, :] ignore,
+                            const cnp.uint32_t num_rays, const cnp.uint32_t packet_size, const Py_ssize_t packet,
+                            cnp.uint8_t[:] hit, double[:, :] intersect, double[:, :] normal, double[:] albedo,
+                            cnp.int64_t[:] facet, double[:] hit_distances) noexcept nogil:
+        """
+        This C method traces a single packet of rays through the tree.
+        """
+
+        cdef:
+            Py_ssize_t first = packet * packet_size
+            Py_ssize_t last = min(first + packet_size, <Py_ssize_t> num_rays)
+            cnp.uint32_t num_ignore = ignore.shape[1]
+            cnp.uint8_t[MAX_PACKET_SIZE] active
+            cnp.int64_t* shape_ignore_data = <cnp.int64_t*> malloc((last - first) * num_ignore * sizeof(cnp.int64_t))
+            size_t ray
+
+        for ray in range(<size_t> (last - first)):
+            active[ray] = True
+
+        self.root._compute_intersect_packet(start, directions[:, first:last], inv_directions[:, first:last],
+                                            &ignore[first, 0], num_ignore, shape_ignore_data, last - first, active,
+                                            hit[first:last], intersect[first:last], normal[first:last],
+                                            albedo[first:last], facet[first:last], hit_distances[first:last])
+
+        free(shape_ignore_data)
+
+    def _trace_coherent(self, starts, directions, inv_directions, ignore, omp, packet_size, workspace):
+        """
+        This helper traces rays which all share the same start through the tree in packets.
+
+        The rays are first sorted so that each packet contains rays with similar directions (see
+        :func:`_coherent_order`), then traced in packets, and then the results are scattered into ``workspace`` in
+        their original order.
+        """
+
+        num_rays = directions.shape[1]
+
+        start = np.ascontiguousarray(starts[:, 0], dtype=np.float64)
+
+        order = _coherent_order(directions)
+
+        directions = np.ascontiguousarray(directions[:, order], dtype=np.float64)
+        inv_directions = np.ascontiguousarray(inv_directions[:, order], dtype=np.float64)
+
+        ignore = np.ascontiguousarray(ignore[order], dtype=np.int64)
+
+        hits = np.zeros(num_rays, dtype=np.uint8)
+        intersects = np.full((num_rays, 3), np.nan)
+        normals = np.full((num_rays, 3), np.nan)
+        albedos = np.full(num_rays, np.nan)
+        facets = -np.ones(num_rays, dtype=np.int64)
+        distances = np.full(num_rays, np.inf)
+
+        self._trace_packets(start, directions, inv_directions, ignore, num_rays, packet_size, omp,
+                            hits, intersects, normals, albedos, facets, distances)
+
+        # put everything back in the original order
+        workspace.hit[order] = hits
+        workspace.distance[order] = distances
+        workspace.intersect[order] = intersects
+        workspace.normal[order] = normals
+        workspace.albedo[order] = albedos
+        workspace.facet[order] = facets
+
+    def is_occluded(self, rays, omp=True):
+        """
+        is_occluded(self, rays, omp=True)
+
+        This python method checks whether each ray strikes anything in the tree.
+
+        This is intended for shadow checks where all that matters is whether anything blocks the path of the ray, not
+        what was struck first.  The traversal for each ray stops as soon as anything is struck and none of the
+        intersection geometry is computed, making this much cheaper than :meth:`trace`.
+
+        This method also translates/rotates the rays into the tree frame first, for efficiency in tracing.
+
+        :param rays: The rays to check against the tree
+        :type rays: Rays
+        :param omp: A boolean flag specifying whether to use parallel processing (``True``) or not
+        :type omp: bool
+        :return: A length n boolean numpy array which is ``True`` where the ray struck something
+        :rtype: np.ndarray
+        """
+
+        if (self._rotation is not None) or (self._position is not None):
+
+            rays = copy.copy(rays)
+
+        if self._rotation is not None:
+            rays.rotate(self._rotation)
+
+        if self._position is not None:
+            rays.translate(np.asarray(self._position))
+
+        return super().is_occluded(rays, omp)
+
     def compute_intersect(self, ray):
         """
         compute_intersect(self, ray)
@@ -913,16 +1983,30 @@ cdef class KDTree(Surface):
 
         return results
 
-    def trace(self, rays, omp=True):
+    def trace(self, rays, omp=True, packet_size=16, out=None):
         """
-        trace(self, rays, omp=True)
+        trace(self, rays, omp=True, packet_size=16, out=None)
 
         This python method provides an easy interface to trace a number of Rays through the surface.
 
         It packages all of the ray inputs and the required output arrays automatically and dispatches to the c version
         of the method for efficient computation.  It then packages the output into the expected structured array.
 
-        This method also translates/rotates the rays into the tree frame first, for efficiency in tracing.
+        This method also translates/rotates the rays into the tree frame first, for efficiency in tracing.  The
+        transformed rays are written into the buffers of a :class:`.TraceWorkspace` (the rays themselves are not copied)
+        and the intersects and normals are transformed back out of the tree frame in place, in parallel, after the
+        trace.
+
+        When all of the rays share the same start (as is the case for rays generated from a camera by
+        :func:`.compute_rays`) the rays are traced in packets of ``packet_size`` rays with similar directions.  Each
+        packet is traversed through the tree together, so that the bounding box of each node is only checked once per
+        packet and the work of the ray-triangle intersection that depends only on the start is shared by every ray in
+        the packet.  This is typically several times faster than tracing the rays individually.  Set ``packet_size`` to
+        1 to trace the rays individually.
+
+        If ``out`` is provided as a :class:`.TraceWorkspace` then the results are written directly into the
+        (preallocated) buffers of the workspace and the workspace is returned instead of a new structured array.  When
+        the same workspace is used for repeated traces this avoids allocating new arrays for each trace.
 
         Parallel processing can be turned off by setting the omp flag to False
 
@@ -930,45 +2014,44 @@ cdef class KDTree(Surface):
         :type rays: Rays
         :param omp: A boolean flag specifying whether to use parallel processing (``True``) or not
         :type omp: bool
-        :return: A length n numpy array with a data type of :data:`.INTERSECT_DTYPE`
-        :rtype: np.ndarray
+        :param packet_size: The number of rays to trace together when the rays share a start (between 1 and 16)
+        :type packet_size: int
+        :param out: A workspace to write the results into, or ``None`` to return a new structured array
+        :type out: Optional[TraceWorkspace]
+        :return: A length n numpy array with a data type of :data:`.INTERSECT_DTYPE` or ``out`` if it was provided
+        :rtype: Union[np.ndarray, TraceWorkspace]
         """
 
-        # if there is a rotation or translation into the tree's frame then copy the rays so that we don't mess with the
-        # originals
-        if (self._rotation is not None) or (self._position is not None):
+        if not (1 <= packet_size <= MAX_PACKET_SIZE):
+            raise ValueError('packet_size must be between 1 and {}'.format(int(MAX_PACKET_SIZE)))
 
-            rays = copy.copy(rays)
-
-        # apply any rotations so the rays are expressed in the tree frame
-        if self._rotation is not None:
-            rays.rotate(self._rotation)
-
-        # apply any translation so the rays are expressed in the tree frame
-        if self._position is not None:
-            rays.translate(np.asarray(self._position))
+        workspace = TraceWorkspace() if out is None else out
 
-        results = super().trace(rays, omp)
+        workspace.reset(rays.num_rays)
 
-        hits = results['check']
+        # express the rays in the tree frame
+        starts, directions, inv_directions = rays_to_frame(rays, self._rotation, self._position, workspace, omp)
 
-        # if we translated the rays then un-translate the results
-        if self._position is not None:
+        if rays.ignore is None:
+            ignore = -np.ones((rays.num_rays, 1), dtype=np.int64)
+        else:
+            ignore = to_block(rays.ignore)
 
-            results["intersect"][hits] -= self._position
+        if (packet_size > 1) and (rays.num_rays > 1) and (starts == starts[:, :1]).all():
+            self._trace_coherent(starts, directions, inv_directions, ignore, omp, packet_size, workspace)
 
-        # if we rotated the rays then un-rotate the results
-        if self._rotation is not None:
+        else:
+            self._trace(starts, directions, inv_directions, ignore, rays.num_rays, omp,
+                        workspace.hit, workspace.intersect, workspace.normal, workspace.albedo, workspace.facet,
+                        workspace.distance)
 
-            intersects = results[hits]["intersect"]
-            normals = results[hits]["normal"]
+        # put the intersects/normals back into the frame the rays were expressed in
+        results_from_frame(workspace, self._rotation, self._position, omp)
 
-            results["intersect"][hits] = (self._rotation.inv().matrix @
-                                          intersects.squeeze().T).T.reshape(intersects.shape)
-            results["normal"][hits] = (self._rotation.inv().matrix @
-                                       normals.squeeze().T).T.reshape(normals.shape)
+        if out is None:
+            return workspace.to_intersect_array()
 
-        return results
+        return out
 
     def translate(self, translation):
         """
@@ -1193,6 +2276,51 @@ cpdef cnp.ndarray get_facet_vertices(KDNode node, size_t facet_id):
             return left_check
 
 
+def compute_sah_cost(tree: KDTree, traversal_cost: float = 1.0, intersection_cost: float = 1.5) -> float:
+    """
+    compute_sah_cost(tree, traversal_cost=1.0, intersection_cost=1.5)
+
+    This function computes the expected cost of tracing a ray through a built tree according to the surface area
+    heuristic.
+
+    The cost of a leaf node is ``intersection_cost`` times the number of geometry primitives it contains.  The cost of a
+    branch node is ``traversal_cost`` plus the cost of each child weighted by the ratio of the surface area of the
+    child's bounding box to the surface area of the branch's bounding box (the probability that a ray which strikes the
+    branch also strikes the child).  The result is the expected cost for a ray that strikes the root of the tree, which
+    is useful for comparing trees built for the same shape with different settings.
+
+    :param tree: the tree we are to compute the cost for
+    :type tree: KDTree
+    :param traversal_cost: The relative cost of traversing a node
+    :type traversal_cost: float
+    :param intersection_cost: The relative cost of tracing a single geometry primitive
+    :type intersection_cost: float
+    :return: The expected cost of tracing a ray which strikes the root of the tree
+    :rtype: float
+    """
+
+    def surface_area(node: KDNode) -> float:
+
+        sides = node.bounding_box.max_sides - node.bounding_box.min_sides
+
+        return 2 * (sides[0] * sides[1] + sides[1] * sides[2] + sides[2] * sides[0])
+
+    def node_cost(node: KDNode) -> float:
+
+        if node.has_surface:
+            return intersection_cost * node.surface.num_faces
+
+        area = surface_area(node)
+
+        if area <= 0:
+            return traversal_cost + node_cost(node.left) + node_cost(node.right)
+
+        return (traversal_cost + (surface_area(node.left) * node_cost(node.left) +
+                                  surface_area(node.right) * node_cost(node.right)) / area)
+
+    return node_cost(tree.root)
+
+
 def describe_tree(tree: KDTree):
     """
     describe_tree(tree)
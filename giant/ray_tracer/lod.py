@@ -0,0 +1,442 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+"""
+This module provides a level of detail (LOD) hierarchy for tessellated shapes so that objects which only span a small
+number of pixels in an image can be rendered and analyzed using a mesh sized to the image resolution instead of the full
+resolution shape.
+
+Description
+-----------
+
+A high resolution shape model may contain millions of facets, which is necessary when the camera is close to the body,
+but is wasteful when the body is far away and each pixel covers many facets.  The :class:`.LODShape` stores a list of
+precomputed versions of the same shape, from the full resolution shape (level 0) to progressively coarser meshes, along
+with the typical edge length (the :attr:`~.LODShape.resolutions`) of each level.  At any time one of the levels is
+active (:attr:`~.LODShape.active_level`), and the :class:`.LODShape` behaves exactly like the active level (tracing,
+limb finding, etc.), while all of the levels are moved together when the shape is rotated or translated.
+
+The coarser levels are made using :func:`decimate_surface`, which clusters the vertices of a surface into a uniform grid
+of cells and replaces each cluster with its mean, dropping facets which collapse.  This is not the highest quality
+decimation algorithm available, but it is fast, has no dependencies, and preserves the overall shape of the body well
+when the cell size is small compared to the size of the body, which is all that is needed when the facets are smaller
+than a pixel anyway.
+
+The level to use is selected by :meth:`.LODShape.select` based on the ground sample distance of the camera at the body,
+choosing the coarsest level whose resolution is no larger than :attr:`~.LODShape.detail_factor` times the ground sample
+distance.  Typically this is done automatically through :meth:`.SceneObject.select_level_of_detail` and
+:meth:`.Scene.select_levels_of_detail`, which are called by :class:`.RelativeOpNav` each time the scene is updated for a
+new image.
+
+Use
+---
+
+To use a level of detail hierarchy, build it from a shape (before placing the shape in the scene) and use it as the
+shape of a :class:`.SceneObject`
+
+    >>> from giant.ray_tracer.lod import LODShape
+    >>> from giant.ray_tracer.scene import SceneObject
+    >>> lod = LODShape.from_shape(kdtree, num_levels=5)
+    >>> target = SceneObject(lod)
+
+Since the facets differ between levels, the facet numbers returned when tracing depend on the active level, and shadow
+caching (:mod:`.shadow_cache`) is not used for these shapes.
+"""
+
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from giant.rotations import Rotation
+from giant.ray_tracer.shapes.surface import RawSurface
+from giant.ray_tracer.shapes.triangle import Triangle64
+from giant.ray_tracer.kdtree import KDTree
+from giant.ray_tracer.flat_kdtree import FlatKDTree
+from giant._typing import ARRAY_LIKE, Real
+
+
+def _surface_geometry(shape: Any) -> Tuple[np.ndarray, np.ndarray, Union[float, np.ndarray]]:
+    """
+    This helper extracts the vertices (in the current frame), facets, and albedos from a tessellated shape.
+
+    :param shape: The shape to extract the geometry from
+    :return: The vertices as a nx3 array, the facets as a mx3 array, and the albedos as a float or a length n array
+    :raises ValueError: If the shape is not a triangulated :class:`.RawSurface`, :class:`.KDTree`, or
+                        :class:`.FlatKDTree`
+    """
+
+    rotation = None
+    position = None
+
+    if isinstance(shape, KDTree):
+        rotation = shape.rotation
+        position = shape.position
+        shape = shape.surface
+    elif isinstance(shape, FlatKDTree):
+        rotation = shape.rotation
+        position = shape.position
+    elif not isinstance(shape, RawSurface):
+        raise ValueError("Levels of detail can only be made from triangulated surfaces or KD trees, not "
+                         "{}".format(type(shape).__name__))
+
+    vertices = np.asarray(shape.vertices, dtype=np.float64).reshape(-1, 3)
+    facets = np.asarray(shape.facets, dtype=np.int64)
+
+    if facets.ndim != 2 or facets.shape[1] != 3:
+        raise ValueError("Levels of detail can only be made from triangulated surfaces")
+
+    albedos = np.asarray(shape.albedos, dtype=np.float64)
+
+    if albedos.size == 1:
+        albedos = float(albedos.ravel()[0])
+    else:
+        albedos = albedos.ravel()
+
+    # take the vertices from the tree frame to the current frame (tree = rotation@current + position)
+    if position is not None:
+        vertices = vertices - np.asarray(position, dtype=np.float64).ravel()
+
+    if rotation is not None:
+        vertices = vertices @ rotation.matrix
+
+    return vertices, facets, albedos
+
+
+def compute_resolution(shape: Any) -> float:
+    """
+    Computes the resolution (mean edge length) of a tessellated shape.
+
+    :param shape: The triangulated :class:`.RawSurface`, :class:`.KDTree`, or :class:`.FlatKDTree` to compute the
+                  resolution of
+    :return: The mean length of the edges of the facets in the units of the shape
+    """
+
+    vertices, facets, _ = _surface_geometry(shape)
+
+    corners = vertices[facets]
+
+    return float(np.linalg.norm(corners - np.roll(corners, 1, axis=1), axis=-1).mean())
+
+
+def decimate_surface(shape: Any, cell_size: Real) -> Triangle64:
+    """
+    Creates a coarser version of a tessellated shape by clustering its vertices into cubic cells.
+
+    Every vertex is assigned to the cell of a uniform grid with sides of length ``cell_size`` that it falls in.  The
+    vertices in each cell are replaced by their mean (along with their albedos if the albedos vary per vertex), and each
+    facet is re-pointed to the new vertices.  Facets which collapse to a line or a point, and duplicate facets, are
+    dropped.  The result is returned as a :class:`.Triangle64` in the current frame of the input shape.
+
+    :param shape: The triangulated :class:`.RawSurface`, :class:`.KDTree`, or :class:`.FlatKDTree` to decimate
+    :param cell_size: The length of the sides of the cells used to cluster the vertices in the units of the shape.  This
+                      is roughly the resolution of the decimated shape.
+    :return: The decimated surface
+    :raises ValueError: If the cell size is not positive or decimating would remove every facet
+    """
+
+    if cell_size <= 0:
+        raise ValueError("The cell size must be positive")
+
+    vertices, facets, albedos = _surface_geometry(shape)
+
+    cells = np.floor((vertices - vertices.min(axis=0)) / cell_size).astype(np.int64)
+
+    _, clusters, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    clusters = clusters.ravel()
+
+    new_vertices = np.stack([np.bincount(clusters, weights=vertices[:, axis]) for axis in range(3)],
+                            axis=-1) / counts.reshape(-1, 1)
+
+    if not np.isscalar(albedos):
+        albedos = np.bincount(clusters, weights=albedos[:clusters.size]) / counts
+
+    new_facets = clusters[facets]
+
+    # drop facets that have collapsed
+    keep = ((new_facets[:, 0] != new_facets[:, 1]) & (new_facets[:, 1] != new_facets[:, 2]) &
+            (new_facets[:, 0] != new_facets[:, 2]))
+
+    new_facets = new_facets[keep]
+
+    if new_facets.shape[0] == 0:
+        raise ValueError("The cell size is too large, every facet collapsed")
+
+    # drop duplicate facets, keeping the winding of the first one
+    _, unique = np.unique(np.sort(new_facets, axis=-1), axis=0, return_index=True)
+
+    new_facets = new_facets[np.sort(unique)]
+
+    # only keep the vertices that are still used
+    used, new_facets = np.unique(new_facets, return_inverse=True)
+    new_facets = new_facets.reshape(-1, 3)
+
+    if not np.isscalar(albedos):
+        albedos = albedos[used]
+
+    return Triangle64(new_vertices[used], albedos, new_facets)
+
+
+class LODShape:
+    """
+    A level of detail hierarchy of a tessellated shape.
+
+    This class stores precomputed versions of a shape at progressively coarser resolutions in :attr:`levels` (with the
+    full resolution shape as level 0) and behaves like the level currently selected by :attr:`active_level`.  Any
+    attribute not defined by this class (for instance ``trace``, ``find_limbs``, or ``compute_limb_jacobian``) is
+    retrieved from the active level, while :meth:`rotate` and :meth:`translate` are applied to every level so that they
+    always stay together.  The :attr:`bounding_box` and :attr:`reference_ellipsoid` are always those of the full
+    resolution shape.
+
+    The active level is typically selected automatically based on the ground sample distance of the camera through
+    :meth:`.SceneObject.select_level_of_detail`, but can be set directly or by calling :meth:`select`.
+
+    Typically this is created using :meth:`from_shape`, which makes the coarser levels using :func:`decimate_surface`
+
+        >>> from giant.ray_tracer.lod import LODShape
+        >>> lod = LODShape.from_shape(kdtree, num_levels=5)
+        >>> lod.select(0.05)  # select the level for a 50 m ground sample distance if the shape is in km
+    """
+
+    def __init__(self, levels: Sequence[Any], resolutions: Optional[ARRAY_LIKE] = None, detail_factor: Real = 0.5):
+        """
+        :param levels: The shapes making up the hierarchy, from the finest to the coarsest.  These should all represent
+                       the same object in the same frame.
+        :param resolutions: The resolution (typical edge length) of each level in the units of the shape.  If ``None``
+                            then this is computed using :func:`compute_resolution` for each level
+        :param detail_factor: The largest allowed ratio of the resolution of the selected level to the ground sample
+                              distance
+        :raises ValueError: If no levels are provided, the number of resolutions doesn't match the number of levels, or
+                            the detail factor is not positive
+        """
+
+        if len(levels) == 0:
+            raise ValueError("At least 1 level must be provided")
+
+        if detail_factor <= 0:
+            raise ValueError("The detail factor must be positive")
+
+        self.levels: List[Any] = list(levels)
+        """
+        The shapes making up the hierarchy, from the finest (level 0) to the coarsest.
+        """
+
+        if resolutions is None:
+            resolutions = [compute_resolution(level) for level in self.levels]
+
+        self.resolutions: np.ndarray = np.asarray(resolutions, dtype=np.float64).ravel()
+        """
+        The resolution (typical edge length) of each level in the units of the shape.
+        """
+
+        if self.resolutions.size != len(self.levels):
+            raise ValueError("There must be a resolution for each level")
+
+        self.detail_factor: float = float(detail_factor)
+        """
+        The largest allowed ratio of the resolution of the selected level to the ground sample distance.
+
+        Smaller values select finer levels.  The default of 0.5 keeps the facets at least 2 times smaller than the
+        footprint of a pixel so that templates rendered with the selected level are indistinguishable from those rendered
+        with the full resolution shape.
+        """
+
+        self._active_level: int = 0
+
+    def __getattr__(self, item: str) -> Any:
+        # don't forward private attributes so that copying/pickling works before the instance is fully initialized
+        if item.startswith('_') or (item == 'levels'):
+            raise AttributeError(item)
+
+        return getattr(self.shape, item)
+
+    @classmethod
+    def from_shape(cls, shape: Any, num_levels: int = 4, reduction: Real = 2.0, min_faces: int = 500,
+                   detail_factor: Real = 0.5, max_depth: Optional[int] = None) -> 'LODShape':
+        """
+        Creates a level of detail hierarchy from a tessellated shape.
+
+        The shape itself is used as level 0.  Each subsequent level is made using :func:`decimate_surface` with a cell
+        size ``reduction`` times larger than the resolution of the previous level (which reduces the number of facets
+        by roughly ``reduction**2``), and is stored as a :class:`.KDTree` in the current frame of the shape.  Levels are
+        added until ``num_levels`` levels exist or the next level would have fewer than ``min_faces`` facets.
+
+        :param shape: The triangulated :class:`.RawSurface`, :class:`.KDTree`, or :class:`.FlatKDTree` to build the
+                      hierarchy from
+        :param num_levels: The maximum number of levels, including the full resolution shape
+        :param reduction: The factor to increase the resolution by for each level
+        :param min_faces: The minimum number of facets for a decimated level
+        :param detail_factor: The largest allowed ratio of the resolution of the selected level to the ground sample
+                              distance
+        :param max_depth: The maximum depth of the :class:`.KDTree` for each decimated level.  If ``None`` then this is
+                          chosen so that the leaves contain about 8 facets each.
+        :return: The level of detail hierarchy
+        :raises ValueError: If ``reduction`` is not greater than 1 or ``num_levels`` is less than 1
+        """
+
+        if reduction <= 1:
+            raise ValueError("The reduction must be greater than 1")
+
+        if num_levels < 1:
+            raise ValueError("There must be at least 1 level")
+
+        levels = [shape]
+        resolutions = [compute_resolution(shape)]
+
+        surface = shape
+        while len(levels) < num_levels:
+            cell_size = reduction * resolutions[-1]
+
+            try:
+                surface = decimate_surface(surface, cell_size)
+            except ValueError:
+                break
+
+            if surface.facets.shape[0] < min_faces:
+                break
+
+            if max_depth is None:
+                depth = int(np.clip(np.ceil(np.log2(surface.facets.shape[0] / 8)), 1, 18))
+            else:
+                depth = max_depth
+
+            tree = KDTree(surface, max_depth=depth)
+            tree.build_parallel(print_progress=False)
+
+            levels.append(tree)
+            resolutions.append(max(compute_resolution(surface), cell_size))
+
+        return cls(levels, resolutions=resolutions, detail_factor=detail_factor)
+
+    @property
+    def shape(self) -> Any:
+        """
+        The currently active level.
+        """
+
+        return self.levels[self._active_level]
+
+    @property
+    def active_level(self) -> int:
+        """
+        The index into :attr:`levels` of the level that is currently used.
+        """
+
+        return self._active_level
+
+    @active_level.setter
+    def active_level(self, val: int):
+
+        val = int(val)
+
+        if not (0 <= val < len(self.levels)):
+            raise ValueError("The active level must be between 0 and {}".format(len(self.levels) - 1))
+
+        self._active_level = val
+
+    @property
+    def bounding_box(self) -> Any:
+        """
+        The bounding box of the full resolution shape, which contains every level.
+        """
+
+        return self.levels[0].bounding_box
+
+    @property
+    def reference_ellipsoid(self) -> Any:
+        """
+        The reference ellipsoid of the full resolution shape.
+        """
+
+        return getattr(self.levels[0], "reference_ellipsoid", None)
+
+    @property
+    def order(self) -> int:
+        """
+        The largest order of any of the levels, so that the facet numbers of every level fit in a :class:`.Scene`.
+        """
+
+        orders = []
+        for level in self.levels:
+            if hasattr(level, "order"):
+                orders.append(level.order)
+            else:
+                orders.append(int(np.log10(level.num_faces)))
+
+        return max(orders)
+
+    def select(self, ground_sample_distance: Real) -> int:
+        """
+        Selects and activates the coarsest level whose resolution is no larger than :attr:`detail_factor` times the
+        ground sample distance.
+
+        If no level is coarse enough then the full resolution shape (level 0) is selected.  If the ground sample
+        distance is not finite then the full resolution shape is selected.
+
+        :param ground_sample_distance: The ground sample distance of the camera at the shape in the units of the shape
+        :return: The index of the selected level
+        """
+
+        level = 0
+
+        if np.isfinite(ground_sample_distance):
+            allowed = np.flatnonzero(self.resolutions <= self.detail_factor * ground_sample_distance)
+
+            if allowed.size:
+                level = int(allowed.max())
+
+        self._active_level = level
+
+        return level
+
+    def trace(self, rays: Any, *args, **kwargs) -> np.ndarray:
+        """
+        Traces rays through the active level.
+
+        See the ``trace`` method of the active level for details.
+
+        :param rays: The rays to trace
+        :return: The results of tracing the active level
+        """
+
+        return self.shape.trace(rays, *args, **kwargs)
+
+    def is_occluded(self, rays: Any) -> np.ndarray:
+        """
+        Checks whether each ray strikes the active level.
+
+        This uses the ``is_occluded`` method of the active level if it has one, otherwise it uses its ``trace`` method.
+
+        :param rays: The rays to check
+        :return: A boolean numpy array which is ``True`` where the ray struck the active level
+        """
+
+        if hasattr(self.shape, "is_occluded"):
+            return np.atleast_1d(self.shape.is_occluded(rays)).ravel()
+
+        return np.atleast_1d(self.shape.trace(rays)["check"]).ravel()
+
+    def rotate(self, rotation: Union[Rotation, ARRAY_LIKE]):
+        """
+        Rotates every level.
+
+        :param rotation: The rotation to apply
+        """
+
+        if not isinstance(rotation, Rotation):
+            rotation = Rotation(rotation)
+
+        for level in self.levels:
+            level.rotate(rotation)
+
+    def translate(self, translation: ARRAY_LIKE):
+        """
+        Translates every level.
+
+        :param translation: The translation to apply
+        """
+
+        translation = np.asarray(translation, dtype=np.float64).ravel()
+
+        for level in self.levels:
+            level.translate(translation)
@@ -0,0 +1,16 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+# these match the values of the omp_sched_t enumeration
+cdef enum:
+    SCHEDULE_DEFAULT = 0
+    SCHEDULE_STATIC = 1
+    SCHEDULE_DYNAMIC = 2
+    SCHEDULE_GUIDED = 3
+    SCHEDULE_AUTO = 4
+
+
+cdef int get_thread_count() noexcept nogil
+
+cdef void apply_schedule(const int default_schedule) noexcept nogil
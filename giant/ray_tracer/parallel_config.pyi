@@ -0,0 +1,30 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+from contextlib import AbstractContextManager
+from typing import Optional, Tuple
+
+
+NUM_THREADS_ENVIRONMENT_VARIABLE: str
+SCHEDULE_ENVIRONMENT_VARIABLE: str
+SCHEDULES: Tuple[str, ...]
+
+
+def set_num_threads(num_threads: Optional[int] = None) -> None: ...
+
+
+def get_num_threads() -> int: ...
+
+
+def set_schedule(schedule: Optional[str] = None, chunk_size: int = 0) -> None: ...
+
+
+def get_schedule() -> Tuple[str, int]: ...
+
+
+def parallel_config(num_threads: Optional[int] = None, schedule: Optional[str] = None,
+                    chunk_size: Optional[int] = None) -> AbstractContextManager[None]: ...
+
+
+def configure_from_environment() -> None: ...
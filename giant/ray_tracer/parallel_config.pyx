@@ -0,0 +1,258 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+"""
+This cython module provides the global runtime configuration for the OpenMP kernels used throughout GIANT.
+
+Description
+-----------
+
+All of the compiled kernels in GIANT (ray tracing, limb finding, normal computation, tree building, rendering,
+rasterization, and the surface feature correlators) are parallelized using OpenMP.  By default they use as many threads
+as OpenMP allows (usually the number of cores, or ``OMP_NUM_THREADS`` if it is set) and a loop schedule chosen for
+each kernel.  This is not always what you want.  On machines with many cores you may want to make sure all of them are
+used, while when you run several GIANT processes at once you will want to limit each one so that the machine is not
+oversubscribed.
+
+The functions in this module control the number of threads, the loop schedule, and the chunk size used by every
+compiled kernel at run time:
+
+* :func:`set_num_threads`/:func:`get_num_threads` control the number of threads in each parallel region
+* :func:`set_schedule`/:func:`get_schedule` control how the loop iterations are divided between the threads
+* :func:`parallel_config` temporarily changes the settings inside of a ``with`` block
+
+The initial settings are read from the ``GIANT_NUM_THREADS`` and ``GIANT_SCHEDULE`` environment variables when this
+module is first imported (see :func:`configure_from_environment`).  ``GIANT_NUM_THREADS`` should be a positive integer
+and ``GIANT_SCHEDULE`` should be a schedule kind optionally followed by a comma and a chunk size (for instance
+``dynamic,64``), following the same format as the ``OMP_SCHEDULE`` environment variable.
+
+The settings are global for the process and apply to parallel regions started from any Python thread.  If GIANT was
+built without OpenMP the settings are stored but everything runs serially.
+
+Use
+---
+
+.. code::
+
+    >>> from giant.ray_tracer import parallel_config
+    >>> parallel_config.set_num_threads(16)
+    >>> parallel_config.set_schedule('dynamic', 64)
+    >>> with parallel_config.parallel_config(num_threads=1):
+    ...     tree.trace(rays)  # runs in a single thread
+"""
+
+import os
+import warnings
+from contextlib import contextmanager
+from typing import Optional, Tuple, Iterator
+
+
+cdef extern from *:
+    """
+    #ifdef _OPENMP
+    #include <omp.h>
+    static int giant_omp_max_threads(void) { return omp_get_max_threads(); }
+    static void giant_omp_set_schedule(int kind, int chunk_size) { omp_set_schedule((omp_sched_t) kind, chunk_size); }
+    #else
+    static int giant_omp_max_threads(void) { return 1; }
+    static void giant_omp_set_schedule(int kind, int chunk_size) { (void) kind; (void) chunk_size; }
+    #endif
+    """
+    int giant_omp_max_threads() noexcept nogil
+    void giant_omp_set_schedule(int kind, int chunk_size) noexcept nogil
+
+
+NUM_THREADS_ENVIRONMENT_VARIABLE: str = 'GIANT_NUM_THREADS'
+"""
+The name of the environment variable used to set the initial number of threads.
+"""
+
+SCHEDULE_ENVIRONMENT_VARIABLE: str = 'GIANT_SCHEDULE'
+"""
+The name of the environment variable used to set the initial schedule (``kind[,chunk_size]``).
+"""
+
+SCHEDULES: Tuple[str, ...] = ('default', 'static', 'dynamic', 'guided', 'auto')
+"""
+The recognized schedule kinds.
+
+``'default'`` uses the schedule that was chosen for each kernel (static for kernels where each iteration does the same
+amount of work, dynamic or guided for kernels like ray tracing where it can vary), while the others use the
+corresponding OpenMP schedule for every kernel.
+"""
+
+
+# 0 means use the OpenMP default
+cdef int _num_threads = 0
+cdef int _schedule = SCHEDULE_DEFAULT
+cdef int _chunk_size = 0
+
+
+cdef int get_thread_count() noexcept nogil:
+    """
+    This C function returns the number of threads each parallel region should use.
+    """
+
+    if _num_threads > 0:
+        return _num_threads
+
+    return giant_omp_max_threads()
+
+
+cdef void apply_schedule(const int default_schedule) noexcept nogil:
+    """
+    This C function sets the OpenMP run time schedule for the calling thread.
+
+    It must be called before entering any parallel region that uses ``schedule='runtime'``.  ``default_schedule`` is
+    the schedule chosen for the kernel, which is used unless the user has selected a specific schedule.
+    """
+
+    if _schedule == SCHEDULE_DEFAULT:
+        giant_omp_set_schedule(default_schedule, _chunk_size)
+    else:
+        giant_omp_set_schedule(_schedule, _chunk_size)
+
+
+def set_num_threads(num_threads: Optional[int] = None):
+    """
+    set_num_threads(num_threads=None)
+
+    Sets the number of threads used by all of the OpenMP kernels in GIANT.
+
+    :param num_threads: The number of threads to use.  ``None`` (or 0) restores the OpenMP default
+    :raises ValueError: If the number of threads is negative
+    """
+
+    global _num_threads
+
+    if num_threads is None:
+        num_threads = 0
+
+    num_threads = int(num_threads)
+
+    if num_threads < 0:
+        raise ValueError('num_threads must be non-negative, not {}'.format(num_threads))
+
+    _num_threads = num_threads
+
+
+def get_num_threads() -> int:
+    """
+    get_num_threads()
+
+    Returns the number of threads that will be used by the OpenMP kernels in GIANT.
+
+    :return: The number of threads
+    """
+
+    return get_thread_count()
+
+
+def set_schedule(schedule: Optional[str] = None, chunk_size: int = 0):
+    """
+    set_schedule(schedule=None, chunk_size=0)
+
+    Sets the loop schedule used by all of the OpenMP kernels in GIANT.
+
+    :param schedule: The schedule kind, one of :data:`SCHEDULES`.  ``None`` restores the default for each kernel
+    :param chunk_size: The number of iterations handed to a thread at a time.  0 uses the OpenMP default for the
+                       schedule
+    :raises ValueError: If the schedule is not recognized or the chunk size is negative
+    """
+
+    global _schedule, _chunk_size
+
+    if schedule is None:
+        schedule = 'default'
+
+    schedule = schedule.lower()
+
+    if schedule not in SCHEDULES:
+        raise ValueError('schedule must be one of {} not {}'.format(SCHEDULES, schedule))
+
+    chunk_size = int(chunk_size)
+
+    if chunk_size < 0:
+        raise ValueError('chunk_size must be non-negative, not {}'.format(chunk_size))
+
+    _schedule = SCHEDULES.index(schedule)
+    _chunk_size = chunk_size
+
+
+def get_schedule() -> Tuple[str, int]:
+    """
+    get_schedule()
+
+    Returns the loop schedule and chunk size used by the OpenMP kernels in GIANT.
+
+    :return: The schedule kind (one of :data:`SCHEDULES`) and the chunk size (0 for the OpenMP default)
+    """
+
+    return SCHEDULES[_schedule], _chunk_size
+
+
+@contextmanager
+def parallel_config(num_threads: Optional[int] = None, schedule: Optional[str] = None,
+                    chunk_size: Optional[int] = None) -> Iterator[None]:
+    """
+    parallel_config(num_threads=None, schedule=None, chunk_size=None)
+
+    A context manager which temporarily changes the OpenMP settings, restoring the previous settings on exit.
+
+    Any argument left as ``None`` keeps its current setting.
+
+    :param num_threads: The number of threads to use inside of the block
+    :param schedule: The schedule kind to use inside of the block
+    :param chunk_size: The chunk size to use inside of the block
+    """
+
+    global _num_threads, _schedule, _chunk_size
+
+    previous = (_num_threads, _schedule, _chunk_size)
+
+    try:
+        if num_threads is not None:
+            set_num_threads(num_threads)
+
+        if (schedule is not None) or (chunk_size is not None):
+            set_schedule(SCHEDULES[_schedule] if schedule is None else schedule,
+                         _chunk_size if chunk_size is None else chunk_size)
+
+        yield
+
+    finally:
+        _num_threads, _schedule, _chunk_size = previous
+
+
+def configure_from_environment():
+    """
+    configure_from_environment()
+
+    Sets the number of threads and the schedule from the ``GIANT_NUM_THREADS`` and ``GIANT_SCHEDULE`` environment
+    variables.
+
+    This is called automatically when this module is imported.  Variables that are not set are ignored, and variables
+    that can't be interpreted are ignored with a warning.
+    """
+
+    num_threads = os.environ.get(NUM_THREADS_ENVIRONMENT_VARIABLE)
+
+    if num_threads:
+        try:
+            set_num_threads(int(num_threads))
+        except ValueError:
+            warnings.warn('Unable to interpret {}={!r}.  Ignoring'.format(NUM_THREADS_ENVIRONMENT_VARIABLE,
+                                                                        num_threads))
+
+    schedule = os.environ.get(SCHEDULE_ENVIRONMENT_VARIABLE)
+
+    if schedule:
+        kind, _, chunk_size = schedule.partition(',')
+        try:
+            set_schedule(kind.strip(), int(chunk_size) if chunk_size.strip() else 0)
+        except ValueError:
+            warnings.warn('Unable to interpret {}={!r}.  Ignoring'.format(SCHEDULE_ENVIRONMENT_VARIABLE, schedule))
+
+
+configure_from_environment()
@@ -0,0 +1,610 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+"""
+This cython module provides a CPU rasterization renderer which can be used in place of ray tracing to render templates.
+
+Description
+-----------
+
+Ray tracing (:mod:`.render`) does work proportional to the number of pixels times the number of rays per pixel times
+the (logarithmic) cost of finding the closest facet for each ray.  When a whole body is rendered from far away, where a
+template is small but the shape model has many facets, it is often much cheaper to go the other way around and project
+each facet onto the image instead, which is what rasterization does.
+
+The :func:`rasterize_template` function in this module renders a template by
+
+#. converting each target in the scene into triangles in the camera frame (see :func:`triangulate`),
+#. projecting the vertices of the triangles onto the image using the :class:`.CameraModel` and scan converting each
+   triangle into a depth buffer (z-buffer) defined on the same sub-pixel grid that :func:`.compute_rays` and
+   :func:`.render_template` use, keeping the closest triangle for each sub-pixel,
+#. rendering a shadow map of all of the triangles as seen from the light (using an orthographic projection along the
+   direction to the light since the light is typically very far away),
+#. reconstructing the surface location, normal, and albedo for each sub-pixel that struck something from the closest
+   triangle (using perspective correct interpolation), checking the surface location against the shadow map, and
+   evaluating the illumination model, and
+#. summing the intensities of the sub-pixels into the template pixels.
+
+The scan conversion is done in compiled code, parallelized over bands of rows with OpenMP.  The results match the ray
+traced templates closely, but not exactly.  The edges of the projected triangles are straight lines in the image, while
+with a distorted camera model they are slightly curved, and shadows are resolved at the resolution of the shadow map
+instead of per ray.  Ellipsoids are tessellated with a resolution tied to their apparent size.
+
+Use
+---
+
+The rasterizer is a drop-in replacement for :func:`.render_template`
+
+    >>> from giant.ray_tracer.raster import rasterize_template
+    >>> template, (min_bounds, max_bounds) = rasterize_template(scene, model, (0, 511), (0, 511), grid_size=3)
+
+and can be selected in the :class:`.XCorrCenterFinding` and :class:`.SurfaceFeatureNavigation` classes using their
+``rasterize`` options.  Any shape can be rasterized as long as :func:`triangulate` understands it, which includes all
+:class:`.Surface` types, the :class:`.KDTree`, the :class:`.FlatKDTree`, the :class:`.Ellipsoid`,
+:class:`.ShapeInstance`, and any object which provides its own ``triangulate`` method returning the same outputs as
+:func:`triangulate`.
+"""
+
+from typing import Tuple, Optional
+
+import numpy as np
+cimport numpy as cnp
+
+import cython
+from cython.parallel import prange
+from libc.math cimport ceil, floor
+from giant.ray_tracer.parallel_config cimport get_thread_count, apply_schedule, SCHEDULE_DYNAMIC
+
+from giant.ray_tracer.shapes import Ellipsoid
+from giant.ray_tracer.shapes.surface import RawSurface
+from giant.ray_tracer.kdtree import KDTree
+from giant.ray_tracer.flat_kdtree import FlatKDTree
+from giant.ray_tracer.scene import ShapeInstance
+from giant.ray_tracer.lod import LODShape
+from giant.ray_tracer.illumination import ILLUM_DTYPE, McEwenIllumination
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void _raster_band(const double[:] x, const double[:] y, const double[:] key, const cnp.int64_t[:, :] facets,
+                       const Py_ssize_t row_start, const Py_ssize_t row_stop, double[:, :] depth,
+                       cnp.int64_t[:, :] ids) noexcept nogil:
+    """
+    This C function scan converts every triangle into the rows ``row_start:row_stop`` of the depth buffer.
+
+    The grid points are at integer (x, y) locations.  The key is interpolated linearly across each triangle and the
+    largest key for each grid point is kept, along with the index of the triangle it came from.
+    """
+
+    cdef:
+        Py_ssize_t facet, row, col, min_row, max_row, min_col, max_col
+        Py_ssize_t num_cols = depth.shape[1]
+        cnp.int64_t a, b, c
+        double x0, y0, x1, y1, x2, y2, area, w0, w1, w2, value
+        double eps = -1e-12
+
+    for facet in range(facets.shape[0]):
+
+        a = facets[facet, 0]
+        b = facets[facet, 1]
+        c = facets[facet, 2]
+
+        x0 = x[a]
+        y0 = y[a]
+        x1 = x[b]
+        y1 = y[b]
+        x2 = x[c]
+        y2 = y[c]
+
+        # triangles with a vertex that couldn't be projected are marked with nans
+        if (x0 != x0) or (x1 != x1) or (x2 != x2):
+            continue
+
+        min_row = <Py_ssize_t> ceil(min(y0, min(y1, y2)))
+        max_row = <Py_ssize_t> floor(max(y0, max(y1, y2)))
+
+        if min_row < row_start:
+            min_row = row_start
+        if max_row > row_stop - 1:
+            max_row = row_stop - 1
+
+        if min_row > max_row:
+            continue
+
+        min_col = <Py_ssize_t> ceil(min(x0, min(x1, x2)))
+        max_col = <Py_ssize_t> floor(max(x0, max(x1, x2)))
+
+        if min_col < 0:
+            min_col = 0
+        if max_col > num_cols - 1:
+            max_col = num_cols - 1
+
+        if min_col > max_col:
+            continue
+
+        area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+
+        if area == 0:
+            continue
+
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+
+                # the barycentric coordinates of the grid point
+                w0 = ((x1 - col) * (y2 - row) - (x2 - col) * (y1 - row)) / area
+                w1 = ((x2 - col) * (y0 - row) - (x0 - col) * (y2 - row)) / area
+                w2 = 1 - w0 - w1
+
+                if (w0 < eps) or (w1 < eps) or (w2 < eps):
+                    continue
+
+                value = w0 * key[a] + w1 * key[b] + w2 * key[c]
+
+                if value > depth[row, col]:
+                    depth[row, col] = value
+                    ids[row, col] = facet
+
+
+def _rasterize(x, y, key, facets, num_rows, num_cols, omp):
+    """
+    This helper scan converts triangles into a new depth buffer with ``num_rows`` rows and ``num_cols`` columns.
+
+    When ``omp`` is ``True`` the rows are split into bands which are scan converted in parallel.
+
+    :return: The depth buffer (the largest interpolated key for each grid point or ``-inf``) and the index of the
+             triangle that each grid point came from (or -1)
+    """
+
+    depth = np.full((num_rows, num_cols), -np.inf, dtype=np.float64)
+    ids = -np.ones((num_rows, num_cols), dtype=np.int64)
+
+    cdef:
+        const double[:] x_view = np.ascontiguousarray(x, dtype=np.float64)
+        const double[:] y_view = np.ascontiguousarray(y, dtype=np.float64)
+        const double[:] key_view = np.ascontiguousarray(key, dtype=np.float64)
+        const cnp.int64_t[:, :] facets_view = np.ascontiguousarray(facets, dtype=np.int64)
+        double[:, :] depth_view = depth
+        cnp.int64_t[:, :] ids_view = ids
+        Py_ssize_t total_rows = num_rows
+        Py_ssize_t band_rows = 16
+        Py_ssize_t num_bands = (total_rows + band_rows - 1) // band_rows
+        Py_ssize_t band, stop
+
+    if omp and (num_bands > 1):
+        apply_schedule(SCHEDULE_DYNAMIC)
+        for band in prange(num_bands, nogil=True, schedule='runtime', num_threads=get_thread_count()):
+            stop = (band + 1) * band_rows
+            if stop > total_rows:
+                stop = total_rows
+            _raster_band(x_view, y_view, key_view, facets_view, band * band_rows, stop, depth_view, ids_view)
+    else:
+        with nogil:
+            _raster_band(x_view, y_view, key_view, facets_view, 0, total_rows, depth_view, ids_view)
+
+    return depth, ids
+
+
+def _tessellate_ellipsoid(ellipsoid, resolution):
+    """
+    This helper tessellates an ellipsoid into triangles using a latitude/longitude grid with ``resolution`` longitude
+    steps.
+    """
+
+    num_lon = max(int(resolution), 8)
+    num_lat = num_lon // 2 + 1
+
+    lat = np.linspace(-np.pi / 2, np.pi / 2, num_lat)[1:-1]
+    lon = np.linspace(0, 2 * np.pi, num_lon, endpoint=False)
+
+    lat, lon = np.meshgrid(lat, lon, indexing='ij')
+
+    # the grid points plus the 2 poles
+    units = np.vstack([np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)],
+                                axis=-1).reshape(-1, 3),
+                       [[0, 0, -1], [0, 0, 1]]])
+
+    south = units.shape[0] - 2
+    north = units.shape[0] - 1
+
+    rings = np.arange(num_lat - 2).reshape(-1, 1) * num_lon
+    this_lon = np.arange(num_lon).reshape(1, -1)
+    next_lon = (this_lon + 1) % num_lon
+
+    # quads between the latitude rings
+    lower_left = (rings[:-1] + this_lon).ravel()
+    lower_right = (rings[:-1] + next_lon).ravel()
+    upper_left = (rings[1:] + this_lon).ravel()
+    upper_right = (rings[1:] + next_lon).ravel()
+
+    facets = np.vstack([np.stack([lower_left, lower_right, upper_right], axis=-1),
+                        np.stack([lower_left, upper_right, upper_left], axis=-1),
+                        np.stack([np.full(num_lon, south), next_lon.ravel(), this_lon.ravel()], axis=-1),
+                        np.stack([np.full(num_lon, north), (rings[-1] + this_lon).ravel(),
+                                  (rings[-1] + next_lon).ravel()], axis=-1)]).astype(np.int64)
+
+    body_points = units * np.asarray(ellipsoid.principal_axes, dtype=np.float64).ravel()
+
+    orientation = np.asarray(ellipsoid.orientation, dtype=np.float64)
+
+    vertices = body_points @ orientation.T + np.asarray(ellipsoid.center, dtype=np.float64).ravel()
+
+    albedos = np.asarray(ellipsoid.compute_albedos(body_points.T), dtype=np.float64).ravel()
+
+    return vertices, facets, _facet_normals(vertices, facets), albedos[facets]
+
+
+def _facet_normals(vertices, facets):
+    """
+    This helper computes the outward unit normal of each triangle from its vertices using the right hand rule.
+    """
+
+    normals = np.cross(vertices[facets[:, 1]] - vertices[facets[:, 0]], vertices[facets[:, 2]] - vertices[facets[:, 0]])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return normals / np.linalg.norm(normals, axis=-1, keepdims=True)
+
+
+def _corner_albedos(albedos, facets):
+    """
+    This helper expands the albedos of a surface into the albedo at each corner of each triangle in the same way the
+    surfaces index them when tracing.
+    """
+
+    albedos = np.asarray(albedos, dtype=np.float64)
+
+    if albedos.ndim == 0 or albedos.size == 1:
+        return np.full(facets.shape, float(albedos.ravel()[0]), dtype=np.float64)
+
+    return albedos.ravel()[facets]
+
+
+def _to_current_frame(triangles, rotation, position):
+    """
+    This helper transforms triangles from a local frame into the current frame given the rotation and position that
+    take the current frame into the local frame (``local = rotation@current + position``).
+    """
+
+    vertices, facets, normals, albedos = triangles
+
+    if position is not None:
+        vertices = vertices - np.asarray(position, dtype=np.float64).ravel()
+
+    if rotation is not None:
+        matrix = np.asarray(getattr(rotation, "matrix", rotation), dtype=np.float64)
+
+        # row vectors so right multiplying by the matrix applies the transpose
+        vertices = vertices @ matrix
+        normals = normals @ matrix
+
+    return vertices, facets, normals, albedos
+
+
+def triangulate(shape, resolution=64):
+    """
+    triangulate(shape, resolution=64)
+
+    This function converts a shape into triangles expressed in the current frame for rasterization.
+
+    The following shapes are supported
+
+    * :class:`.RawSurface` subclasses (like :class:`.Triangle64`), which are used directly
+    * :class:`.KDTree` and :class:`.FlatKDTree`, whose surfaces are transformed from the tree frame into the current
+      frame
+    * :class:`.ShapeInstance`, whose shape is triangulated and then transformed into the current frame
+    * :class:`.LODShape`, whose active level is triangulated
+    * :class:`.Ellipsoid`, which is tessellated using a latitude/longitude grid with ``resolution`` steps in longitude
+    * anything with a ``triangulate`` method, which is called with ``resolution`` and must return the same outputs as
+      this function
+
+    :param shape: The shape to triangulate
+    :param resolution: The number of longitude steps to use when tessellating ellipsoids
+    :type resolution: int
+    :return: The vertices as a nx3 array, the facets as a mx3 array of indices into the vertices, the unit normal of
+             each facet as a mx3 array, and the albedo at each corner of each facet as a mx3 array
+    :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+    :raises ValueError: If the shape cannot be triangulated
+    """
+
+    if isinstance(shape, LODShape):
+        return triangulate(shape.shape, resolution=resolution)
+
+    if isinstance(shape, ShapeInstance):
+        return _to_current_frame(triangulate(shape.shape, resolution=resolution), shape._rotation, shape._position)
+
+    if isinstance(shape, KDTree):
+        return _to_current_frame(triangulate(shape.surface, resolution=resolution), shape.rotation, shape.position)
+
+    if isinstance(shape, FlatKDTree):
+        facets = np.asarray(shape.facets, dtype=np.int64)
+
+        return _to_current_frame((np.asarray(shape.vertices, dtype=np.float64), facets,
+                                  np.asarray(shape.normals, dtype=np.float64), _corner_albedos(shape.albedos, facets)),
+                                 shape.rotation, shape.position)
+
+    if isinstance(shape, RawSurface):
+        facets = np.asarray(shape.facets, dtype=np.int64)
+        normals = np.asarray(shape.normals, dtype=np.float64)
+
+        if facets.shape[-1] > 3:
+            # fan triangulate polygons around their first vertex
+            fans = range(1, facets.shape[-1] - 1)
+
+            facets, normals = (np.vstack([facets[:, [0, corner, corner + 1]] for corner in fans]),
+                               np.tile(normals, (len(fans), 1)))
+
+        return np.asarray(shape.vertices, dtype=np.float64), facets, normals, _corner_albedos(shape.albedos, facets)
+
+    if isinstance(shape, Ellipsoid):
+        return _tessellate_ellipsoid(shape, resolution)
+
+    if hasattr(shape, "triangulate"):
+        return shape.triangulate(resolution=resolution)
+
+    raise ValueError("Unable to triangulate shapes of type {}".format(type(shape).__name__))
+
+
+def rasterize_template(scene, model, rows, cols, grid_size=1, illumination_model=None, temperature=0, image_number=0,
+                       shadow_resolution=None, tile_rows=32, omp=True, return_coverage=False):
+    """
+    rasterize_template(scene, model, rows, cols, grid_size=1, illumination_model=None, temperature=0, image_number=0, shadow_resolution=None, tile_rows=32, omp=True, return_coverage=False)
+
+    This function renders a template of the targets in a scene using rasterization with a z-buffer and a shadow map.
+
+    This is a drop-in replacement for :func:`.render_template`.  The sub-pixels are laid out in the same way, the scene
+    should already be placed in the camera frame, and the template and its bounds are returned in the same way.  See the
+    module documentation for details on how the rendering is done and how the results differ from ray tracing.
+
+    The shadow map is rendered with square texels.  By default, its resolution is chosen so that the texels are about
+    half the size of a sub-pixel on the targets (up to 2048 texels on a side), which can be overridden with
+    ``shadow_resolution``.  Ellipsoids are tessellated so that their facets are about 1 sub-pixel across (up to 1024
+    steps in longitude).
+
+    :param scene: The scene to render, already placed in the camera frame
+    :type scene: Scene
+    :param model: The camera model used to project the triangles onto the image
+    :type model: CameraModel
+    :param rows: The minimum and maximum pixel row to render (inclusive on both sides)
+    :type rows: ARRAY_LIKE
+    :param cols: The minimum and maximum pixel column to render (inclusive on both sides)
+    :type cols: ARRAY_LIKE
+    :param grid_size: The number of samples per edge of each pixel
+    :type grid_size: int
+    :param illumination_model: The illumination model used to convert the geometry into intensities.  If ``None`` then
+                               :class:`.McEwenIllumination` is used
+    :type illumination_model: Optional[IlluminationModel]
+    :param temperature: The temperature of the camera passed to :meth:`.CameraModel.project_onto_image`
+    :type temperature: Real
+    :param image_number: The number of the image passed to :meth:`.CameraModel.project_onto_image`
+    :type image_number: int
+    :param shadow_resolution: The number of texels along the longest side of the shadow map or ``None`` to choose it
+                              automatically
+    :type shadow_resolution: Optional[int]
+    :param tile_rows: The number of pixel rows to shade at a time
+    :type tile_rows: int
+    :param omp: A boolean flag specifying whether to use parallel processing (``True``) or not
+    :type omp: bool
+    :param return_coverage: A flag specifying whether to also return a boolean array the same shape as the template
+                            which is ``True`` for pixels where every sample struck something
+    :type return_coverage: bool
+    :return: The rendered template as a 2D array and the (column, row) pixel location of the first and last pixels in
+             the template as a tuple of length 2 arrays (and the coverage array if requested)
+    :rtype: Union[Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]],
+                  Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray], np.ndarray]]
+    :raises ValueError: if the scene does not have both a light object and target objects or if ``tile_rows`` is less
+                        than 1
+    """
+
+    if (scene.light_obj is None) or (not scene.target_objs):
+        raise ValueError("both light_obj and target_objs must be set to render a template")
+
+    if tile_rows < 1:
+        raise ValueError("tile_rows must be at least 1")
+
+    if illumination_model is None:
+        illumination_model = McEwenIllumination()
+
+    # lay out the sub-pixels the same way as compute_rays
+    grid_dist = 1 / grid_size
+    grid_start = 0.5 - grid_dist / 2
+
+    sub_cols = np.arange(cols[0] - grid_start, cols[1] + 0.5, grid_dist)
+    sub_rows = np.arange(rows[0] - grid_start, rows[1] + 0.5, grid_dist)
+
+    min_bounds = np.array([sub_cols[0], sub_rows[0]]).round()
+    max_bounds = np.array([sub_cols[-1], sub_rows[-1]]).round()
+
+    column_index = (sub_cols.round() - min_bounds[0]).astype(np.int64)
+    row_index = (sub_rows.round() - min_bounds[1]).astype(np.int64)
+
+    template_shape = (int(max_bounds[1] - min_bounds[1]) + 1, int(max_bounds[0] - min_bounds[0]) + 1)
+
+    light_position = np.asarray(scene.light_obj.shape.location, dtype=np.float64).ravel()
+
+    def to_grid(points):
+        # project points in the camera frame onto the sub-pixel grid, marking anything behind the camera with nans
+        grid = np.full((2, points.shape[0]), np.nan)
+
+        in_front = points[:, 2] > 0
+
+        if in_front.any():
+            pixels = np.asarray(model.project_onto_image(points[in_front].T, temperature=temperature,
+                                                         image=image_number), dtype=np.float64).reshape(2, -1)
+
+            grid[0, in_front] = (pixels[0] - sub_cols[0]) / grid_dist
+            grid[1, in_front] = (pixels[1] - sub_rows[0]) / grid_dist
+
+        return grid
+
+    # gather the triangles for every target
+    vertices = []
+    facets = []
+    normals = []
+    albedos = []
+
+    num_vertices = 0
+    for target in scene.target_objs:
+
+        resolution = 64
+
+        if isinstance(target.shape, Ellipsoid):
+            corners = to_grid(np.asarray(target.shape.bounding_box.vertices, dtype=np.float64).T)
+
+            if np.isfinite(corners).all():
+                extent = np.ptp(corners, axis=1).max()
+
+                resolution = int(np.clip(np.ceil(np.pi * extent), 16, 1024))
+
+        target_vertices, target_facets, target_normals, target_albedos = triangulate(target.shape,
+                                                                                     resolution=resolution)
+
+        vertices.append(np.asarray(target_vertices, dtype=np.float64).reshape(-1, 3))
+        facets.append(np.asarray(target_facets, dtype=np.int64).reshape(-1, 3) + num_vertices)
+        normals.append(np.asarray(target_normals, dtype=np.float64).reshape(-1, 3))
+        albedos.append(np.asarray(target_albedos, dtype=np.float64).reshape(-1, 3))
+
+        num_vertices += vertices[-1].shape[0]
+
+    vertices = np.vstack(vertices)
+    facets = np.vstack(facets)
+    normals = np.vstack(normals)
+    albedos = np.vstack(albedos)
+
+    template = np.zeros(template_shape, dtype=np.float64)
+    coverage = np.zeros(template_shape, dtype=np.int64)
+
+    if facets.shape[0] == 0:
+        if return_coverage:
+            return template, (min_bounds, max_bounds), coverage.astype(bool)
+
+        return template, (min_bounds, max_bounds)
+
+    # render the depth buffer from the camera using 1/z, which is linear in the image for a pinhole camera
+    grid = to_grid(vertices)
+
+    with np.errstate(divide='ignore'):
+        inverse_depth = 1 / vertices[:, 2]
+
+    _, ids = _rasterize(grid[0], grid[1], inverse_depth, facets, sub_rows.size, sub_cols.size, omp)
+
+    # render the shadow map from the light using an orthographic projection
+    light_direction = light_position - vertices.mean(axis=0)
+    light_direction /= np.linalg.norm(light_direction)
+
+    shadow_u = np.cross(light_direction, [1.0, 0.0, 0.0] if abs(light_direction[0]) < 0.9 else [0.0, 1.0, 0.0])
+    shadow_u /= np.linalg.norm(shadow_u)
+    shadow_v = np.cross(light_direction, shadow_u)
+
+    shadow_basis = np.vstack([shadow_u, shadow_v, light_direction])
+
+    shadow_points = vertices @ shadow_basis.T
+
+    shadow_min = shadow_points[:, :2].min(axis=0)
+    shadow_extent = max(np.ptp(shadow_points[:, :2], axis=0).max(), np.finfo(np.float64).tiny)
+
+    if shadow_resolution is None:
+        visible = np.isfinite(grid).all(axis=0)
+
+        if visible.any():
+            # aim for texels about half the size of a sample on the targets
+            camera_extent = np.ptp(grid[:, visible], axis=1).max()
+            camera_world_extent = np.ptp(vertices[visible], axis=0).max()
+
+            shadow_resolution = 2 * camera_extent * shadow_extent / max(camera_world_extent,
+                                                                          np.finfo(np.float64).tiny)
+        else:
+            shadow_resolution = 64
+
+        shadow_resolution = int(np.clip(np.ceil(shadow_resolution), 64, 2048))
+
+    texel = shadow_extent / (int(shadow_resolution) - 1)
+
+    shadow_grid = (shadow_points[:, :2] - shadow_min) / texel
+
+    shadow_depth, shadow_ids = _rasterize(shadow_grid[:, 0], shadow_grid[:, 1], shadow_points[:, 2], facets,
+                                          int(np.ceil(shadow_grid[:, 1].max())) + 1,
+                                          int(np.ceil(shadow_grid[:, 0].max())) + 1, omp)
+
+    # the sub-pixel rows belonging to each template row
+    row_starts = np.searchsorted(row_index, np.arange(template_shape[0] + 1))
+
+    for first_row in range(0, template_shape[0], tile_rows):
+
+        last_row = min(first_row + tile_rows, template_shape[0])
+
+        tile_ids = ids[row_starts[first_row]:row_starts[last_row]]
+
+        sample_rows, sample_cols = np.nonzero(tile_ids >= 0)
+
+        if sample_rows.size == 0:
+            continue
+
+        hit_facets = tile_ids[sample_rows, sample_cols]
+
+        sample_rows += row_starts[first_row]
+
+        corners = facets[hit_facets]
+
+        # the barycentric coordinates of each sample in the image
+        x = grid[0][corners]
+        y = grid[1][corners]
+
+        area = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])
+
+        weights = np.empty(corners.shape, dtype=np.float64)
+        weights[:, 0] = ((x[:, 1] - sample_cols) * (y[:, 2] - sample_rows) -
+                         (x[:, 2] - sample_cols) * (y[:, 1] - sample_rows)) / area
+        weights[:, 1] = ((x[:, 2] - sample_cols) * (y[:, 0] - sample_rows) -
+                         (x[:, 0] - sample_cols) * (y[:, 2] - sample_rows)) / area
+        weights[:, 2] = 1 - weights[:, 0] - weights[:, 1]
+
+        # perspective correct the weights
+        weights *= inverse_depth[corners]
+        weights /= weights.sum(axis=-1, keepdims=True)
+
+        points = np.einsum('ij,ijk->ik', weights, vertices[corners])
+
+        sample_normals = normals[hit_facets]
+
+        sample_albedos = (weights * albedos[hit_facets]).sum(axis=-1)
+
+        incidence = points - light_position
+        incidence /= np.linalg.norm(incidence, axis=-1, keepdims=True)
+
+        exidence = -points / np.linalg.norm(points, axis=-1, keepdims=True)
+
+        # check the shadow map using a slope scaled bias to avoid self shadowing from neighboring facets
+        sample_shadow = points @ shadow_basis.T
+
+        texel_cols = np.clip(np.round((sample_shadow[:, 0] - shadow_min[0]) / texel).astype(np.int64), 0,
+                             shadow_depth.shape[1] - 1)
+        texel_rows = np.clip(np.round((sample_shadow[:, 1] - shadow_min[1]) / texel).astype(np.int64), 0,
+                             shadow_depth.shape[0] - 1)
+
+        cos_light = np.abs(sample_normals @ light_direction)
+        tan_light = np.minimum(np.sqrt(np.maximum(1 - cos_light ** 2, 0)) / np.maximum(cos_light, 1e-3), 20)
+
+        bias = texel * (1.5 * tan_light + 1)
+
+        shadowed = ((shadow_depth[texel_rows, texel_cols] > sample_shadow[:, 2] + bias) &
+                    (shadow_ids[texel_rows, texel_cols] != hit_facets))
+
+        illum_inputs = np.zeros(hit_facets.size, dtype=ILLUM_DTYPE)
+        illum_inputs["incidence"] = incidence
+        illum_inputs["exidence"] = exidence
+        illum_inputs["normal"] = sample_normals
+        illum_inputs["albedo"] = sample_albedos
+        illum_inputs["visible"] = ~shadowed
+
+        intensity = np.asarray(illumination_model(illum_inputs), dtype=np.float64).ravel()
+
+        pixels = row_index[sample_rows] * template_shape[1] + column_index[sample_cols]
+
+        template += np.bincount(pixels, weights=intensity, minlength=template.size).reshape(template_shape)
+        coverage += np.bincount(pixels, minlength=template.size).reshape(template_shape)
+
+    if return_coverage:
+        return template, (min_bounds, max_bounds), coverage == grid_size * grid_size
+
+    return template, (min_bounds, max_bounds)
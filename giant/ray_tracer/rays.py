@@ -24,6 +24,10 @@ they're created they can be used for tracing :mod:`.shapes`, :class:`.KDTree`, :
 or entire solids when tracing rays, using the :attr:`.ignore` attribute of the :class:`.Rays` class.  The format that
 the ids for the ignore attribute take are somewhat complicated, so be sure to read the documentation carefully if you
 are planning to use this feature.
+
+For large numbers of rays that are repeatedly sub-selected (for instance the rays generated for every pixel of a
+template) the :class:`.RayBatch` class stores the rays as a structure of arrays, returning views when sliced and
+storing the ignore ids in compressed sparse row form.  It can be used anywhere :class:`.Rays` can.
 """
 
 
@@ -66,8 +70,18 @@ facet            int64            The id of the facet(if traced against a surfac
 In general, anywhere that ``check`` is not ``True`` has no guarantee on the values of the other elements.
 """
 
+INTERSECT32_DTYPE: np.dtype = np.dtype([('check', bool), ('distance', np.float32),
+                                        ('intersect', np.float32, (3,)), ('normal', np.float32, (3,)),
+                                        ('albedo', np.float32), ('facet', np.int64)])
+"""
+The single precision version of :data:`INTERSECT_DTYPE`.
+
+This is returned when :class:`.Rays32` are traced through an object which supports single precision tracing (currently 
+the :class:`.FlatKDTree`).  The fields have the same meaning as in :data:`INTERSECT_DTYPE`, but the floating point 
+fields are stored as single precision floats.  These arrays can be assigned directly into arrays with dtype 
+:data:`INTERSECT_DTYPE` if needed.
+"""
 
-# todo: consider updating the init to accept the inv directions for faster indexing
 
 class Rays:
     """
@@ -99,7 +113,15 @@ class Rays:
     This class supports iterating through rays one at a time using the normal python syntax (``for ray in rays: ...``).
     That being said, this is not super efficient and is not the way GIANT handles multiple rays internally.  You can
     also use indexing on the :class:`.Rays` object, which will return another :class:`.Rays` object.  This can be useful
-    for things like boolean indexing and slicing.
+    for things like boolean indexing and slicing.  When working with large numbers of rays that are sliced or indexed
+    frequently, consider using :class:`.RayBatch` instead.
+    """
+
+    __slots__ = ("_start", "_direction", "_inv_direction", "_ignore", "num_rays")
+
+    dtype: type = np.float64
+    """
+    The floating point type that the start, direction, and inverse direction arrays are stored as.
     """
 
     def __init__(self, start: ARRAY_LIKE, direction: ARRAY_LIKE, ignore: Optional[ARRAY_LIKE] = None):
@@ -141,16 +163,16 @@ class Rays:
             if (self.ignore is not None) and isinstance(self.ignore, (list, np.ndarray, tuple)):
 
                 for start, direction, ignore in zip(starts.T, directions.T, self.ignore):
-                    yield Rays(start, direction, ignore=ignore)
+                    yield type(self)(start, direction, ignore=ignore)
 
             elif self.ignore is not None:
 
                 for start, direction in zip(starts.T, directions.T):
-                    yield Rays(start, direction, ignore=self.ignore)
+                    yield type(self)(start, direction, ignore=self.ignore)
 
             else:
                 for start, direction in zip(starts.T, directions.T):
-                    yield Rays(start, direction)
+                    yield type(self)(start, direction)
 
         else:
 
@@ -166,19 +188,26 @@ class Rays:
         """
 
         if self.num_rays > 1:
-            starts, directions = np.broadcast_arrays(self._start.reshape(3, -1), self._direction.reshape(3, -1))
+            # only index the arrays that actually vary by ray so that shared starts/directions stay shared
+            starts = self._start[:, item] if self._start.ndim == 2 else self._start
+            directions = self._direction[:, item] if self._direction.ndim == 2 else self._direction
 
             if (self.ignore is not None) and isinstance(self.ignore, (list, np.ndarray, tuple)):
 
-                return Rays(starts.T[item].T, directions.T[item].T, ignore=self.ignore[item])
+                if isinstance(self.ignore, np.ndarray) or isinstance(item, (int, np.integer, slice)):
+                    return type(self)(starts, directions, ignore=self.ignore[item])
+
+                # sequences can't be indexed with masks or index arrays
+                return type(self)(starts, directions, ignore=[self.ignore[ind] for ind in
+                                                              np.arange(self.num_rays)[item]])
 
             elif self.ignore is not None:
 
-                return Rays(starts.T[item].T, directions.T[item].T, ignore=self.ignore)
+                return type(self)(starts, directions, ignore=self.ignore)
 
             else:
 
-                return Rays(starts.T[item].T, directions.T[item].T)
+                return type(self)(starts, directions)
 
         else:
 
@@ -198,15 +227,11 @@ class Rays:
         :param rotation:  an array representing a rotation or a :class:`.Rotation` object by which to rotate the rays
         """
 
-        if isinstance(rotation, Rotation):
+        if not isinstance(rotation, Rotation):
+            rotation = Rotation(rotation)
 
-            self._direction = np.matmul(rotation.matrix, self._direction)
-            self._start = np.matmul(rotation.matrix, self._start)
-
-        else:
-
-            self._direction = np.matmul(Rotation(rotation).matrix, self._direction)
-            self._start = np.matmul(Rotation(rotation).matrix, self._start)
+        self._direction = np.matmul(rotation.matrix, self._direction).astype(self.dtype, copy=False)
+        self._start = np.matmul(rotation.matrix, self._start).astype(self.dtype, copy=False)
 
         self._inv_direction = 1 / self._direction
 
@@ -221,10 +246,11 @@ class Rays:
 
         translation_array = np.asarray(translation).astype(np.float64).squeeze()
 
-        if (self._start.ndim > 1) and (translation.ndim == 1):
+        if (self._start.ndim > 1) and (translation_array.ndim == 1):
             translation_array = translation_array.reshape(3, -1)
 
-        self._start += translation_array
+        # don't update the start array in place since it may be shared with a (shallow) copy of these rays
+        self._start = (self._start + translation_array).astype(self.dtype, copy=False)
 
     @property
     def start(self) -> np.ndarray:
@@ -246,7 +272,7 @@ class Rays:
     @start.setter
     def start(self, val: ARRAY_LIKE):
 
-        val_array = np.asarray(val).squeeze().astype(np.float64)
+        val_array = np.asarray(val).squeeze().astype(self.dtype)
 
         if val_array.shape and (val_array.shape[0] != 3):
             raise ValueError("The first axis must have a length of 3")
@@ -283,7 +309,7 @@ class Rays:
     @direction.setter
     def direction(self, val: ARRAY_LIKE):
 
-        val_array = np.asarray(val).squeeze().astype(np.float64)
+        val_array = np.asarray(val).squeeze().astype(self.dtype)
 
         if (not val_array.shape) or (val_array.shape[0] != 3):
             raise ValueError("The first axis must have a length of 3")
@@ -335,8 +361,674 @@ class Rays:
         self._ignore = val
 
 
+class Rays32(Rays):
+    """
+    A single precision version of :class:`.Rays`.
+
+    This behaves exactly like :class:`.Rays` except that the start, direction, and inverse direction arrays are stored
+    as single precision floats.  When these rays are traced through an object that supports single precision tracing
+    (currently the :class:`.FlatKDTree`) the tree is traversed and the triangles are intersected in single precision and
+    the results are returned with dtype :data:`.INTERSECT32_DTYPE`, halving the memory traffic for both the rays and the
+    geometry.  Objects which do not support single precision tracing promote the rays to double precision and trace
+    them as usual.
+
+    Single precision is typically sufficient for rendering templates where the rays and the geometry are expressed
+    relative to a nearby origin (for instance kilometer scale bodies expressed in the camera frame), but it should not
+    be used when the precision of the intersect locations themselves is important.
+
+    You can convert existing rays to single precision by simply passing their components to this class
+
+        >>> from giant.ray_tracer.rays import Rays, Rays32
+        >>> rays = Rays([0, 0, 0], [[1, 0], [0, 1], [0, 0]])
+        >>> rays32 = Rays32(rays.start, rays.direction, ignore=rays.ignore)
+    """
+
+    __slots__ = ()
+
+    dtype: type = np.float32
+    """
+    The floating point type that the start, direction, and inverse direction arrays are stored as.
+    """
+
+
+class RayBatch(Rays):
+    """
+    A structure of arrays container for large batches of rays that can be sliced and indexed cheaply.
+
+    This behaves like :class:`.Rays` (and can be passed anywhere that :class:`.Rays` can be, including to the ``trace``
+    and ``is_occluded`` methods of all of the :mod:`.shapes`, the :class:`.KDTree`, the :class:`.FlatKDTree`, and the
+    :class:`.Scene`) but is designed for cases where the rays are sub-selected frequently, for instance when only the
+    rays that struck something are traced toward the light.  The differences are
+
+    * the start, direction, and inverse direction arrays provided to the constructor are used directly if they already
+      have the right type, not copied.  You can also provide the inverse directions if you already have them.
+    * indexing with an integer or a slice returns views into the arrays of the original batch instead of copies and
+      indexing with a boolean mask or integer array only copies the components which actually vary from ray to ray.
+      A single shared start (or direction) is never broadcast to the full number of rays.
+    * iterating through the batch yields single ray views without rebuilding any arrays.
+    * the ignore ids are stored in compressed sparse row (CSR) form instead of as a list of arrays, with the ids for
+      ray ``i`` stored in ``ignore_indices[ignore_indptr[i]:ignore_indptr[i+1]]``.  The :attr:`ignore` attribute
+      returns these ids as a dense nxk block padded with -1, which is what the tracers consume, so no conversion is
+      needed when tracing.
+
+    Note that because indexing returns views, modifying the arrays of a sub-batch in place will modify the original
+    batch as well.  The :meth:`rotate` and :meth:`translate` methods always create new arrays so they are safe to use.
+
+    You can create a batch directly, from existing rays, or from CSR ignore data
+
+        >>> import numpy as np
+        >>> from giant.ray_tracer.rays import Rays, RayBatch
+        >>> batch = RayBatch(np.zeros(3), np.eye(3), ignore=[[1, 2], [], [3]])
+        >>> batch.ignore
+        array([[ 1,  2],
+               [-1, -1],
+               [ 3, -1]])
+        >>> batch.ignore_indptr, batch.ignore_indices
+        (array([0, 2, 2, 3]), array([1, 2, 3]))
+        >>> batch[1:].ignore_indptr
+        array([2, 2, 3])
+        >>> batch = RayBatch.from_rays(Rays([0, 0, 0], [[1, 0], [0, 1], [0, 0]]))
+    """
+
+    __slots__ = ("_ignore_indptr", "_ignore_indices")
+
+    def __init__(self, start: ARRAY_LIKE, direction: ARRAY_LIKE, ignore: Optional[ARRAY_LIKE] = None,
+                 inv_direction: Optional[ARRAY_LIKE] = None):
+        """
+        :param start: Where the rays begin at as a length 3 array or a 3xn array
+        :param direction: The direction that the rays proceed in as a length 3 array or a 3xn array (typically this
+                          should be unit vectors)
+        :param ignore: The ids to ignore when tracing the rays.  This should be either ``None`` for no ignores, a
+                       single id to ignore for all rays, a length n array for a single ignore per ray (set to -1 for
+                       rays where you don't want any ignores), an nxk array of ignores padded with -1, or a length n
+                       Sequence of arrays (where there are multiple (possibly different numbers) ignores for each ray)
+        :param inv_direction: The inverse of the direction (1/direction) with the same shape as ``direction`` if it has
+                              already been computed.  If ``None`` then it will be computed.
+        """
+
+        start_array = self._as_ray_array(start)
+        direction_array = self._as_ray_array(direction)
+
+        if (start_array.ndim == 2) and (direction_array.ndim == 2) and \
+                (start_array.shape[-1] != direction_array.shape[-1]):
+            raise ValueError("The start and direction arrays must have the same shape.")
+
+        if inv_direction is None:
+            inv_direction_array = 1 / direction_array
+        else:
+            inv_direction_array = self._as_ray_array(inv_direction)
+
+            if inv_direction_array.shape != direction_array.shape:
+                raise ValueError("The inverse direction array must have the same shape as the direction array.")
+
+        self._start = start_array
+        self._direction = direction_array
+        self._inv_direction = inv_direction_array
+
+        self.num_rays: int = max(start_array.shape[-1] if start_array.ndim == 2 else 1,
+                                 direction_array.shape[-1] if direction_array.ndim == 2 else 1)
+        """
+        The number of rays contained in the object.
+        """
+
+        self._ignore = None
+        self._ignore_indptr = None
+        self._ignore_indices = None
+
+        self.ignore = ignore
+
+    @classmethod
+    def _as_ray_array(cls, val: ARRAY_LIKE) -> np.ndarray:
+        """
+        Converts an input to a length 3 or 3xn array of :attr:`dtype` without copying if possible.
+
+        :param val: The value to convert
+        :return: The converted array
+        """
+
+        val_array = np.asarray(val, dtype=cls.dtype)
+
+        if (val_array.ndim == 2) and (val_array.shape[-1] == 1):
+            val_array = val_array[:, 0]
+
+        if (val_array.ndim not in (1, 2)) or (val_array.shape[0] != 3):
+            raise ValueError("The first axis must have a length of 3")
+
+        return val_array
+
+    @classmethod
+    def _view(cls, start: np.ndarray, direction: np.ndarray, inv_direction: np.ndarray, num_rays: int,
+              ignore: Optional[np.ndarray], ignore_indptr: Optional[np.ndarray],
+              ignore_indices: Optional[np.ndarray]) -> 'RayBatch':
+        """
+        Builds a new batch directly from already validated components without any checks or copies.
+
+        This is used internally for indexing/iterating.
+        """
+
+        out = cls.__new__(cls)
+        out._start = start
+        out._direction = direction
+        out._inv_direction = inv_direction
+        out.num_rays = num_rays
+        out._ignore = ignore
+        out._ignore_indptr = ignore_indptr
+        out._ignore_indices = ignore_indices
+
+        return out
+
+    @classmethod
+    def from_rays(cls, rays: Rays) -> 'RayBatch':
+        """
+        Creates a ray batch from an existing :class:`.Rays` object, sharing its arrays when possible.
+
+        :param rays: The rays to convert
+        :return: The rays as a :class:`.RayBatch`
+        """
+
+        if isinstance(rays, RayBatch):
+            return rays
+
+        return cls(rays._start, rays._direction, ignore=rays.ignore,
+                   inv_direction=rays._inv_direction if rays.dtype == cls.dtype else None)
+
+    @classmethod
+    def from_csr(cls, start: ARRAY_LIKE, direction: ARRAY_LIKE, ignore_indptr: ARRAY_LIKE,
+                 ignore_indices: ARRAY_LIKE, inv_direction: Optional[ARRAY_LIKE] = None) -> 'RayBatch':
+        """
+        Creates a ray batch with ignores specified in compressed sparse row form.
+
+        The ids to ignore for ray ``i`` are ``ignore_indices[ignore_indptr[i]:ignore_indptr[i+1]]``.
+
+        :param start: Where the rays begin at as a length 3 array or a 3xn array
+        :param direction: The direction that the rays proceed in as a length 3 array or a 3xn array
+        :param ignore_indptr: The length n+1 array of offsets into ``ignore_indices`` for each ray
+        :param ignore_indices: The flat array of ids to ignore
+        :param inv_direction: The inverse of the direction if already computed
+        :return: The new ray batch
+        """
+
+        out = cls(start, direction, inv_direction=inv_direction)
+
+        indptr = np.asarray(ignore_indptr, dtype=np.int64)
+
+        if indptr.shape != (out.num_rays + 1,):
+            raise ValueError("ignore_indptr must have length num_rays+1")
+
+        out._ignore_indptr = indptr
+        out._ignore_indices = np.asarray(ignore_indices, dtype=np.int64).ravel()
+
+        return out
+
+    def __iter__(self) -> Iterable['RayBatch']:
+        """
+        Iterate 1 at a time through the rays contained in this object.
+
+        Each ray yielded is a view into this batch.
+        """
+
+        if self.num_rays > 1:
+            for ind in range(self.num_rays):
+                yield self[ind]
+
+        else:
+            yield self
+
+    def __getitem__(self, item: Union[int, ARRAY_LIKE, slice]) -> 'RayBatch':
+        """
+        Select a subset of the rays contained in this object.
+
+        Integers and slices return views into this batch.  Boolean masks and integer arrays only copy the components
+        which vary from ray to ray.
+
+        :param item: The value to use to index with
+        """
+
+        if isinstance(item, (int, np.integer)):
+            ind = int(item)
+
+            if ind < 0:
+                ind += self.num_rays
+
+            if not (0 <= ind < self.num_rays):
+                raise IndexError("index {} is out of bounds for {} rays".format(item, self.num_rays))
+
+            item = slice(ind, ind + 1)
+            single = True
+
+        else:
+            single = False
+
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.num_rays)
+
+            num_rays = len(range(start, stop, step))
+
+            if step == 1:
+                # contiguous selections of CSR data are just a view of the offsets
+                indptr = self._ignore_indptr[start:stop + 1] if self._ignore_indptr is not None else None
+                indices = self._ignore_indices
+            elif self._ignore_indptr is not None:
+                indptr, indices = self._csr_gather(np.arange(start, stop, step))
+            else:
+                indptr = indices = None
+
+        else:
+            item = np.arange(self.num_rays)[item]
+
+            num_rays = item.size
+
+            if self._ignore_indptr is not None:
+                indptr, indices = self._csr_gather(item)
+            else:
+                indptr = indices = None
+
+        if single:
+            select = start
+        else:
+            select = item
+
+        def take(array: np.ndarray) -> np.ndarray:
+            if array.ndim == 1:
+                return array
+
+            return array[:, select]
+
+        ignore = self._ignore[item] if self._ignore is not None else None
+
+        return self._view(take(self._start), take(self._direction), take(self._inv_direction), num_rays,
+                          ignore, indptr, indices)
+
+    def _csr_gather(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gathers the CSR ignore data for the requested rows.
+
+        :param rows: The integer indices of the rows to gather
+        :return: The new offsets and indices arrays
+        """
+
+        row_starts = self._ignore_indptr[rows]
+        counts = self._ignore_indptr[rows + 1] - row_starts
+
+        indptr = np.zeros(rows.size + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        positions = np.repeat(row_starts - indptr[:-1], counts) + np.arange(indptr[-1])
+
+        return indptr, self._ignore_indices[positions]
+
+    @property
+    def shares_origin(self) -> bool:
+        """
+        A flag specifying whether all of the rays in this batch begin at the same location.
+
+        When this is ``True`` only a single start location is stored.
+        """
+
+        return self._start.ndim == 1
+
+    @property
+    def ignore(self) -> Optional[np.ndarray]:
+        """
+        The ids to ignore for each ray as an nxk int64 array padded with -1 or ``None`` if nothing is ignored.
+
+        If the ignores were specified in CSR form this is built the first time it is requested and then cached.
+        """
+
+        if (self._ignore is None) and (self._ignore_indptr is not None):
+            counts = np.diff(self._ignore_indptr)
+
+            width = max(int(counts.max()) if counts.size else 0, 1)
+
+            block = -np.ones((self.num_rays, width), dtype=np.int64)
+
+            rows = np.repeat(np.arange(self.num_rays), counts)
+
+            cols = np.arange(rows.size) - np.repeat(np.cumsum(counts) - counts, counts)
+
+            block[rows, cols] = self._ignore_indices[self._ignore_indptr[0]:self._ignore_indptr[-1]]
+
+            self._ignore = block
+
+        return self._ignore
+
+    @ignore.setter
+    def ignore(self, val):
+
+        self._ignore = None
+        self._ignore_indptr = None
+        self._ignore_indices = None
+
+        if val is None:
+            return
+
+        if isinstance(val, np.ndarray) and (val.dtype != object):
+            if val.ndim == 0:
+                self._ignore = np.full((self.num_rays, 1), val, dtype=np.int64)
+
+            elif val.ndim == 1:
+                if val.size == self.num_rays:
+                    self._ignore = val.astype(np.int64, copy=False).reshape(-1, 1)
+                elif self.num_rays == 1:
+                    self._ignore = val.astype(np.int64, copy=False).reshape(1, -1)
+                else:
+                    raise ValueError("The ignore array must have one element per ray.")
+
+            elif val.ndim == 2:
+                if val.shape[0] != self.num_rays:
+                    raise ValueError("The ignore array must have one row per ray.")
+
+                self._ignore = val.astype(np.int64, copy=False)
+
+            else:
+                raise ValueError("The ignore array must be at most 2 dimensional.")
+
+        elif np.isscalar(val):
+            self._ignore = np.full((self.num_rays, 1), val, dtype=np.int64)
+
+        else:
+            rows = [np.asarray(row, dtype=np.int64).ravel() for row in val]
+
+            if (len(rows) != self.num_rays) and (self.num_rays == 1):
+                rows = [np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)]
+
+            if len(rows) != self.num_rays:
+                raise ValueError("The ignore sequence must have one element per ray.")
+
+            rows = [row[row >= 0] for row in rows]
+
+            counts = np.fromiter((row.size for row in rows), dtype=np.int64, count=len(rows))
+
+            self._ignore_indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+            np.cumsum(counts, out=self._ignore_indptr[1:])
+
+            self._ignore_indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+
+    def _build_csr(self):
+        """
+        Builds the CSR form of the ignores from the dense block form if needed.
+        """
+
+        if (self._ignore_indptr is None) and (self._ignore is not None):
+            keep = self._ignore >= 0
+
+            self._ignore_indptr = np.zeros(self.num_rays + 1, dtype=np.int64)
+            np.cumsum(keep.sum(axis=-1), out=self._ignore_indptr[1:])
+
+            self._ignore_indices = self._ignore[keep]
+
+    @property
+    def ignore_indptr(self) -> Optional[np.ndarray]:
+        """
+        The offsets into :attr:`ignore_indices` for each ray as a length n+1 int64 array or ``None`` if nothing is
+        ignored.
+
+        The ids to ignore for ray ``i`` are ``ignore_indices[ignore_indptr[i]:ignore_indptr[i+1]]``.  Note that when
+        this batch is a slice of another batch the offsets do not necessarily start at 0.
+        """
+
+        self._build_csr()
+
+        return self._ignore_indptr
+
+    @property
+    def ignore_indices(self) -> Optional[np.ndarray]:
+        """
+        The flat array of ids to ignore for all rays as an int64 array or ``None`` if nothing is ignored.
+
+        See :attr:`ignore_indptr` for how these are assigned to each ray.
+        """
+
+        self._build_csr()
+
+        return self._ignore_indices
+
+
+class TraceWorkspace:
+    """
+    Reusable, preallocated buffers for tracing rays through a :class:`.Surface` (including :class:`.KDTree` and
+    :class:`.FlatKDTree`).
+
+    Normally each call to ``trace`` allocates a new structured array with dtype :data:`.INTERSECT_DTYPE` (along with a
+    number of temporary arrays to transform the rays into and the results out of the frame of the surface).  When the
+    same number of rays (or fewer) are traced many times, for instance when rendering templates for every image in a
+    sequence, these allocations can be avoided by creating a workspace once and passing it to ``trace`` through the
+    ``out`` argument.  The results are then written directly into the workspace, with each component stored as its own
+    contiguous array (a structure of arrays instead of an array of structures), and the workspace itself is returned.
+
+    The buffers are grown automatically if more rays are traced than the workspace has room for, but are never shrunk.
+    The results for the most recent trace are available through the :attr:`check`, :attr:`distance`,
+    :attr:`intersect`, :attr:`normal`, :attr:`albedo`, and :attr:`facet` properties, which are views into the buffers
+    with the same meaning as the fields of :data:`.INTERSECT_DTYPE` (except that :attr:`intersect` and :attr:`normal`
+    are nx3).  These can also be retrieved by indexing the workspace with the field name (``workspace["check"]``) so
+    that the workspace can be used in place of a structured results array in most code.  Because these are views, they
+    will be overwritten by the next trace into this workspace, so copy them (or use :meth:`to_intersect_array`) if they
+    need to be kept.
+
+        >>> from giant.ray_tracer.rays import Rays, TraceWorkspace
+        >>> from giant.ray_tracer.shapes import Triangle64
+        >>> import numpy as np
+        >>> tri = Triangle64(np.array([[0, 1, 0], [0, 0, 1], [1, 1, 1.]]), 1, np.array([[0, 1, 2]]))
+        >>> workspace = TraceWorkspace()
+        >>> res = tri.trace(Rays([0.1, 0.1, 0], [0, 0, 1]), out=workspace)
+        >>> res is workspace
+        True
+        >>> workspace.check
+        array([ True])
+
+    A workspace should not be shared between threads that are tracing at the same time.
+    """
+
+    def __init__(self, num_rays: int = 0):
+        """
+        :param num_rays: The number of rays to initially allocate room for
+        """
+
+        self.num_rays: int = 0
+        """
+        The number of rays in the most recent trace into this workspace.
+        """
+
+        self._capacity: int = 0
+
+        self._hit = np.zeros(0, dtype=np.uint8)
+        self._distance = np.zeros(0, dtype=np.float64)
+        self._intersect = np.zeros((0, 3), dtype=np.float64)
+        self._normal = np.zeros((0, 3), dtype=np.float64)
+        self._albedo = np.zeros(0, dtype=np.float64)
+        self._facet = np.zeros(0, dtype=np.int64)
+
+        self._start = np.zeros((3, 0), dtype=np.float64)
+        self._direction = np.zeros((3, 0), dtype=np.float64)
+        self._inv_direction = np.zeros((3, 0), dtype=np.float64)
+
+        self.reserve(num_rays)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of rays in the most recent trace into this workspace
+        """
+
+        return self.num_rays
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """
+        Returns the view of the results for the requested field of :data:`.INTERSECT_DTYPE`.
+
+        :param field: The name of the field to retrieve
+        :raises KeyError: if the field is not one of the fields of :data:`.INTERSECT_DTYPE`
+        """
+
+        if field not in INTERSECT_DTYPE.names:
+            raise KeyError(field)
+
+        return getattr(self, field)
+
+    def reserve(self, num_rays: int):
+        """
+        Ensures that the buffers have room for at least ``num_rays`` rays.
+
+        If the buffers need to grow they are reallocated with room for at least twice as many rays as they previously
+        held, so that slowly growing ray counts don't trigger a reallocation every time.  The contents of the buffers
+        are not preserved when they are reallocated.
+
+        :param num_rays: The number of rays that the buffers need to hold
+        """
+
+        if num_rays <= self._capacity:
+            return
+
+        capacity = max(int(num_rays), 2 * self._capacity)
+
+        self._hit = np.zeros(capacity, dtype=np.uint8)
+        self._distance = np.empty(capacity, dtype=np.float64)
+        self._intersect = np.empty((capacity, 3), dtype=np.float64)
+        self._normal = np.empty((capacity, 3), dtype=np.float64)
+        self._albedo = np.empty(capacity, dtype=np.float64)
+        self._facet = np.empty(capacity, dtype=np.int64)
+
+        self._start = np.empty((3, capacity), dtype=np.float64)
+        self._direction = np.empty((3, capacity), dtype=np.float64)
+        self._inv_direction = np.empty((3, capacity), dtype=np.float64)
+
+        self._capacity = capacity
+
+    def reset(self, num_rays: int):
+        """
+        Prepares the workspace to receive the results of tracing ``num_rays`` rays.
+
+        This grows the buffers if needed and then initializes the results for the first ``num_rays`` rays to misses
+        (``check`` is ``False``, ``distance`` is ``inf``, ``facet`` is -1, and everything else is NaN).  This is called
+        automatically by the ``trace`` methods which accept a workspace.
+
+        :param num_rays: The number of rays that are about to be traced
+        """
+
+        self.reserve(num_rays)
+
+        self.num_rays = int(num_rays)
+
+        self._hit[:num_rays] = 0
+        self._distance[:num_rays] = np.inf
+        self._intersect[:num_rays] = np.nan
+        self._normal[:num_rays] = np.nan
+        self._albedo[:num_rays] = np.nan
+        self._facet[:num_rays] = -1
+
+    @property
+    def capacity(self) -> int:
+        """
+        The number of rays that the buffers can currently hold without being reallocated.
+        """
+
+        return self._capacity
+
+    @property
+    def hit(self) -> np.ndarray:
+        """
+        A uint8 view of :attr:`check` (1 where the ray struck the surface, 0 otherwise).
+
+        This is the form that the compiled tracing routines write to.
+        """
+
+        return self._hit[:self.num_rays]
+
+    @property
+    def check(self) -> np.ndarray:
+        """
+        A length n boolean array specifying whether each ray struck the surface
+        """
+
+        return self._hit[:self.num_rays].view(bool)
+
+    @property
+    def distance(self) -> np.ndarray:
+        """
+        A length n array of the distance to the intersect for each ray (``inf`` for rays that missed)
+        """
+
+        return self._distance[:self.num_rays]
+
+    @property
+    def intersect(self) -> np.ndarray:
+        """
+        A nx3 array of the intersect location for each ray (NaN for rays that missed)
+        """
+
+        return self._intersect[:self.num_rays]
+
+    @property
+    def normal(self) -> np.ndarray:
+        """
+        A nx3 array of the unit normal vector of the surface at the intersect for each ray (NaN for rays that missed)
+        """
+
+        return self._normal[:self.num_rays]
+
+    @property
+    def albedo(self) -> np.ndarray:
+        """
+        A length n array of the albedo at the intersect for each ray (NaN for rays that missed)
+        """
+
+        return self._albedo[:self.num_rays]
+
+    @property
+    def facet(self) -> np.ndarray:
+        """
+        A length n array of the id of the facet struck by each ray (-1 for rays that missed)
+        """
+
+        return self._facet[:self.num_rays]
+
+    @property
+    def start(self) -> np.ndarray:
+        """
+        A 3xn scratch buffer used to hold the start of each ray after it has been transformed into the frame of the
+        object being traced.
+        """
+
+        return self._start[:, :self.num_rays]
+
+    @property
+    def direction(self) -> np.ndarray:
+        """
+        A 3xn scratch buffer used to hold the direction of each ray after it has been transformed into the frame of the
+        object being traced.
+        """
+
+        return self._direction[:, :self.num_rays]
+
+    @property
+    def inv_direction(self) -> np.ndarray:
+        """
+        A 3xn scratch buffer used to hold the inverse direction of each ray after it has been transformed into the
+        frame of the object being traced.
+        """
+
+        return self._inv_direction[:, :self.num_rays]
+
+    def to_intersect_array(self) -> np.ndarray:
+        """
+        Copies the results of the most recent trace into a new structured array with dtype :data:`.INTERSECT_DTYPE`.
+
+        :return: A length n numpy array with dtype :data:`.INTERSECT_DTYPE`
+        """
+
+        results = np.empty(self.num_rays, dtype=INTERSECT_DTYPE)
+
+        results["check"] = self.check
+        results["distance"] = self.distance
+        results["intersect"] = self.intersect
+        results["normal"] = self.normal
+        results["albedo"] = self.albedo
+        results["facet"] = self.facet
+
+        return results
+
+
 def compute_rays(model: CameraModel, rows: ARRAY_LIKE, cols: ARRAY_LIKE, grid_size: int = 1, temperature: Real = 0,
-                 image_number: int = 0) -> Tuple[Rays, np.ndarray]:
+                 image_number: int = 0) -> Tuple[RayBatch, np.ndarray]:
     """
     Compute rays passing through the given row, col pairs for the given camera in the camera frame.
 
@@ -402,7 +1094,8 @@ def compute_rays(model: CameraModel, rows: ARRAY_LIKE, cols: ARRAY_LIKE, grid_si
     # get the direction vectors for each ray
     directions = model.pixels_to_unit(uv, temperature=temperature, image=image_number)
 
-    # store the origin as the origin of the camera frame
+    # store the origin as the origin of the camera frame.  Use a batch so that the single origin is shared and the
+    # directions are not copied
     starts = np.zeros(3)
 
-    return Rays(starts, directions), uv
+    return RayBatch(starts, directions), uv
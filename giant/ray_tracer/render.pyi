@@ -0,0 +1,18 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from giant.ray_tracer.scene import Scene
+from giant.ray_tracer.illumination import IlluminationModel
+from giant.camera_models.camera_model import CameraModel
+from giant._typing import ARRAY_LIKE, Real
+
+
+def render_template(scene: Scene, model: CameraModel, rows: ARRAY_LIKE, cols: ARRAY_LIKE, grid_size: int = 1,
+                    illumination_model: Optional[IlluminationModel] = None, temperature: Real = 0,
+                    image_number: int = 0, tile_rows: int = 32, omp: bool = True, adaptive: bool = False,
+                    facet_edges: bool = True) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]: ...
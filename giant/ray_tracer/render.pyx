@@ -0,0 +1,911 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+"""
+This cython module provides a rendering engine which traces, shades, and accumulates rays directly into a template
+image.
+
+Description
+-----------
+
+Rendering a template in GIANT is normally done in a number of steps.  First, the rays for every sub-pixel are created
+with :func:`.compute_rays`.  Then :meth:`.Scene.get_illumination_inputs` traces the rays through the scene, traces
+shadow rays to the light source, and stores the geometry for every ray in a structured array with dtype
+:data:`.ILLUM_DTYPE`.  Then an :class:`.IlluminationModel` converts the geometry into intensities, which are finally
+added into the pixels of the template.  Each step produces an array for every ray, which for large templates with
+multiple rays per pixel can require a lot of memory and time.
+
+The :func:`render_template` function in this module instead does all of these steps together.  The template is
+rendered in tiles of pixel rows.  For each tile, the rays are generated using the camera model, and then traced through
+each target, checked for shadowing, shaded, and accumulated into the template inside of compiled loops which release
+the GIL (and are parallelized with OpenMP), using buffers that are reused from tile to tile.  The memory required is
+therefore set by the size of a tile instead of the size of the template.
+
+Targets whose shape is a :class:`.Surface` (including :class:`.KDTree` and :class:`.FlatKDTree`) are traced using
+their compiled ``trace`` methods (which trace coherent packets of rays through the trees) into a reused
+:class:`.TraceWorkspace`, merged into the closest intersect for each ray in compiled code, and checked for shadowing
+entirely in compiled code.  Any other targets (like :class:`.Ellipsoid`) are traced using their usual python ``trace``
+and ``is_occluded`` methods for the rays in each tile which strike their bounding box and then merged into the buffers.
+Similarly, the :class:`.LambertianIllumination`, :class:`.LommelSeeligerIllumination`, :class:`.McEwenIllumination`,
+:class:`.GaskellIllumination`, and :class:`.AshikhminShirleyDiffuseIllumination` models are evaluated directly in the
+compiled loop, while any other :class:`.IlluminationModel` is called with an :data:`.ILLUM_DTYPE` array for each tile.
+Targets with a :attr:`.SceneObject.shadow_cache` look up the shadows they cast on themselves from the cache instead of
+tracing them (see :mod:`.shadow_cache`).
+
+The results are the same as the multistep process described above (up to the order in which the intensities are added
+into each pixel).
+
+Use
+---
+
+To render a template, provide a :class:`.Scene` (which has already been placed in the camera frame), the camera model,
+the (inclusive) pixel bounds to render, and the number of rays per pixel edge
+
+    >>> from giant.ray_tracer.render import render_template
+    >>> from giant.ray_tracer.illumination import McEwenIllumination
+    >>> template, (min_bounds, max_bounds) = render_template(scene, model, (0, 511), (0, 511), grid_size=3,
+    ...                                                      illumination_model=McEwenIllumination())
+
+The returned bounds give the (column, row) pixel location of the first and last pixel in the template.
+"""
+
+from typing import Tuple, Optional
+
+import numpy as np
+cimport numpy as cnp
+
+import cython
+from cython.parallel import prange, parallel
+from libc.math cimport sqrt, acos, exp, pow, M_PI, INFINITY
+
+from giant.ray_tracer.shapes.surface cimport Surface
+from giant.ray_tracer.parallel_config cimport get_thread_count, apply_schedule, SCHEDULE_STATIC, SCHEDULE_DYNAMIC
+from giant.ray_tracer.kdtree import KDTree
+from giant.ray_tracer.flat_kdtree import FlatKDTree
+from giant.ray_tracer.lod import LODShape
+from giant.ray_tracer.rays import Rays, TraceWorkspace
+from giant.ray_tracer.shadow_cache import get_shadow_cache
+from giant.ray_tracer.illumination import (ILLUM_DTYPE, LambertianIllumination, LommelSeeligerIllumination,
+                                           McEwenIllumination, GaskellIllumination,
+                                           AshikhminShirleyDiffuseIllumination)
+
+
+cdef enum:
+    _EXTERNAL = -1
+    _LAMBERTIAN = 0
+    _LOMMEL_SEELIGER = 1
+    _MCEWEN = 2
+    _GASKELL = 3
+    _ASHIKHMIN_SHIRLEY = 4
+
+
+_COMPILED_BRDFS = {LambertianIllumination: _LAMBERTIAN,
+                   LommelSeeligerIllumination: _LOMMEL_SEELIGER,
+                   McEwenIllumination: _MCEWEN,
+                   GaskellIllumination: _GASKELL,
+                   AshikhminShirleyDiffuseIllumination: _ASHIKHMIN_SHIRLEY}
+"""
+A mapping from illumination model types to the compiled versions of their laws.
+
+Only exact type matches are used so that subclasses which change the law are called directly.
+"""
+
+
+@cython.cdivision(True)
+cdef inline double _shade(const int brdf, const double global_albedo, const double[3] incidence,
+                          const double[3] exidence, const double[3] normal, const double albedo) noexcept nogil:
+    """
+    This C function evaluates the requested illumination law for a single ray.
+
+    This matches the ``__call__`` methods of the corresponding :class:`.IlluminationModel` classes exactly.
+    """
+
+    cdef:
+        double cos_inc = -(normal[0] * incidence[0] + normal[1] * incidence[1] + normal[2] * incidence[2])
+        double cos_emi = normal[0] * exidence[0] + normal[1] * exidence[1] + normal[2] * exidence[2]
+        double beta
+
+    if brdf == _LAMBERTIAN:
+        if not (cos_inc >= 0):
+            return 0
+
+        return global_albedo * albedo * cos_inc
+
+    if not ((cos_inc >= 0) and (cos_emi >= 0)):
+        return 0
+
+    if brdf == _LOMMEL_SEELIGER:
+        return global_albedo * albedo * cos_inc / (cos_inc + cos_emi)
+
+    if brdf == _ASHIKHMIN_SHIRLEY:
+        return cos_inc * ((1 - pow(1 - cos_inc / 2, 5)) * (1 - pow(1 - cos_emi / 2, 5)))
+
+    beta = exp(-(acos(-(incidence[0] * exidence[0] + incidence[1] * exidence[1] + incidence[2] * exidence[2])) *
+                 180 / M_PI) / 60.)
+
+    if brdf == _MCEWEN:
+        return global_albedo * albedo * ((1 - beta) * cos_inc + 2 * beta * cos_inc / (cos_inc + cos_emi))
+
+    # gaskell
+    return global_albedo * albedo * ((1 - beta) * cos_inc + beta * cos_inc / (cos_inc + cos_emi))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef inline void _to_frame(const double[:, :] rotation, const double[:] position, const double[3] start,
+                           const double[3] direction, double[:] start_out, double[:] direction_out,
+                           double[:] inv_direction_out) noexcept nogil:
+    """
+    This C function expresses a single ray in the local frame of a surface (``rotation@x + position``).
+    """
+
+    cdef:
+        Py_ssize_t i
+
+    for i in range(3):
+        start_out[i] = (position[i] + rotation[i, 0] * start[0] + rotation[i, 1] * start[1] +
+                        rotation[i, 2] * start[2])
+        direction_out[i] = rotation[i, 0] * direction[0] + rotation[i, 1] * direction[1] + rotation[i, 2] * direction[2]
+        inv_direction_out[i] = 1.0 / direction_out[i]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _merge_closest(const Py_ssize_t num_rays, const cnp.int64_t index, const cnp.uint8_t[:] object_hit,
+                         const double[:] object_distance, const double[:, :] object_intersect,
+                         const double[:, :] object_normal, const double[:] object_albedo,
+                         const cnp.int64_t[:] object_facet, cnp.uint8_t[:] hit, double[:] distance,
+                         double[:, :] intersect, double[:, :] normal, double[:] albedo, cnp.int64_t[:] facet,
+                         cnp.int64_t[:] hit_object) noexcept nogil:
+    """
+    This C function merges the results of tracing a single object into the running closest intersect for each ray.
+
+    Any intersect that is closer than the current ``distance`` for the ray replaces the current results, and ``index``
+    is stored in ``hit_object``.
+    """
+
+    cdef:
+        Py_ssize_t ray, i
+
+    for ray in range(num_rays):
+
+        if object_hit[ray] and (object_distance[ray] < distance[ray]):
+            hit[ray] = 1
+            distance[ray] = object_distance[ray]
+            albedo[ray] = object_albedo[ray]
+            facet[ray] = object_facet[ray]
+            hit_object[ray] = index
+
+            for i in range(3):
+                intersect[ray, i] = object_intersect[ray, i]
+                normal[ray, i] = object_normal[ray, i]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _occlude_surface(Surface surface, const double[:, :] rotation, const double[:] position,
+                           const double[:, :] shadow_start, const double[:, :] shadow_direction,
+                           const Py_ssize_t num_rays, const cnp.int64_t index, const bint omp,
+                           double[:, :] local_start, double[:, :] local_direction, double[:, :] local_inv_direction,
+                           const cnp.uint8_t[:] hit, const cnp.int64_t[:] facet, const cnp.int64_t[:] hit_object,
+                           cnp.int64_t[:] ignore, cnp.uint8_t[:] occluded) noexcept nogil:
+    """
+    This C function checks whether the shadow rays for the rays which struck something and are not yet known to be
+    shadowed are blocked by a surface.
+
+    The facet that was struck is ignored if it belongs to this surface.
+    """
+
+    cdef:
+        Py_ssize_t ray
+
+    if omp:
+        apply_schedule(SCHEDULE_DYNAMIC)
+        with nogil, parallel(num_threads=get_thread_count()):
+            for ray in prange(num_rays, schedule='runtime'):
+                _occlude_surface_ray(surface, rotation, position, shadow_start, shadow_direction, index, ray,
+                                     local_start, local_direction, local_inv_direction, hit, facet, hit_object,
+                                     ignore, occluded)
+    else:
+        for ray in range(num_rays):
+            _occlude_surface_ray(surface, rotation, position, shadow_start, shadow_direction, index, ray,
+                                 local_start, local_direction, local_inv_direction, hit, facet, hit_object,
+                                 ignore, occluded)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline void _occlude_surface_ray(Surface surface, const double[:, :] rotation, const double[:] position,
+                                      const double[:, :] shadow_start, const double[:, :] shadow_direction,
+                                      const cnp.int64_t index, const Py_ssize_t ray, double[:, :] local_start,
+                                      double[:, :] local_direction, double[:, :] local_inv_direction,
+                                      const cnp.uint8_t[:] hit, const cnp.int64_t[:] facet,
+                                      const cnp.int64_t[:] hit_object, cnp.int64_t[:] ignore,
+                                      cnp.uint8_t[:] occluded) noexcept nogil:
+    """
+    This C function checks a single shadow ray against a surface for :func:`_occlude_surface`.
+    """
+
+    cdef:
+        double[3] start
+        double[3] direction
+        Py_ssize_t i
+
+    if (not hit[ray]) or occluded[ray]:
+        return
+
+    for i in range(3):
+        start[i] = shadow_start[ray, i]
+        direction[i] = shadow_direction[ray, i]
+
+    if hit_object[ray] == index:
+        ignore[ray] = facet[ray]
+    else:
+        ignore[ray] = -1
+
+    _to_frame(rotation, position, start, direction, local_start[ray], local_direction[ray], local_inv_direction[ray])
+
+    occluded[ray] = surface._is_occluded(local_start[ray], local_direction[ray], local_inv_direction[ray],
+                                         &ignore[ray], 1)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void _prepare_shadows(const double[:] light_position, const Py_ssize_t num_rays, const cnp.uint8_t[:] hit,
+                           const double[:, :] intersect, double[:, :] shadow_start, double[:, :] shadow_direction,
+                           cnp.uint8_t[:] occluded) noexcept nogil:
+    """
+    This C function computes the shadow rays from each intersect toward the light in the same way as
+    :meth:`.Scene.get_illumination_inputs`.
+    """
+
+    cdef:
+        Py_ssize_t ray, i
+        double direction_norm, intersect_norm
+
+    for ray in range(num_rays):
+
+        occluded[ray] = 0
+
+        if not hit[ray]:
+            continue
+
+        direction_norm = 0
+        intersect_norm = 0
+
+        for i in range(3):
+            shadow_direction[ray, i] = light_position[i] - intersect[ray, i]
+            direction_norm += shadow_direction[ray, i] * shadow_direction[ray, i]
+            intersect_norm += intersect[ray, i] * intersect[ray, i]
+
+        direction_norm = sqrt(direction_norm)
+        intersect_norm = sqrt(intersect_norm)
+
+        for i in range(3):
+            shadow_direction[ray, i] /= direction_norm
+            # nudge the start toward the light so we don't strike the surface we are starting on
+            shadow_start[ray, i] = intersect[ray, i] + shadow_direction[ray, i] * (1e-15 * intersect_norm)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline double _shade_ray(const int brdf, const double global_albedo, const double[:, :] directions,
+                              const cnp.uint8_t[:] hit, const cnp.uint8_t[:] occluded, const double[:, :] normal,
+                              const double[:] albedo, const double[:, :] shadow_direction,
+                              const Py_ssize_t ray) noexcept nogil:
+    """
+    This C function shades a single ray from the trace buffers, returning 0 for rays that missed or are shadowed.
+    """
+
+    cdef:
+        double[3] incidence
+        double[3] exidence
+        double[3] local_normal
+        Py_ssize_t i
+
+    if (not hit[ray]) or occluded[ray]:
+        return 0
+
+    for i in range(3):
+        incidence[i] = -shadow_direction[ray, i]
+        exidence[i] = -directions[i, ray]
+        local_normal[i] = normal[ray, i]
+
+    return _shade(brdf, global_albedo, incidence, exidence, local_normal, albedo[ray])
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _shade_and_splat(const int brdf, const double global_albedo, const double[:, :] directions,
+                           const cnp.uint8_t[:] hit, const cnp.uint8_t[:] occluded, const double[:, :] normal,
+                           const double[:] albedo, const double[:, :] shadow_direction, const double[:] intensity,
+                           const cnp.int64_t[:] group_starts, const cnp.int64_t[:] group_rows,
+                           const cnp.int64_t[:] column_index, const Py_ssize_t num_groups, const bint omp,
+                           double[:, :] template) noexcept nogil:
+    """
+    This C function shades the rays of a tile and adds them to the template.
+
+    The rays are grouped by the template row they belong to (``group_starts`` gives the first sub-pixel row of each
+    group in the tile and ``group_rows`` the template row for each group) so that each template row is only ever updated
+    by a single thread.  If ``brdf`` is ``_EXTERNAL`` then ``intensity`` is used for the intensity of each ray instead of
+    evaluating an illumination law.
+    """
+
+    cdef:
+        Py_ssize_t group
+
+    if omp:
+        apply_schedule(SCHEDULE_STATIC)
+        with nogil, parallel(num_threads=get_thread_count()):
+            for group in prange(num_groups, schedule='runtime'):
+                _shade_and_splat_group(brdf, global_albedo, directions, hit, occluded, normal, albedo,
+                                       shadow_direction, intensity, group_starts, group_rows, column_index, group,
+                                       template)
+    else:
+        for group in range(num_groups):
+            _shade_and_splat_group(brdf, global_albedo, directions, hit, occluded, normal, albedo, shadow_direction,
+                                   intensity, group_starts, group_rows, column_index, group, template)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline void _shade_and_splat_group(const int brdf, const double global_albedo, const double[:, :] directions,
+                                        const cnp.uint8_t[:] hit, const cnp.uint8_t[:] occluded,
+                                        const double[:, :] normal, const double[:] albedo,
+                                        const double[:, :] shadow_direction, const double[:] intensity,
+                                        const cnp.int64_t[:] group_starts, const cnp.int64_t[:] group_rows,
+                                        const cnp.int64_t[:] column_index, const Py_ssize_t group,
+                                        double[:, :] template) noexcept nogil:
+    """
+    This C function shades and accumulates the rays for a single template row for :func:`_shade_and_splat`.
+    """
+
+    cdef:
+        Py_ssize_t num_columns = column_index.shape[0]
+        Py_ssize_t sub_row, column, ray
+        cnp.int64_t row = group_rows[group]
+        double value
+
+    for sub_row in range(group_starts[group], group_starts[group + 1]):
+        for column in range(num_columns):
+
+            ray = sub_row * num_columns + column
+
+            if brdf == _EXTERNAL:
+                value = intensity[ray]
+
+            elif hit[ray] and (not occluded[ray]):
+                value = _shade_ray(brdf, global_albedo, directions, hit, occluded, normal, albedo, shadow_direction,
+                                   ray)
+
+            else:
+                continue
+
+            template[row, column_index[column]] += value
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _shade_rays(const int brdf, const double global_albedo, const double[:, :] directions,
+                      const cnp.uint8_t[:] hit, const cnp.uint8_t[:] occluded, const double[:, :] normal,
+                      const double[:] albedo, const double[:, :] shadow_direction, const Py_ssize_t num_rays,
+                      const bint omp, double[:] intensity) noexcept nogil:
+    """
+    This C function shades each ray, storing the results in ``intensity``.
+
+    This is used when the rays are not laid out on a regular grid of sub-pixels and so can't be shaded and accumulated
+    at the same time by :func:`_shade_and_splat`.
+    """
+
+    cdef:
+        Py_ssize_t ray
+
+    if omp:
+        apply_schedule(SCHEDULE_STATIC)
+        with nogil, parallel(num_threads=get_thread_count()):
+            for ray in prange(num_rays, schedule='runtime'):
+                intensity[ray] = _shade_ray(brdf, global_albedo, directions, hit, occluded, normal, albedo,
+                                            shadow_direction, ray)
+    else:
+        for ray in range(num_rays):
+            intensity[ray] = _shade_ray(brdf, global_albedo, directions, hit, occluded, normal, albedo,
+                                        shadow_direction, ray)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _splat_rays(const double[:] intensity, const cnp.int64_t[:] pixel_rows, const cnp.int64_t[:] pixel_columns,
+                      const Py_ssize_t num_rays, double[:, :] template) noexcept nogil:
+    """
+    This C function adds the intensity of each ray into the template pixel given by ``pixel_rows`` and
+    ``pixel_columns``.
+
+    This is done serially since multiple rays may fall in the same pixel.
+    """
+
+    cdef:
+        Py_ssize_t ray
+
+    for ray in range(num_rays):
+        template[pixel_rows[ray], pixel_columns[ray]] += intensity[ray]
+
+
+def _box_candidates(shape, directions, distance):
+    """
+    This helper returns the indices of the rays starting at the origin which strike the bounding box of a shape closer
+    than the current closest intersect.
+
+    If the shape does not have a bounding box then all of the rays are returned.
+    """
+
+    bounding_box = getattr(shape, "bounding_box", None)
+
+    if bounding_box is None:
+        return np.arange(directions.shape[-1])
+
+    vertices = bounding_box.vertices
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_directions = 1 / directions
+
+        t1 = vertices.min(axis=-1).reshape(3, 1) * inv_directions
+        t2 = vertices.max(axis=-1).reshape(3, 1) * inv_directions
+
+    # fmin/fmax ignore the nans that come from 0*inf for rays parallel to a side
+    near = np.fmax.reduce(np.fmin(t1, t2), axis=0)
+    far = np.fmin.reduce(np.fmax(t1, t2), axis=0)
+
+    # pad the comparison slightly since the box is only used to skip rays that can't possibly hit
+    return np.flatnonzero((far >= np.maximum(near, 0)) & (near <= distance * (1 + 1e-9)))
+
+
+class _RenderBuffers:
+    """
+    This class holds the per-ray buffers used by :func:`render_template`, which are allocated once and reused for each
+    batch of rays that is rendered.
+    """
+
+    def __init__(self, max_rays):
+        """
+        :param max_rays: The maximum number of rays that will be rendered in a single batch
+        :type max_rays: int
+        """
+
+        self.hit = np.zeros(max_rays, dtype=np.uint8)
+        self.occluded = np.zeros(max_rays, dtype=np.uint8)
+        self.distance = np.empty(max_rays, dtype=np.float64)
+        self.intersect = np.empty((max_rays, 3), dtype=np.float64)
+        self.normal = np.empty((max_rays, 3), dtype=np.float64)
+        self.albedo = np.empty(max_rays, dtype=np.float64)
+        self.facet = np.empty(max_rays, dtype=np.int64)
+        self.hit_object = np.empty(max_rays, dtype=np.int64)
+        self.intensity = np.zeros(max_rays, dtype=np.float64)
+        self.ignore = np.empty(max_rays, dtype=np.int64)
+        self.shadow_start = np.empty((max_rays, 3), dtype=np.float64)
+        self.shadow_direction = np.empty((max_rays, 3), dtype=np.float64)
+        self.local_start = np.empty((max_rays, 3), dtype=np.float64)
+        self.local_direction = np.empty((max_rays, 3), dtype=np.float64)
+        self.local_inv_direction = np.empty((max_rays, 3), dtype=np.float64)
+        self.workspace = TraceWorkspace(max_rays)
+
+    def reset(self, num_rays):
+        """
+        Resets the first ``num_rays`` entries of the buffers to represent rays that haven't struck anything.
+
+        :param num_rays: The number of rays in the batch about to be rendered
+        :type num_rays: int
+        """
+
+        self.hit[:num_rays] = 0
+        self.distance[:num_rays] = np.inf
+        self.intersect[:num_rays] = np.nan
+        self.normal[:num_rays] = np.nan
+        self.albedo[:num_rays] = np.nan
+        self.facet[:num_rays] = -1
+        self.hit_object[:num_rays] = -1
+
+
+def _trace_batch(objects, directions, num_rays, buffers, light_position, omp):
+    """
+    This helper traces a batch of rays starting at the origin through the targets to find the closest intersect and
+    then checks whether each intersect is shadowed, storing the results in ``buffers``.
+    """
+
+    buffers.reset(num_rays)
+
+    # find the closest intersect for each ray
+    for index, (shape, compiled, rotation_matrix, position_vector, target) in enumerate(objects):
+
+        if compiled:
+            # surfaces trace into the workspace with their own (packet) tracing
+            workspace = buffers.workspace
+
+            shape.trace(Rays(np.zeros(3), directions), omp=omp, out=workspace)
+
+            _merge_closest(num_rays, index, workspace.hit, workspace.distance, workspace.intersect, workspace.normal,
+                           workspace.albedo, workspace.facet, buffers.hit, buffers.distance, buffers.intersect,
+                           buffers.normal, buffers.albedo, buffers.facet, buffers.hit_object)
+
+        else:
+            candidates = _box_candidates(shape, directions, buffers.distance[:num_rays])
+
+            if candidates.size == 0:
+                continue
+
+            results = np.atleast_1d(shape.trace(Rays(np.zeros(3), directions[:, candidates]))).ravel()
+
+            results_distance = np.linalg.norm(results["intersect"], axis=-1)
+
+            closer = results["check"] & (results_distance < buffers.distance[candidates])
+
+            update = candidates[closer]
+
+            buffers.hit[update] = 1
+            buffers.distance[update] = results_distance[closer]
+            buffers.intersect[update] = results["intersect"][closer]
+            buffers.normal[update] = results["normal"][closer]
+            buffers.albedo[update] = results["albedo"][closer]
+            buffers.facet[update] = results["facet"][closer]
+            buffers.hit_object[update] = index
+
+    # check if each intersect is shadowed
+    _prepare_shadows(light_position, num_rays, buffers.hit, buffers.intersect, buffers.shadow_start,
+                     buffers.shadow_direction, buffers.occluded)
+
+    # look up the shadows that objects with a shadow cache cast on themselves
+    cached = {}
+    for index, (shape, compiled, rotation_matrix, position_vector, target) in enumerate(objects):
+
+        cache = get_shadow_cache(target)
+
+        if cache is None:
+            continue
+
+        own = np.flatnonzero(buffers.hit[:num_rays].astype(bool) & (buffers.hit_object[:num_rays] == index))
+
+        if own.size == 0:
+            continue
+
+        buffers.occluded[own] = cache.shadowed(target, buffers.facet[own], buffers.intersect[own], light_position)
+
+        cached[index] = own
+
+    for index, (shape, compiled, rotation_matrix, position_vector, target) in enumerate(objects):
+
+        own = cached.get(index)
+
+        if own is not None:
+            # the rays on this object already know whether it shadows them, so mark them as done for this object
+            own_occluded = buffers.occluded[own].copy()
+            buffers.occluded[own] = 1
+
+        if compiled:
+            _occlude_surface(shape, rotation_matrix, position_vector, buffers.shadow_start, buffers.shadow_direction,
+                             num_rays, index, omp, buffers.local_start, buffers.local_direction,
+                             buffers.local_inv_direction, buffers.hit, buffers.facet, buffers.hit_object,
+                             buffers.ignore, buffers.occluded)
+
+        else:
+            check = np.flatnonzero(buffers.hit[:num_rays].astype(bool) & ~buffers.occluded[:num_rays].astype(bool))
+
+            if check.size != 0:
+                shadow_rays = Rays(buffers.shadow_start[check].T, buffers.shadow_direction[check].T,
+                                   ignore=np.where(buffers.hit_object[check] == index, buffers.facet[check], -1))
+
+                if hasattr(shape, "is_occluded"):
+                    object_occluded = shape.is_occluded(shadow_rays)
+                else:
+                    object_occluded = shape.trace(shadow_rays)["check"]
+
+                buffers.occluded[check] = np.atleast_1d(object_occluded).ravel()
+
+        if own is not None:
+            buffers.occluded[own] = own_occluded
+
+
+def _external_intensity(illumination_model, directions, num_rays, buffers):
+    """
+    This helper computes the intensity of a batch of traced rays using an illumination model that doesn't have a
+    compiled version by forming the :data:`.ILLUM_DTYPE` array for the batch.
+    """
+
+    illum_inputs = np.zeros(num_rays, dtype=ILLUM_DTYPE)
+    illum_inputs["incidence"] = -buffers.shadow_direction[:num_rays]
+    illum_inputs["exidence"] = -directions.T
+    illum_inputs["normal"] = buffers.normal[:num_rays]
+    illum_inputs["albedo"] = buffers.albedo[:num_rays]
+    illum_inputs["visible"] = buffers.hit[:num_rays].astype(bool) & ~buffers.occluded[:num_rays].astype(bool)
+
+    return np.ascontiguousarray(illumination_model(illum_inputs), dtype=np.float64).ravel()
+
+
+def _shade_batch(brdf, global_albedo, illumination_model, directions, num_rays, buffers, omp):
+    """
+    This helper shades a batch of traced rays, returning the intensity of each ray.
+    """
+
+    if brdf == _EXTERNAL:
+        return _external_intensity(illumination_model, directions, num_rays, buffers)
+
+    _shade_rays(brdf, global_albedo, directions, buffers.hit, buffers.occluded, buffers.normal, buffers.albedo,
+                buffers.shadow_direction, num_rays, omp, buffers.intensity)
+
+    return buffers.intensity[:num_rays]
+
+
+def _neighbor_differs(values):
+    """
+    This helper flags the pixels of a 2D array which differ from any of their 8 neighbors.
+
+    Both pixels of each differing pair are flagged.
+    """
+
+    differs = np.zeros(values.shape, dtype=bool)
+
+    # each neighbor pair is checked once: right, down, down-right, and down-left
+    for first, second in [((slice(None), slice(1, None)), (slice(None), slice(None, -1))),
+                          ((slice(1, None), slice(None)), (slice(None, -1), slice(None))),
+                          ((slice(1, None), slice(1, None)), (slice(None, -1), slice(None, -1))),
+                          ((slice(1, None), slice(None, -1)), (slice(None, -1), slice(1, None)))]:
+
+        pair_differs = values[first] != values[second]
+
+        differs[first] |= pair_differs
+        differs[second] |= pair_differs
+
+    return differs
+
+
+def render_template(scene, model, rows, cols, grid_size=1, illumination_model=None, temperature=0, image_number=0,
+                    tile_rows=32, omp=True, adaptive=False, facet_edges=True):
+    """
+    render_template(scene, model, rows, cols, grid_size=1, illumination_model=None, temperature=0, image_number=0, tile_rows=32, omp=True, adaptive=False, facet_edges=True)
+
+    This function renders a template of the targets in a scene by tracing, shading, and accumulating rays for each
+    sub-pixel directly into the template.
+
+    The sub-pixels are laid out in the same way as :func:`.compute_rays` for a min, max pair of ``rows`` and ``cols``,
+    and the rays start at the origin (so the scene should already be placed in the camera frame).  Each ray is traced
+    through the :attr:`.Scene.target_objs` to find the closest intersect, a shadow ray is traced from the intersect to
+    the :attr:`.Scene.light_obj` (ignoring the facet that was struck), and the visible intersects are shaded using
+    ``illumination_model`` and added to the template pixel containing the sub-pixel, exactly as
+    :meth:`.Scene.get_illumination_inputs` followed by the illumination model and ``np.add.at`` would.
+
+    The template is rendered ``tile_rows`` pixel rows at a time so that only the buffers for a single tile are ever
+    needed.  See the module documentation for details on what is done in compiled code.
+
+    If ``adaptive`` is ``True`` then the sub-pixel grid is only used where it matters.  A single ray is first traced
+    through the center of each pixel.  Then any pixel whose center ray differs from one of its 8 neighbors in what was
+    struck (limbs and the edges between targets), whether it is lit (terminators and shadow edges), or, if
+    ``facet_edges`` is ``True``, which facet was struck, is rendered with the full ``grid_size`` by ``grid_size`` grid of
+    sub-pixels.  The rest of the pixels use the intensity of the center ray for each of their sub-pixels.  This gives
+    the same template at the edges, which drive the correlation, while tracing far fewer rays in smooth regions and in
+    the empty space around the targets.  For shape models where facets are much smaller than a pixel, ``facet_edges``
+    should be set to ``False``, otherwise nearly every pixel on the targets will be refined.
+
+    :param scene: The scene to render, already placed in the camera frame
+    :type scene: Scene
+    :param model: The camera model used to compute the direction of each ray
+    :type model: CameraModel
+    :param rows: The minimum and maximum pixel row to render (inclusive on both sides)
+    :type rows: ARRAY_LIKE
+    :param cols: The minimum and maximum pixel column to render (inclusive on both sides)
+    :type cols: ARRAY_LIKE
+    :param grid_size: The number of rays per edge of each pixel
+    :type grid_size: int
+    :param illumination_model: The illumination model used to convert the geometry into intensities.  If ``None`` then
+                               :class:`.McEwenIllumination` is used
+    :type illumination_model: Optional[IlluminationModel]
+    :param temperature: The temperature of the camera passed to :meth:`.CameraModel.pixels_to_unit`
+    :type temperature: Real
+    :param image_number: The number of the image passed to :meth:`.CameraModel.pixels_to_unit`
+    :type image_number: int
+    :param tile_rows: The number of pixel rows to render at a time
+    :type tile_rows: int
+    :param omp: A boolean flag specifying whether to use parallel processing (``True``) or not
+    :type omp: bool
+    :param adaptive: A flag specifying whether to only use the full sub-pixel grid for pixels near edges
+    :type adaptive: bool
+    :param facet_edges: A flag specifying whether changes in the struck facet between neighboring pixels should be
+                        treated as edges when ``adaptive`` is ``True``
+    :type facet_edges: bool
+    :return: The rendered template as a 2D array and the (column, row) pixel location of the first and last pixels in
+             the template as a tuple of length 2 arrays
+    :rtype: Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]
+    :raises ValueError: if the scene does not have both a light object and target objects or if ``tile_rows`` is less
+                        than 1
+    """
+
+    if (scene.light_obj is None) or (not scene.target_objs):
+        raise ValueError("both light_obj and target_objs must be set to render a template")
+
+    if tile_rows < 1:
+        raise ValueError("tile_rows must be at least 1")
+
+    if illumination_model is None:
+        illumination_model = McEwenIllumination()
+
+    cdef int brdf = _COMPILED_BRDFS.get(type(illumination_model), _EXTERNAL)
+    cdef double global_albedo = getattr(illumination_model, "global_albedo", 1.0)
+
+    # lay out the sub-pixels the same way as compute_rays
+    grid_dist = 1 / grid_size
+    grid_start = 0.5 - grid_dist / 2
+
+    sub_cols = np.arange(cols[0] - grid_start, cols[1] + 0.5, grid_dist)
+    sub_rows = np.arange(rows[0] - grid_start, rows[1] + 0.5, grid_dist)
+
+    min_bounds = np.array([sub_cols[0], sub_rows[0]]).round()
+    max_bounds = np.array([sub_cols[-1], sub_rows[-1]]).round()
+
+    column_index = (sub_cols.round() - min_bounds[0]).astype(np.int64)
+    row_index = (sub_rows.round() - min_bounds[1]).astype(np.int64)
+
+    template = np.zeros((int(max_bounds[1] - min_bounds[1]) + 1, int(max_bounds[0] - min_bounds[0]) + 1),
+                        dtype=np.float64)
+
+    light_position = np.asarray(scene.light_obj.shape.location, dtype=np.float64).ravel()
+
+    # figure out how each target is going to be traced
+    objects = []
+    for target in scene.target_objs:
+        shape = target.shape
+
+        if isinstance(shape, LODShape):
+            shape = shape.shape
+
+        if isinstance(shape, Surface):
+            rotation = None
+            position = None
+
+            if isinstance(shape, (KDTree, FlatKDTree)):
+                rotation = shape.rotation
+                position = shape.position
+
+            objects.append((shape, True,
+                            np.eye(3) if rotation is None else np.asarray(rotation.matrix, dtype=np.float64),
+                            np.zeros(3) if position is None else np.asarray(position, dtype=np.float64).ravel(),
+                            target))
+        else:
+            objects.append((shape, False, None, None, target))
+
+    # the sub-pixel rows belonging to each template row
+    row_starts = np.searchsorted(row_index, np.arange(template.shape[0] + 1)).astype(np.int64)
+
+    num_columns = sub_cols.size
+
+    tile_starts = np.arange(0, template.shape[0], tile_rows)
+    tile_ends = np.minimum(tile_starts + tile_rows, template.shape[0])
+    max_rays = int((row_starts[tile_ends] - row_starts[tile_starts]).max(initial=0)) * num_columns
+
+    # allocate the buffers once and reuse them for each tile
+    buffers = _RenderBuffers(max_rays)
+
+    if adaptive:
+        _render_adaptive(objects, model, brdf, global_albedo, illumination_model, sub_rows, sub_cols, row_index,
+                         column_index, row_starts, tile_starts, tile_ends, temperature, image_number, light_position,
+                         facet_edges, buffers, omp, template)
+
+        return template, (min_bounds, max_bounds)
+
+    for first_row, last_row in zip(tile_starts, tile_ends):
+
+        first_sub_row = row_starts[first_row]
+        last_sub_row = row_starts[last_row]
+
+        num_rays = (last_sub_row - first_sub_row) * num_columns
+
+        if num_rays == 0:
+            continue
+
+        # compute the rays for this tile
+        directions = _pixel_directions(model, sub_cols, sub_rows[first_sub_row:last_sub_row], temperature,
+                                       image_number)
+
+        _trace_batch(objects, directions, num_rays, buffers, light_position, omp)
+
+        # shade the rays and add them to the template
+        if brdf == _EXTERNAL:
+            intensity = _external_intensity(illumination_model, directions, num_rays, buffers)
+        else:
+            intensity = buffers.intensity
+
+        group_starts = row_starts[first_row:last_row + 1] - first_sub_row
+        group_rows = np.arange(first_row, last_row, dtype=np.int64)
+
+        _shade_and_splat(brdf, global_albedo, directions, buffers.hit, buffers.occluded, buffers.normal,
+                         buffers.albedo, buffers.shadow_direction, intensity, group_starts, group_rows, column_index,
+                         last_row - first_row, omp, template)
+
+    return template, (min_bounds, max_bounds)
+
+
+def _pixel_directions(model, pixel_cols, pixel_rows, temperature, image_number):
+    """
+    This helper computes the unit direction vectors through every (column, row) pair of the provided pixel locations as
+    a 3xn array, ordered with the columns changing fastest.
+    """
+
+    grid_cols, grid_rows = np.meshgrid(pixel_cols, pixel_rows)
+
+    return np.ascontiguousarray(model.pixels_to_unit(np.vstack([grid_cols.ravel(), grid_rows.ravel()]),
+                                                     temperature=temperature, image=image_number),
+                                dtype=np.float64).reshape(3, -1)
+
+
+def _render_adaptive(objects, model, brdf, global_albedo, illumination_model, sub_rows, sub_cols, row_index,
+                     column_index, row_starts, tile_starts, tile_ends, temperature, image_number, light_position,
+                     facet_edges, buffers, omp, template):
+    """
+    This helper renders the template for :func:`render_template` by first tracing a single ray through each pixel and
+    then only using the full sub-pixel grid for pixels that differ from their neighbors.
+    """
+
+    num_template_rows, num_template_columns = template.shape
+
+    # the number of sub-pixels in each template row/column and their centers
+    row_counts = np.bincount(row_index, minlength=num_template_rows)
+    column_counts = np.bincount(column_index, minlength=num_template_columns)
+
+    row_centers = np.bincount(row_index, weights=sub_rows, minlength=num_template_rows) / row_counts
+    column_centers = np.bincount(column_index, weights=sub_cols, minlength=num_template_columns) / column_counts
+
+    coarse_intensity = np.zeros(template.shape, dtype=np.float64)
+    coarse_object = np.full(template.shape, -1, dtype=np.int64)
+    coarse_facet = np.full(template.shape, -1, dtype=np.int64)
+
+    # trace a single ray through the center of each pixel
+    for first_row, last_row in zip(tile_starts, tile_ends):
+
+        num_rays = (last_row - first_row) * num_template_columns
+
+        directions = _pixel_directions(model, column_centers, row_centers[first_row:last_row], temperature,
+                                       image_number)
+
+        _trace_batch(objects, directions, num_rays, buffers, light_position, omp)
+
+        intensity = _shade_batch(brdf, global_albedo, illumination_model, directions, num_rays, buffers, omp)
+
+        coarse_intensity[first_row:last_row] = intensity.reshape(-1, num_template_columns)
+        coarse_object[first_row:last_row] = buffers.hit_object[:num_rays].reshape(-1, num_template_columns)
+        coarse_facet[first_row:last_row] = buffers.facet[:num_rays].reshape(-1, num_template_columns)
+
+    # refine the pixels on limbs, terminators, and shadow edges (and facet edges if requested)
+    refine = _neighbor_differs(coarse_object) | _neighbor_differs(coarse_intensity > 0)
+
+    if facet_edges:
+        refine |= _neighbor_differs(coarse_facet)
+
+    # the pixels that aren't refined use the center ray for every one of their sub-pixels
+    template[:] = np.where(refine, 0, coarse_intensity * np.outer(row_counts, column_counts))
+
+    for first_row, last_row in zip(tile_starts, tile_ends):
+
+        first_sub_row = row_starts[first_row]
+        last_sub_row = row_starts[last_row]
+
+        tile_row_index = row_index[first_sub_row:last_sub_row]
+
+        sub_pixel_rows, sub_pixel_columns = np.nonzero(refine[tile_row_index][:, column_index])
+
+        num_rays = sub_pixel_rows.size
+
+        if num_rays == 0:
+            continue
+
+        directions = np.ascontiguousarray(
+            model.pixels_to_unit(np.vstack([sub_cols[sub_pixel_columns],
+                                            sub_rows[first_sub_row:last_sub_row][sub_pixel_rows]]),
+                                 temperature=temperature, image=image_number),
+            dtype=np.float64
+        ).reshape(3, -1)
+
+        _trace_batch(objects, directions, num_rays, buffers, light_position, omp)
+
+        intensity = _shade_batch(brdf, global_albedo, illumination_model, directions, num_rays, buffers, omp)
+
+        _splat_rays(intensity, np.ascontiguousarray(tile_row_index[sub_pixel_rows]),
+                    np.ascontiguousarray(column_index[sub_pixel_columns]), num_rays, template)
@@ -28,10 +28,11 @@ with the scene classes much, as this is done for you in the rest of GIANT.
 """
 
 import datetime
-from typing import Callable, Optional, Any, List
+from typing import Callable, Optional, Any, List, Hashable
 import warnings
 from typing import Tuple, Union
 from enum import Enum
+from collections import OrderedDict
 import copy
 
 import numpy as np
@@ -44,8 +45,10 @@ from giant._typing import Real, ARRAY_LIKE
 from giant.camera_models import CameraModel
 from giant.image import OpNavImage
 from giant.ray_tracer.illumination import IlluminationModel, ILLUM_DTYPE
-from giant.ray_tracer.rays import INTERSECT_DTYPE
+from giant.ray_tracer.rays import INTERSECT_DTYPE, TraceWorkspace, RayBatch
 from giant.ray_tracer.utilities import to_block
+from giant.ray_tracer.shadow_cache import ShadowCache, get_shadow_cache
+from giant.ray_tracer.lod import LODShape
 
 
 SPEED_OF_LIGHT = 299792.458  # km/sec
@@ -228,7 +231,8 @@ class SceneObject:
                  name: str = 'object',
                  position_function: Optional[Callable[[datetime], np.ndarray]] = None,
                  orientation_function: Optional[Callable[[datetime], Rotation]] = None,
-                 corrections: Optional[CorrectionsType] = CorrectionsType.LTPS):
+                 corrections: Optional[CorrectionsType] = CorrectionsType.LTPS,
+                 shadow_cache: Optional[ShadowCache] = None):
         """
         :param shape: The shape that represents the object.  This is typically a subclass of :class:`.Shape`, but can be
                       anything so long as it implements ``translate``, ``rotate``, and ``trace`` methods.
@@ -250,6 +254,9 @@ class SceneObject:
                             :data:`.CorrectionsType`, most typically :attr:`.CorrectionsTyps.LTPS` which applies light
                             time and stellar aberration corrections.  This is used by :class:`.Scene` and is only used
                             when the :attr:`position_function` and :attr:`orientation_function` are not ``None``.
+        :param shadow_cache: An optional cache of the facets of the object which shadow themselves, used to reuse
+                             shadows across images with similar light directions.  This only applies to tessellated
+                             shapes.  See :mod:`.shadow_cache` for details.
         """
 
         self.position_function: Optional[Callable[[datetime], np.ndarray]] = position_function
@@ -300,6 +307,15 @@ class SceneObject:
         The name of the object, used for logging purposes and readability.
         """
 
+        self.shadow_cache: Optional[ShadowCache] = shadow_cache
+        """
+        An optional cache of the facets of the object which are shadowed by the object itself.
+
+        When this is not ``None`` (and the shape is tessellated) the shadows cast by the object onto itself are looked up
+        from the cache by :meth:`.Scene.get_illumination_inputs` and :func:`.render_template` instead of being traced
+        for every ray.  See :mod:`.shadow_cache` for details.
+        """
+
     @property
     def shape(self) -> Union[Shape, Any]:
         """
@@ -544,6 +560,44 @@ class SceneObject:
         # get the norm of the extent of the projected limbs to be the apparent diameter
         return np.linalg.norm(image_locs.T.reshape(-1, 2, 1) - image_locs.reshape(1, 2, -1), axis=1).max(initial=0)
 
+    def select_level_of_detail(self, model: CameraModel, image: int = 0, temperature: Real = 0.0) -> Optional[int]:
+        """
+        Selects the level of detail to use for the object based on the ground sample distance of the camera.
+
+        This only does anything if the shape is a :class:`.LODShape`.  The ground sample distance at the center of the
+        object is computed using :meth:`.CameraModel.compute_ground_sample_distance`, and the physical radius of the
+        object is estimated from this and the :meth:`get_apparent_diameter` of the object.  The ground sample distance
+        is then scaled to the point of the object closest to the camera (where it is smallest) and passed to
+        :meth:`.LODShape.select`.
+
+        This method assumes that the object has already been placed in the camera frame (the frame centered at the focus
+        of the camera) with the z axis pointing perpendicular to the image plane.
+
+        :param model: The camera model that relates points in the 3d world to points on the image plane
+        :param image: the index of the image that is being projected onto.  Can normally be ignored
+        :param temperature: The temperature of the camera at the time we are selecting the level of detail
+        :return: The index of the selected level, or ``None`` if the shape is not a :class:`.LODShape`
+        """
+
+        if not isinstance(self._shape, LODShape):
+            return None
+
+        distance = np.linalg.norm(self._position)
+
+        center_gsd = float(np.asarray(model.compute_ground_sample_distance(self._position,
+                                                                           temperature=temperature)).ravel()[0])
+
+        radius = 0.5 * self.get_apparent_diameter(model, image=image, temperature=temperature) * center_gsd
+
+        # the ground sample distance is proportional to the distance to the surface
+        if distance > radius:
+            ground_sample_distance = center_gsd * (distance - radius) / distance
+        else:
+            # we are inside the bounding sphere so use the full resolution shape
+            ground_sample_distance = 0.0
+
+        return self._shape.select(ground_sample_distance)
+
     def place(self, date: datetime):
         """
         Place the object using the :attr:`orientation_function` and :attr:`position_function` at the requested date.
@@ -568,6 +622,334 @@ class SceneObject:
             warnings.warn("Attempted to place a SceneObject without a position_function")
 
 
+class ShapeInstance:
+    """
+    This class provides a rigid body instance of a (possibly shared) traceable shape.
+
+    Normally, moving an object in GIANT (through :meth:`.SceneObject.translate` and :meth:`.SceneObject.rotate`) updates
+    the shape itself, which means that if the same shape (for instance the same :class:`.KDTree`) is to appear multiple
+    times in a scene it must be copied for each appearance.  This class instead stores the rotation and translation from
+    the current (external) frame into the frame the shape is expressed in, and transforms the rays into the shape frame
+    when they are traced.  Multiple instances can therefore share the same underlying shape, each with their own
+    position and orientation, without copying the shape.
+
+    When used as the shape of a :class:`.SceneObject` in a :class:`.Scene`, the scene's bounding volume hierarchy is
+    built using the current frame :attr:`bounding_box` of each instance, so rays are only transformed into the shape
+    frame for the instances whose bounding box they actually strike.
+
+    Any attributes not defined by this class (for instance ``order``, ``num_faces``, or ``reference_ellipsoid``) are
+    retrieved from the underlying shape.
+
+        >>> from giant.ray_tracer.scene import ShapeInstance, SceneObject, Scene
+        >>> from giant.ray_tracer.shapes import Ellipsoid
+        >>> boulder = Ellipsoid(principal_axes=[1, 1, 1])
+        >>> objects = [SceneObject(ShapeInstance(boulder, position=[0, 0, 10])),
+        ...            SceneObject(ShapeInstance(boulder, position=[5, 0, 10]))]
+        >>> scene = Scene(objects)
+    """
+
+    def __init__(self, shape: Union[Shape, Any], rotation: Optional[Union[Rotation, ARRAY_LIKE]] = None,
+                 position: Optional[ARRAY_LIKE] = None):
+        """
+        :param shape: The shape that this is an instance of.  This is not copied and must have ``trace`` and
+                      ``bounding_box`` attributes.
+        :param rotation: The rotation from the shape frame to the current frame for the instance.  If ``None`` then no
+                         rotation is applied
+        :param position: The location of the origin of the shape frame in the current frame.  If ``None`` then no
+                         translation is applied
+        """
+
+        self.shape: Union[Shape, Any] = shape
+        """
+        The shared shape that this is an instance of.
+        
+        This is never modified by this class.
+        """
+
+        self._rotation: Optional[Rotation] = None
+        """
+        The rotation that goes from the current frame to the shape frame.
+
+        Note that this is the inverse of the rotation applied through the :meth:`rotate` method, and it is 
+        multiplicatively updated, not overwritten.
+        """
+
+        self._position: Optional[np.ndarray] = None
+        """
+        The translation vector that goes from the current frame to the shape frame.
+
+        Note that this is the negative of the translation applied through the :meth:`translate` method, rotated into the 
+        shape frame and added to any existing position.
+        """
+
+        self._bounding_box = copy.deepcopy(shape.bounding_box)
+        """
+        The bounding box of the shape expressed in the current frame
+        """
+
+        if rotation is not None:
+            self.rotate(rotation)
+
+        if position is not None:
+            self.translate(position)
+
+    def __getattr__(self, item: str) -> Any:
+        # don't forward private attributes so that copying/pickling works before the instance is fully initialized
+        if item.startswith('_') or (item == 'shape'):
+            raise AttributeError(item)
+
+        return getattr(self.shape, item)
+
+    @property
+    def bounding_box(self):
+        """
+        The bounding box of the underlying shape expressed in the current frame of this instance.
+        """
+
+        return self._bounding_box
+
+    def rotate(self, rotation: Union[Rotation, ARRAY_LIKE]):
+        """
+        Rotates the instance.
+
+        The rotation is not applied to the shape itself, instead it is stored and applied (inversely) to the rays when
+        they are traced.
+
+        :param rotation: The rotation to apply
+        """
+
+        if not isinstance(rotation, Rotation):
+            rotation = Rotation(rotation)
+
+        if self._rotation is None:
+            self._rotation = rotation.inv()
+
+        else:
+            self._rotation = self._rotation * rotation.inv()
+
+        if self._bounding_box is not None:
+            self._bounding_box.rotate(rotation)
+
+    def translate(self, translation: ARRAY_LIKE):
+        """
+        Translates the instance.
+
+        The translation is not applied to the shape itself, instead it is stored and applied (inversely) to the rays
+        when they are traced.
+
+        :param translation: The translation to apply
+        """
+
+        translation = np.asarray(translation, dtype=np.float64).ravel()
+
+        if self._bounding_box is not None:
+            self._bounding_box.translate(translation)
+
+        if self._rotation is not None:
+            translation = self._rotation.matrix @ translation
+
+        if self._position is not None:
+            self._position = self._position - translation
+
+        else:
+            self._position = -translation
+
+    def _to_shape_frame(self, rays: Rays) -> Rays:
+        """
+        Creates a new set of rays expressed in the shape frame from rays expressed in the current frame.
+
+        The input rays are not modified.
+
+        :param rays: The rays to transform
+        :return: The transformed rays
+        """
+
+        start = rays.start.reshape(3, -1)
+        direction = rays.direction.reshape(3, -1)
+
+        if self._rotation is not None:
+            start = self._rotation.matrix @ start
+            direction = self._rotation.matrix @ direction
+
+        if self._position is not None:
+            start = start + self._position.reshape(3, 1)
+
+        return Rays(start, direction, ignore=rays.ignore)
+
+    def trace(self, rays: Rays) -> np.ndarray:
+        """
+        Traces rays through the instance.
+
+        The rays are transformed into the shape frame, traced through the shared shape, and then the intersect points
+        and normal vectors are transformed back into the current frame.
+
+        :param rays: The rays to trace expressed in the current frame
+        :return: A numpy array with dtype :data:`.INTERSECT_DTYPE` specifying where each ray intersected
+        """
+
+        res = np.atleast_1d(self.shape.trace(self._to_shape_frame(rays))).ravel()
+
+        hits = res["check"]
+
+        if not hits.any():
+            return res
+
+        if self._position is not None:
+            res["intersect"][hits] -= self._position
+
+        if self._rotation is not None:
+            res["intersect"][hits] = (self._rotation.matrix.T @ res["intersect"][hits].T).T
+            res["normal"][hits] = (self._rotation.matrix.T @ res["normal"][hits].T).T
+
+        return res
+
+    def is_occluded(self, rays: Rays) -> np.ndarray:
+        """
+        Checks whether each ray strikes the instance.
+
+        The rays are transformed into the shape frame and then checked using the ``is_occluded`` method of the shared
+        shape (or its ``trace`` method if it doesn't have one).
+
+        :param rays: The rays to check expressed in the current frame
+        :return: A boolean numpy array which is ``True`` where the ray struck the instance
+        """
+
+        rays_local = self._to_shape_frame(rays)
+
+        if hasattr(self.shape, 'is_occluded'):
+            return np.atleast_1d(self.shape.is_occluded(rays_local)).ravel()
+
+        return np.atleast_1d(self.shape.trace(rays_local)["check"]).ravel()
+
+
+class _SceneBVH:
+    """
+    A simple array based bounding volume hierarchy over the world frame bounding boxes of the objects in a scene.
+
+    The hierarchy is built by recursively splitting the objects at the median of their bounding box centers along the
+    axis with the largest spread.  It is traversed by all of the rays at once, carrying along the subset of rays that
+    strike each node, so that each object is only checked against the rays that strike all of its parent nodes.
+
+    This is used internally by :meth:`.Scene.trace` and is rebuilt for each trace since the objects in the scene
+    usually move between traces.  Users typically should not need to interact with it directly.
+    """
+
+    def __init__(self, bounds: np.ndarray, object_indices: np.ndarray):
+        """
+        :param bounds: The bounding box for each object as a kx6 array where the first 3 columns are the minimum sides
+                       and the last 3 columns are the maximum sides
+        :param object_indices: The index of the object each bounding box belongs to as a length k array
+        """
+
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 6)
+
+        # pad the boxes slightly so that flat objects (like a single facet) still have a volume
+        pad = 1e-9 * np.maximum(np.abs(bounds).max(axis=-1, keepdims=True), 1.0)
+
+        self.bounds: List[np.ndarray] = []
+        """
+        The bounds for each node in the tree as a length 6 array of minimum sides followed by maximum sides
+        """
+
+        self.children: List[Tuple[int, int]] = []
+        """
+        The indices of the left/right children of each node (-1 for leaf nodes)
+        """
+
+        self.objects: List[int] = []
+        """
+        The object index for each node (-1 for non-leaf nodes)
+        """
+
+        self._build(np.hstack([bounds[:, :3] - pad, bounds[:, 3:] + pad]), np.asarray(object_indices).ravel())
+
+    def _build(self, bounds: np.ndarray, object_indices: np.ndarray) -> int:
+        """
+        Recursively builds the hierarchy for the provided boxes, returning the index of the node that was created.
+
+        :param bounds: The padded bounds for the objects contained in this node as a kx6 array
+        :param object_indices: The object index for each bounding box
+        :return: The index of the created node
+        """
+
+        node = len(self.bounds)
+
+        self.bounds.append(np.concatenate([bounds[:, :3].min(axis=0), bounds[:, 3:].max(axis=0)]))
+        self.children.append((-1, -1))
+
+        if object_indices.size == 1:
+            self.objects.append(int(object_indices[0]))
+            return node
+
+        self.objects.append(-1)
+
+        centers = (bounds[:, :3] + bounds[:, 3:]) / 2
+
+        axis = np.argmax(centers.max(axis=0) - centers.min(axis=0))
+
+        order = np.argsort(centers[:, axis], kind='stable')
+
+        half = order.size // 2
+
+        left = self._build(bounds[order[:half]], object_indices[order[:half]])
+        right = self._build(bounds[order[half:]], object_indices[order[half:]])
+
+        self.children[node] = (left, right)
+
+        return node
+
+    def trace(self, starts: np.ndarray, inv_directions: np.ndarray) -> List[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Traverses the hierarchy with the provided rays, returning the rays that strike the bounding box of each object.
+
+        The distances returned are the distance along the (unnormalized) direction vector to the near side of each
+        object's bounding box, which may be negative if the ray starts inside of the box.
+
+        :param starts: The start location for each ray as a 3xn array
+        :param inv_directions: The inverse of the direction for each ray as a 3xn array
+        :return: A list of tuples of the object index, the indices of the rays that strike the object's bounding box,
+                 and the near distance to the bounding box for each of those rays
+        """
+
+        out = []
+
+        stack = [(0, np.arange(starts.shape[-1]))]
+
+        while stack:
+
+            node, ray_inds = stack.pop()
+
+            bounds = self.bounds[node]
+
+            node_starts = starts[:, ray_inds]
+            node_inv_directions = inv_directions[:, ray_inds]
+
+            with np.errstate(invalid='ignore'):
+                t1 = (bounds[:3].reshape(3, 1) - node_starts) * node_inv_directions
+                t2 = (bounds[3:].reshape(3, 1) - node_starts) * node_inv_directions
+
+            # fmin/fmax ignore the nans that come from 0*inf for rays parallel to a side
+            near = np.fmax.reduce(np.fmin(t1, t2), axis=0)
+            far = np.fmin.reduce(np.fmax(t1, t2), axis=0)
+
+            hit = (far >= np.maximum(near, 0))
+
+            if not hit.any():
+                continue
+
+            ray_inds = ray_inds[hit]
+
+            if self.objects[node] >= 0:
+                out.append((self.objects[node], ray_inds, near[hit]))
+
+            else:
+                left, right = self.children[node]
+                stack.append((right, ray_inds))
+                stack.append((left, ray_inds))
+
+        return out
+
+
 class Scene:
     """
     This is a container for :class:`SceneObject` instances that provides an easy interface for tracing and rendering.
@@ -581,17 +963,29 @@ class Scene:
     individual object using :meth:`calculate_apparent_position`.  Any objects that do not define the mentioned
     attributes will likely not be placed correctly in the scene when using these methods and thus warnings will be
     printed.
+
+    Because the same image is frequently used to update the scene many times (for instance when identifying stars and
+    then estimating the attitude for an image), the placed state of each object is cached by :meth:`update` so that
+    repeated updates for the same image do not need to recompute the (potentially expensive) position/orientation
+    functions and corrections.  The cache is keyed by the image observation date and camera state, the corrections
+    used, and the object, and the least recently used entries are discarded once it holds more than
+    :attr:`update_cache_size` entries.  If you change the :attr:`.SceneObject.position_function` or
+    :attr:`.SceneObject.orientation_function` of an object after updating the scene you should call
+    :meth:`clear_update_cache` to ensure the cached states are not reused.
     """
 
     def __init__(self, target_objs: Optional[Union[List[SceneObject], SceneObject]] = None,
                  light_obj: Optional[SceneObject] = None,
-                 obscuring_objs: Optional[List[SceneObject]] = None):
+                 obscuring_objs: Optional[List[SceneObject]] = None,
+                 update_cache_size: int = 128):
         """
         :param target_objs: The objects that are to be traced/rendered in a scene as a list of :class:`.SceneObject`.
         :param light_obj: The light object.  This is just used to track the position of the light, therefore it is
                           typically just a wrapper around a :class:`.Point`
         :param obscuring_objs: A list of objects that shouldn't be rendered but may be used externally from the scene
                                to identify whether targets are visible or not.
+        :param update_cache_size: The maximum number of placed object states to keep in the cache used by
+                                  :meth:`update`.  Set to 0 to disable the cache.
         """
 
         self.order: int = -1
@@ -623,6 +1017,39 @@ class Scene:
         self._light_obj = None
         self.light_obj = light_obj
 
+        self.update_cache_size: int = update_cache_size
+        """
+        The maximum number of placed object states to keep in the cache used by :meth:`update`.
+        
+        Each entry is the state of a single object for a single image/corrections combination.  Once the cache exceeds 
+        this size the least recently used entries are discarded.  Set to 0 to disable caching.
+        """
+
+        self._update_cache: OrderedDict = OrderedDict()
+        """
+        The cache of placed object states used by :meth:`update`.
+        
+        The keys are generated by :meth:`_get_update_key` and the values are tuples of the orientation and position of 
+        the object after it was placed.
+        """
+
+        self._trace_workspace: TraceWorkspace = TraceWorkspace()
+        """
+        The reusable buffers that :class:`.Surface` objects are traced into by :meth:`trace`.
+        
+        This is scratch space only, so it is not copied or pickled with the scene.
+        """
+
+    def __getstate__(self) -> dict:
+        """
+        Used to control how this class is pickled/copied so that the trace workspace is not included
+        """
+
+        state = self.__dict__.copy()
+
+        state.pop("_trace_workspace", None)
+
+        return state
 
     @property
     def target_objs(self) -> Optional[List[SceneObject]]:
@@ -739,12 +1166,17 @@ class Scene:
 
     def trace(self, trace_rays: Rays) -> np.ndarray:
         """
-        Trace trace_rays through the current scene and return the intersections with the objects in the scene for each
-        ray (optionally only the first intersection for each ray).
-
-        This method iterates through each object in the :attr:`target_objs` property and traces the ray through that
-        object using the object's trace method.  The results from the tracing of each object are then reduced to only
-        the first intersection for each ray.
+        Trace trace_rays through the current scene and return the first intersection with the objects in the scene for
+        each ray.
+
+        This method first builds a bounding volume hierarchy over the (world frame) bounding boxes of the objects in the
+        :attr:`target_objs` property and uses it to determine which objects each ray could possibly strike, and the
+        distance along the ray to the bounding box of each of those objects.  The objects are then traced in order of
+        increasing distance using the object's trace method while keeping track of the closest intersect found so far
+        for each ray.  Rays whose closest intersect is nearer than the bounding box of the next object are not traced
+        against that object, which means that objects hidden behind other objects are typically skipped entirely.
+        Objects whose shape does not have a bounding box are traced against every ray that hasn't already struck
+        something closer.
 
         This method handles determining whether things are to be ignored for each target, as well as updating the
         ``facet`` component of the return to have the appropriate id (encoding the target number at the head of the id).
@@ -756,38 +1188,201 @@ class Scene:
         :return: a numpy structured array of the intersections for each ray.
         """
 
-        results = []
+        num_rays = trace_rays.num_rays
 
-        for ind, target in enumerate(self.target_objs):
+        results = np.zeros(num_rays, dtype=INTERSECT_DTYPE)
+        results["check"] = False
+        results["distance"] = np.inf
+        results["intersect"] = np.nan
+        results["normal"] = np.nan
+        results["albedo"] = np.nan
+        results["facet"] = -1
+
+        if not self.target_objs:
+            return results
+
+        sizer = 10 ** (self.order + 1)
+
+        if trace_rays.ignore is None:
+            ignore_inds = None
+        elif np.isscalar(trace_rays.ignore):
+            ignore_inds = np.full((num_rays, 1), trace_rays.ignore, dtype=np.int64)
+        else:
+            ignore_inds = to_block(trace_rays.ignore).reshape(num_rays, -1)
+
+        starts = trace_rays.start.reshape(3, -1)
+        directions = trace_rays.direction.reshape(3, -1)
 
-            ignore_inds = copy.deepcopy(trace_rays.ignore)
+        # the bounding box distances are along the direction vector so convert them into actual distances
+        direction_norms = np.linalg.norm(directions, axis=0)
+
+        # the distance to the closest intersect found so far for each ray
+        best = np.full(num_rays, np.inf)
+
+        for ind, ray_inds, near in self._get_candidates(trace_rays):
+
+            # skip any rays that have already struck something closer than this object's bounding box
+            keep = near * direction_norms[ray_inds] <= best[ray_inds]
+
+            ray_inds = ray_inds[keep]
+
+            if ray_inds.size == 0:
+                continue
+
+            # avoid copying anything except the references, the ignores are handled below
+            ray_use = copy.copy(trace_rays)
+            ray_use.ignore = None
+
+            if ray_inds.size != num_rays:
+                ray_use = ray_use[ray_inds]
 
             if ignore_inds is not None:
+                ray_use.ignore = np.where(ignore_inds // sizer == ind, ignore_inds % sizer, -1)[ray_inds]
 
-                ignore_inds = to_block(ignore_inds)
+            shape = self.target_objs[ind].shape
 
-                ignore_inds[ignore_inds // (10 ** (self.order + 1)) != ind] = -1
-                ignore_inds[ignore_inds // (10 ** (self.order + 1)) == ind] = (
-                    ignore_inds[ignore_inds // (10 ** (self.order + 1)) == ind].astype(np.longfloat) %
-                    (10 ** (self.order + 1))
-                ).astype(np.int64)
+            if isinstance(shape, LODShape):
+                shape = shape.shape
+
+            if isinstance(shape, Surface):
+                # trace surfaces into the reusable workspace so that we aren't allocating new results for each object
+                object_results = shape.trace(ray_use, out=self._get_trace_workspace())
+            else:
+                object_results = np.atleast_1d(shape.trace(ray_use)).ravel()
 
-                ray_use = copy.deepcopy(trace_rays)
+            distances = np.linalg.norm(object_results["intersect"] - starts[:, ray_inds].T, axis=-1)
 
-                ray_use.ignore = ignore_inds
+            closer = object_results["check"] & (distances < best[ray_inds])
 
+            if not closer.any():
+                continue
+
+            update_inds = ray_inds[closer]
+
+            best[update_inds] = distances[closer]
+
+            for field in INTERSECT_DTYPE.names:
+                results[field][update_inds] = object_results[field][closer]
+
+            results["facet"][update_inds] += ind * sizer
+
+        return results
+
+    def _get_trace_workspace(self) -> TraceWorkspace:
+        """
+        Returns the workspace that surfaces are traced into by :meth:`trace`, creating it if it doesn't exist yet.
+
+        :return: The trace workspace for this scene
+        """
+
+        if not hasattr(self, "_trace_workspace"):
+            # in case this is an old scene that was pickled before the workspace was added
+            self._trace_workspace = TraceWorkspace()
+
+        return self._trace_workspace
+
+    def _get_candidates(self, trace_rays: Rays) -> List[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        This method determines which rays could possibly strike each object in :attr:`target_objs`.
+
+        This is done by building a :class:`._SceneBVH` over the world frame bounding boxes of the target objects and
+        traversing it with the rays.  Objects whose shape does not have a bounding box are considered possible for every
+        ray at a distance of ``-inf``.
+
+        The candidates are returned sorted by the closest bounding box distance for each object, so that nearer objects
+        are traced before further objects.
+
+        :param trace_rays: The rays that are to be traced
+        :return: A list of tuples of the index into :attr:`target_objs`, the indices of the rays that strike the
+                 object's bounding box, and the distance along each ray to the bounding box.
+        """
+
+        bounded_inds = []
+        bounds = []
+
+        candidates = []
+
+        for ind, target in enumerate(self.target_objs):
+
+            bounding_box = getattr(target.shape, "bounding_box", None)
+
+            if bounding_box is None:
+                candidates.append((ind, np.arange(trace_rays.num_rays), np.full(trace_rays.num_rays, -np.inf)))
             else:
-                ray_use = trace_rays
+                vertices = bounding_box.vertices
+                bounded_inds.append(ind)
+                bounds.append(np.concatenate([vertices.min(axis=-1), vertices.max(axis=-1)]))
+
+        if bounded_inds:
+            bvh = _SceneBVH(np.asarray(bounds), np.asarray(bounded_inds))
+
+            candidates.extend(bvh.trace(trace_rays.start.reshape(3, -1), trace_rays.inv_direction.reshape(3, -1)))
+
+        candidates.sort(key=lambda candidate: candidate[2].min())
+
+        return candidates
+
+    def is_occluded(self, trace_rays: Rays, skip: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Check whether each of the trace_rays strikes any of the objects in the current scene.
+
+        This is used for shadow checks, where we only need to know whether anything is in the way, not what was struck
+        first.  It iterates through each object in the :attr:`target_objs` property and checks the rays that haven't
+        already struck something against that object using the object's ``is_occluded`` method (falling back to its
+        ``trace`` method if it doesn't have one).  This can stop as soon as anything is struck for each ray and doesn't
+        need to compute any of the intersection geometry, which makes it much cheaper than :meth:`trace`.
+
+        Ignores are handled in the same way as in :meth:`trace`.  In addition, entire objects can be skipped for
+        specific rays using ``skip``, which is used when the shadows an object casts on itself are already known.
+
+        :param trace_rays: The rays to be checked against the current scene
+        :param skip: An optional length n array of the index into :attr:`target_objs` of an object that each ray should
+                     not be checked against (-1 for rays that should be checked against everything)
+        :return: a boolean numpy array of shape (n,) which is ``True`` where the ray struck something.
+        """
+
+        occluded = np.zeros(trace_rays.num_rays, dtype=bool)
+
+        sizer = 10 ** (self.order + 1)
+
+        if trace_rays.ignore is None:
+            ignore_inds = None
+        elif np.isscalar(trace_rays.ignore):
+            ignore_inds = np.full((trace_rays.num_rays, 1), trace_rays.ignore, dtype=np.int64)
+        else:
+            ignore_inds = to_block(trace_rays.ignore).reshape(trace_rays.num_rays, -1)
+
+        for ind, target in enumerate(self.target_objs):
+
+            remaining = ~occluded
+
+            if not remaining.any():
+                break
+
+            if skip is not None:
+                remaining &= skip != ind
+
+                if not remaining.any():
+                    continue
 
-            object_results = target.shape.trace(ray_use)
+            # only check the rays that haven't already struck something (the ignores are handled below)
+            ray_use = copy.copy(trace_rays)
+            ray_use.ignore = None
 
-            object_results["facet"][object_results["check"]] += ind * (10 ** (self.order + 1))
+            if (trace_rays.num_rays > 1) and (not remaining.all()):
+                ray_use = ray_use[remaining]
 
-            results.append(object_results)
+            if ignore_inds is not None:
+                ray_use.ignore = np.where(ignore_inds // sizer == ind, ignore_inds % sizer, -1)[remaining]
+
+            if hasattr(target.shape, 'is_occluded'):
+                object_occluded = target.shape.is_occluded(ray_use)
+            else:
+                object_occluded = target.shape.trace(ray_use)["check"]
 
-        results = np.asarray(results, dtype=INTERSECT_DTYPE)
+            occluded[remaining] = np.atleast_1d(object_occluded).ravel()
 
-        return self.get_first(results, trace_rays)
+        return occluded
 
     def get_illumination_inputs(self, trace_rays: Rays,
                                 return_intersects: bool = False) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
@@ -827,7 +1422,9 @@ class Scene:
             else:
                 return illum_params
 
-        shadow_start = initial_intersect[initial_intersect["check"]]["intersect"]
+        hits = initial_intersect[initial_intersect["check"]]
+
+        shadow_start = hits["intersect"]
 
         shadow_dir = self.light_obj.shape.location.flatten() - shadow_start
 
@@ -835,40 +1432,30 @@ class Scene:
 
         shadow_start = shadow_start + shadow_dir * (1e-15*np.linalg.norm(shadow_start, axis=-1, keepdims=True))
 
-        shadow_rays = Rays(shadow_start.T, shadow_dir.T,
-                           ignore=initial_intersect[initial_intersect["check"]]["facet"])
+        # use a ray batch so that the transposed starts/directions and the facet ids are used as views, not copies
+        shadow_rays = RayBatch(shadow_start.T, shadow_dir.T, ignore=hits["facet"])
+
+        shadowed, skip = self._cached_self_shadows(hits)
 
-        shadow_check = self.trace(shadow_rays)
+        if skip is None:
+            shadowed = np.atleast_1d(self.is_occluded(shadow_rays))
+        else:
+            # only the shadows cast by the other objects need to be traced for the cached objects
+            unknown = ~shadowed
+            shadowed[unknown] = self.is_occluded(shadow_rays[unknown], skip=skip[unknown])
 
         illum_params = np.zeros((trace_rays.num_rays,), dtype=ILLUM_DTYPE)
 
         check = np.atleast_1d(initial_intersect["check"].copy())
 
-        check[check] = ~shadow_check["check"]
-
-        if shadow_rays.num_rays == 1:
-
-            if trace_rays.num_rays == 1:
-                if check[0]:
-                    illum_params[0] = (-np.atleast_2d(shadow_rays.direction.T),
-                                       -np.atleast_2d(trace_rays.direction.T),
-                                       np.atleast_2d(initial_intersect[check]["normal"]),
-                                       np.atleast_1d(initial_intersect[check]["albedo"]),
-                                       np.atleast_1d(check))
-
-            else:
-                illum_params[check] = list(zip(-np.atleast_2d(shadow_rays.direction.T),
-                                               -np.atleast_2d(trace_rays[check].direction.T),
-                                               np.atleast_2d(initial_intersect[check]["normal"]),
-                                               np.atleast_1d(initial_intersect[check]["albedo"]),
-                                               np.atleast_1d(check[check])))
+        check[check] = ~shadowed
 
-        else:
-            illum_params[check] = list(zip(-np.atleast_2d(shadow_rays[~shadow_check["check"].squeeze()].direction.T),
-                                           -np.atleast_2d(trace_rays[check].direction.T),
-                                           np.atleast_2d(initial_intersect[check]["normal"]),
-                                           np.atleast_1d(initial_intersect[check]["albedo"]),
-                                           np.atleast_1d(check[check])))
+        # fill in the fields directly instead of building per ray tuples
+        illum_params["incidence"][check] = -shadow_dir[~shadowed]
+        illum_params["exidence"][check] = -trace_rays.direction.reshape(3, -1).T[check]
+        illum_params["normal"][check] = np.atleast_1d(initial_intersect)["normal"][check]
+        illum_params["albedo"][check] = np.atleast_1d(initial_intersect)["albedo"][check]
+        illum_params["visible"][check] = True
 
         illum_params[~check] = (None, None, None, None, False)
 
@@ -877,6 +1464,45 @@ class Scene:
         else:
             return illum_params
 
+    def _cached_self_shadows(self, hits: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Looks up the shadows that each object casts on itself for the intersects on objects with a
+        :attr:`.SceneObject.shadow_cache`.
+
+        :param hits: The intersects that struck something with dtype :data:`.INTERSECT_DTYPE` as returned by
+                     :meth:`trace`
+        :return: Whether each intersect is known to be shadowed and the index of the object whose self shadowing is
+                 already accounted for for each intersect (-1 if not cached) or ``None`` if no objects are cached
+        """
+
+        shadowed = np.zeros(hits.size, dtype=bool)
+
+        skip = None
+
+        sizer = 10 ** (self.order + 1)
+
+        for ind, target in enumerate(self.target_objs):
+
+            cache = get_shadow_cache(target)
+
+            if cache is None:
+                continue
+
+            on_target = hits["facet"] // sizer == ind
+
+            if not on_target.any():
+                continue
+
+            if skip is None:
+                skip = np.full(hits.size, -1, dtype=np.int64)
+
+            shadowed[on_target] = cache.shadowed(target, hits["facet"][on_target] % sizer,
+                                                 hits["intersect"][on_target], self.light_obj.shape.location)
+
+            skip[on_target] = ind
+
+        return shadowed, skip
+
     @staticmethod
     def get_first(res: np.ndarray, traced_rays: Rays) -> np.ndarray:
         """
@@ -912,6 +1538,21 @@ class Scene:
 
         return res[min_ind, np.arange(min_ind.size)]
 
+    def select_levels_of_detail(self, model: CameraModel, image: int = 0, temperature: Real = 0.0):
+        """
+        Selects the level of detail for each target and obscuring object whose shape is a :class:`.LODShape` using
+        :meth:`.SceneObject.select_level_of_detail`.
+
+        This should be called after the scene has been placed in the camera frame (for instance after :meth:`update`).
+
+        :param model: The camera model that relates points in the 3d world to points on the image plane
+        :param image: the index of the image that is being projected onto.  Can normally be ignored
+        :param temperature: The temperature of the camera at the time we are selecting the levels of detail
+        """
+
+        for target in self.target_objs + self.obscuring_objs:
+            target.select_level_of_detail(model, image=image, temperature=temperature)
+
     def raster_render(self, target_ind: int,
                       illumination_model: Optional[IlluminationModel] = None) -> Tuple[np.ndarray,
                                                                                        np.ndarray,
@@ -927,7 +1568,8 @@ class Scene:
         The return is the numpy array with a dtype of :attr:`.ILLUM_DTYPE` that can be provided to an
         :mod:`.illumination` model and the center of each facet.
 
-        This is experimental and probably shouldn't be used much.
+        This is experimental and probably shouldn't be used much.  For a rasterized template with occlusion and
+        shadowing, use :func:`.rasterize_template` instead.
 
         :raises ValueError: if the target is not represented by a tesselation (Surface)
 
@@ -987,6 +1629,9 @@ class Scene:
         This method changes the scene to reflect the time specified by image optionally using corrections of
         "LT" (light time), "S" (stellar aberration", or "LTPS" (light time and aberration).
 
+        The placed state of each object is cached (see :attr:`update_cache_size`), so that calling this method
+        repeatedly for the same image only needs to reapply the cached states.
+
         :param image: The image from the camera you want to update the scene for as an :class:`.OpNavImage`
         :param corrections: A flag specifying which corrections to use or ``None`` to use the corrections specified for
                             each object in the scene.
@@ -998,20 +1643,117 @@ class Scene:
                 use_corrections = getattr(target, 'corrections', CorrectionsType.LTPS)
             else:
                 use_corrections = corrections
-            self.calculate_apparent_position(target, image, use_corrections)
+            self._place_object(target, image, use_corrections)
         if self.obscuring_objs is not None:
             for obs in self.obscuring_objs:
                 if corrections is None:
                     use_corrections = getattr(obs, 'corrections', CorrectionsType.LTPS)
                 else:
                     use_corrections = corrections
-                self.calculate_apparent_position(obs, image, use_corrections)
+                self._place_object(obs, image, use_corrections)
 
         if corrections is None:
             use_corrections = getattr(self.light_obj, 'corrections', CorrectionsType.LTPS)
         else:
             use_corrections = corrections
-        self.calculate_apparent_position(self.light_obj, image, use_corrections)
+        self._place_object(self.light_obj, image, use_corrections)
+
+    def clear_update_cache(self, target: Optional[SceneObject] = None):
+        """
+        This method invalidates the placed object states cached by :meth:`update`.
+
+        This should be called whenever something that affects the placement of an object changes without the image
+        changing, for instance when the :attr:`.SceneObject.position_function` of an object is replaced.
+
+        :param target: The object to invalidate the cached states for.  If ``None`` then the entire cache is cleared
+        """
+
+        if not hasattr(self, "_update_cache"):
+            self._update_cache = OrderedDict()
+
+        if target is None:
+            self._update_cache.clear()
+
+        else:
+            for key in [key for key in self._update_cache if key[0] is target]:
+                del self._update_cache[key]
+
+    @staticmethod
+    def _get_update_key(target: SceneObject, image: OpNavImage,
+                        corrections: Optional[CorrectionsType]) -> Optional[Tuple[Hashable, ...]]:
+        """
+        This method generates the key used to cache the placed state of an object for an image.
+
+        Only objects that have both a ``position_function`` and an ``orientation_function`` can be cached since
+        otherwise the placed state depends on the state of the object before it was placed.  For these objects ``None``
+        is returned.
+
+        The key includes the camera position, velocity, and orientation for the image in addition to the observation
+        date, so that images that share an epoch but not a camera state are not confused.
+
+        :param target: The object being placed
+        :param image: The image the object is being placed for
+        :param corrections: The corrections being used to place the object
+        :return: The key for the cache or ``None`` if the object cannot be cached
+        """
+
+        if (getattr(target, 'position_function', None) is None) or \
+                (getattr(target, 'orientation_function', None) is None):
+            return None
+
+        camera_state = []
+        for value in (image.position, image.velocity, image.rotation_inertial_to_camera):
+            if value is None:
+                camera_state.append(None)
+            elif isinstance(value, Rotation):
+                camera_state.append(tuple(value.q.ravel()))
+            else:
+                camera_state.append(tuple(np.asarray(value, dtype=np.float64).ravel()))
+
+        return (target, corrections, image.observation_date) + tuple(camera_state)
+
+    def _place_object(self, target: SceneObject, image: OpNavImage, corrections: Optional[CorrectionsType]):
+        """
+        This method places an object in the camera frame for an image, using the cache of placed states if possible.
+
+        If the placed state of the object for this image and corrections is already in the cache, it is applied to the
+        object directly (or nothing is done if the object is already in that state).  Otherwise the object is placed
+        using :meth:`calculate_apparent_position` and the resulting state is stored in the cache.
+
+        :param target: The object to place
+        :param image: The image to place the object for
+        :param corrections: The corrections to use when placing the object
+        """
+
+        if not hasattr(self, "_update_cache"):
+            # in case this is an old scene that was pickled before the cache was added
+            self._update_cache = OrderedDict()
+            self.update_cache_size = 128
+
+        key = self._get_update_key(target, image, corrections) if self.update_cache_size > 0 else None
+
+        if key is not None:
+            state = self._update_cache.get(key)
+
+            if state is not None:
+                self._update_cache.move_to_end(key)
+
+                orientation, position = state
+
+                if (not np.array_equal(target.orientation.q, orientation.q)) or \
+                        (not np.array_equal(target.position, position)):
+                    target.change_orientation(copy.deepcopy(orientation))
+                    target.change_position(position)
+
+                return
+
+        self.calculate_apparent_position(target, image, corrections)
+
+        if key is not None:
+            self._update_cache[key] = (copy.deepcopy(target.orientation), target.position.copy())
+
+            while len(self._update_cache) > self.update_cache_size:
+                self._update_cache.popitem(last=False)
 
     @staticmethod
     def calculate_apparent_position(target: SceneObject, image: OpNavImage,
@@ -0,0 +1,270 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+"""
+This module provides a cache of which facets of a tessellated object shadow themselves for a given light direction, so
+that shadows can be reused across the images of a sequence instead of being traced from scratch for each image.
+
+Description
+-----------
+
+When a scene is rendered, every ray that strikes a target is traced again toward the light to see whether the
+intersect is shadowed.  In a dense imaging campaign the direction to the light expressed in the body-fixed frame of the
+target barely changes from one image to the next, so the same facets are shadowed by the same terrain in each image.
+The :class:`.ShadowCache` stores whether each facet is shadowed by the object itself for a light direction in the
+body-fixed frame.  Light directions are quantized into cells of size :attr:`~.ShadowCache.tolerance` so that nearby
+directions share an entry, and an entry is only reused while the current light direction is within
+:attr:`~.ShadowCache.tolerance` radians of the direction the entry was computed for.
+
+Facets that are struck for the first time for an entry are traced once, from the mean of the intersect points on the
+facet toward the light, and every ray that strikes the facet reuses the result.  This means that shadows are resolved at
+the facet level instead of at the ray level, which is typically fine for templates where the facets are on the order of
+a pixel or smaller but will blur shadow edges for coarse shapes.  Only shadowing by the object itself is cached;
+shadowing by other objects in the scene is still traced for every ray.
+
+Use
+---
+
+To use the cache, assign an instance to the :attr:`.SceneObject.shadow_cache` attribute of any target in a
+:class:`.Scene` whose shape is a tessellated :class:`.Surface` (including the :class:`.KDTree`).  It is then used
+automatically by :meth:`.Scene.get_illumination_inputs` and :func:`.render_template`.  Since entries are keyed on the
+facet ids, the cache should be cleared using :meth:`~.ShadowCache.clear` if the shape of the object is changed.
+"""
+
+
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+import numpy as np
+
+from giant.ray_tracer.rays import RayBatch
+from giant.ray_tracer.shapes.surface import Surface
+from giant._typing import ARRAY_LIKE, Real
+
+
+class ShadowCache:
+    """
+    A cache of the facets of an object that are shadowed by the object itself for light directions in the body-fixed
+    frame of the object.
+
+    The cache holds up to :attr:`max_entries` light directions, discarding the least recently used direction once this
+    is exceeded.  Each entry stores the facet ids and whether each facet is shadowed as sorted arrays, and grows as new
+    facets are struck.  See the module documentation for more details.
+
+    Typically this is attached to a :class:`.SceneObject` and is used automatically
+
+        >>> from giant.ray_tracer.scene import SceneObject
+        >>> from giant.ray_tracer.shadow_cache import ShadowCache
+        >>> target = SceneObject(kdtree, shadow_cache=ShadowCache(tolerance=1e-3))
+    """
+
+    def __init__(self, tolerance: Real = 1e-3, max_entries: int = 16):
+        """
+        :param tolerance: The maximum angle in radians between the current light direction and the light direction an
+                          entry was computed for for the entry to be reused.  This is also the size of the cells that
+                          the light directions are quantized into
+        :param max_entries: The maximum number of light directions to keep in the cache
+        :raises ValueError: If the tolerance is not positive or max_entries is less than 1
+        """
+
+        if tolerance <= 0:
+            raise ValueError("The tolerance must be positive")
+
+        if max_entries < 1:
+            raise ValueError("The cache must be able to hold at least 1 entry")
+
+        self.tolerance: float = float(tolerance)
+        """
+        The maximum angle in radians between the current light direction and the direction an entry was computed for
+        for the entry to be reused.
+
+        This is also the size of the cells used to quantize the light directions.  Changing this does not invalidate
+        existing entries but changes which cell new directions fall into, so you may want to :meth:`clear` the cache
+        when changing it.
+        """
+
+        self.max_entries: int = max_entries
+        """
+        The maximum number of light directions to keep in the cache.
+
+        Once the cache exceeds this size the least recently used entries are discarded.
+        """
+
+        self._entries: OrderedDict = OrderedDict()
+        """
+        The cached entries.
+
+        The keys are the quantized light directions and the values are tuples of the light direction the entry was
+        computed for, the sorted facet ids, and whether each facet is shadowed.
+        """
+
+        self.traced_facets: int = 0
+        """
+        The total number of facets that have had to be traced toward the light (cache misses).
+        """
+
+    def __len__(self) -> int:
+        """
+        Returns the number of light directions currently stored in the cache
+        """
+
+        return len(self._entries)
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+
+        self._entries.clear()
+
+    def _quantize(self, direction: np.ndarray) -> Hashable:
+        """
+        Returns the key of the cell that a unit light direction falls into.
+
+        :param direction: The unit light direction in the body-fixed frame
+        :return: The key for the cell
+        """
+
+        return tuple(np.floor(direction / self.tolerance).astype(np.int64))
+
+    def _get_entry(self, direction: np.ndarray) -> Tuple[Hashable, np.ndarray, np.ndarray]:
+        """
+        Returns the key, facet ids, and shadowed flags of the entry for a light direction.
+
+        If there is no entry for the cell the direction falls into, or the entry was computed for a direction more than
+        :attr:`tolerance` away from the requested direction, a new empty entry is started.
+
+        :param direction: The unit light direction in the body-fixed frame
+        :return: The key of the entry, the sorted facet ids for the entry, and whether each facet is shadowed
+        """
+
+        key = self._quantize(direction)
+
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            entry_direction, facets, shadowed = entry
+
+            if np.arccos(np.clip(entry_direction @ direction, -1, 1)) <= self.tolerance:
+                self._entries.move_to_end(key)
+
+                return key, facets, shadowed
+
+        facets = np.zeros(0, dtype=np.int64)
+        shadowed = np.zeros(0, dtype=bool)
+
+        self._entries[key] = (direction, facets, shadowed)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        return key, facets, shadowed
+
+    def shadowed(self, target: Any, facets: ARRAY_LIKE, intersects: ARRAY_LIKE,
+                 light_position: ARRAY_LIKE) -> np.ndarray:
+        """
+        Determines whether each intersect on an object is shadowed by the object itself using the cache.
+
+        Any facets which are not in the cache yet for the current light direction are traced once, from the mean of the
+        provided intersects on the facet toward the light, using the ``is_occluded`` method of the shape (or its
+        ``trace`` method if it doesn't have one), and the results are stored in the cache.
+
+        :param target: The :class:`.SceneObject` the intersects are on, placed in the current frame
+        :param facets: The ids of the facets that were struck, as returned by the ``trace`` method of the shape (not
+                       the scene) as a length n array
+        :param intersects: The intersect points in the current frame as a nx3 array
+        :param light_position: The location of the light in the current frame as a length 3 array
+        :return: A length n boolean array that is ``True`` where the intersect is shadowed by the object
+        """
+
+        facets = np.asarray(facets, dtype=np.int64).ravel()
+        intersects = np.asarray(intersects, dtype=np.float64).reshape(-1, 3)
+        light_position = np.asarray(light_position, dtype=np.float64).ravel()
+
+        if facets.size == 0:
+            return np.zeros(0, dtype=bool)
+
+        # the direction to the light in the body-fixed frame
+        direction = target.orientation.matrix.T @ (light_position - np.asarray(target.position).ravel())
+        direction /= np.linalg.norm(direction)
+
+        key, cached_facets, cached_shadowed = self._get_entry(direction)
+
+        locations = np.minimum(np.searchsorted(cached_facets, facets), max(cached_facets.size - 1, 0))
+
+        if cached_facets.size:
+            known = cached_facets[locations] == facets
+        else:
+            known = np.zeros(facets.size, dtype=bool)
+
+        if not known.all():
+            new_facets, inverse = np.unique(facets[~known], return_inverse=True)
+
+            counts = np.bincount(inverse)
+
+            # use the mean of the intersects on each facet as its representative point
+            starts = np.stack([np.bincount(inverse, weights=intersects[~known, axis]) for axis in range(3)],
+                              axis=-1) / counts.reshape(-1, 1)
+
+            shadow_directions = light_position - starts
+            shadow_directions /= np.linalg.norm(shadow_directions, axis=-1, keepdims=True)
+
+            starts += shadow_directions * (1e-15 * np.linalg.norm(starts, axis=-1, keepdims=True))
+
+            shadow_rays = RayBatch(starts.T, shadow_directions.T, ignore=new_facets)
+
+            if hasattr(target.shape, 'is_occluded'):
+                new_shadowed = target.shape.is_occluded(shadow_rays)
+            else:
+                new_shadowed = target.shape.trace(shadow_rays)["check"]
+
+            new_shadowed = np.atleast_1d(np.asarray(new_shadowed, dtype=bool)).ravel()
+
+            self.traced_facets += new_facets.size
+
+            # merge the new facets into the entry, keeping it sorted
+            cached_facets = np.concatenate([cached_facets, new_facets])
+            cached_shadowed = np.concatenate([cached_shadowed, new_shadowed])
+
+            order = np.argsort(cached_facets, kind='stable')
+
+            cached_facets = cached_facets[order]
+            cached_shadowed = cached_shadowed[order]
+
+            self._entries[key] = (self._entries[key][0], cached_facets, cached_shadowed)
+
+            locations = np.searchsorted(cached_facets, facets)
+
+        return cached_shadowed[locations]
+
+    def __getstate__(self) -> dict:
+        """
+        Used to control how this class is pickled/copied so that the cached entries are not included
+        """
+
+        state = self.__dict__.copy()
+
+        state["_entries"] = OrderedDict()
+
+        return state
+
+
+def get_shadow_cache(target: Any) -> Optional[ShadowCache]:
+    """
+    Returns the shadow cache for a target if it has one and its shape can use it.
+
+    Only tessellated shapes have facets that the cache can be keyed on, so ``None`` is returned for anything that
+    isn't a :class:`.Surface` (like the :class:`.Ellipsoid`).
+
+    :param target: The :class:`.SceneObject` to get the cache for
+    :return: The shadow cache or ``None``
+    """
+
+    cache = getattr(target, "shadow_cache", None)
+
+    if (cache is None) or (not isinstance(target.shape, Surface)):
+        return None
+
+    return cache
@@ -13,6 +13,9 @@ cdef class AxisAlignedBoundingBox:
     # functions
     cdef void _compute_intersect(self, const double[:] start, const double[:] inv_direction, cnp.uint8_t *res,
                                  double *near_distance, double *far_distance) noexcept nogil
+    cdef bint _compute_intersect_packet(self, const double[:] start, const double[:, :] inv_directions,
+                                        const cnp.uint32_t num_rays, cnp.uint8_t[] res,
+                                        double[] near_distance) noexcept nogil
     cdef void _trace(self, const double[:, :] starts, const double[:, :] inv_directions, cnp.uint8_t[:] res,
                      double[:, :] distances, cnp.uint32_t numrays) noexcept nogil
 
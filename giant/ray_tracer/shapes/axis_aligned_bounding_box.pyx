@@ -300,6 +300,61 @@ cdef class AxisAlignedBoundingBox:
         near_distance[0] = tmin
         far_distance[0] = tmax
 
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef bint _compute_intersect_packet(self, const double[:] start, const double[:, :] inv_directions,
+                                        const cnp.uint32_t num_rays, cnp.uint8_t[] res,
+                                        double[] near_distance) noexcept nogil:
+        """
+        This c method computes the intersect of a packet of rays which all share the same start location with this
+        bounding box.
+
+        Because the start is shared, the distance from the start to each side of the box only needs to be computed once
+        for the entire packet, after which each ray only requires a multiplication by its inverse direction.
+
+        We assume that the rays have already been rotated into the correct frame.
+
+        Arguments start, inv_directions (3xn), and num_rays are inputs.  Arguments res and near_distance are length n
+        outputs.  The return value is ``True`` if any of the rays in the packet intersected the box.
+        """
+
+        cdef int i
+        cdef cnp.uint32_t ray
+
+        cdef double t1, t2, tmin, tmax
+
+        cdef double[3] min_offset
+        cdef double[3] max_offset
+
+        cdef bint any_hit = False
+
+        # the offsets from the start to the sides are shared by every ray in the packet
+        for i in range(3):
+            min_offset[i] = self._min_sides[i] - start[i]
+            max_offset[i] = self._max_sides[i] - start[i]
+
+        for ray in range(num_rays):
+
+            t1 = min_offset[0] * inv_directions[0, ray]
+            t2 = max_offset[0] * inv_directions[0, ray]
+
+            tmin = min(t1, t2)
+            tmax = max(t1, t2)
+
+            for i in range(1, 3):
+                t1 = min_offset[i] * inv_directions[i, ray]
+                t2 = max_offset[i] * inv_directions[i, ray]
+
+                tmin = max(tmin, min(t1, t2))
+                tmax = min(tmax, max(t1, t2))
+
+            res[ray] = tmax >= max(tmin, 0)
+            near_distance[ray] = tmin
+
+            any_hit = any_hit | res[ray]
+
+        return any_hit
+
     @cython.boundscheck(False)
     @cython.wraparound(False)
     cdef void _trace(self, double[:, :] starts, double[:, :] inv_directions,
@@ -355,8 +410,8 @@ cdef class AxisAlignedBoundingBox:
             rays.rotate(self._rotation)
 
         # extracted the required components of the rays
-        start = rays.start.reshape(3, -1)
-        inverse_direction = rays.inv_direction.reshape(3, -1)
+        start = np.asarray(rays.start, dtype=np.float64).reshape(3, -1)
+        inverse_direction = np.asarray(rays.inv_direction, dtype=np.float64).reshape(3, -1)
 
         # initialize the results array as an integer array
         res = np.zeros(rays.num_rays, dtype=np.uint8)
@@ -410,8 +465,8 @@ cdef class AxisAlignedBoundingBox:
             ray.rotate(self._rotation)
 
         # extract the required components of the ray
-        start = ray.start.ravel()
-        inverse_direction = ray.inv_direction.ravel()
+        start = np.asarray(ray.start, dtype=np.float64).ravel()
+        inverse_direction = np.asarray(ray.inv_direction, dtype=np.float64).ravel()
 
         cdef double[:] distances = np.zeros(2, dtype=np.float64)
 
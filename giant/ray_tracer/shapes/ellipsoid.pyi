@@ -60,6 +60,8 @@ class Ellipsoid(Solid):
 
     def compute_intersect(self, ray: Rays) -> np.ndarray: ...
 
+    def is_occluded(self, rays: Rays) -> np.ndarray: ...
+
     def compute_normals(self, locs: np.ndarray) -> np.ndarray: ...
 
     def compute_albedos(self, body_centered_vecs: np.ndarray) -> np.ndarray: ...
@@ -30,14 +30,16 @@ import numpy as np
 import cython
 from cython.parallel import prange, parallel
 
-from scipy.linalg.cython_lapack cimport dgelsd, dgesv
-from libc.math cimport sqrt, isnan
+from libc.math cimport sqrt, isnan, NAN
+
+cimport numpy as cnp
 
 from giant.rotations import Rotation
 from giant.ray_tracer.rays import INTERSECT_DTYPE
 from giant.catalogues.utilities import unit_to_radec
 
 from giant.ray_tracer.shapes.solid cimport Solid
+from giant.ray_tracer.parallel_config cimport get_thread_count, apply_schedule, SCHEDULE_STATIC
 from giant.ray_tracer.shapes.axis_aligned_bounding_box import AxisAlignedBoundingBox
 
 from giant._typing import SCALAR_OR_ARRAY, ARRAY_LIKE
@@ -79,6 +81,201 @@ def quadratic_equation(a, b, c):
     return (-b - discriminant) / (2 * a), (-b + discriminant) / (2 * a)
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline void _intersect_ray(const double[:, :] starts, const double[:, :] directions,
+                                const double[:, :] ellipsoid_matrix, const double[:] center,
+                                const cnp.uint8_t[:] ignored, double[:, :] intersects, const Py_ssize_t ray) noexcept nogil:
+    """
+    Solves the ray/ellipsoid quadratic for a single ray (a column of ``starts`` and ``directions``), storing the closest
+    non-negative intersect in the corresponding row of ``intersects`` (NaN for misses).
+    """
+
+    cdef int i, j
+    cdef double[3] rel_start
+    cdef double[3] dir_ell
+    cdef double a_coef, b_coef, c_coef, discriminant, distance, dist_far, cynan = NAN
+
+    if ignored[ray]:
+        for i in range(3):
+            intersects[ray, i] = cynan
+        return
+
+    for i in range(3):
+        rel_start[i] = starts[i, ray] - center[i]
+
+    # form d^T@A_C once so it can be reused for the a and b coefficients
+    for j in range(3):
+        dir_ell[j] = 0
+        for i in range(3):
+            dir_ell[j] += directions[i, ray]*ellipsoid_matrix[i, j]
+
+    a_coef = 0
+    b_coef = 0
+    c_coef = 0
+    for i in range(3):
+        a_coef += dir_ell[i]*directions[i, ray]
+        b_coef += dir_ell[i]*rel_start[i]
+        for j in range(3):
+            c_coef += rel_start[i]*ellipsoid_matrix[i, j]*rel_start[j]
+
+    b_coef = 2*b_coef
+    c_coef = c_coef - 1
+
+    discriminant = b_coef*b_coef - 4*a_coef*c_coef
+
+    # a is always positive so the near root is always the one using the negative square root
+    distance = cynan
+    if discriminant >= 0:
+        discriminant = sqrt(discriminant)
+        dist_far = (-b_coef + discriminant)/(2*a_coef)
+        if dist_far >= 0:
+            distance = (-b_coef - discriminant)/(2*a_coef)
+            if distance < 0:
+                distance = dist_far
+
+    for i in range(3):
+        intersects[ray, i] = starts[i, ray] + distance*directions[i, ray]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline void _find_limb(const double[:] scan_center_dir, const double[:, :] scan_dirs,
+                            const double[:, :] ellipsoid_matrix, const double[:] observer_to_ellipsoid,
+                            const double[:] polar_normal, double[:, :] limbs, const Py_ssize_t ind) noexcept nogil:
+    """
+    Computes the limb along a single scan line (a column of ``scan_dirs``) in closed form, storing the vector from the
+    observer to the limb in the corresponding row of ``limbs``.  ``polar_normal`` is :math:`\mathbf{r}_C^T\mathbf{A}_C`.
+    """
+
+    cdef int i, j
+    cdef double[3] plane_normal
+    cdef double[3] line_dir
+    cdef double[3] line_start
+    cdef double[3] temp_a
+    cdef double[3] temp_b
+    cdef double[3] line_ell
+    cdef double line_norm2, scan_offset, a_coef, b_coef, c_coef, discriminant, root, dot
+
+
+    # the normal to the scan plane is c x s
+    plane_normal[0] = scan_center_dir[1]*scan_dirs[2, ind] - scan_center_dir[2]*scan_dirs[1, ind]
+    plane_normal[1] = scan_center_dir[2]*scan_dirs[0, ind] - scan_center_dir[0]*scan_dirs[2, ind]
+    plane_normal[2] = scan_center_dir[0]*scan_dirs[1, ind] - scan_center_dir[1]*scan_dirs[0, ind]
+
+    # the limb line is the intersection of the polar plane r_C^T@A_C@p = -1 and the scan plane
+    # (c x s)^T@p = -(c x s)^T@r_C
+    line_dir[0] = polar_normal[1]*plane_normal[2] - polar_normal[2]*plane_normal[1]
+    line_dir[1] = polar_normal[2]*plane_normal[0] - polar_normal[0]*plane_normal[2]
+    line_dir[2] = polar_normal[0]*plane_normal[1] - polar_normal[1]*plane_normal[0]
+
+    scan_offset = 0
+    line_norm2 = 0
+    for i in range(3):
+        scan_offset -= plane_normal[i]*observer_to_ellipsoid[i]
+        line_norm2 += line_dir[i]*line_dir[i]
+
+    # the minimum norm point on the line is (-1*(n x l) + d*(l x u))/(l^T@l)
+    temp_a[0] = plane_normal[1]*line_dir[2] - plane_normal[2]*line_dir[1]
+    temp_a[1] = plane_normal[2]*line_dir[0] - plane_normal[0]*line_dir[2]
+    temp_a[2] = plane_normal[0]*line_dir[1] - plane_normal[1]*line_dir[0]
+
+    temp_b[0] = line_dir[1]*polar_normal[2] - line_dir[2]*polar_normal[1]
+    temp_b[1] = line_dir[2]*polar_normal[0] - line_dir[0]*polar_normal[2]
+    temp_b[2] = line_dir[0]*polar_normal[1] - line_dir[1]*polar_normal[0]
+
+    for i in range(3):
+        line_start[i] = (scan_offset*temp_b[i] - temp_a[i])/line_norm2
+
+    # now find where the line pierces the ellipsoid
+    #   a = l^T @ A_C @ l
+    #   b = 2*p0^T @ A_C @ l
+    #   c = p0^T @ A_C p0 - 1
+    for j in range(3):
+        line_ell[j] = 0
+        for i in range(3):
+            line_ell[j] += line_dir[i]*ellipsoid_matrix[i, j]
+
+    a_coef = 0
+    b_coef = 0
+    c_coef = 0
+    for i in range(3):
+        a_coef += line_ell[i]*line_dir[i]
+        b_coef += line_ell[i]*line_start[i]
+        for j in range(3):
+            c_coef += line_start[i]*ellipsoid_matrix[i, j]*line_start[j]
+
+    b_coef = 2*b_coef
+    c_coef = c_coef - 1
+
+    discriminant = sqrt(b_coef*b_coef - 4*a_coef*c_coef)
+
+    # use the root which gives a positive dot product with the scan direction
+    root = (-b_coef + discriminant)/(2*a_coef)
+
+    dot = 0
+    for i in range(3):
+        dot += (line_start[i] + root*line_dir[i])*scan_dirs[i, ind]
+
+    if dot < 0:
+        root = (-b_coef - discriminant)/(2*a_coef)
+
+    for i in range(3):
+        limbs[ind, i] = line_start[i] + root*line_dir[i] + observer_to_ellipsoid[i]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline void _limb_jacobian(const double[:] scan_center_dir, const double[:, :] scan_dirs,
+                                const double[:, :] limb_points, const double[:, :] ellipsoid_matrix,
+                                const double[:] relative_position, const double[:] pos_ell,
+                                double[:, :, :] jacobian, const Py_ssize_t ind) noexcept nogil:
+    """
+    Computes the limb Jacobian for a single limb (a column of ``limb_points``) using the closed form inverse of the 3x3
+    coefficient matrix, storing the result in the corresponding panel of ``jacobian``.  ``pos_ell`` is
+    :math:`\mathbf{r}_C^T\mathbf{A}_C`.
+    """
+
+    cdef int i, j
+    cdef double[3] point_ell
+    cdef double[3] plane_normal
+    cdef double[3] point_col
+    cdef double[3] normal_col
+    cdef double determinant
+
+    # p_C^T @ A_C for the center-relative limb point
+    for j in range(3):
+        point_ell[j] = 0
+        for i in range(3):
+            point_ell[j] += (limb_points[i, ind] - relative_position[i])*ellipsoid_matrix[i, j]
+
+    plane_normal[0] = scan_center_dir[1]*scan_dirs[2, ind] - scan_center_dir[2]*scan_dirs[1, ind]
+    plane_normal[1] = scan_center_dir[2]*scan_dirs[0, ind] - scan_center_dir[0]*scan_dirs[2, ind]
+    plane_normal[2] = scan_center_dir[0]*scan_dirs[1, ind] - scan_center_dir[1]*scan_dirs[0, ind]
+
+    # the coefficient matrix has rows [2 p_C^T@A_C, r_C^T@A_C, (c x s)^T] and the rhs has rows
+    # [0, -p_C^T@A_C, -(c x s)^T] so only the last 2 columns of the inverse are needed.  These are
+    # (r2 x r0)/det and (r0 x r1)/det where r0, r1, r2 are the rows of the coefficient matrix
+    point_col[0] = plane_normal[1]*point_ell[2] - plane_normal[2]*point_ell[1]
+    point_col[1] = plane_normal[2]*point_ell[0] - plane_normal[0]*point_ell[2]
+    point_col[2] = plane_normal[0]*point_ell[1] - plane_normal[1]*point_ell[0]
+
+    normal_col[0] = point_ell[1]*pos_ell[2] - point_ell[2]*pos_ell[1]
+    normal_col[1] = point_ell[2]*pos_ell[0] - point_ell[0]*pos_ell[2]
+    normal_col[2] = point_ell[0]*pos_ell[1] - point_ell[1]*pos_ell[0]
+
+    # det = r0^T@(r1 x r2) = r2^T@(r0 x r1)
+    determinant = 0
+    for i in range(3):
+        determinant += plane_normal[i]*normal_col[i]
+
+    # the factors of 2 on the first row cancel between the cofactors and the determinant
+    for i in range(3):
+        for j in range(3):
+            jacobian[ind, i, j] = -(point_col[i]*point_ell[j] + normal_col[i]*plane_normal[j])/determinant
+        jacobian[ind, i, i] += 1
+
+
 cdef class Ellipsoid(Solid):
     r"""
     __init__(self, center, principal_axes=None, orientation=None, ellipsoid_matrix=None, albedo_map=None, _bounding_box=None, _id=None)
@@ -282,18 +479,17 @@ cdef class Ellipsoid(Solid):
 
         This method computes the AABB for the ellipsoid.
 
-        The AABB is defined according to the positive and negative locations of the principal axes of the ellipsoid
-        in the current frame (including the center offset).  The results are stored in the :attr:`bounding_box`
-        attribute.
+        The AABB is defined as the tightest box containing the ellipsoid in the current frame (including the center
+        offset).  The half width of the box along each axis is the norm of the corresponding row of the orientation
+        matrix scaled by the principal axes.  The results are stored in the :attr:`bounding_box` attribute.
         """
 
-        # get the positive and negative locations along the principal axes
-        pos_bounds = self.orientation * np.diag(self.principal_axes) + self.center.reshape(3, 1)
-        neg_bounds = -self.orientation * np.diag(self.principal_axes) + self.center.reshape(3, 1)
+        # the extent of the rotated ellipsoid along each axis of the current frame
+        half_widths = np.linalg.norm(self.orientation * self.principal_axes.reshape(1, 3), axis=-1)
 
         # get the minimum and maximum bounds
-        min_bounds = np.minimum(pos_bounds, neg_bounds).min(axis=-1)
-        max_bounds = np.maximum(pos_bounds, neg_bounds).max(axis=-1)
+        min_bounds = self.center.ravel() - half_widths
+        max_bounds = self.center.ravel() + half_widths
 
         # form the AABB
         self.bounding_box = AxisAlignedBoundingBox(min_bounds, max_bounds)
@@ -337,95 +533,43 @@ cdef class Ellipsoid(Solid):
         :type: np.ndarray
         """
 
-        # TODO: put this into C code so that it can be parallelized
+        starts = np.asarray(rays.start, dtype=np.float64).reshape(3, -1)
+        directions = np.asarray(rays.direction, dtype=np.float64).reshape(3, -1)
 
-        if rays.num_rays > 1:
-            # if we have more than 1 ray reshape the center
-            center = self.center.reshape(3, 1)
+        cdef Py_ssize_t num_rays = max(starts.shape[1], directions.shape[1])
 
-        else:
-            center = self.center
-
-        # multiply the direction vectors for the rays with the full blown ellipsoid matrix
-        los_ellipsoid = np.matmul(rays.direction.T, self.ellipsoid_matrix)
-
-        # compute the coefficients of the quadratic equation to check for intersection
-        # a coefficient is d.T@A@d
-        a_coef = (los_ellipsoid * rays.direction.T).sum(axis=-1)
-        # b coefficient is 2*d.T@A@(s-c)
-        b_coef = 2 * (los_ellipsoid * (rays.start-center).T).sum(axis=-1)
-        # c coefficient is (s-c).T@A@(s-c)
-        c_coef = ((rays.start-center).T * np.matmul(self.ellipsoid_matrix, rays.start-center).T).sum(axis=-1) - 1
-
-        # compute the two possible intersections as the 2 roots of the quadratic equation
-        dist_a, dist_b = quadratic_equation(a_coef, b_coef, c_coef)
-
-        if rays.num_rays > 1:
+        cdef const double[:, :] starts_view = np.ascontiguousarray(np.broadcast_to(starts, (3, num_rays)))
+        cdef const double[:, :] directions_view = np.ascontiguousarray(np.broadcast_to(directions, (3, num_rays)))
 
-            # initialize the output array
-            result = np.empty((rays.num_rays, 3), dtype=np.float64)
+        cdef cnp.uint8_t[:] ignored = np.zeros(num_rays, dtype=np.uint8)
 
-            # find negative distances and nan distances
-            test_neg_dist = (dist_a < 0) & (dist_b < 0)
-
-            test_nan_dist = np.isnan(dist_a) & np.isnan(dist_b)
-
-            # check for any rays that want to ignore this body
-            if rays.ignore is not None:
-                test_ignore = rays.ignore.ravel() == self.id
+        # check for any rays that want to ignore this body (only considered when tracing more than 1 ray)
+        if (rays.ignore is not None) and (rays.num_rays > 1):
+            if isinstance(rays.ignore, np.ndarray):
+                ignored = (rays.ignore.reshape(rays.num_rays, -1) == self.id).any(axis=-1).astype(np.uint8)
             else:
-                test_ignore = np.zeros(rays.num_rays, dtype=bool)
-
-            # set the result to nan where we didn't intersect
-            result[test_nan_dist | test_neg_dist] = np.nan
-
-            # check where the negative root is the right one
-            dist_b_check = (dist_a < 0) & (dist_b >= 0)
-
-            # compute the intersection point for these rays and store it
-            result[dist_b_check] = (rays.start[:, dist_b_check] +
-                                    dist_b[dist_b_check]*rays.direction[:, dist_b_check]).T
-
-            # check where the positive root is the right one
-            dist_a_check = (dist_b < 0) & (dist_a >= 0)
+                # ragged ignores
+                ignored = np.array([np.any(np.asarray(row) == self.id) for row in rays.ignore], dtype=np.uint8)
 
-            result[dist_a_check] = (rays.start[:, dist_a_check] +
-                                    dist_a[dist_a_check]*rays.direction[:, dist_a_check]).T
+        cdef double[:, :] result = np.empty((num_rays, 3), dtype=np.float64)
 
-            # anywhere that isn't filled strikes the surface twice, only return the closer one
-            unfilled_check = ~(dist_a_check | dist_b_check | test_neg_dist | test_nan_dist | test_ignore)
+        cdef Py_ssize_t ray
 
-            result[unfilled_check] = (rays.start[:, unfilled_check] +
-                                      np.minimum(dist_a[unfilled_check],
-                                                 dist_b[unfilled_check])*rays.direction[:, unfilled_check]).T
+        apply_schedule(SCHEDULE_STATIC)
+        with nogil:
+            for ray in prange(num_rays, schedule='runtime', num_threads=get_thread_count()):
+                _intersect_ray(starts_view, directions_view, self._ellipsoid_matrix, self._center, ignored, result,
+                               ray)
 
-            result[test_ignore] = np.nan
-
-            return result
-        else:
-
-            if (dist_a < 0) and (dist_b < 0):
-                # if the object is behind the ray return none
-                return None
-
-            elif np.isnan(dist_a) and np.isnan(dist_b):
-                # if the object isn't intersected by the ray return none
-                return None
-
-            elif (dist_a < 0) and (dist_b >= 0):
-                # if the ray only strikes the surface once choose the right one
-                distance = dist_b
+        if rays.num_rays > 1:
+            return np.asarray(result)
 
-            elif (dist_a >= 0) and (dist_b < 0):
-                # if the ray only strikes the surface once choose the right one
-                distance = dist_a
+        # if the object isn't intersected by the ray (or is behind the ray) return none
+        if isnan(result[0, 0]):
+            return None
 
-            else:
-                # otherwise, the object intersects the surface twice so choose the closer intersection
-                distance = min(dist_a, dist_b)
-
-            # return the intersection
-            return rays.start + rays.direction * distance
+        # return the intersection
+        return np.asarray(result[0]).copy()
 
     def compute_intersect(self, ray):
         """
@@ -483,6 +627,49 @@ cdef class Ellipsoid(Solid):
 
         return self.compute_intersect(rays)
 
+    def is_occluded(self, rays):
+        """
+        is_occluded(self, rays)
+
+        This method checks whether each ray strikes this tri-axial ellipsoid.
+
+        This uses the same quadratic equation as :meth:`intersect`, but only checks that it has a real, non-negative
+        root, without computing the intersection points, normal vectors, or albedos.  It is intended for shadow checks.
+
+        Any rays that are set to ignore this ellipsoid (by its :attr:`id`) are not considered occluded.
+
+        :param rays: The rays to check against the ellipsoid
+        :type rays: Rays
+        :return: A length n boolean numpy array which is ``True`` where the ray struck the ellipsoid
+        :rtype: np.ndarray
+        """
+
+        starts = rays.start.reshape(3, -1) - self.center.reshape(3, 1)
+        directions = rays.direction.reshape(3, -1)
+
+        los_ellipsoid = self.ellipsoid_matrix @ directions
+
+        a_coef = (los_ellipsoid * directions).sum(axis=0)
+        b_coef = 2 * (los_ellipsoid * starts).sum(axis=0)
+        c_coef = (starts * (self.ellipsoid_matrix @ starts)).sum(axis=0) - 1
+
+        discriminant = b_coef * b_coef - 4 * a_coef * c_coef
+
+        # the farther root is the larger one since a is always positive
+        with np.errstate(invalid='ignore'):
+            occluded = (discriminant >= 0) & (-b_coef + np.sqrt(discriminant) >= 0)
+
+        if rays.ignore is not None:
+            if (rays.num_rays == 1) or isinstance(rays.ignore, np.ndarray):
+                ignored = (np.asarray(rays.ignore).reshape(rays.num_rays, -1) == self.id).any(axis=-1)
+            else:
+                # ragged ignores
+                ignored = np.array([np.any(np.asarray(row) == self.id) for row in rays.ignore], dtype=bool)
+
+            occluded &= ~ignored
+
+        return occluded
+
     def compute_normals(self, locs):
         r"""
         compute_normals(self, locs)
@@ -614,8 +801,8 @@ cdef class Ellipsoid(Solid):
         Typically it is assumed that the location of the observer is at the origin of the current frame and therefore
         ``observer_position`` can be left as ``None``.
 
-        The limb for the ellipsoid is found by first solving for the particular solution to the underdetermined system
-        of equations
+        The limb for the ellipsoid is found by first solving for the minimum norm solution to the underdetermined
+        system of equations
 
         .. math::
 
@@ -624,8 +811,16 @@ cdef class Ellipsoid(Solid):
             -\left(\mathbf{s}_c\times\mathbf{s}_d\right)^T\mathbf{r} \end{array}\right]
 
         where :math:`\mathbf{s}_c` is ``scan_center_dir``, :math:`\mathbf{s}_d` is ``scan_dirs``, and :math:`\mathbf{r}`
-        is the vector from the observer to the center of the ellipsoid.  Once :math:`\mathbf{p}_0` is solved for, the
-        limb can be found by solving the quadratic equation
+        is the vector from the observer to the center of the ellipsoid.  Since the system only has 2 equations, the
+        minimum norm solution can be written in closed form as
+
+        .. math::
+
+            \mathbf{p}_0 = \frac{-\left(\mathbf{n}\times\mathbf{p}_h\right) - \left(\mathbf{n}^T\mathbf{r}\right)
+            \left(\mathbf{p}_h\times\mathbf{A}_C\mathbf{r}\right)}{\mathbf{p}_h^T\mathbf{p}_h}
+
+        where :math:`\mathbf{n}=\mathbf{s}_c\times\mathbf{s}_d` and :math:`\mathbf{p}_h` is defined below.  Once
+        :math:`\mathbf{p}_0` is solved for, the limb can be found by solving the quadratic equation
 
         .. math::
 
@@ -647,6 +842,9 @@ cdef class Ellipsoid(Solid):
 
         The returned limbs are expressed as vectors from the observer to the limb point in the current frame.
 
+        All of the scan lines are processed in a single parallel loop without calling LAPACK, so it is efficient to
+        request thousands of limb points at once.
+
         :param scan_center_dir: the unit vector which the scan is to begin at in the current frame as a length 3 array
         :type scan_center_dir: np.ndarray
         :param scan_dirs: the unit vectors along with the scan is to proceed as a 3xn array in the current frame where
@@ -663,152 +861,26 @@ cdef class Ellipsoid(Solid):
         if observer_position is None:
             observer_position = np.zeros(3, dtype=np.float64)
 
-        # declarations for increased speed
-        cdef double[:] observer_to_ellipsoid = self.center - observer_position
-
-        cdef int ind
-        cdef int i, j
+        cdef double[:] observer_to_ellipsoid = self.center - np.asarray(observer_position, dtype=np.float64).ravel()
 
-        cdef double[:, :] coefs = np.zeros((2, 3), dtype=np.float64, order='F')
-        cdef double[3] rhs
-        cdef double[3] line_dir
+        cdef const double[:] center_dir = np.ascontiguousarray(scan_center_dir, dtype=np.float64).ravel()
+        cdef const double[:, :] scan_view = np.ascontiguousarray(scan_dirs, dtype=np.float64).reshape(3, -1)
 
-        cdef double[:, :] limbs = np.zeros((scan_dirs.shape[-1], 3), dtype=np.float64)
+        cdef Py_ssize_t num_limbs = scan_view.shape[1], ind
 
-        cdef double a_coef, b_coef, c_coef, root, discriminant, rcond, cynan=np.nan
+        # the normal to the polar plane (r_C^T@A_C) is the same for every scan line
+        cdef double[:] polar_normal = np.asarray(observer_to_ellipsoid) @ self.ellipsoid_matrix
 
-        cdef int  m, n, nrhs, lda, ldb, rank, lwork, info
-
-        cdef double[1000] work
-        cdef int[50] iwork
-        cdef double[2] s
-        cdef bint breakout
-
-        # compute the cross product between the scan center directions and the scan direction vectors
-        cdef double[:, :] crosses = np.cross(scan_center_dir.reshape(1, 3), scan_dirs.T).astype(np.float64)
-        # set the value for the first element of the rhs to be -1
-        rhs[0] = -1
-
-        # initialize values for the least squares solution
-        rcond = 7e-16
-        m = 2
-        n = 3
-        nrhs = 1
-        lda = m
-        ldb = n
-        lwork = 1000
+        cdef double[:, :] limbs = np.empty((num_limbs, 3), dtype=np.float64)
 
         # TODO: figure out what to do when exactly nadir
+        apply_schedule(SCHEDULE_STATIC)
+        with nogil:
+            for ind in prange(num_limbs, schedule='runtime', num_threads=get_thread_count()):
+                _find_limb(center_dir, scan_view, self._ellipsoid_matrix, observer_to_ellipsoid, polar_normal, limbs,
+                           ind)
 
-        # TODO: consider parallelizing -- I think this would require breaking this into a sub function so that it has
-        #  its own working arrays
-        # for each scan_direction
-        for ind in range(scan_dirs.shape[-1]):
-
-            rhs[1] = 0
-
-            # form the coefficient matrix and rhs vector defining the linear system that represents the line formed by
-            # the intersection of the plane through the body center and the plane through the scan vector
-            for j in range(3):
-
-                # initialize the first row of the coefficient matrix to 0
-                coefs[0, j] = 0
-
-                # set the jth column of the first row of the coefficient matrix to be the inner product between the
-                # observer_to_ellipsoid vector and the jth column of the ellipsoid matrix ( r_C^T@A_C )
-                for i in range(3):
-
-                    coefs[0, j] += observer_to_ellipsoid[i]*self.ellipsoid_matrix[i, j]
-
-                # set the second row of the coefficient matrix to be the cross product between the center vector and
-                # scan vector
-                coefs[1, j] = crosses[ind, j]
-
-                # set the last element of the rhs vector to be the negative inner product of the cross product between
-                # the center vector and the scan vector and the observer_to_ellipsoid of the body ( -(c x s)^T@r_C )
-                rhs[1] -= crosses[ind, j]*observer_to_ellipsoid[j]
-
-            rhs[0] = -1
-            rhs[2] = 0
-
-            # get the direction for the line formed by the intersection of the plane through the body center and the
-            # scan plane by taking the cross product of the normal vectors of the two planes
-            line_dir[0] = coefs[0, 1]*crosses[ind, 2] - coefs[0, 2]*crosses[ind, 1]
-            line_dir[1] = coefs[0, 2]*crosses[ind, 0] - coefs[0, 0]*crosses[ind, 2]
-            line_dir[2] = coefs[0, 0]*crosses[ind, 1] - coefs[0, 1]*crosses[ind, 0]
-
-            # find the particular solution to the underdetermined system of equations to determine a point on the line
-            # formed by the intersection of the plane through the body center and the scan plane
-            # line_start = np.linalg.lstsq(coefs, rhs[:2])[0]
-            # make sure we don't have nans
-            breakout = False
-            for i in range(2):
-                for j in range(3):
-                    if isnan(coefs[i, j]):
-                        breakout = True
-                        break
-                if breakout:
-                    break
-
-            if not breakout:
-                for i in range(3):
-                    if isnan(rhs[i]):
-                        breakout = True
-
-            if breakout:
-                limbs[ind, :] = cynan
-                continue
-
-            dgelsd(&m, &n, &nrhs, &coefs[0, 0], &lda, &rhs[0], &ldb,
-                   &s[0], &rcond, &rank, &work[0], &lwork, &iwork[0], &info)
-
-            # now we can solve for the place where the line we just found pierces the ellipsoid
-
-            # initialize the quadratic equation coefficients to 0
-            a_coef = 0
-            b_coef = 0
-            c_coef = 0
-
-            # compute the quadratic equation coefficients according to
-            #   a = xh^T @ A_C @ xh
-            #   b = 2*x0^T @ A_C @ xh
-            #   c = x0^T @ A_C x0 - 1
-
-            for i in range(3):
-                for j in range(3):
-                    temp = self.ellipsoid_matrix[j, i]
-                    a_coef += line_dir[j]*temp*line_dir[i]
-                    temp *= rhs[j]
-                    b_coef += temp*line_dir[i]
-                    c_coef += temp*rhs[i]
-
-            b_coef *= 2
-            c_coef -= 1
-
-            # solve the quadratic equation for the distance
-
-            # calculate the discriminant
-            discriminant = sqrt(b_coef*b_coef - 4*a_coef*c_coef)
-
-            # calculate the positive root
-            root = (-b_coef + discriminant)/(2*a_coef)
-
-            temp = 0
-
-            # find the intersection point for this root and see if it has a positive dot product with the scan direction
-            # vector
-            for i in range(3):
-                limbs[ind, i] = rhs[i] + root*line_dir[i]
-                temp += limbs[ind, i]*scan_dirs[i, ind]
-
-            # if the dot product is negative then use the negative root of the quadratic equation
-            if temp < 0:
-                root = (-b_coef - discriminant)/(2*a_coef)
-
-                for i in range(3):
-                    limbs[ind, i] = rhs[i] + root*line_dir[i]
-
-        return np.asarray(limbs).T + np.asarray(observer_to_ellipsoid).reshape(3, 1)
+        return np.asarray(limbs).T
 
     def compute_limb_jacobian(self, scan_center_dir, scan_dirs, limb_points, observer_position=None):
         r"""
@@ -834,6 +906,9 @@ cdef class Ellipsoid(Solid):
         :math:`\frac{\partial\mathbf{x}_C}{\partial\mathbf{r}_C}` where :math:`\mathbf{x}_C` is the vector from the
         observer to the limb in the current frame.
 
+        Since only the last 2 rows of the right hand side are non-zero, the system is solved in closed form using the
+        cofactors of the coefficient matrix for all of the limbs in a single parallel loop.
+
         :param scan_center_dir: the unit vector which the scan is to begin at in the current frame as a length 3 array
         :type scan_center_dir: np.ndarray
         :param scan_dirs: the unit vectors along with the scan is to proceed as a 3xn array in the current frame where
@@ -854,68 +929,23 @@ cdef class Ellipsoid(Solid):
         else:
             relative_position = self.center.ravel()
 
-        # center the limb points at the ellipse center
-        limb_points = limb_points - relative_position.reshape(3, 1)
-
-        cdef double[:, :, :] coefs = np.rollaxis(
-            np.zeros((3, 3, scan_dirs.shape[-1]), dtype=np.float64, order='F'), -1, 0)
-        cdef double[:, :, :] rhs = np.rollaxis(
-            np.zeros((3, 3, scan_dirs.shape[-1]), dtype=np.float64, order='F'), -1, 0)
-
-        cdef double[:, :, :] jacobian = np.zeros((scan_dirs.shape[-1], 3, 3), dtype=np.float64)
-
-        cdef int ind, i, j, jtype
-
-        cdef double[:, :] crosses = np.cross(scan_center_dir.ravel(), scan_dirs.T).astype(np.float64)
-
-        cdef double[:] posell = relative_position.ravel() @ self.ellipsoid_matrix
-
-        cdef double[:, :] pointsell = limb_points.T @ self.ellipsoid_matrix
-
-        cdef double[:, :] pointcrosses
-        cdef double[:, :] poscrosses
-        cdef int nlimbs = int(scan_dirs.shape[-1])
-
-        cdef int n, nrhs, lda, ldb, info
-
-        cdef int [:, :] ipiv = np.zeros((nlimbs, 3), dtype='i')
-
-        # initialize the values for the lapack system solver
-        n = nrhs = lda = ldb = 3
-
-        # extract the number of limbs we are considering
-
-        # if we're computing a "center" jacobian then compute the cross product between the limb vectors/position
-        # vector and the scan vectors
-        with cython.boundscheck(False):
-            with nogil, parallel():
-                for ind in prange(nlimbs, schedule='static'):
-
-                    # form the coefficient matrix as
-                    #    [2 p_C^T @ A_C]
-                    #    [ r_C^T @ A_C ]
-                    #    [  (c x s)^T  ]
-                    for j in range(3):
-                        # for i in range(3):
-                        coefs[ind, 0, j] = 2*pointsell[ind, j]
+        cdef const double[:] center_dir = np.ascontiguousarray(scan_center_dir, dtype=np.float64).ravel()
+        cdef const double[:, :] scan_view = np.ascontiguousarray(scan_dirs, dtype=np.float64).reshape(3, -1)
+        cdef const double[:, :] limb_view = np.ascontiguousarray(limb_points, dtype=np.float64).reshape(3, -1)
+        cdef const double[:] position_view = np.ascontiguousarray(relative_position, dtype=np.float64)
 
-                        coefs[ind, 1, j] = posell[j]
-                        coefs[ind, 2, j] = crosses[ind, j]
+        cdef Py_ssize_t nlimbs = scan_view.shape[1], ind
 
-                    # form the rhs of the system of equations depending on the type
-                    #   [ 0   0   0 ]
-                    #   [ -p_C^T @ A_C ]
-                    #   [  -(c x s)^T  ]
-                    for j in range(3):
-                        rhs[ind, 1, j] = -pointsell[ind, j]
-                        rhs[ind, 2, j] = -crosses[ind, j]
+        # r_C^T@A_C is the same for every limb
+        cdef double[:] posell = relative_position @ self.ellipsoid_matrix
 
-                    # solve for the jacobian matrix for the current limb and store it
-                    dgesv(&n, &nrhs, &coefs[ind, 0, 0], &lda, &ipiv[ind][0], &rhs[ind, 0, 0], &ldb, &info)
-                    jacobian[ind] = rhs[ind]
+        cdef double[:, :, :] jacobian = np.empty((nlimbs, 3, 3), dtype=np.float64)
 
-                    for i in range(3):
-                        jacobian[ind, i, i] += 1
+        apply_schedule(SCHEDULE_STATIC)
+        with nogil:
+            for ind in prange(nlimbs, schedule='runtime', num_threads=get_thread_count()):
+                _limb_jacobian(center_dir, scan_view, limb_view, self._ellipsoid_matrix, position_view, posell,
+                               jacobian, ind)
 
         # return the Jacobians
         return np.asarray(jacobian)
@@ -26,6 +26,8 @@ class Shape:
 
     def trace(self, rays: Rays) -> np.ndarray: ...
 
+    def is_occluded(self, rays: Rays) -> np.ndarray: ...
+
     def find_limbs(self, scan_center_dir: np.ndarray,
                    scan_dirs: np.ndarray,
                    observer_position: Optional[np.ndarray] = None) -> np.ndarray: ...
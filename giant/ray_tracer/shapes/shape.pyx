@@ -81,6 +81,22 @@ cdef class Shape:
 
         return
 
+    def is_occluded(self, rays):
+        """
+        This method checks whether each of a series of rays strikes the geometry defined by the class, returning the
+        results as a boolean numpy array.
+
+        This is used for shadow checks where only whether the ray struck anything matters.  By default it simply uses
+        the ``check`` field from :meth:`trace`, but subclasses should override it with something cheaper when they can.
+
+        :param rays:  The rays to check
+        :type rays: Rays
+        :return: A length n boolean numpy array which is ``True`` where the ray struck the geometry
+        :rtype: np.ndarray
+        """
+
+        return np.atleast_1d(self.trace(rays)["check"])
+
     def find_limbs(self, scan_center_dir, scan_dirs, observer_position=None):
         """
         find_limbs(self, scan_center_dir, scan_dirs, observer_position=None)
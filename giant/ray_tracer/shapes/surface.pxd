@@ -8,16 +8,47 @@ from giant.ray_tracer.shapes.ellipsoid cimport Ellipsoid
 
 cimport numpy as cnp
 
+
+cdef void transform_rays(const double[:, :] starts, const double[:, :] directions, const double[:, :] rotation,
+                         const double[:] position, double[:, :] starts_out, double[:, :] directions_out,
+                         double[:, :] inv_directions_out, const Py_ssize_t num_rays, const bint omp) noexcept nogil
+
+cdef void untransform_results(const cnp.uint8_t[:] hit, double[:, :] intersect, double[:, :] normal,
+                              const double[:, :] rotation, const double[:] position, const Py_ssize_t num_rays,
+                              const bint omp) noexcept nogil
+
+cdef tuple rays_to_frame(rays, rotation, position, workspace, bint omp)
+
+cdef void results_from_frame(workspace, rotation, position, bint omp)
+
+
 cdef class Surface(Shape):
     cdef public:
         Ellipsoid reference_ellipsoid
 
+    cdef:
+        object _edge_topology
+
     # functions
     cdef void _compute_intersect(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
                                  const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore,
                                  cnp.uint8_t *hit, double[:] intersect, double[:] normal, double *albedo,
                                  cnp.int64_t *facet, double *hit_distance) noexcept nogil
 
+    cdef void _compute_intersect_packet(self, const double[:] start, const double[:, :] directions,
+                                        const double[:, :] inv_directions, const cnp.int64_t[] ignore,
+                                        const cnp.uint32_t num_ignore, const cnp.uint32_t num_rays,
+                                        const cnp.uint8_t[] active, cnp.uint8_t[:] hit, double[:, :] intersect,
+                                        double[:, :] normal, double[:] albedo, cnp.int64_t[:] facet,
+                                        double[:] hit_distance) noexcept nogil
+
+    cdef bint _is_occluded(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
+                           const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore) noexcept nogil
+
+    cdef void _trace_occlusion(self, const double[:, :] starts, const double[:, :] directions,
+                               const double[:, :] inv_directions, const cnp.int64_t[:, :] ignore,
+                               const cnp.uint32_t num_rays, const bint omp, cnp.uint8_t[:] occluded) noexcept nogil
+
     cdef void _trace(self, const double[:, :] starts, const double[:, :] directions, const double[:, :] inv_directions,
                      const cnp.int64_t[:, :] ignore, const cnp.uint32_t numrays, const bint omp,
                      cnp.uint8_t[:] hit, double[:, :] intersect, double[:, :] normal, double[:] albedo,
@@ -9,7 +9,7 @@ import numpy as np
 from giant.ray_tracer.shapes.axis_aligned_bounding_box import AxisAlignedBoundingBox
 from giant.ray_tracer.shapes.ellipsoid import Ellipsoid
 from giant.ray_tracer.shapes.shape import Shape
-from giant.ray_tracer.rays import Rays
+from giant.ray_tracer.rays import Rays, TraceWorkspace
 from giant.rotations import Rotation
 
 from giant._typing import Real, ARRAY_LIKE
@@ -19,6 +19,11 @@ def find_limbs_surface(target: ARRAY_LIKE, scan_center_dir: ARRAY_LIKE, scan_dir
                        observer_position: Optional[ARRAY_LIKE] = None, initial_step: Optional[Real]=None,
                        max_iterations: int = 25, rtol: float = 1e-12, atol: float = 1e-12) -> np.ndarray: ...
 
+def compute_edge_topology(facets: ARRAY_LIKE) -> Tuple[np.ndarray, np.ndarray]: ...
+
+def find_limbs_silhouette(target: 'Surface', scan_center_dir: ARRAY_LIKE, scan_dirs: ARRAY_LIKE,
+                          observer_position: Optional[ARRAY_LIKE] = None) -> np.ndarray: ...
+
 class Surface(Shape):
 
     reference_ellipsoid: Ellipsoid
@@ -33,7 +38,10 @@ class Surface(Shape):
 
     def compute_intersect(self, ray: Rays) -> np.ndarray: ...
 
-    def trace(self, rays: Rays, omp: bool = True) -> np.ndarray: ...
+    def trace(self, rays: Rays, omp: bool = True,
+              out: Optional[TraceWorkspace] = None) -> Union[np.ndarray, TraceWorkspace]: ...
+
+    def is_occluded(self, rays: Rays, omp: bool = True) -> np.ndarray: ...
 
 
 class RawSurface(Surface):
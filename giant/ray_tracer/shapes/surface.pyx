@@ -26,21 +26,191 @@ import cython
 from cython.parallel import prange, parallel
 
 cimport numpy as cnp
-from libc.math cimport fabs
+from libc.math cimport fabs, atan2
 
 import pandas as pd
 
 from giant.rotations import Rotation
 from giant.ray_tracer.utilities import ref_ellipse, to_block
-from giant.ray_tracer.rays import INTERSECT_DTYPE
+from giant.ray_tracer.rays import INTERSECT_DTYPE, TraceWorkspace
 
 from giant.ray_tracer.shapes.shape cimport Shape
+from giant.ray_tracer.parallel_config cimport get_thread_count, apply_schedule, SCHEDULE_STATIC, SCHEDULE_DYNAMIC
 from giant.ray_tracer.shapes.axis_aligned_bounding_box import AxisAlignedBoundingBox
 from giant.ray_tracer.shapes.ellipsoid import Ellipsoid
 
 import warnings
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef inline void _transform_ray(const double[:, :] starts, const double[:, :] directions, const double[:, :] rotation,
+                                const double[:] position, double[:, :] starts_out, double[:, :] directions_out,
+                                double[:, :] inv_directions_out, const Py_ssize_t ray) noexcept nogil:
+    """
+    This C function applies ``rotation@x + position`` to the start and ``rotation@x`` to the direction of a single ray.
+    """
+
+    cdef:
+        Py_ssize_t i, j
+        double start, direction
+
+    for i in range(3):
+        start = position[i]
+        direction = 0
+
+        for j in range(3):
+            start = start + rotation[i, j] * starts[j, ray]
+            direction = direction + rotation[i, j] * directions[j, ray]
+
+        starts_out[i, ray] = start
+        directions_out[i, ray] = direction
+        inv_directions_out[i, ray] = 1.0 / direction
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline void _untransform_result(const cnp.uint8_t[:] hit, double[:, :] intersect, double[:, :] normal,
+                                     const double[:, :] rotation, const double[:] position,
+                                     const Py_ssize_t ray) noexcept nogil:
+    """
+    This C function applies ``rotation.T@(x - position)`` to the intersect and ``rotation.T@x`` to the normal of a
+    single ray if it struck something.
+    """
+
+    cdef:
+        Py_ssize_t i
+        double[3] local_intersect
+        double[3] local_normal
+
+    if not hit[ray]:
+        return
+
+    for i in range(3):
+        local_intersect[i] = intersect[ray, i] - position[i]
+        local_normal[i] = normal[ray, i]
+
+    for i in range(3):
+        intersect[ray, i] = (rotation[0, i] * local_intersect[0] + rotation[1, i] * local_intersect[1] +
+                             rotation[2, i] * local_intersect[2])
+        normal[ray, i] = (rotation[0, i] * local_normal[0] + rotation[1, i] * local_normal[1] +
+                          rotation[2, i] * local_normal[2])
+
+
+cdef void transform_rays(const double[:, :] starts, const double[:, :] directions, const double[:, :] rotation,
+                         const double[:] position, double[:, :] starts_out, double[:, :] directions_out,
+                         double[:, :] inv_directions_out, const Py_ssize_t num_rays, const bint omp) noexcept nogil:
+    """
+    This C function transforms rays into a local frame, writing the transformed starts, directions, and inverse
+    directions into the output arrays.
+
+    The local start is ``rotation@start + position`` and the local direction is ``rotation@direction``.  The input
+    arrays can be broadcast (0 stride) views.  Unless specifically requested to the contrary, this function uses OpenMP
+    to parallelize over the rays.
+    """
+
+    cdef Py_ssize_t ray
+
+    if omp:
+        apply_schedule(SCHEDULE_STATIC)
+        with nogil, parallel(num_threads=get_thread_count()):
+            for ray in prange(num_rays, schedule='runtime'):
+                _transform_ray(starts, directions, rotation, position, starts_out, directions_out,
+                               inv_directions_out, ray)
+
+    else:
+        for ray in range(num_rays):
+            _transform_ray(starts, directions, rotation, position, starts_out, directions_out, inv_directions_out, ray)
+
+
+cdef void untransform_results(const cnp.uint8_t[:] hit, double[:, :] intersect, double[:, :] normal,
+                              const double[:, :] rotation, const double[:] position, const Py_ssize_t num_rays,
+                              const bint omp) noexcept nogil:
+    """
+    This C function transforms the intersects and normals for the rays that struck something from a local frame back
+    into the frame the rays were originally expressed in, in place.
+
+    This is the inverse of :func:`transform_rays` (the intersect becomes ``rotation.T@(intersect - position)`` and the
+    normal becomes ``rotation.T@normal``).  Unless specifically requested to the contrary, this function uses OpenMP to
+    parallelize over the rays.
+    """
+
+    cdef Py_ssize_t ray
+
+    if omp:
+        apply_schedule(SCHEDULE_STATIC)
+        with nogil, parallel(num_threads=get_thread_count()):
+            for ray in prange(num_rays, schedule='runtime'):
+                _untransform_result(hit, intersect, normal, rotation, position, ray)
+
+    else:
+        for ray in range(num_rays):
+            _untransform_result(hit, intersect, normal, rotation, position, ray)
+
+
+cdef tuple rays_to_frame(rays, rotation, position, workspace, bint omp):
+    """
+    This helper expresses ``rays`` in the local frame of an object that stores the rotation and translation from the
+    current frame into its local frame (like :class:`.KDTree`) so that the rays can be traced by the C methods.
+
+    If either ``rotation`` or ``position`` is not ``None`` then the transformed rays are written into the ray buffers of
+    ``workspace`` (which must already be reset for the rays) without copying the :class:`.Rays` object.  Otherwise the
+    ray arrays themselves are returned (promoted to double precision if needed).
+
+    :return: The starts, directions, and inverse directions of the rays in the local frame as 3xn arrays
+    """
+
+    starts = np.asarray(rays.start, dtype=np.float64).reshape(3, -1)
+    directions = np.asarray(rays.direction, dtype=np.float64).reshape(3, -1)
+
+    if (rotation is None) and (position is None):
+        return starts, directions, np.asarray(rays.inv_direction, dtype=np.float64).reshape(3, -1)
+
+    if rotation is None:
+        rotation_matrix = np.eye(3)
+    else:
+        rotation_matrix = np.asarray(getattr(rotation, "matrix", rotation), dtype=np.float64)
+
+    if position is None:
+        position_vector = np.zeros(3)
+    else:
+        position_vector = np.asarray(position, dtype=np.float64).ravel()
+
+    # broadcast the starts and directions against each other so that shared starts/directions are 0 strided
+    starts, directions = np.broadcast_arrays(starts, directions)
+
+    transform_rays(starts, directions, rotation_matrix, position_vector, workspace.start, workspace.direction,
+                   workspace.inv_direction, starts.shape[1], omp)
+
+    return workspace.start, workspace.direction, workspace.inv_direction
+
+
+cdef void results_from_frame(workspace, rotation, position, bint omp):
+    """
+    This helper transforms the intersects and normals in ``workspace`` from the local frame of an object back into the
+    frame the rays were expressed in, in place.
+
+    This undoes the transformation applied by :func:`rays_to_frame`.
+    """
+
+    if (rotation is None) and (position is None):
+        return
+
+    if rotation is None:
+        rotation_matrix = np.eye(3)
+    else:
+        rotation_matrix = np.asarray(getattr(rotation, "matrix", rotation), dtype=np.float64)
+
+    if position is None:
+        position_vector = np.zeros(3)
+    else:
+        position_vector = np.asarray(position, dtype=np.float64).ravel()
+
+    untransform_results(workspace.hit, workspace.intersect, workspace.normal, rotation_matrix, position_vector,
+                        workspace.num_rays, omp)
+
+
 @cython.boundscheck(False)
 def find_limbs_surface(Surface target, scan_center_dir, scan_dirs, observer_position=None, initial_step=None,
                        int max_iterations=25, double rtol=1e-12, double atol=1e-12):
@@ -226,6 +396,390 @@ def find_limbs_surface(Surface target, scan_center_dir, scan_dirs, observer_posi
     return result
 
 
+def compute_edge_topology(facets):
+    """
+    compute_edge_topology(facets)
+
+    This helper function determines the unique edges of a tessellated surface and the facets that share each edge.
+
+    The edges are returned as a ex2 array of vertex indices (sorted so the smaller index is first) along with a ex2
+    array of the indices of the facets on either side of each edge.  Edges that only belong to a single facet (the
+    boundary of an open surface) have ``-1`` as their second facet.  If more than 2 facets share an edge (a
+    non-manifold surface) then only the first 2 are recorded.  Degenerate edges (from a vertex to itself) are discarded.
+
+    The topology only depends on the facets, not the vertices, so it does not change when the surface is moved and can
+    be reused across many calls to :func:`find_limbs_silhouette`.
+
+    :param facets: The facets of the surface as a mxp array of indices into the vertices
+    :type facets: ARRAY_LIKE
+    :return: The unique edges as a ex2 array and the facets on either side of each edge as a ex2 array
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+
+    facets = np.asarray(facets, dtype=np.int64)
+    facets = facets.reshape(-1, facets.shape[-1])
+
+    num_corners = facets.shape[1]
+
+    # each facet contributes edges from each corner to the next corner
+    pairs = np.sort(np.stack([facets.ravel(), np.roll(facets, -1, axis=1).ravel()], axis=1), axis=1)
+    facet_ids = np.repeat(np.arange(facets.shape[0], dtype=np.int64), num_corners)
+
+    keep = pairs[:, 0] != pairs[:, 1]
+    pairs = pairs[keep]
+    facet_ids = facet_ids[keep]
+
+    if pairs.shape[0] == 0:
+        return np.zeros((0, 2), dtype=np.int64), np.zeros((0, 2), dtype=np.int64)
+
+    # group identical edges together
+    order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+    pairs = pairs[order]
+    facet_ids = facet_ids[order]
+
+    new_edge = np.ones(pairs.shape[0], dtype=bool)
+    new_edge[1:] = (pairs[1:] != pairs[:-1]).any(axis=1)
+
+    group_starts = np.flatnonzero(new_edge)
+    counts = np.diff(np.append(group_starts, pairs.shape[0]))
+
+    edges = pairs[group_starts]
+
+    edge_facets = -np.ones((edges.shape[0], 2), dtype=np.int64)
+    edge_facets[:, 0] = facet_ids[group_starts]
+
+    shared = counts >= 2
+    edge_facets[shared, 1] = facet_ids[group_starts[shared] + 1]
+
+    return edges, edge_facets
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef inline void _facet_facing(const double[:, :] vertices, const cnp.int64_t[:, :] facets, const double[:] observer,
+                               cnp.uint8_t[:] facing, const Py_ssize_t facet) noexcept nogil:
+    """
+    This C function determines whether a single facet faces toward (1) or away from (0) the observer.
+    """
+
+    cdef:
+        Py_ssize_t i
+        double[3] side_a
+        double[3] side_b
+        double dot = 0
+
+    for i in range(3):
+        side_a[i] = vertices[facets[facet, 1], i] - vertices[facets[facet, 0], i]
+        side_b[i] = vertices[facets[facet, 2], i] - vertices[facets[facet, 0], i]
+
+    dot += (side_a[1]*side_b[2] - side_a[2]*side_b[1])*(vertices[facets[facet, 0], 0] - observer[0])
+    dot += (side_a[2]*side_b[0] - side_a[0]*side_b[2])*(vertices[facets[facet, 0], 1] - observer[1])
+    dot += (side_a[0]*side_b[1] - side_a[1]*side_b[0])*(vertices[facets[facet, 0], 2] - observer[2])
+
+    facing[facet] = dot < 0
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef Py_ssize_t _lower_bound(const double[:] values, const Py_ssize_t num_values, const double target) noexcept nogil:
+    """
+    This C function returns the index of the first element of sorted ``values`` which is not less than ``target``.
+    """
+
+    cdef Py_ssize_t low = 0, high = num_values, mid
+
+    while low < high:
+        mid = (low + high) // 2
+        if values[mid] < target:
+            low = mid + 1
+        else:
+            high = mid
+
+    return low
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef inline void _cross_scan_line(const double *start, const double *end, const double[:, :] scan_normals,
+                                  const double[:, :] scan_perps, const double[:] center_dir, const Py_ssize_t scan,
+                                  double[:] best, double[:, :] limbs) noexcept nogil:
+    """
+    This C function intersects a single silhouette edge (expressed relative to the observer) with a scan plane, keeping
+    the intersect if it is farther from the scan center than any previous intersect for the scan line.
+    """
+
+    cdef:
+        Py_ssize_t i
+        double start_dist = 0, end_dist = 0, fraction, along = 0, toward = 0, outward
+        double[3] point
+
+    for i in range(3):
+        start_dist += scan_normals[scan, i]*start[i]
+        end_dist += scan_normals[scan, i]*end[i]
+
+    if start_dist == end_dist:
+        return
+
+    fraction = start_dist/(start_dist - end_dist)
+
+    if (fraction < 0) or (fraction > 1):
+        return
+
+    for i in range(3):
+        point[i] = start[i] + fraction*(end[i] - start[i])
+        along += point[i]*center_dir[i]
+        toward += point[i]*scan_perps[scan, i]
+
+    if (along <= 0) or (toward < 0):
+        return
+
+    # the tangent of the angle between the scan center and the point
+    outward = toward/along
+
+    if outward > best[scan]:
+        best[scan] = outward
+        for i in range(3):
+            limbs[scan, i] = point[i]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void _silhouette_limbs(const double[:, :] vertices, const cnp.int64_t[:, :] facets,
+                            const cnp.int64_t[:, :] edges, const cnp.int64_t[:, :] edge_facets,
+                            const double[:] observer, const double[:] center_dir, const double[:] basis_x,
+                            const double[:] basis_y, const double[:] sorted_azimuths, const cnp.int64_t[:] scan_order,
+                            const double[:, :] scan_normals, const double[:, :] scan_perps,
+                            cnp.uint8_t[:] facing, cnp.uint8_t[:] silhouette, double[:] best,
+                            double[:, :] limbs) noexcept nogil:
+    """
+    This C function finds the outermost crossing of the silhouette edges with each scan half-plane.
+
+    The facing of each facet and the silhouette flag of each edge are computed in parallel.  The (much smaller) set of
+    silhouette edges is then binned into the scan lines by azimuth about the scan center so that each edge is only
+    intersected with the scan planes that it actually crosses.
+    """
+
+    cdef:
+        Py_ssize_t facet, edge, ind, first, last, i, stop
+        Py_ssize_t num_facets = facets.shape[0], num_edges = edges.shape[0], num_scans = sorted_azimuths.shape[0]
+        double start_along, end_along, start_azimuth, end_azimuth, low, high
+        double[3] start
+        double[3] end
+        double pi = 3.141592653589793
+
+    apply_schedule(SCHEDULE_STATIC)
+    for facet in prange(num_facets, schedule='runtime', num_threads=get_thread_count()):
+        _facet_facing(vertices, facets, observer, facing, facet)
+
+    # an edge is on the silhouette if it separates a front and back facing facet or if it is on the boundary
+    for edge in prange(num_edges, schedule='runtime', num_threads=get_thread_count()):
+        if edge_facets[edge, 1] < 0:
+            silhouette[edge] = 1
+        else:
+            silhouette[edge] = facing[edge_facets[edge, 0]] != facing[edge_facets[edge, 1]]
+
+    for edge in range(num_edges):
+        if not silhouette[edge]:
+            continue
+
+        start_along = 0
+        end_along = 0
+        for i in range(3):
+            start[i] = vertices[edges[edge, 0], i] - observer[i]
+            end[i] = vertices[edges[edge, 1], i] - observer[i]
+            start_along += start[i]*center_dir[i]
+            end_along += end[i]*center_dir[i]
+
+        # ignore anything behind the observer
+        if (start_along <= 0) or (end_along <= 0):
+            continue
+
+        start_azimuth = atan2(start[0]*basis_y[0] + start[1]*basis_y[1] + start[2]*basis_y[2],
+                              start[0]*basis_x[0] + start[1]*basis_x[1] + start[2]*basis_x[2])
+        end_azimuth = atan2(end[0]*basis_y[0] + end[1]*basis_y[1] + end[2]*basis_y[2],
+                            end[0]*basis_x[0] + end[1]*basis_x[1] + end[2]*basis_x[2])
+
+        low = min(start_azimuth, end_azimuth)
+        high = max(start_azimuth, end_azimuth)
+
+        if high - low <= pi:
+            first = _lower_bound(sorted_azimuths, num_scans, low)
+            stop = _lower_bound(sorted_azimuths, num_scans, high)
+            while (stop < num_scans) and (sorted_azimuths[stop] <= high):
+                stop += 1
+            for ind in range(first, stop):
+                _cross_scan_line(start, end, scan_normals, scan_perps, center_dir, scan_order[ind], best, limbs)
+
+        else:
+            # the edge wraps around +/- pi
+            first = _lower_bound(sorted_azimuths, num_scans, high)
+            for ind in range(first, num_scans):
+                _cross_scan_line(start, end, scan_normals, scan_perps, center_dir, scan_order[ind], best, limbs)
+
+            last = _lower_bound(sorted_azimuths, num_scans, low)
+            while (last < num_scans) and (sorted_azimuths[last] <= low):
+                last += 1
+            for ind in range(last):
+                _cross_scan_line(start, end, scan_normals, scan_perps, center_dir, scan_order[ind], best, limbs)
+
+
+def _surface_tessellation(Surface target):
+    """
+    This helper returns the vertices and facets of a surface (or surface acceleration structure) in its own frame, or
+    ``None`` if they aren't available.
+    """
+
+    surface = getattr(target, "surface", target)
+
+    if surface is None:
+        return None
+
+    vertices = getattr(surface, "vertices", None)
+    facets = getattr(surface, "facets", None)
+
+    if (vertices is None) or (facets is None):
+        return None
+
+    facets = np.asarray(facets)
+
+    if (facets.ndim != 2) or (facets.shape[1] != 3):
+        return None
+
+    return np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 3), facets
+
+
+def find_limbs_silhouette(Surface target, scan_center_dir, scan_dirs, observer_position=None):
+    r"""
+    find_limbs_silhouette(target, scan_center_dir, scan_dirs, observer_position=None)
+
+    This helper function determines the limb points for a tessellated surface (visible edge of the surface) that would
+    be visible for an observer located at ``observer_position`` looking toward ``scan_center_dir`` along the directions
+    given by ``scan_dirs`` using the silhouette edges of the surface instead of tracing rays.
+
+    Typically it is assumed that the location of the observer is at the origin of the current frame and therefore
+    ``observer_position`` can be left as ``None``.
+
+    The silhouette edges are the edges shared by a facet that faces the observer and a facet that faces away from the
+    observer (plus any edges on the boundary of an open surface).  These are found using the edge adjacency of the
+    facets (see :func:`compute_edge_topology`), which is computed once and then cached on the surface.  Each scan line
+    defines a half-plane containing the observer, the scan center direction, and the scan direction.  The limb along the
+    scan line is the point where the silhouette crosses this half-plane that is farthest from the scan center direction,
+    which is guaranteed to be visible to the observer and is the same point that the iterative search in
+    :func:`find_limbs_surface` converges to.  Interior (occluded) silhouette edges on concave bodies are therefore
+    automatically ignored.
+
+    The silhouette edges are binned by their azimuth about the scan center direction so that each edge is only
+    intersected with the scan lines it actually crosses, making this O(silhouette edges) instead of O(scan lines
+    :math:`\times` trace cost).
+
+    The returned limbs are expressed as vectors from the observer to the limb point in the current frame as a 3xn
+    numpy array.  If no silhouette edge crosses a scan line (for instance because the body does not extend in that
+    direction from the scan center) the corresponding column is NaN.
+
+    :param target: The target object that we are to find the limb points for as a triangulated :class:`.Surface`
+    :type target: Surface
+    :param scan_center_dir: the unit vector which the scan is to begin at in the current frame as a length 3 array.
+                            This should point toward the interior of the apparent disk of the surface, ideally near the
+                            center of figure
+    :type scan_center_dir: ARRAY_LIKE
+    :param scan_dirs: the unit vectors along with the scan is to proceed as a 3xn array in the current frame where
+                      each column represents a new limb point we wish to find (should be nearly orthogonal to the
+                      ``scan_center_dir`` in most cases).
+    :type scan_dirs: ARRAY_LIKE
+    :param observer_position: The location of the observer in the current frame.  If ``None`` then it is assumed
+                              the observer is at the origin of the current frame
+    :type observer_position: Optional[ARRAY_LIKE]
+    :return: the vectors from the observer to the limbs in the current frame as a 3xn array
+    :rtype: numpy.ndarray
+    :raises ValueError: If the surface isn't triangulated or its vertices and facets aren't available
+    """
+
+    tessellation = _surface_tessellation(target)
+
+    if tessellation is None:
+        raise ValueError("The silhouette can only be extracted for triangulated surfaces with accessible vertices and "
+                         "facets")
+
+    vertices, facets = tessellation
+
+    if (target._edge_topology is None) or (target._edge_topology[0] != facets.shape[0]):
+        target._edge_topology = (facets.shape[0],) + compute_edge_topology(facets)
+
+    _, edges, edge_facets = target._edge_topology
+
+    scan_dirs = np.array(scan_dirs, dtype=np.float64).reshape(3, -1)
+    scan_center_dir = np.array(scan_center_dir, dtype=np.float64).ravel()
+
+    if observer_position is not None:
+        observer = np.array(observer_position, dtype=np.float64).ravel()
+    else:
+        observer = np.zeros(3, dtype=np.float64)
+
+    # go into the frame of the surface (surface = rotation@current + position)
+    rotation = getattr(target, "rotation", None)
+    position = getattr(target, "position", None)
+
+    if rotation is not None:
+        observer = rotation.matrix @ observer
+        scan_center_dir = rotation.matrix @ scan_center_dir
+        scan_dirs = rotation.matrix @ scan_dirs
+
+    if position is not None:
+        observer = observer + np.asarray(position, dtype=np.float64).ravel()
+
+    scan_center_dir = scan_center_dir / np.linalg.norm(scan_center_dir)
+
+    # the component of each scan direction perpendicular to the scan center defines its half-plane
+    scan_perps = scan_dirs - np.outer(scan_center_dir, scan_center_dir @ scan_dirs)
+    scan_perps /= np.linalg.norm(scan_perps, axis=0, keepdims=True)
+
+    scan_normals = np.cross(scan_center_dir, scan_perps.T)
+
+    # build a basis perpendicular to the scan center to measure azimuths in
+    basis_x = np.cross(scan_center_dir, np.eye(3)[np.argmin(np.abs(scan_center_dir))])
+    basis_x /= np.linalg.norm(basis_x)
+    basis_y = np.cross(scan_center_dir, basis_x)
+
+    azimuths = np.arctan2(basis_y @ scan_perps, basis_x @ scan_perps)
+    scan_order = np.argsort(azimuths).astype(np.int64)
+
+    num_scans = scan_dirs.shape[1]
+
+    cdef:
+        cnp.uint8_t[:] facing = np.zeros(facets.shape[0], dtype=np.uint8)
+        cnp.uint8_t[:] silhouette = np.zeros(edges.shape[0], dtype=np.uint8)
+        double[:] best = np.full(num_scans, -np.inf, dtype=np.float64)
+        double[:, :] limbs = np.full((num_scans, 3), np.nan, dtype=np.float64)
+        const double[:, :] vertices_view = vertices
+        const cnp.int64_t[:, :] facets_view = np.ascontiguousarray(facets, dtype=np.int64)
+        const cnp.int64_t[:, :] edges_view = edges
+        const cnp.int64_t[:, :] edge_facets_view = edge_facets
+        const double[:] observer_view = observer
+        const double[:] center_view = scan_center_dir
+        const double[:] basis_x_view = basis_x
+        const double[:] basis_y_view = basis_y
+        const double[:] azimuths_view = np.ascontiguousarray(azimuths[scan_order])
+        const cnp.int64_t[:] order_view = scan_order
+        const double[:, :] normals_view = np.ascontiguousarray(scan_normals)
+        const double[:, :] perps_view = np.ascontiguousarray(scan_perps.T)
+
+    with nogil:
+        _silhouette_limbs(vertices_view, facets_view, edges_view, edge_facets_view, observer_view, center_view,
+                          basis_x_view, basis_y_view, azimuths_view, order_view, normals_view, perps_view, facing,
+                          silhouette, best, limbs)
+
+    result = np.asarray(limbs).T
+
+    # undo the rotation if we need to (the limbs are already relative to the observer)
+    if rotation is not None:
+        result = rotation.matrix.T @ result
+
+    return result
+
+
 cdef class Surface(Shape):
     """
     This defines the basic interface expected of all surfaces in GIANT.
@@ -255,8 +809,11 @@ cdef class Surface(Shape):
         Typically it is assumed that the location of the observer is at the origin of the current frame and therefore
         ``observer_position`` can be left as ``None``.
 
-        This method operates iteratively, as described by :func:`.find_limbs_surface`.  To have more control over the
-        accuracy of the limb points you should use the :func:`.find_limbs_surface` function directly.
+        When the vertices and facets of the triangulated surface are available, the limbs are found from the
+        silhouette edges of the surface as described by :func:`.find_limbs_silhouette`.  Otherwise (or for any scan
+        lines the silhouette does not cross) this method operates iteratively, as described by
+        :func:`.find_limbs_surface`.  To have more control over the accuracy of the iterative limb points you should
+        use the :func:`.find_limbs_surface` function directly.
 
         The returned limbs are expressed as vectors from the observer to the limb point in the current frame as a 3xn
         numpy array.
@@ -276,7 +833,20 @@ cdef class Surface(Shape):
         :rtype: numpy.ndarray
         """
 
-        return find_limbs_surface(self, scan_center_dir, scan_dirs, observer_position)
+        if _surface_tessellation(self) is None:
+            return find_limbs_surface(self, scan_center_dir, scan_dirs, observer_position)
+
+        scan_dirs = np.array(scan_dirs, dtype=np.float64).reshape(3, -1)
+
+        limbs = find_limbs_silhouette(self, scan_center_dir, scan_dirs, observer_position)
+
+        missing = np.isnan(limbs).any(axis=0)
+
+        if missing.any():
+            limbs[:, missing] = find_limbs_surface(self, np.asarray(scan_center_dir, dtype=np.float64).ravel(),
+                                                   scan_dirs[:, missing], observer_position)
+
+        return limbs
 
     def compute_limb_jacobian(self, center_direction, scan_vectors, limb_points_camera, observer_position=None):
         """
@@ -321,6 +891,67 @@ cdef class Surface(Shape):
 
         pass
 
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef void _compute_intersect_packet(self, const double[:] start, const double[:, :] directions,
+                                        const double[:, :] inv_directions, const cnp.int64_t[] ignore,
+                                        const cnp.uint32_t num_ignore, const cnp.uint32_t num_rays,
+                                        const cnp.uint8_t[] active, cnp.uint8_t[:] hit, double[:, :] intersect,
+                                        double[:, :] normal, double[:] albedo, cnp.int64_t[:] facet,
+                                        double[:] hit_distance) noexcept nogil:
+        """
+        This C method is used to compute the intersect between a packet of rays which all share the same start location
+        and the surfaces contained in this object.
+
+        The directions and inverse directions are 3xn and the ignores are stored as a flat array with ``num_ignore``
+        values for each ray.  Only rays flagged in ``active`` are considered, and the results for a ray are only
+        updated if an intersection is found that is closer than the current ``hit_distance`` for that ray, which makes
+        it easy to accumulate the closest intersection over multiple calls.
+
+        By default this simply calls :meth:`_compute_intersect` for each active ray.  Subclasses can override it to
+        share work between the rays in the packet.
+        """
+
+        cdef:
+            cnp.uint32_t ray
+            size_t i
+            cnp.uint8_t new_hit
+            double new_distance
+            double previous_albedo
+            cnp.int64_t previous_facet
+            double[3] previous_intersect
+            double[3] previous_normal
+
+        for ray in range(num_rays):
+
+            if not active[ray]:
+                continue
+
+            # store the current results so we can restore them if we don't find something closer
+            previous_albedo = albedo[ray]
+            previous_facet = facet[ray]
+            for i in range(3):
+                previous_intersect[i] = intersect[ray, i]
+                previous_normal[i] = normal[ray, i]
+
+            new_hit = 0
+            new_distance = hit_distance[ray]
+
+            self._compute_intersect(start, directions[:, ray], inv_directions[:, ray], &ignore[ray * num_ignore],
+                                    num_ignore, &new_hit, intersect[ray], normal[ray], &albedo[ray], &facet[ray],
+                                    &new_distance)
+
+            if new_hit and (new_distance < hit_distance[ray]):
+                hit[ray] = True
+                hit_distance[ray] = new_distance
+
+            else:
+                albedo[ray] = previous_albedo
+                facet[ray] = previous_facet
+                for i in range(3):
+                    intersect[ray, i] = previous_intersect[i]
+                    normal[ray, i] = previous_normal[i]
+
     def compute_intersect(self, ray):
         """
         compute_intersect(self, ray)
@@ -340,9 +971,10 @@ cdef class Surface(Shape):
         """
 
         # extract the components of the ray that we need
-        start = ray.start.ravel()
-        direction = ray.direction.ravel()
-        inv_direction = ray.inv_direction.ravel()
+        # single precision rays are promoted since surfaces are always traced in double precision
+        start = np.asarray(ray.start, dtype=np.float64).ravel()
+        direction = np.asarray(ray.direction, dtype=np.float64).ravel()
+        inv_direction = np.asarray(ray.inv_direction, dtype=np.float64).ravel()
         # prepare the ignore vector
         if ray.ignore is None:
             ignore = np.array([-1], dtype=np.int64)
@@ -390,9 +1022,10 @@ cdef class Surface(Shape):
 
         if omp:
 
-            with nogil, parallel():
+            apply_schedule(SCHEDULE_DYNAMIC)
+            with nogil, parallel(num_threads=get_thread_count()):
                 # if we are using parallel then drop the gil and do the trace in parallel
-                for ray in prange(num_rays, schedule='dynamic'):
+                for ray in prange(num_rays, schedule='runtime'):
 
                     self._compute_intersect(starts[:, ray], directions[:, ray], inv_directions[:, ray], &ignore[ray, 0],
                                             num_ignore,
@@ -408,47 +1041,117 @@ cdef class Surface(Shape):
                                             &hit[ray], intersect[ray], normal[ray], &albedo[ray], &facet[ray],
                                             &hit_distances[ray])
 
-    def trace(self, rays, omp=True):
+    cdef bint _is_occluded(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
+                           const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore) noexcept nogil:
+        """
+        This C method is used to check whether a single ray strikes anything in this object.
+
+        Unlike :meth:`_compute_intersect`, this can stop as soon as anything is struck, since we don't need to know
+        what was struck first.
+
+        The python version of this method :meth:`.is_occluded` should be used unless working from Cython
+        """
+
+        return False
+
+    @cython.boundscheck(False)
+    cdef void _trace_occlusion(self, const double[:, :] starts, const double[:, :] directions,
+                               const double[:, :] inv_directions, const cnp.int64_t[:, :] ignore,
+                               const cnp.uint32_t num_rays, const bint omp, cnp.uint8_t[:] occluded) noexcept nogil:
+        """
+        This C method is used to check whether multiple rays strike anything in this object.
+
+        This is done by making calls to the _is_occluded C method for each ray provided.
+
+        Unless specifically requested to the contrary, this method uses OpenMP to parallelize the checks
+        """
+
+        cdef int ray
+        cdef long long num_ignore = ignore.shape[1]
+
+        if omp:
+
+            apply_schedule(SCHEDULE_DYNAMIC)
+            with nogil, parallel(num_threads=get_thread_count()):
+                for ray in prange(num_rays, schedule='runtime'):
+
+                    occluded[ray] = self._is_occluded(starts[:, ray], directions[:, ray], inv_directions[:, ray],
+                                                      &ignore[ray, 0], num_ignore)
+        else:
+
+            with nogil:
+                for ray in range(num_rays):
+                    occluded[ray] = self._is_occluded(starts[:, ray], directions[:, ray], inv_directions[:, ray],
+                                                      &ignore[ray, 0], num_ignore)
+
+    def is_occluded(self, rays, omp=True):
+        """
+        is_occluded(self, rays, omp=True)
+
+        This python method checks whether each ray strikes anything in this object.
+
+        This is intended for shadow checks where all that matters is whether anything blocks the path of the ray, not
+        what was struck first.  It is therefore cheaper than :meth:`trace`, both because the search for each ray stops
+        at the first intersection and because none of the intersection geometry is computed or stored.
+
+        Parallel processing can be turned off by setting the omp flag to False
+
+        :param rays: The rays to check against the surface
+        :type rays: Rays
+        :param omp: A boolean flag specifying whether to use parallel processing (``True``) or not
+        :type omp: bool
+        :return: A length n boolean numpy array which is ``True`` where the ray struck something
+        :rtype: np.ndarray
+        """
+
+        # extract the components of the rays (promoting single precision rays to double precision)
+        starts = np.asarray(rays.start, dtype=np.float64).reshape(3, -1)
+        directions = np.asarray(rays.direction, dtype=np.float64).reshape(3, -1)
+        inv_directions = np.asarray(rays.inv_direction, dtype=np.float64).reshape(3, -1)
+
+        occluded = np.zeros(rays.num_rays, dtype=np.uint8)
+
+        # fix the ignores so that they can be effectively used
+        if rays.ignore is None:
+            ignore = -np.ones((rays.num_rays, 1), dtype=np.int64)
+        else:
+            ignore = to_block(rays.ignore)
+
+        self._trace_occlusion(starts, directions, inv_directions, ignore, rays.num_rays, omp, occluded)
+
+        return occluded.astype(bool)
+
+    def trace(self, rays, omp=True, out=None):
         """
-        trace(self, rays, omp=True)
+        trace(self, rays, omp=True, out=None)
 
         This python method provides an easy interface to trace a number of Rays through the surface.
 
         It packages all of the ray inputs and the required output arrays automatically and dispatches to the c version
         of the method for efficient computation.  It then packages the output into the expected structured array.
 
+        If ``out`` is provided as a :class:`.TraceWorkspace` then the results are instead written directly into the
+        (preallocated) buffers of the workspace and the workspace is returned.  This avoids allocating any new arrays
+        when the same workspace is used repeatedly.
+
         Parallel processing can be turned off by setting the omp flag to False
 
         :param rays: The rays to trace to the surface
         :type rays: Rays
         :param omp: A boolean flag specifying whether to use parallel processing (``True``) or not
         :type omp: bool
-        :return: A length n numpy array with a data type of :data:`.INTERSECT_DTYPE`
-        :rtype: np.ndarray
+        :param out: A workspace to write the results into, or ``None`` to return a new structured array
+        :type out: Optional[TraceWorkspace]
+        :return: A length n numpy array with a data type of :data:`.INTERSECT_DTYPE` or ``out`` if it was provided
+        :rtype: Union[np.ndarray, TraceWorkspace]
         """
 
-        # extract the components of the rays
-        starts = rays.start.reshape(3, -1)
-        directions = rays.direction.reshape(3, -1)
-        inv_directions = rays.inv_direction.reshape(3, -1)
-
-        # form the results structured array
-        results = np.zeros(rays.num_rays, INTERSECT_DTYPE)
-
-        # extract the required components of the results structured array
-        hits = results["check"].astype(np.uint8)  # use integer dtype since cython doesn't like bool arrays
-        intersects = results["intersect"]
-        distances = results["distance"]
-        normals = results["normal"]
-        albedos = results["albedo"]
-        facets = results["facet"]
-
-        # initialize the output
-        intersects[:] = np.nan
-        distances[:] = np.inf
-        normals[:] = np.nan
-        albedos[:] = np.nan
-        facets[:] = -1
+        workspace = TraceWorkspace() if out is None else out
+
+        workspace.reset(rays.num_rays)
+
+        # extract the components of the rays (promoting single precision rays to double precision)
+        starts, directions, inv_directions = rays_to_frame(rays, None, None, workspace, omp)
 
         # fix the ignores so that they can be effectively used
         if rays.ignore is None:
@@ -458,13 +1161,13 @@ cdef class Surface(Shape):
 
         # trace the rays
         self._trace(starts, directions, inv_directions, ignore, rays.num_rays, omp,
-                    hits, intersects, normals, albedos, facets, distances)
-
-        # re-add the check column since we needed to mess with the dtype
-        results["check"] = hits
+                    workspace.hit, workspace.intersect, workspace.normal, workspace.albedo, workspace.facet,
+                    workspace.distance)
 
-        return results
+        if out is None:
+            return workspace.to_intersect_array()
 
+        return out
 
 cdef class RawSurface(Surface):
     """
@@ -652,6 +1355,7 @@ cdef class RawSurface(Surface):
 
     @facets.setter
     def facets(self, val):
+        self._edge_topology = None
         if isinstance(val, np.ndarray):
             if val.dtype == np.uint32:
                 if val.shape[-1] == 3:
@@ -7,6 +7,9 @@ cimport numpy as cnp
 from giant.ray_tracer.shapes.surface cimport Surface64, Surface32
 
 
+cdef void _solve_3x3sys(double[3][3] mat, double[3] rhs, double[3] solu) noexcept nogil
+
+
 cdef class Triangle64(Surface64):
 
     # functions
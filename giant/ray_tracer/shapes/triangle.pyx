@@ -47,6 +47,7 @@ import cython
 from cython.parallel import prange, parallel, threadid
 
 from giant.ray_tracer.shapes.shapes cimport Surface32, Surface64
+from giant.ray_tracer.parallel_config cimport get_thread_count, apply_schedule, SCHEDULE_GUIDED
 
 
 cdef void _solve_3x3sys(double[3][3] mat, double[3] rhs, double[3] solu) noexcept nogil:
@@ -81,6 +82,39 @@ cdef void _solve_3x3sys(double[3][3] mat, double[3] rhs, double[3] solu) noexcep
         solu[3] = 1000.
 
 
+@cython.cdivision(True)
+cdef inline bint _shared_origin_intersect(const double[3] tvec, const double[3] qvec, const double[3] side1,
+                                          const double[3] side2, const double dx, const double dy, const double dz,
+                                          double[3] solu) noexcept nogil:
+    """
+    This C function checks if a ray intersects a triangle using the Moller Trumbore method, where the terms which only
+    depend on the start of the ray and the triangle (``tvec`` is the start minus the first vertex and ``qvec`` is the
+    cross product of ``tvec`` with ``side1``) have already been computed.
+
+    This allows these terms to be shared by a packet of rays with the same start.  The barycentric coordinates and
+    distance are stored in ``solu`` in the same order as :func:`_solve_3x3sys`.
+    """
+
+    cdef double[3] pvec
+    cdef double det
+
+    # p = direction x side2
+    pvec[0] = dy * side2[2] - dz * side2[1]
+    pvec[1] = dz * side2[0] - dx * side2[2]
+    pvec[2] = dx * side2[1] - dy * side2[0]
+
+    det = side1[0] * pvec[0] + side1[1] * pvec[1] + side1[2] * pvec[2]
+
+    if det == 0.:
+        return False
+
+    solu[0] = (tvec[0] * pvec[0] + tvec[1] * pvec[1] + tvec[2] * pvec[2]) / det
+    solu[1] = (dx * qvec[0] + dy * qvec[1] + dz * qvec[2]) / det
+    solu[2] = (side2[0] * qvec[0] + side2[1] * qvec[1] + side2[2] * qvec[2]) / det
+
+    return (solu[0] >= 0) & (solu[1] >= 0) & (solu[2] > 0) & ((solu[0] + solu[1]) <= 1)
+
+
 cdef class Triangle64(Surface64):
     """
     __init__(self, vertices, albedos, facets, normals=None, compute_bounding_box=True, bounding_box=None, compute_reference_ellipsoid=True, reference_ellipsoid=None)
@@ -124,6 +158,7 @@ cdef class Triangle64(Surface64):
 
     @facets.setter
     def facets(self, val):
+        self._edge_topology = None
         try:
             # check that the last 2 shapes are 3x3
             if val.shape[-1] != 3:
@@ -185,20 +220,22 @@ cdef class Triangle64(Surface64):
         cdef unsigned long long i
         cdef cnp.uint32_t num_faces=self.num_faces
         cdef cnp.uint32_t ind
-        cdef double[8][3] side1
-        cdef double[8][3] side2
-        cdef double[8] dist
-        cdef int thread, num_threads=8
+        cdef int thread, num_threads=get_thread_count()
+        # scratch space for each thread
+        cdef double[:, ::1] side1 = np.empty((num_threads, 3), dtype=np.float64)
+        cdef double[:, ::1] side2 = np.empty((num_threads, 3), dtype=np.float64)
+        cdef double[::1] dist = np.empty(num_threads, dtype=np.float64)
         # cross 0-1 with 0-2
         self._normals = np.zeros((self.num_faces, 3), dtype=np.float64)
 
+        apply_schedule(SCHEDULE_GUIDED)
         with nogil, parallel(num_threads=num_threads):
-            for ind in prange(num_faces, schedule='guided'):
+            for ind in prange(num_faces, schedule='runtime'):
                 thread = threadid()
-                self._get_sides(ind, side1[thread], side2[thread])
-                self._normals[ind, 0] = side1[thread][1] * side2[thread][2] - side2[thread][1] * side1[thread][2]
-                self._normals[ind, 1] = -(side1[thread][0] * side2[thread][2] - side2[thread][0] * side1[thread][2])
-                self._normals[ind, 2] = side1[thread][0] * side2[thread][1] - side2[thread][0] * side1[thread][1]
+                self._get_sides(ind, &side1[thread, 0], &side2[thread, 0])
+                self._normals[ind, 0] = side1[thread, 1] * side2[thread, 2] - side2[thread, 1] * side1[thread, 2]
+                self._normals[ind, 1] = -(side1[thread, 0] * side2[thread, 2] - side2[thread, 0] * side1[thread, 2])
+                self._normals[ind, 2] = side1[thread, 0] * side2[thread, 1] - side2[thread, 0] * side1[thread, 1]
                 dist[thread] = 0
                 for i in range(3):
                     dist[thread] += self._normals[ind, i] ** 2
@@ -385,6 +422,143 @@ cdef class Triangle64(Surface64):
                     dist = solu[2]
                     hit_distance[0] = dist
 
+    @cython.boundscheck(False)
+    cdef bint _is_occluded(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
+                           const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore) noexcept nogil:
+        """
+        This C function checks if a ray intersects any of the surfaces contained in a given object, stopping at the
+        first one found.
+
+        Users should see the python version :meth:`is_occluded` for more information
+        """
+
+        cdef int num_faces = self._facets.shape[0]
+        cdef int face
+        cdef int i
+        cdef bint ignore_face
+
+        cdef double ldot
+
+        cdef double[3][3] coef_mat
+        cdef double[3] rhs
+        cdef double[3] solu
+        cdef double[3] side1, side2
+
+        for face in range(num_faces):
+
+            # check to see if we should be ignoring this face
+            ignore_face = False
+            for i in range(num_ignore):
+                if face == ignore[i]:
+                    ignore_face = True
+                    break
+
+            if ignore_face:
+                continue
+
+            # check to see if the ray is parallel to the face
+            ldot = 0.
+            for i in range(3):
+                ldot += direction[i]*self._normals[face, i]
+
+            if fabs(ldot) <= 1e-12:
+                continue
+
+            # solve for the barycentric coordinates and distance along the ray
+            self._get_sides(face, side1, side2)
+            for i in range(3):
+                coef_mat[i][0] = side1[i]
+                coef_mat[i][1] = side2[i]
+                coef_mat[i][2] = -direction[i]
+                rhs[i] = start[i] - self._vertices[self._facets[face][0], i]
+
+            _solve_3x3sys(coef_mat, rhs, solu)
+
+            if (solu[0] >=0) & (solu[1] >= 0) & (solu[2] > 0) & ((solu[0] + solu[1]) <= 1):
+                return True
+
+        return False
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef void _compute_intersect_packet(self, const double[:] start, const double[:, :] directions,
+                                        const double[:, :] inv_directions, const cnp.int64_t[] ignore,
+                                        const cnp.uint32_t num_ignore, const cnp.uint32_t num_rays,
+                                        const cnp.uint8_t[] active, cnp.uint8_t[:] hit, double[:, :] intersect,
+                                        double[:, :] normal, double[:] albedo, cnp.int64_t[:] facet,
+                                        double[:] hit_distance) noexcept nogil:
+        """
+        This C function checks if a packet of rays which all share the same start intersect any of the surfaces
+        contained in this object.
+
+        The faces are visited once for the entire packet.  For each face, the terms of the Moller Trumbore method which
+        only depend on the start and the face are computed once and shared by every ray in the packet.  The results
+        for a ray are only updated if the intersection is closer than the current ``hit_distance`` for the ray.
+        """
+
+        cdef int num_faces = self._facets.shape[0]
+        cdef int face
+        cdef int i
+        cdef cnp.uint32_t ray
+        cdef bint ignore_face
+
+        cdef double ldot
+
+        cdef double[3] side1_in, side2_in
+        cdef double[3] side1, side2
+        cdef double[3] tvec, qvec
+        cdef double[3] solu
+
+        for face in range(num_faces):
+
+            self._get_sides(face, side1_in, side2_in)
+
+            for i in range(3):
+                side1[i] = side1_in[i]
+                side2[i] = side2_in[i]
+                tvec[i] = start[i] - self._vertices[self._facets[face, 0], i]
+
+            # q = tvec x side1, which is shared by all of the rays
+            qvec[0] = tvec[1] * side1[2] - tvec[2] * side1[1]
+            qvec[1] = tvec[2] * side1[0] - tvec[0] * side1[2]
+            qvec[2] = tvec[0] * side1[1] - tvec[1] * side1[0]
+
+            for ray in range(num_rays):
+
+                if not active[ray]:
+                    continue
+
+                # check to see if we should be ignoring this face for this ray
+                ignore_face = False
+                for i in range(num_ignore):
+                    if face == ignore[ray * num_ignore + i]:
+                        ignore_face = True
+                        break
+
+                if ignore_face:
+                    continue
+
+                # check to see if the ray is parallel to the face
+                ldot = 0.
+                for i in range(3):
+                    ldot += directions[i, ray] * self._normals[face, i]
+
+                if fabs(ldot) <= 1e-12:
+                    continue
+
+                if _shared_origin_intersect(tvec, qvec, side1, side2, directions[0, ray], directions[1, ray],
+                                            directions[2, ray], solu):
+
+                    # check to see if we have already struck something closer
+                    if solu[2] < hit_distance[ray]:
+                        hit[ray] = True
+                        for i in range(3):
+                            intersect[ray, i] = start[i] + solu[2] * directions[i, ray]
+                            normal[ray, i] = self._normals[face, i]
+                        facet[ray] = face
+                        albedo[ray] = self._get_albedo(solu, face)
+                        hit_distance[ray] = solu[2]
+
 cdef class Triangle32(Surface32):
     """
     __init__(self, vertices, albedos, facets, normals=None, compute_bounding_box=True, bounding_box=None, compute_reference_ellipsoid=True, reference_ellipsoid=None)
@@ -428,6 +602,7 @@ cdef class Triangle32(Surface32):
 
     @facets.setter
     def facets(self, val):
+        self._edge_topology = None
         try:
             # check that the last 2 shapes are 3x3
             if val.shape[-1] != 3:
@@ -489,20 +664,22 @@ cdef class Triangle32(Surface32):
         cdef unsigned long long i
         cdef long long num_faces=self.num_faces
         cdef long long ind
-        cdef float[8][3] side1
-        cdef float[8][3] side2
-        cdef float[8] dist
-        cdef int thread, num_threads=8
+        cdef int thread, num_threads=get_thread_count()
+        # scratch space for each thread
+        cdef float[:, ::1] side1 = np.empty((num_threads, 3), dtype=np.float32)
+        cdef float[:, ::1] side2 = np.empty((num_threads, 3), dtype=np.float32)
+        cdef float[::1] dist = np.empty(num_threads, dtype=np.float32)
         # cross 0-1 with 0-2
         self._normals = np.zeros((self.num_faces, 3), dtype=np.float32)
 
+        apply_schedule(SCHEDULE_GUIDED)
         with nogil, parallel(num_threads=num_threads):
-            for ind in prange(num_faces, schedule='guided'):
+            for ind in prange(num_faces, schedule='runtime'):
                 thread = threadid()
-                self._get_sides(ind, side1[thread], side2[thread])
-                self._normals[ind, 0] = side1[thread][1] * side2[thread][2] - side2[thread][1] * side1[thread][2]
-                self._normals[ind, 1] = -(side1[thread][0] * side2[thread][2] - side2[thread][0] * side1[thread][2])
-                self._normals[ind, 2] = side1[thread][0] * side2[thread][1] - side2[thread][0] * side1[thread][1]
+                self._get_sides(ind, &side1[thread, 0], &side2[thread, 0])
+                self._normals[ind, 0] = side1[thread, 1] * side2[thread, 2] - side2[thread, 1] * side1[thread, 2]
+                self._normals[ind, 1] = -(side1[thread, 0] * side2[thread, 2] - side2[thread, 0] * side1[thread, 2])
+                self._normals[ind, 2] = side1[thread, 0] * side2[thread, 1] - side2[thread, 0] * side1[thread, 1]
                 dist[thread] = 0
                 for i in range(3):
                     dist[thread] += self._normals[ind, i] ** 2
@@ -686,3 +863,140 @@ cdef class Triangle32(Surface32):
                     # update the best distance so far
                     dist = solu[2]
                     hit_distance[0] = dist
+
+    @cython.boundscheck(False)
+    cdef bint _is_occluded(self, const double[:] start, const double[:] direction, const double[:] inv_direction,
+                           const cnp.int64_t[] ignore, const cnp.uint32_t num_ignore) noexcept nogil:
+        """
+        This C function checks if a ray intersects any of the surfaces contained in a given object, stopping at the
+        first one found.
+
+        Users should see the python version :meth:`is_occluded` for more information
+        """
+
+        cdef int num_faces = self._facets.shape[0]
+        cdef int face
+        cdef int i
+        cdef bint ignore_face
+
+        cdef double ldot
+
+        cdef double[3][3] coef_mat
+        cdef double[3] rhs
+        cdef double[3] solu
+        cdef float[3] side1, side2
+
+        for face in range(num_faces):
+
+            # check to see if we should be ignoring this face
+            ignore_face = False
+            for i in range(num_ignore):
+                if face == ignore[i]:
+                    ignore_face = True
+                    break
+
+            if ignore_face:
+                continue
+
+            # check to see if the ray is parallel to the face
+            ldot = 0.
+            for i in range(3):
+                ldot += direction[i]*self._normals[face, i]
+
+            if fabs(ldot) <= 1e-12:
+                continue
+
+            # solve for the barycentric coordinates and distance along the ray
+            self._get_sides(face, side1, side2)
+            for i in range(3):
+                coef_mat[i][0] = side1[i]
+                coef_mat[i][1] = side2[i]
+                coef_mat[i][2] = -direction[i]
+                rhs[i] = start[i] - self._vertices[self._facets[face][0], i]
+
+            _solve_3x3sys(coef_mat, rhs, solu)
+
+            if (solu[0] >=0) & (solu[1] >= 0) & (solu[2] > 0) & ((solu[0] + solu[1]) <= 1):
+                return True
+
+        return False
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef void _compute_intersect_packet(self, const double[:] start, const double[:, :] directions,
+                                        const double[:, :] inv_directions, const cnp.int64_t[] ignore,
+                                        const cnp.uint32_t num_ignore, const cnp.uint32_t num_rays,
+                                        const cnp.uint8_t[] active, cnp.uint8_t[:] hit, double[:, :] intersect,
+                                        double[:, :] normal, double[:] albedo, cnp.int64_t[:] facet,
+                                        double[:] hit_distance) noexcept nogil:
+        """
+        This C function checks if a packet of rays which all share the same start intersect any of the surfaces
+        contained in this object.
+
+        The faces are visited once for the entire packet.  For each face, the terms of the Moller Trumbore method which
+        only depend on the start and the face are computed once and shared by every ray in the packet.  The results
+        for a ray are only updated if the intersection is closer than the current ``hit_distance`` for the ray.
+        """
+
+        cdef int num_faces = self._facets.shape[0]
+        cdef int face
+        cdef int i
+        cdef cnp.uint32_t ray
+        cdef bint ignore_face
+
+        cdef double ldot
+
+        cdef float[3] side1_in, side2_in
+        cdef double[3] side1, side2
+        cdef double[3] tvec, qvec
+        cdef double[3] solu
+
+        for face in range(num_faces):
+
+            self._get_sides(face, side1_in, side2_in)
+
+            for i in range(3):
+                side1[i] = side1_in[i]
+                side2[i] = side2_in[i]
+                tvec[i] = start[i] - self._vertices[self._facets[face, 0], i]
+
+            # q = tvec x side1, which is shared by all of the rays
+            qvec[0] = tvec[1] * side1[2] - tvec[2] * side1[1]
+            qvec[1] = tvec[2] * side1[0] - tvec[0] * side1[2]
+            qvec[2] = tvec[0] * side1[1] - tvec[1] * side1[0]
+
+            for ray in range(num_rays):
+
+                if not active[ray]:
+                    continue
+
+                # check to see if we should be ignoring this face for this ray
+                ignore_face = False
+                for i in range(num_ignore):
+                    if face == ignore[ray * num_ignore + i]:
+                        ignore_face = True
+                        break
+
+                if ignore_face:
+                    continue
+
+                # check to see if the ray is parallel to the face
+                ldot = 0.
+                for i in range(3):
+                    ldot += directions[i, ray] * self._normals[face, i]
+
+                if fabs(ldot) <= 1e-12:
+                    continue
+
+                if _shared_origin_intersect(tvec, qvec, side1, side2, directions[0, ray], directions[1, ray],
+                                            directions[2, ray], solu):
+
+                    # check to see if we have already struck something closer
+                    if solu[2] < hit_distance[ray]:
+                        hit[ray] = True
+                        for i in range(3):
+                            intersect[ray, i] = start[i] + solu[2] * directions[i, ray]
+                            normal[ray, i] = self._normals[face, i]
+                        facet[ray] = face
+                        albedo[ray] = self._get_albedo(solu, face)
+                        hit_distance[ray] = solu[2]
@@ -280,10 +280,10 @@ def to_block(vals: ARRAY_LIKE) -> np.ndarray:
 
         if vals.ndim == 2:
 
-            return vals.astype(np.int64)
+            return np.ascontiguousarray(vals, dtype=np.int64)
 
         else:
-            return vals.reshape(-1, 1).astype(np.int64)
+            return np.ascontiguousarray(vals.reshape(-1, 1), dtype=np.int64)
 
     # determine how many rows there are
     n_rows = len(vals)
@@ -46,6 +46,10 @@ Parameter                                  Description
 :attr:`~XCorrCenterFinding.brdf`           The bidirectional reflectance distribution function used to compute the
                                            expected illumination of a ray based on the geometry of the scene.
 :attr:`~XCorrCenterFinding.grid_size`      The size of the grid to use for subpixel sampling when rendering the template
+:attr:`~XCorrCenterFinding.adaptive_grid`  A flag specifying whether to only use the subpixel grid for pixels on the
+                                           edges of the targets when rendering the template
+:attr:`~XCorrCenterFinding.rasterize`      A flag specifying whether to render the template by rasterizing the shapes
+                                           instead of ray tracing them
 :attr:`~XCorrCenterFinding.peak_finder`    The function to use to detect the peak of the correlation surface.
 :attr:`~XCorrCenterFinding.blur`           A flag specifying whether to blur the correlation surface to decrease high
                                            frequency noise before identifying the peak.
@@ -87,6 +91,8 @@ import numpy as np
 from giant.relative_opnav.estimators.estimator_interface_abc import RelNavEstimator, RelNavObservablesType
 from giant.ray_tracer.rays import Rays, compute_rays
 from giant.ray_tracer.scene import Scene, SceneObject
+from giant.ray_tracer.render import render_template
+from giant.ray_tracer.raster import rasterize_template
 from giant.ray_tracer.illumination import IlluminationModel, McEwenIllumination
 from giant.camera import Camera
 from giant.image import OpNavImage
@@ -126,6 +132,21 @@ class XCorrCenterFindingOptions:
     If ``rays`` is not None then this is ignored
     """
 
+    adaptive_grid: bool = False
+    """
+    A flag specifying whether to only use the full ``grid_size`` sub-pixel grid for pixels on the limbs, terminators, 
+    shadow edges, and facet edges of the targets, using a single ray for the rest of the pixels.  See 
+    :func:`.render_template` for details.  If ``rays`` is not None then this is ignored
+    """
+
+    rasterize: bool = False
+    """
+    A flag specifying whether to render the template by projecting the triangles of the shapes onto the image with a 
+    z-buffer and a shadow map instead of ray tracing.  This is usually much faster for detailed shapes but resolves 
+    shadows at the resolution of the shadow map.  See :func:`.rasterize_template` for details.  If ``rays`` is not None 
+    then this is ignored
+    """
+
     peak_finder:  Callable[[np.ndarray, bool], np.ndarray] = quadric_peak_finder_2d
     """
     The peak finder function to use. This should be a callable that takes in a 2D surface as a numpy array and returns 
@@ -211,7 +232,7 @@ class XCorrCenterFinding(RelNavEstimator):
                  brdf: Optional[IlluminationModel] = None, rays: Union[Optional[Rays], List[Rays]] = None,
                  grid_size: int = 1, peak_finder: Callable[[np.ndarray, bool], np.ndarray] = quadric_peak_finder_2d,
                  min_corr_score: float = 0.3, blur: bool = True, search_region: Optional[int] = None,
-                 template_overflow_bounds=-1):
+                 template_overflow_bounds=-1, adaptive_grid: bool = False, rasterize: bool = False):
         """
         :param scene: The scene describing the a priori locations of the targets and the light source.
         :param camera: The :class:`.Camera` object containing the camera model and images to be analyzed
@@ -245,7 +266,11 @@ class XCorrCenterFinding(RelNavEstimator):
                                          camera field of view.  Set to a number less than 0 to accept all overflow
                                          pixels in the template.  Set to a number greater than or equal to 0 to limit
                                          the number of overflow pixels.
-
+        :param adaptive_grid: A flag specifying whether to only use the full ``grid_size`` sub-pixel grid for pixels on
+                              the edges of the targets when rendering the template.  If ``rays`` is not None then this
+                              is ignored
+        :param rasterize: A flag specifying whether to render the template by rasterizing the shapes instead of ray
+                          tracing them.  If ``rays`` is not None then this is ignored
         """
 
         super().__init__(scene, camera, image_processing)
@@ -277,6 +302,25 @@ class XCorrCenterFinding(RelNavEstimator):
         See :func:`.compute_rays` for details.
         """
 
+        self.adaptive_grid: bool = adaptive_grid
+        """
+        A flag specifying whether to only use the full sub-pixel grid for pixels on the limbs, terminators, shadow edges,
+        and facet edges of the targets when rendering the template.
+        
+        This can drastically reduce the number of rays traced when ``grid_size`` is large while leaving the edges of the 
+        template, which drive the correlation, unchanged.  See :func:`.render_template` for details.
+        """
+
+        self.rasterize: bool = rasterize
+        """
+        A flag specifying whether to render the template by rasterizing the shapes instead of ray tracing them.
+        
+        Rasterization projects each triangle onto the image and keeps the closest one for each sub-pixel using a 
+        z-buffer, which is typically much faster than ray tracing for detailed shapes.  Shadows are determined using a 
+        shadow map rendered from the light.  See :func:`.rasterize_template` for details.  This is ignored if 
+        :attr:`rays` is not ``None``.
+        """
+
         if brdf is None:
             brdf = McEwenIllumination()
 
@@ -356,6 +400,8 @@ class XCorrCenterFinding(RelNavEstimator):
         """
         self.rays = options.rays
         self.grid_size = options.grid_size
+        self.adaptive_grid = options.adaptive_grid
+        self.rasterize = options.rasterize
         if options.brdf is None:
             self.brdf = McEwenIllumination()
         else:
@@ -427,6 +473,26 @@ class XCorrCenterFinding(RelNavEstimator):
         :return: The rays to trace through the scene and the  the pixel coordinates for each ray as a tuple, plus
                  the bounds of the pixel coordinates
         """
+        min_inds, max_inds = self.compute_template_bounds(target, temperature=temperature)
+
+        # Compute the rays for the template
+        return compute_rays(self.camera.model, (min_inds[1], max_inds[1]), (min_inds[0], max_inds[0]),
+                            grid_size=self.grid_size, temperature=temperature), (min_inds, max_inds)
+
+    def compute_template_bounds(self, target: SceneObject, temperature: Real = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        This method computes the (inclusive) pixel bounds of the template required to render a given target based on
+        the location of the target in the image.
+
+        If a circumscribing sphere is defined for the target, the edges of the sphere are used to compute the required
+        pixels; otherwise, the bounding box is used. The pixels are checked to be sure they are contained in the image.
+        If the expected target location is completely outside of the image then it is relocated to be in the center of
+        the image (for rendering purposes).
+
+        :param target: The target that is being rendered
+        :param temperature: The temperature of the camera at the time the target is being rendered
+        :return: The minimum and maximum (column, row) pixel bounds of the template
+        """
         local_min, local_max = target.get_bounding_pixels(self.camera.model, temperature=temperature)
 
         # If the template size is too small artificially increase it so we can get the PSF in there
@@ -461,17 +527,65 @@ class XCorrCenterFinding(RelNavEstimator):
             # change the target position
             target.change_position(pos)
 
-            # recurse to compute the rays for the new target location
-            return self.compute_rays(target, temperature=temperature)
+            # recurse to compute the bounds for the new target location
+            return self.compute_template_bounds(target, temperature=temperature)
+
+        elif self.template_overflow_bounds >= 0:
+            return min_inds, max_inds
 
         else:
-            # Compute the rays for the template
-            if self.template_overflow_bounds >= 0:
-                return compute_rays(self.camera.model, (min_inds[1], max_inds[1]), (min_inds[0], max_inds[0]),
-                                    grid_size=self.grid_size, temperature=temperature), (min_inds, max_inds)
-            else:
-                return compute_rays(self.camera.model, (local_min[1], local_max[1]), (local_min[0], local_max[0]),
-                                    grid_size=self.grid_size, temperature=temperature), (local_min, local_max)
+            return local_min, local_max
+
+    def render_template(self, target_ind: int, target: SceneObject,
+                        temperature: Real = 0) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """
+        This method renders the template image for the given target and returns it along with the (column, row) pixel
+        bounds of the template in the image.
+
+        When the rays to trace are not specified by the user for the target, the template is rendered directly using
+        :func:`.ray_tracer.render.render_template`, which traces, shades, and accumulates the rays for the pixels
+        determined by :meth:`compute_template_bounds` in compiled code without creating arrays for every ray, or, if
+        :attr:`rasterize` is ``True``, using :func:`.rasterize_template`.  Otherwise, the rays are rendered using :meth:`render` and the resulting illumination values are accumulated into
+        the pixels they project to.
+
+        :param target_ind: index into the :attr:`.Scene.target_objs` list of the target being rendering
+        :param target: the :class:`.SceneObject` for the target being rendered
+        :param temperature: The temperature of the camera at the time the scene is being rendered.
+        :return: the rendered template and the minimum and maximum (column, row) pixel bounds of the template
+        """
+
+        if (self.rays is None) or ((not isinstance(self.rays, Rays)) and (self.rays[target_ind] is None)):
+            min_inds, max_inds = self.compute_template_bounds(target, temperature=temperature)
+
+            if self.rasterize:
+                return rasterize_template(self.scene, self.camera.model, (min_inds[1], max_inds[1]),
+                                          (min_inds[0], max_inds[0]), grid_size=self.grid_size,
+                                          illumination_model=self.brdf, temperature=temperature)
+
+            return render_template(self.scene, self.camera.model, (min_inds[1], max_inds[1]),
+                                   (min_inds[0], max_inds[0]), grid_size=self.grid_size, illumination_model=self.brdf,
+                                   temperature=temperature, adaptive=self.adaptive_grid)
+
+        # Do the ray trace
+        illums, locs = self.render(target_ind, target, temperature=temperature)
+
+        # Get the expected bounds of the template in the image
+        # noinspection PyArgumentList
+        bounds = (locs.min(axis=1).round(), locs.max(axis=1).round())
+
+        # Compute the size of the template in pixels
+        template_size = (bounds[1] - bounds[0]) + 1
+
+        # Initialize the template matrix
+        template = np.zeros(template_size[::-1].astype(int))
+
+        # Compute the subscripts into the template
+        subs = (locs - bounds[0].reshape(2, 1)).round().astype(int)
+
+        # use numpy fancy stuff to add the computed brightness for each ray to the appropriate pixels
+        np.add.at(template, (subs[1], subs[0]), illums.flatten())
+
+        return template, bounds
 
     def estimate(self, image: OpNavImage, include_targets: Optional[List[bool]] = None):
         """
@@ -500,7 +614,8 @@ class XCorrCenterFinding(RelNavEstimator):
         for target_ind, target in self.target_generator(include_targets):
 
             # Do the ray trace and render the template
-            illums, locs = self.render(target_ind, target, temperature=image.temperature)
+            self.templates[target_ind], bounds = self.render_template(target_ind, target,
+                                                                      temperature=image.temperature)
 
             # Compute the expected location of the object in the image
             self.computed_bearings[target_ind] = self.camera.model.project_onto_image(
@@ -508,22 +623,6 @@ class XCorrCenterFinding(RelNavEstimator):
                 temperature=image.temperature
             ).ravel()
 
-            # Get the expected bounds of the template in the image
-            # noinspection PyArgumentList
-            bounds = (locs.min(axis=1).round(), locs.max(axis=1).round())
-
-            # Compute the size of the template in pixels
-            template_size = (bounds[1] - bounds[0]) + 1
-
-            # Initialize the template matrix
-            self.templates[target_ind] = np.zeros(template_size[::-1].astype(int))
-
-            # Compute the subscripts into the template
-            subs = (locs - bounds[0].reshape(2, 1)).round().astype(int)
-
-            # use numpy fancy stuff to add the computed brightness for each ray to the appropriate pixels
-            np.add.at(self.templates[target_ind], (subs[1], subs[0]), illums.flatten())
-
             # Apply the psf of the camera to the template
             if self.camera.psf is not None:
                 self.templates[target_ind] = self.camera.psf(self.templates[target_ind])
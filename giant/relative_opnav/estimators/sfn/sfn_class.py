@@ -83,6 +83,8 @@ Parameter                                        Description
                                                  expected illumination of a ray based on the geometry of the scene.
 :attr:`~SurfaceFeatureNavigation.grid_size`      The size of the grid to use for subpixel sampling when rendering the
                                                  templates
+:attr:`~SurfaceFeatureNavigation.rasterize`      A flag specifying whether to render the templates by rasterizing the
+                                                 features instead of ray tracing them
 :attr:`~SurfaceFeatureNavigation.peak_finder`    The function to use to detect the peaks of the correlation surfaces.
 :attr:`~SurfaceFeatureNavigation.blur`           A flag specifying whether to blur the correlation surfaces to decrease
                                                  high frequency noise before identifying the peak.
@@ -204,6 +206,7 @@ from giant.ray_tracer.rays import compute_rays
 from giant.ray_tracer.illumination import IlluminationModel
 from giant.ray_tracer.scene import Scene, SceneObject
 from giant.ray_tracer.rays import Rays
+from giant.ray_tracer.raster import rasterize_template
 from giant.image_processing import ImageProcessing
 from giant.image_processing import otsu, cv2_correlator_2d, quadric_peak_finder_2d
 from giant.image import OpNavImage
@@ -440,7 +443,7 @@ class SurfaceFeatureNavigation(XCorrCenterFinding):
                  max_lsq_iterations: Optional[int] = None, lsq_relative_error_tolerance: float = 1e-8,
                  lsq_relative_update_tolerance: float = 1e-8,
                  cf_results: NONEARRAY = None, cf_index: Optional[List[int]] = None,
-                 show_templates: bool = False):
+                 show_templates: bool = False, rasterize: bool = False):
         """
         :param scene: The scene describing the a priori locations of the targets and the light source.
         :param camera: The :class:`.Camera` object containing the camera model and images to be analyzed
@@ -508,11 +511,13 @@ class SurfaceFeatureNavigation(XCorrCenterFinding):
                          in like order
         :param show_templates: A flag to show the rendered templates for each feature "live".  This is useful for
                                debugging but in general should not be used.
+        :param rasterize: A flag specifying whether to render the templates by rasterizing the features instead of ray
+                          tracing them.  If ``rays`` is not None then this is ignored
         """
 
         super().__init__(scene, camera, image_processing,
                          brdf=brdf, rays=rays, grid_size=grid_size, peak_finder=peak_finder,
-                         min_corr_score=min_corr_score, blur=blur, search_region=search_region)
+                         min_corr_score=min_corr_score, blur=blur, search_region=search_region, rasterize=rasterize)
 
         self.run_pnp_solver: bool = run_pnp_solver
         """
@@ -808,7 +813,8 @@ class SurfaceFeatureNavigation(XCorrCenterFinding):
                temperature: Real = 0) -> Tuple[List[np.ndarray], np.ndarray]:
         """
         This method renders each visible feature for the current target according to the current estimate of the
-        relative position/orientation between the target and the camera using single bounce ray tracing.
+        relative position/orientation between the target and the camera using single bounce ray tracing (or
+        rasterization if :attr:`rasterize` is ``True`` and the rays are not specified by the user).
 
         The illumination values are computed by (a) determining the rays to trace through the scene (either user
         specified or by a call to :meth:`compute_rays`), (b) performing a single bounce ray trace through the scene
@@ -857,55 +863,73 @@ class SurfaceFeatureNavigation(XCorrCenterFinding):
 
             start = time.time()
 
-            # figure out what rays to trace.  Hopefully we are doing this ourselves because things might go wonky
-            # otherwise
-            if self.rays is None:
-                (rays, locs), bounds = self.compute_rays(target.shape, feature_ind, temperature=temperature)
-            elif isinstance(self.rays, Rays):
-                rays = self.rays
-                locs = self.camera.model.project_onto_image(rays.start + rays.direction, temperature=temperature)
-                bounds = (locs.min(axis=1, initial=None).round(), locs.max(axis=1, initial=None).round())
-            elif self.rays[target_ind] is None:
-                (rays, locs), bounds = self.compute_rays(target.shape, feature_ind, temperature=temperature)
-            elif isinstance(self.rays[target_ind], list):
-                rays = self.rays[target_ind][feature_ind]
-                locs = self.camera.model.project_onto_image(rays.start + rays.direction, temperature=temperature)
-                bounds = (locs.min(axis=1, initial=None).round(), locs.max(axis=1, initial=None).round())
+            user_rays = (self.rays is not None) and (isinstance(self.rays, Rays) or
+                                                     (self.rays[target_ind] is not None))
+
+            if self.rasterize and (not user_rays):
+                # rasterize only the feature being processed.  The coverage is True where every sample struck the
+                # surface, just like the intersect mask below
+                target.shape.include_features = [feature_ind]
+
+                local_min, local_max = self.compute_feature_pixel_bounds(target.shape, feature_ind,
+                                                                         temperature=temperature)
+
+                self.templates[target_ind][feature_number], bounds, intersects_out = rasterize_template(
+                    self.scene, self.camera.model, (local_min[1], local_max[1]), (local_min[0], local_max[0]),
+                    grid_size=self.grid_size, illumination_model=self.brdf, temperature=temperature,
+                    return_coverage=True
+                )
+
             else:
-                rays = self.rays[target_ind]
-                locs = self.camera.model.project_onto_image(rays.start + rays.direction, temperature=temperature)
-                bounds = (locs.min(axis=1, initial=None).round(), locs.max(axis=1, initial=None).round())
+                # figure out what rays to trace.  Hopefully we are doing this ourselves because things might go wonky
+                # otherwise
+                if self.rays is None:
+                    (rays, locs), bounds = self.compute_rays(target.shape, feature_ind, temperature=temperature)
+                elif isinstance(self.rays, Rays):
+                    rays = self.rays
+                    locs = self.camera.model.project_onto_image(rays.start + rays.direction, temperature=temperature)
+                    bounds = (locs.min(axis=1, initial=None).round(), locs.max(axis=1, initial=None).round())
+                elif self.rays[target_ind] is None:
+                    (rays, locs), bounds = self.compute_rays(target.shape, feature_ind, temperature=temperature)
+                elif isinstance(self.rays[target_ind], list):
+                    rays = self.rays[target_ind][feature_ind]
+                    locs = self.camera.model.project_onto_image(rays.start + rays.direction, temperature=temperature)
+                    bounds = (locs.min(axis=1, initial=None).round(), locs.max(axis=1, initial=None).round())
+                else:
+                    rays = self.rays[target_ind]
+                    locs = self.camera.model.project_onto_image(rays.start + rays.direction, temperature=temperature)
+                    bounds = (locs.min(axis=1, initial=None).round(), locs.max(axis=1, initial=None).round())
 
-            print('Tracing {} rays'.format(rays.num_rays), flush=True)
+                print('Tracing {} rays'.format(rays.num_rays), flush=True)
 
-            target.shape.include_features = [feature_ind]
+                target.shape.include_features = [feature_ind]
 
-            # get the ray trace results along with the intersect array
-            illum_inputs, intersects = self.scene.get_illumination_inputs(rays, return_intersects=True)
+                # get the ray trace results along with the intersect array
+                illum_inputs, intersects = self.scene.get_illumination_inputs(rays, return_intersects=True)
 
-            # transform the ray trace results into relative intensity values
-            illums = self.brdf(illum_inputs)
+                # transform the ray trace results into relative intensity values
+                illums = self.brdf(illum_inputs)
 
-            template_size = (bounds[1] - bounds[0]) + 1
+                template_size = (bounds[1] - bounds[0]) + 1
 
-            # make the arrays for the template and the intersect mask
-            intersects_out = np.ones(template_size[::-1].astype(int), dtype=bool)
+                # make the arrays for the template and the intersect mask
+                intersects_out = np.ones(template_size[::-1].astype(int), dtype=bool)
 
-            self.templates[target_ind][feature_number] = np.zeros(template_size[::-1].astype(int))
+                self.templates[target_ind][feature_number] = np.zeros(template_size[::-1].astype(int))
 
-            # figure out the subscripts into the template/intersect mask arrays
-            subs = (locs - bounds[0].reshape(2, 1)).round().astype(int)
+                # figure out the subscripts into the template/intersect mask arrays
+                subs = (locs - bounds[0].reshape(2, 1)).round().astype(int)
 
-            # make the template/intersect mask
+                # make the template/intersect mask
 
-            # logical and means only pixels where all rays hit the surface are included.  This is to ignore the edge
-            # which will be darker because fewer rays hit it.
+                # logical and means only pixels where all rays hit the surface are included.  This is to ignore the
+                # edge which will be darker because fewer rays hit it.
 
-            # alternatively we could use a logical or and then divide the template by the count of rays that actually
-            # hit the surface.  Something to consider for the future.
-            np.logical_and.at(intersects_out, (subs[1], subs[0]), intersects['check'])
+                # alternatively we could use a logical or and then divide the template by the count of rays that
+                # actually hit the surface.  Something to consider for the future.
+                np.logical_and.at(intersects_out, (subs[1], subs[0]), intersects['check'])
 
-            np.add.at(self.templates[target_ind][feature_number], (subs[1], subs[0]), illums.flatten())
+                np.add.at(self.templates[target_ind][feature_number], (subs[1], subs[0]), illums.flatten())
 
             self.templates[target_ind][feature_number] = self.camera.psf(self.templates[target_ind][feature_number])
 
@@ -926,6 +950,30 @@ class SurfaceFeatureNavigation(XCorrCenterFinding):
 
         return intersects_list, template_centers
 
+    def compute_feature_pixel_bounds(self, feature_catalogue: FeatureCatalogue, feature_ind: int,
+                                     temperature: Real = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        This method computes the (column, row) pixel bounds needed to render a given feature based on the current
+        estimate of the location and orientation of the feature in the image.
+
+        The bounds are found by projecting the corners of the bounding box of the feature onto the image and taking
+        the floor of the minimum and the ceiling of the maximum.
+
+        :param feature_catalogue: The feature catalogue which contains the feature we are rendering
+        :param feature_ind: The index of the feature in the feature catalogue that we are rendering
+        :param temperature: The temperature of the camera at the time the feature is being rendered
+        :return: The minimum and maximum (column, row) pixel bounds of the feature in the image
+        """
+
+        # the feature bounds are already in the camera frame at this point (at least they should be...)
+        bounds = feature_catalogue.feature_bounds[feature_ind]
+        image_locs = self.camera.model.project_onto_image(bounds, temperature=temperature)
+
+        local_min: np.ndarray = np.floor(image_locs.min(axis=1, initial=None))
+        local_max: np.ndarray = np.ceil(image_locs.max(axis=1, initial=None))
+
+        return local_min, local_max
+
     # noinspection PyMethodOverriding
     def compute_rays(self, feature_catalogue: FeatureCatalogue,
                      feature_ind: int,
@@ -946,12 +994,8 @@ class SurfaceFeatureNavigation(XCorrCenterFinding):
                  the bounds of the pixel coordinates
         """
 
-        # the feature bounds are already in the camera frame at this point (at least they should be...)
-        bounds = feature_catalogue.feature_bounds[feature_ind]
-        image_locs = self.camera.model.project_onto_image(bounds, temperature=temperature)
-
-        local_min: np.ndarray = np.floor(image_locs.min(axis=1, initial=None))
-        local_max: np.ndarray = np.ceil(image_locs.max(axis=1, initial=None))
+        local_min, local_max = self.compute_feature_pixel_bounds(feature_catalogue, feature_ind,
+                                                                 temperature=temperature)
 
         rays_pix = compute_rays(self.camera.model, (local_min[1], local_max[1]), (local_min[0], local_max[0]),
                                 grid_size=self.grid_size, temperature=temperature)
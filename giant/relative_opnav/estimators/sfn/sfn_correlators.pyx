@@ -26,6 +26,8 @@ import cython
 from cython.parallel import prange, parallel
 from libc.math cimport sqrt
 
+from giant.ray_tracer.parallel_config cimport get_thread_count, apply_schedule, SCHEDULE_DYNAMIC
+
 
 @cython.boundscheck(False)
 cdef double compute_cor_score(double[:, :] image, double[:, :] template, unsigned char[:, :] image_mask,
@@ -204,8 +206,9 @@ def sfn_correlator(image: np.ndarray, template: np.ndarray, space_mask: Optional
     cdef double temp
 
     # Perform correlation across image:
-    with nogil, parallel():
-        for rind in prange(n_steps_rows, schedule='dynamic'):
+    apply_schedule(SCHEDULE_DYNAMIC)
+    with nogil, parallel(num_threads=get_thread_count()):
+        for rind in prange(n_steps_rows, schedule='runtime'):
             # determine the current row we are working on
             # this corresponds to the location in the image where the center of the template is currently overlaid
             row = center_row + (-sdist + rind)
@@ -105,11 +105,13 @@ import psutil
 
 from giant.rotations import Rotation
 
-from giant.ray_tracer.shapes import AxisAlignedBoundingBox, Shape
+from giant.ray_tracer.shapes import AxisAlignedBoundingBox, Shape, Surface
 from giant.ray_tracer.kdtree import KDTree
 from giant.ray_tracer.scene import Scene
-from giant.ray_tracer.rays import INTERSECT_DTYPE
+from giant.ray_tracer.rays import INTERSECT_DTYPE, TraceWorkspace
 from giant.ray_tracer.rays import Rays
+from giant.ray_tracer.raster import triangulate
+from giant.ray_tracer.utilities import to_block
 from giant.camera_models.camera_model import CameraModel
 
 from giant._typing import Real, NONENUM, PATH, ARRAY_LIKE
@@ -315,6 +317,13 @@ class FeatureCatalogue:
         
         We do not set this at initialization because it is typically set at run time and is frequently changed
         """
+
+        self._trace_workspace: TraceWorkspace = TraceWorkspace()
+        """
+        The reusable buffers that features represented by a :class:`.Surface` are traced into by :meth:`trace`.
+        
+        This is not pickled.
+        """
         
     @property
     def order(self) -> int:
@@ -564,14 +573,174 @@ class FeatureCatalogue:
 
         return total_results[min_ind, np.arange(min_ind.size)]
 
+    def _get_feature_bounding_box(self, feature_index: int) -> AxisAlignedBoundingBox:
+        """
+        This helper returns the bounding box for a feature in the local frame of the feature catalogue without loading
+        the feature, creating and storing it if needed.
+
+        :param feature_index: The index of the feature to get the bounding box for
+        :return: The bounding box for the feature
+        """
+
+        # in case we have an old feature catalogue that doesn't had the bbox attribute yet
+        if not hasattr(self, "_feature_bounding_boxes"):
+            self._feature_bounding_boxes = {}
+
+        # check to see if we already have this bounding box
+        bbox = self._feature_bounding_boxes.get(feature_index)  # type: Optional[AxisAlignedBoundingBox]
+        if bbox is None:
+            # figure out what the original bounds are in the body fixed frame without loading the shape
+            bounds = self.feature_bounds[feature_index].copy()
+            if self._rotation is not None:
+                bounds = self._rotation.matrix@bounds
+            if self._position is not None:
+                bounds += self._position.reshape(3, 1)
+
+            # make the AABB
+            bbox = AxisAlignedBoundingBox(bounds.min(axis=1),
+                                          bounds.max(axis=1))
+
+            # store it for future use
+            self._feature_bounding_boxes[feature_index] = bbox
+
+        return bbox
+
+    def is_occluded(self, rays: Rays) -> np.ndarray:
+        """
+        This method checks whether each ray strikes any feature in the feature catalogue, optionally filtering which
+        features are checked through the :attr:`include_features` attribute.
+
+        This is used for shadow checks, where we only need to know whether anything is in the way.  Each feature is
+        only checked for the rays that haven't already struck another feature, using the ``is_occluded`` method of the
+        feature's shape, so no intersection geometry is computed.  As with :meth:`trace`, if :attr:`include_features` is
+        ``None`` then the bounding box of each feature is checked before the feature is loaded.
+
+        :param rays: The rays to check against the feature catalogue
+        :return: A boolean numpy array which is ``True`` where the ray struck a feature
+        """
+
+        if self.include_features is None:
+            include_features = range(len(self.features))
+            check_bbox = True
+        else:
+            include_features = self.include_features
+            check_bbox = False
+
+        # rotate/translate the rays into the local frame defined for the feature catalogue
+        rays_local = copy(rays)
+        rays_local.ignore = None
+
+        if self._rotation is not None:
+            rays_local.rotate(self._rotation)
+
+        if self._position is not None:
+            rays_local.translate(self._position)
+
+        sizer = 10 ** (self._order + 1)
+
+        if rays.ignore is None:
+            ignore_inds = None
+        elif np.isscalar(rays.ignore):
+            ignore_inds = np.full((rays.num_rays, 1), rays.ignore, dtype=np.int64)
+        else:
+            ignore_inds = to_block(rays.ignore).reshape(rays.num_rays, -1)
+
+        occluded = np.zeros(rays.num_rays, dtype=bool)
+
+        for feature_index in include_features:
+
+            remaining = ~occluded
+
+            if not remaining.any():
+                break
+
+            feature = self.features[feature_index]  # type: SurfaceFeature
+
+            if check_bbox:
+                bbox_results = np.atleast_1d(self._get_feature_bounding_box(feature_index).trace(rays_local))
+
+                if not (bbox_results & remaining).any():
+                    feature.not_found()
+                    continue
+                else:
+                    feature.found()
+
+            # only check the rays that haven't already struck something
+            if (rays.num_rays > 1) and (not remaining.all()):
+                rays_use = rays_local[remaining]
+            else:
+                rays_use = copy(rays_local)
+
+            # determine which ignores apply to this feature
+            if ignore_inds is not None:
+                rays_use.ignore = np.where(ignore_inds // sizer == feature_index, ignore_inds % sizer, -1)[remaining]
+
+            occluded[remaining] = np.atleast_1d(feature.is_occluded(rays_use)).ravel()
+
+        return occluded
+
+    def triangulate(self, resolution: int = 64) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        This method converts the features in the feature catalogue into triangles in the current frame for
+        rasterization (see :func:`.rasterize_template`).
+
+        Only the features listed in the :attr:`include_features` attribute are included, or all features if it is
+        ``None`` (which will load every feature so this should typically be avoided).  Each feature is converted using
+        :func:`.triangulate` and then the combined triangles are rotated/translated from the base frame of the feature
+        catalogue into the current frame.
+
+        :param resolution: The resolution passed to :func:`.triangulate` for each feature
+        :return: The vertices as a nx3 array, the facets as a mx3 array of indices into the vertices, the unit normal of
+                 each facet as a mx3 array, and the albedo at each corner of each facet as a mx3 array
+        """
+
+        if self.include_features is None:
+            include_features = range(len(self.features))
+        else:
+            include_features = self.include_features
+
+        vertices = [np.zeros((0, 3))]
+        facets = [np.zeros((0, 3), dtype=np.int64)]
+        normals = [np.zeros((0, 3))]
+        albedos = [np.zeros((0, 3))]
+
+        num_vertices = 0
+        for feature_index in include_features:
+            feature_vertices, feature_facets, feature_normals, feature_albedos = triangulate(
+                self.features[feature_index].shape, resolution=resolution
+            )
+
+            vertices.append(feature_vertices)
+            facets.append(feature_facets + num_vertices)
+            normals.append(feature_normals)
+            albedos.append(feature_albedos)
+
+            num_vertices += feature_vertices.shape[0]
+
+        vertices = np.vstack(vertices)
+        normals = np.vstack(normals)
+
+        # rotate/translate from the local frame of the catalogue into the current frame
+        if self._position is not None:
+            vertices = vertices - self._position.ravel()
+
+        if self._rotation is not None:
+            vertices = vertices @ self._rotation.matrix
+            normals = normals @ self._rotation.matrix
+
+        return vertices, np.vstack(facets), normals, np.vstack(albedos)
+
     def trace(self, rays: Rays) -> np.ndarray:
         """
         This method traces rays through the feature catalogue, optionally filtering which features are included traced
         through the :attr:`include_features` attribute.
 
         The rays are first rotated/translated into the base frame of the feature catalogue and are then traced through
-        each active feature to look for intersections.  Only the first (shortest distance) intersection for each ray is
-        returned.  The results are returned as a numpy array with type :attr:`.INTERSECT_DTYPE`.
+        each active feature to look for intersections.  Each feature is only traced with the rays that strike its
+        bounding box, and the features are traced from nearest to furthest so that rays which have already struck a
+        feature in front of a bounding box are not traced through that feature.  Only the first (shortest distance)
+        intersection for each ray is returned.  The results are returned as a numpy array with type
+        :attr:`.INTERSECT_DTYPE`.
 
         If the :attr:`include_features` attribute is set to ``None``, then this method will attempt to smartly only load
         features where the Rays intersect the bounding box of the feature, before "lazy loading" the feature.  This is
@@ -603,40 +772,38 @@ class FeatureCatalogue:
         else:
             rays_local = rays
 
-        res = []
+        num_rays = rays_local.num_rays
 
-        # loop through each included feature
+        res = np.zeros(num_rays, dtype=INTERSECT_DTYPE)
+        res["check"] = False
+        res["distance"] = np.inf
+        res["intersect"] = np.nan
+        res["normal"] = np.nan
+        res["albedo"] = np.nan
+        res["facet"] = -1
+
+        sizer = 10 ** (self._order + 1)
+
+        if rays.ignore is None:
+            ignore_inds = None
+        elif np.isscalar(rays.ignore):
+            ignore_inds = np.full((num_rays, 1), rays.ignore, dtype=np.int64)
+        else:
+            ignore_inds = to_block(rays.ignore).reshape(num_rays, -1)
+
+        # figure out which rays strike the bounding box of each feature (and how far away the box is) so that we only
+        # need to trace those rays through the feature, starting with the closest features.  This also lets us avoid
+        # loading features that aren't struck at all.
+        candidates = []
         for feature_index in self.include_features:
             feature = self.features[feature_index]  # type: SurfaceFeature
 
-            # at this point we are rendering the whole feature catalogue, but we don't want to have to load everything
-            # into memory if we don't need it so we trace the bounding box first to ensure that the feature is
-            # intersected before loading it
-            if check_bbox:
-                # in case we have an old feature catalogue that doesn't had the bbox attribute yet
-                if not hasattr(self, "_feature_bounding_boxes"):
-                    self._feature_bounding_boxes = {}
-
-                # check to see if we already have this bounding box
-                bbox = self._feature_bounding_boxes.get(feature_index)  # type: Optional[AxisAlignedBoundingBox]
-                if bbox is None:
-                    # figure out what the original bounds are in the body fixed frame without loading the shape
-                    bounds = self.feature_bounds[feature_index].copy()
-                    if self._rotation is not None:
-                        bounds = self._rotation.matrix@bounds
-                    if self._position is not None:
-                        bounds += self._position.reshape(3, 1)
-
-                    # make the AABB
-                    bbox = AxisAlignedBoundingBox(bounds.min(axis=1),
-                                                  bounds.max(axis=1))
-
-                    # store it for future use
-                    self._feature_bounding_boxes[feature_index] = bbox
-
-                # check if the bounding box is hit by any of the rays
-                bbox_results = bbox.trace(rays_local)
+            bbox_results, bbox_distances = self._get_feature_bounding_box(feature_index).trace(rays_local,
+                                                                                                return_distances=True)
+
+            bbox_results = np.atleast_1d(bbox_results)
 
+            if check_bbox:
                 if not bbox_results.any():
                     # if not notify the feature it wasn't found and move to the next feature
                     feature.not_found()
@@ -645,32 +812,61 @@ class FeatureCatalogue:
                     # if it was notify the feature it was found
                     feature.found()
 
-            # get a copy of the ignore indices to modify which ones count for the current feature
-            original_ignore_inds = deepcopy(rays_local.ignore)
-            ignore_inds = rays_local.ignore
+            elif not bbox_results.any():
+                continue
+
+            candidates.append((feature_index, np.flatnonzero(bbox_results), bbox_distances[bbox_results, 0]))
+
+        candidates.sort(key=lambda candidate: candidate[2].min())
+
+        starts = rays_local.start.reshape(3, -1)
+        direction_norms = np.linalg.norm(rays_local.direction.reshape(3, -1), axis=0)
+
+        # the distance to the closest intersect found so far for each ray
+        best = np.full(num_rays, np.inf)
+
+        for feature_index, ray_inds, near in candidates:
+
+            # don't bother tracing rays that have already struck something in front of this feature
+            ray_inds = ray_inds[near * direction_norms[ray_inds] <= best[ray_inds]]
 
-            # modify the ignore inds for ones that apply to this feature
+            if ray_inds.size == 0:
+                continue
+
+            rays_use = copy(rays_local)
+            rays_use.ignore = None
+
+            if ray_inds.size != num_rays:
+                rays_use = rays_use[ray_inds]
+
+            # determine which ignores apply to this feature
             if ignore_inds is not None:
+                rays_use.ignore = np.where(ignore_inds // sizer == feature_index, ignore_inds % sizer, -1)[ray_inds]
 
-                ignore_inds[ignore_inds // (10 ** (self._order + 1)) != feature_index] = -1
-                ignore_inds[ignore_inds // (10 ** (self._order + 1)) == feature_index] %= 10 ** (self._order + 1)
+            # trace the feature, writing the results into the reusable workspace if we can
+            feature = self.features[feature_index]
 
-            # trace the feature
-            feature_results = feature.trace(rays_local)
+            if isinstance(feature.shape, Surface):
+                feature_results = feature.trace(rays_use, out=self._trace_workspace)
+            else:
+                feature_results = np.atleast_1d(feature.trace(rays_use)).ravel()
 
-            # reset the original ignore inds
-            rays_local.ignore = original_ignore_inds
+            distances = np.linalg.norm(feature_results["intersect"] - starts[:, ray_inds].T, axis=-1)
 
-            # update the id for the intersect face based on the current feature index
-            feature_results["facet"][feature_results["check"]] += feature_index * (10 ** (self._order + 1))
+            closer = feature_results["check"] & (distances < best[ray_inds])
+
+            if not closer.any():
+                continue
 
-            # store the results
-            res.append(feature_results)
+            update_inds = ray_inds[closer]
 
-        # now figure out with intersection was first for any ray with multiple intersects
-        res = np.asarray(res, dtype=INTERSECT_DTYPE)
+            best[update_inds] = distances[closer]
 
-        res = self.get_first(res, rays_local)
+            for field in INTERSECT_DTYPE.names:
+                res[field][update_inds] = feature_results[field][closer]
+
+            # update the id for the intersect face based on the current feature index
+            res["facet"][update_inds] += feature_index * sizer
 
         # now rotate/translate the result back into the frame the rays started in
         if self._position is not None:
@@ -974,17 +1170,38 @@ class SurfaceFeature:
                     self._shape = None
                     self.n_not_found = 0
 
-    def trace(self, rays: Rays) -> np.ndarray:
+    def trace(self, rays: Rays, out: Optional[TraceWorkspace] = None) -> Union[np.ndarray, TraceWorkspace]:
         """
         This method traces the provided rays through the feature DEM.
 
         The trace it handled by the :meth:`~.Shape.trace` method of the DEM object directly.  Because we retrieve this
         method through the :attr:`shape` attribute, if the shape is not already in memory, it will be loaded.
+
+        If ``out`` is provided then the results are written into it instead of a new array and it is returned.  This is
+        only supported when the DEM is represented by a :class:`.Surface` (like a :class:`.KDTree`).
+
         :param rays: the rays to trace against the DEM shape object.
-        :return: A numpy array of type :attr:`INTERSECT_DTYPE` specifying the results of the ray trace.
+        :param out: A workspace to write the results into or ``None``
+        :return: A numpy array of type :attr:`INTERSECT_DTYPE` specifying the results of the ray trace (or ``out``).
+        """
+
+        if out is None:
+            return self.shape.trace(rays)
+
+        return self.shape.trace(rays, out=out)
+
+    def is_occluded(self, rays: Rays) -> np.ndarray:
+        """
+        This method checks whether the provided rays strike the feature DEM.
+
+        The check is handled by the ``is_occluded`` method of the DEM object directly.  Because we retrieve this method
+        through the :attr:`shape` attribute, if the shape is not already in memory, it will be loaded.
+
+        :param rays: the rays to check against the DEM shape object.
+        :return: A boolean numpy array which is ``True`` where the ray struck the DEM
         """
 
-        return self.shape.trace(rays)
+        return self.shape.is_occluded(rays)
 
 
 @dataclass
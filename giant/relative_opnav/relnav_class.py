@@ -1214,13 +1214,17 @@ class RelativeOpNav(OpNav):
 
     def _update_scene(self, image: OpNavImage):
         """
-        This helper method updates the scene if possible
+        This helper method updates the scene if possible, and then selects the level of detail for any targets that have
+        one (see :meth:`.Scene.select_levels_of_detail`)
         """
         # update the scene if possible
         if self._auto_update:
             if not hasattr(self.scene, 'update'):
                 raise AttributeError('Somehow we ended up with a scene without an update method')
             self.scene.update(image)
+
+            if hasattr(self.scene, 'select_levels_of_detail'):
+                self.scene.select_levels_of_detail(self.camera.model, temperature=image.temperature)
         else:
             warn("This isn't an auto scene so we can't update things, hope you know what you're doing")
 
@@ -0,0 +1,107 @@
+# Copyright 2021 United States Government as represented by the Administrator of the National Aeronautics and Space
+# Administration.  No copyright is claimed in the United States under Title 17, U.S. Code. All Other Rights Reserved.
+
+
+"""
+Benchmark the ray tracer on synthetic shapes and optionally compare the results against a stored baseline.
+
+This script generates tessellated ellipsoids and noisy "asteroid" meshes at the requested scales (see
+:mod:`.synthetic_shapes`) and times building the :class:`.KDTree`, tracing rays, computing the illumination inputs,
+and finding limbs on each of them for each of the requested thread counts (see :mod:`.ray_tracer_benchmarks`).  The
+results (rays per second, build time, and peak RSS for each case) are printed to stdout and can be saved to a JSON file
+using ``--output``.
+
+If a baseline JSON file (from a previous run of this script) is provided using ``--baseline`` then each metric is
+compared against the baseline and any that have gotten worse by more than ``--tolerance`` are reported.  In this case
+the script exits with a non-zero status if any regressions were found so it can be used in automated testing.
+
+.. warning::
+
+    The default facet counts go up to 5 million facets, which can take a long time and a lot of memory to generate and
+    build.  Use ``--facets`` to select smaller shapes for quick checks.
+"""
+
+import sys
+from argparse import ArgumentParser
+
+from giant.benchmarks.synthetic_shapes import SHAPE_KINDS
+from giant.benchmarks.ray_tracer_benchmarks import (BENCHMARKS, BenchmarkConfig, run_suite, save_report, load_report,
+                                                    compare_reports)
+
+
+def _get_parser() -> ArgumentParser:
+    """
+    Helper function for the argparse extension
+
+    :return: A setup argument parser
+    """
+
+    defaults = BenchmarkConfig()
+
+    parser = ArgumentParser(description='Benchmark the GIANT ray tracer on synthetic shapes')
+
+    parser.add_argument('-k', '--kinds', help='The kinds of shapes to benchmark', nargs='+', choices=SHAPE_KINDS,
+                        default=list(defaults.shape_kinds))
+    parser.add_argument('-f', '--facets', help='The approximate number of facets for the shapes', nargs='+', type=int,
+                        default=list(defaults.facet_counts))
+    parser.add_argument('-t', '--threads', help='The number of OpenMP threads to benchmark with', nargs='+', type=int,
+                        default=list(defaults.thread_counts))
+    parser.add_argument('-b', '--benchmarks', help='The operations to benchmark', nargs='+', choices=BENCHMARKS,
+                        default=list(defaults.benchmarks))
+    parser.add_argument('-i', '--image_size', help='The number of rows/columns of rays to trace', type=int,
+                        default=defaults.image_size)
+    parser.add_argument('-s', '--scan_lines', help='The number of scan lines to find limbs along', type=int,
+                        default=defaults.num_scan_lines)
+    parser.add_argument('-r', '--repeats', help='The number of times to repeat each timing', type=int,
+                        default=defaults.repeats)
+    parser.add_argument('-d', '--max_depth', help='The maximum depth of the KD trees (chosen automatically if not set)',
+                        type=int, default=None)
+    parser.add_argument('--seed', help='The seed for generating the asteroid shapes', type=int, default=defaults.seed)
+    parser.add_argument('-o', '--output', help='The JSON file to save the results to', type=str, default=None)
+    parser.add_argument('--baseline', help='A JSON file from a previous run to compare against', type=str,
+                        default=None)
+    parser.add_argument('--tolerance', help='The fractional slow down tolerated before reporting a regression',
+                        type=float, default=0.1)
+    parser.add_argument('--no_isolate', help="Run all of the cases in this process",
+                        action='store_true')
+
+    return parser
+
+
+def main():
+    """
+    Parses the command line arguments and runs the benchmarks
+    """
+
+    parser = _get_parser()
+
+    args = parser.parse_args()
+
+    config = BenchmarkConfig(shape_kinds=tuple(args.kinds), facet_counts=tuple(args.facets),
+                             thread_counts=tuple(args.threads), benchmarks=tuple(args.benchmarks),
+                             image_size=args.image_size, num_scan_lines=args.scan_lines, repeats=args.repeats,
+                             max_depth=args.max_depth, seed=args.seed)
+
+    report = run_suite(config, isolate=not args.no_isolate, print_progress=True)
+
+    if args.output is not None:
+        save_report(report, args.output)
+
+    if args.baseline is not None:
+        comparisons = compare_reports(report, load_report(args.baseline), tolerance=args.tolerance)
+
+        regressions = [comparison for comparison in comparisons if comparison['regression']]
+
+        for comparison in comparisons:
+            print('{shape_kind:>10s} {num_facets:>9d} facets {threads:>4s} threads: {metric:<30s} '
+                  '{change:+7.1%}{flag}'.format(threads=str(comparison['num_threads']),
+                                                flag=' REGRESSION' if comparison['regression'] else '',
+                                                **comparison))
+
+        if regressions:
+            print('{} regressions found'.format(len(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -44,7 +44,13 @@ import warnings
 
 import time
 
-from typing import Union, Iterable, List, Optional
+import copy
+
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from typing import Union, Iterable, List, Optional, Tuple, Dict, Any
 
 import numpy as np
 import pandas as pd
@@ -57,6 +63,7 @@ from giant.utilities.outlier_identifier import get_outliers
 from giant.opnav_class import OpNav
 from giant.camera import Camera
 from giant.image_processing import ImageProcessing
+from giant.image import OpNavImage
 from giant.ray_tracer.scene import Scene
 from giant._typing import ARRAY_LIKE, ARRAY_LIKE_2D, PATH, Real, NONEARRAY
 
@@ -71,6 +78,124 @@ _SCAN_VECTORS: np.ndarray = np.vstack([np.cos(_ANGLES), np.sin(_ANGLES), np.zero
 An internal array used for checking for interior points in extended bodies.
 """
 
+PARALLEL_BACKENDS: Tuple[str, ...] = ('thread', 'process')
+"""
+The recognized values for :attr:`.StellarOpNav.parallel_backend`.
+"""
+
+_STAR_ID_RESULTS: Tuple[str, ...] = ('queried_catalogue_star_records', 'queried_catalogue_image_points',
+                                     'queried_catalogue_unit_vectors', 'queried_weights_inertial',
+                                     'queried_weights_picture', 'unmatched_catalogue_star_records',
+                                     'unmatched_catalogue_image_points', 'unmatched_catalogue_unit_vectors',
+                                     'unmatched_extracted_image_points', 'unmatched_weights_inertial',
+                                     'unmatched_weights_picture', 'matched_catalogue_star_records',
+                                     'matched_catalogue_image_points', 'matched_catalogue_unit_vectors',
+                                     'matched_extracted_image_points', 'matched_weights_inertial',
+                                     'matched_weights_picture')
+"""
+The attributes of the :class:`.StarID` instance that are gathered after identifying the stars in an image.
+"""
+
+_WORKER_STATE: threading.local = threading.local()
+"""
+The private copies of the image processing and star identification objects used by each worker in parallel star
+identification.
+"""
+
+
+def _extract_image_points(image_processing: ImageProcessing, image: OpNavImage) -> Tuple[Any, ...]:
+    """
+    This extracts the potential star locations from an image.
+
+    :param image_processing: The image processing instance to use
+    :param image: The image to process
+    :return: The extracted image points, the image illuminations, the PSFs, the stats, and the SNRs (the last 3 are
+             ``None`` if they are not requested from the image processing instance)
+    """
+
+    res = image_processing.locate_subpixel_poi_in_roi(image)
+
+    if image_processing.save_psf:
+        if image_processing.return_stats:
+            return res
+        else:
+            return res[0], res[1], res[2], None, None
+    else:
+        if image_processing.return_stats:
+            return res[0], res[1], None, res[2], res[3]
+        else:
+            return res[0], res[1], None, None, None
+
+
+def _identify_image_stars(star_id: StarID, image: OpNavImage, image_number: int, extracted_image_points: np.ndarray,
+                          use_weights: bool) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], Dict[str, Any]]:
+    """
+    This identifies the stars in an image and gathers the results from the star identification instance.
+
+    :param star_id: The star identification instance to use
+    :param image: The image the points were extracted from
+    :param image_number: The index of the image in the camera
+    :param extracted_image_points: The potential star locations extracted from the image as a 2xn array
+    :param use_weights: A flag specifying whether to compute weights
+    :return: The boolean index arrays returned by :meth:`.StarID.id_stars` and the resulting attributes of the star
+             identification instance as a dictionary
+    """
+
+    # supply the star id class with the proper information
+    star_id.extracted_image_points = extracted_image_points.copy()
+    star_id.a_priori_rotation_cat2camera = image.rotation_inertial_to_camera
+    star_id.camera_velocity = image.velocity.reshape(3, 1)
+    star_id.camera_position = image.position.reshape(3, 1)
+
+    # identify the stars
+    keep_stars, keep_inliers = star_id.id_stars(epoch=image.observation_date, compute_weights=use_weights,
+                                                temperature=image.temperature, image_number=image_number)
+
+    return keep_stars, keep_inliers, {attribute: getattr(star_id, attribute) for attribute in _STAR_ID_RESULTS}
+
+
+def _initialize_worker(image_processing: ImageProcessing, star_id: StarID):
+    """
+    This initializes a worker for parallel star identification with its own copies of the image processing and star
+    identification instances.
+
+    The copies are made in the worker itself so that resources which can only be used by the thread that creates them
+    (like the sqlite connection of the :class:`.GIANTCatalogue`) are created in the worker.  The camera model is shared
+    between the copies since it is only read.
+
+    :param image_processing: The image processing instance to copy
+    :param star_id: The star identification instance to copy
+    """
+
+    _WORKER_STATE.image_processing = copy.deepcopy(image_processing)
+    _WORKER_STATE.star_id = copy.deepcopy(star_id, {id(star_id.model): star_id.model})
+
+    # don't nest process pools inside of the workers
+    _WORKER_STATE.star_id.use_mp = False
+
+
+def _extract_image_points_worker(image: OpNavImage) -> Tuple[Any, ...]:
+    """
+    This extracts the potential star locations from an image using the image processing instance of the worker.
+
+    :param image: The image to process
+    :return: The results of :func:`_extract_image_points`
+    """
+
+    return _extract_image_points(_WORKER_STATE.image_processing, image)
+
+
+def _identify_image_stars_worker(inputs: Tuple[OpNavImage, int, np.ndarray, bool]) \
+        -> Tuple[Optional[np.ndarray], Optional[np.ndarray], Dict[str, Any]]:
+    """
+    This identifies the stars in an image using the star identification instance of the worker.
+
+    :param inputs: The image, the image number, the extracted image points, and the use weights flag
+    :return: The results of :func:`_identify_image_stars`
+    """
+
+    return _identify_image_stars(_WORKER_STATE.star_id, *inputs)
+
 
 class StellarOpNav(OpNav):
     """
@@ -125,7 +250,8 @@ class StellarOpNav(OpNav):
                  image_processing: Optional[ImageProcessing] = None, image_processing_kwargs: Optional[dict] = None,
                  star_id: Optional[StarID] = None, star_id_kwargs: Optional[dict] = None,
                  attitude_estimator: Optional[est.AttitudeEstimator] = None,
-                 attitude_estimator_kwargs: Optional[dict] = None):
+                 attitude_estimator_kwargs: Optional[dict] = None, num_workers: int = 1,
+                 parallel_backend: str = 'thread'):
         """
         :param camera: The :class:`.Camera` object containing the camera model and images to be utilized
         :param use_weights: A flag specifying whether to use weighted estimation for attitude estimation
@@ -146,6 +272,9 @@ class StellarOpNav(OpNav):
         :param attitude_estimator_kwargs: The keyword arguments to pass to the :class:`.DavenportQMethod`
                                           constructor as a dictionary.  If argument ``attitude_estimator`` is not
                                           ``None`` then this is ignored.
+        :param num_workers: The number of images to process at once in :meth:`id_stars`
+        :param parallel_backend: Whether to use a pool of ``'thread'`` or ``'process'`` workers in :meth:`id_stars`
+                                 when ``num_workers`` is greater than 1
         """
 
         # initialize the various objects we need for the star identification and attitude estimation
@@ -181,6 +310,24 @@ class StellarOpNav(OpNav):
         else:
             self._attitude_est = attitude_estimator
 
+        self.num_workers: int = num_workers
+        """
+        The number of images to process at once in :meth:`id_stars`.
+
+        If this is 1 (or less) then the images are processed one after another.  Otherwise, image processing and star
+        identification are performed for multiple images at once using a pool of :attr:`parallel_backend` workers.
+        """
+
+        self.parallel_backend: str = parallel_backend
+        """
+        The type of workers to use when :attr:`num_workers` is greater than 1.
+
+        This should be one of :data:`.PARALLEL_BACKENDS`.  ``'thread'`` workers have very little overhead and work well
+        since most of the image processing and star identification happens in numpy/OpenCV, which release the GIL.
+        ``'process'`` workers avoid the GIL entirely, but the image processing and star identification instances are
+        copied to each worker and each image is copied to the worker processing it.
+        """
+
         self._initial_star_id_kwargs = star_id_kwargs
         self._initial_attitude_est = self._attitude_est.__class__
         self._initial_attitude_est_kwargs = attitude_estimator_kwargs
@@ -1218,9 +1365,22 @@ class StellarOpNav(OpNav):
         #. The results from the star identification are stored into the various properties of this
            class for each image.
 
+        If :attr:`num_workers` is greater than 1 then the image processing and star identification are performed for
+        :attr:`num_workers` images at once using a pool of :attr:`parallel_backend` workers, each with its own copy of
+        the :attr:`image_processing` and :attr:`star_id` instances.  The results are the same as when the images are
+        processed one after another, however, any changes the workers make to their copies are not reflected in the
+        :attr:`image_processing` and :attr:`star_id` attributes.
+
         For more information about the star identification process see the :class:`.StarID` documentation
+
+        :raises ValueError: If :attr:`parallel_backend` is not one of :data:`.PARALLEL_BACKENDS` and
+                            :attr:`num_workers` is greater than 1
         """
 
+        if self.num_workers > 1:
+            self._id_stars_parallel()
+            return
+
         image_count_index = 1
         number_of_images = sum(self._camera.image_mask)
         # walk through each turned on image
@@ -1231,138 +1391,212 @@ class StellarOpNav(OpNav):
             # if we need to reprocess the stars then send them through the image processing pipeline
             if self.process_stars[ind]:
                 # extract subpixel points of interest as potential star locations
-                if self._image_processing.save_psf:
-                    if self._image_processing.return_stats:
-                        (self._ip_extracted_image_points[ind], self._ip_image_illums[ind], self._ip_psfs[ind],
-                         self._ip_stats[ind], self._ip_snrs[ind]) = \
-                            self._image_processing.locate_subpixel_poi_in_roi(image)
-                    else:
-                        (self._ip_extracted_image_points[ind], self._ip_image_illums[ind],
-                         self._ip_psfs[ind]) = self._image_processing.locate_subpixel_poi_in_roi(image)
-                else:
-                    if self._image_processing.return_stats:
-                        (self._ip_extracted_image_points[ind], self._ip_image_illums[ind], self._ip_stats[ind],
-                         self._ip_snrs[ind]) = self._image_processing.locate_subpixel_poi_in_roi(image)
-                    else:
-                        self._ip_extracted_image_points[ind], self._ip_image_illums[ind] = \
-                            self._image_processing.locate_subpixel_poi_in_roi(image)
+                self._store_image_points(ind, _extract_image_points(self._image_processing, image))
 
-                # discard points inside of extended bodies)
-                if self.scene is not None:
+                # discard points inside of extended bodies
+                self._mask_extended_bodies(ind, image)
 
-                    if self._ip_extracted_image_points[ind] is not None:
+                # set a flag saying that we don't need to pass this image through the image processing again
+                self.process_stars[ind] = False
 
-                        self.scene.update(image)
+            # identify the stars and store the required information
+            self._store_star_id_results(ind, image, *_identify_image_stars(self._star_id, image, ind,
+                                                                           self._ip_extracted_image_points[ind],
+                                                                           self.use_weights))
 
-                        for target in self.scene.target_objs:
+            print('image {} of {} done in {:.4g} seconds'.format(image_count_index, number_of_images,
+                                                                 time.time() - start), flush=True)
+            image_count_index += 1
 
-                            # check that we're close to the FOV
-                            boresight_angle = np.arccos(target.position.ravel()[-1] /
-                                                        np.linalg.norm(target.position)) * 180 / np.pi
+    def _id_stars_parallel(self):
+        """
+        This identifies stars for each image turned on in the :attr:`camera` attribute processing
+        :attr:`num_workers` images at once.
 
-                            if boresight_angle <= 1.25 * self.camera.model.field_of_view:
+        This is done in 2 phases.  First, the potential star locations are extracted from all of the images that need
+        to be processed in parallel and the points inside of extended bodies are discarded (in the main thread since
+        the :attr:`scene` is updated for each image).  Then, the stars are identified in all of the images in parallel.
+        The results are stored in image order so they are identical to processing the images one after another.
 
-                                # get the limbs
-                                limbs = target.shape.find_limbs(target.position/np.linalg.norm(target.position),
-                                                                _SCAN_VECTORS)
+        Each worker gets its own copy of the :class:`.ImageProcessing` and :class:`.StarID` instances (sharing the
+        camera model) so that no state is shared between images that are being processed at the same time, and so that
+        each worker opens its own connection to the star catalogue.
+        """
 
-                                limbs_pix = self.camera.model.project_onto_image(limbs, image=ind,
-                                                                                 temperature=image.temperature)
-                                # make a path for the limb
-                                path = Path(limbs_pix.T, closed=True)
+        if self.parallel_backend == 'thread':
+            executor_type = ThreadPoolExecutor
+        elif self.parallel_backend == 'process':
+            executor_type = ProcessPoolExecutor
+        else:
+            raise ValueError('parallel_backend must be one of {} but got {}'.format(PARALLEL_BACKENDS,
+                                                                                   self.parallel_backend))
 
-                                # check if our points are inside of the limb or not
-                                interior = path.contains_points(self._ip_extracted_image_points[ind].T)
+        images = list(self._camera)
+        number_of_images = len(images)
 
-                                # throw out interior points
-                                self._ip_extracted_image_points[ind] = self._ip_extracted_image_points[ind][:,
-                                                                                                            ~interior]
-                                self._ip_image_illums[ind] = self._ip_image_illums[ind][~interior]
+        with executor_type(max_workers=self.num_workers, initializer=_initialize_worker,
+                           initargs=(self._image_processing, self._star_id)) as executor:
 
-                                if self._image_processing.return_stats:
-                                    self._ip_stats[ind] = np.array(self._ip_stats[ind])[~interior]
-                                    self._ip_snrs[ind] = np.array(self._ip_snrs[ind])[~interior]
-                                if self._image_processing.save_psf:
-                                    self._ip_psfs[ind] = self._ip_psfs[ind][~interior]
+            # extract the potential star locations from the images that need it
+            to_process = [(ind, image) for ind, image in images if self.process_stars[ind]]
 
+            start = time.time()
+
+            for (ind, image), image_points in zip(to_process,
+                                                  executor.map(_extract_image_points_worker,
+                                                               [image for _, image in to_process])):
+                self._store_image_points(ind, image_points)
+
+                # discard points inside of extended bodies
+                self._mask_extended_bodies(ind, image)
 
                 # set a flag saying that we don't need to pass this image through the image processing again
                 self.process_stars[ind] = False
 
-            # supply the star id class with the proper information
-            self._star_id.extracted_image_points = self._ip_extracted_image_points[ind].copy()
-            self._star_id.a_priori_rotation_cat2camera = image.rotation_inertial_to_camera
-            self._star_id.camera_velocity = image.velocity.reshape(3, 1)
-            self._star_id.camera_position = image.position.reshape(3, 1)
+            if to_process:
+                print('image processing for {} images done in {:.4g} seconds'.format(len(to_process),
+                                                                                      time.time() - start),
+                      flush=True)
 
-            # identify the stars
-            keep_stars, keep_inliers = self._star_id.id_stars(epoch=image.observation_date,
-                                                              compute_weights=self.use_weights,
-                                                              temperature=image.temperature,
-                                                              image_number=ind)
+            # identify the stars in each image
+            start = time.time()
 
-            # store the required information
-            self._queried_catalogue_star_records[ind] = self._star_id.queried_catalogue_star_records
-            self._queried_catalogue_image_points[ind] = self._star_id.queried_catalogue_image_points
-            self._queried_catalogue_unit_vectors[ind] = self._star_id.queried_catalogue_unit_vectors
+            results = executor.map(_identify_image_stars_worker,
+                                   [(image, ind, self._ip_extracted_image_points[ind], self.use_weights)
+                                    for ind, image in images])
 
-            self._unmatched_catalogue_star_records[ind] = self._star_id.unmatched_catalogue_star_records
-            self._unmatched_catalogue_image_points[ind] = self._star_id.unmatched_catalogue_image_points
-            self._unmatched_catalogue_unit_vectors[ind] = self._star_id.unmatched_catalogue_unit_vectors
-            self._unmatched_extracted_image_points[ind] = self._star_id.unmatched_extracted_image_points
+            for image_count_index, ((ind, image), result) in enumerate(zip(images, results), start=1):
+                self._store_star_id_results(ind, image, *result)
 
-            if self.use_weights:
-                self._queried_weights_inertial[ind] = self._star_id.queried_weights_inertial
-                self._queried_weights_picture[ind] = self._star_id.queried_weights_picture
-                self._unmatched_weights_inertial[ind] = self._star_id.unmatched_weights_inertial
-                self._unmatched_weights_picture[ind] = self._star_id.unmatched_weights_picture
-
-            # if we didn't identify any stars then set the matched variables to None
-            if keep_inliers is None:
-                self._matched_catalogue_star_records[ind] = None
-                self._matched_catalogue_image_points[ind] = None
-                self._matched_catalogue_unit_vectors_inertial[ind] = None
-                self._matched_catalogue_unit_vectors_camera[ind] = None
-                self._matched_extracted_image_points[ind] = None
-                self._matched_image_illums[ind] = None
-                self._matched_psfs[ind] = None
-                self._unmatched_psfs[ind] = None
-                self._matched_ip_stats[ind] = None
-                self._matched_ip_snrs[ind] = None
-                self._unmatched_ip_stats[ind] = self._ip_stats[ind]
-                self._unmatched_ip_snrs[ind] = self._ip_snrs[ind]
-                if self.use_weights:
-                    self._matched_weights_inertial[ind] = None
-                    self._matched_weights_picture[ind] = None
+                print('image {} of {} done in {:.4g} seconds'.format(image_count_index, number_of_images,
+                                                                     time.time() - start), flush=True)
+
+    def _store_image_points(self, ind: int, image_points: Tuple[Any, ...]):
+        """
+        This stores the results of extracting the potential star locations from an image.
+
+        :param ind: The index of the image
+        :param image_points: The results from :func:`_extract_image_points`
+        """
+
+        self._ip_extracted_image_points[ind], self._ip_image_illums[ind], psfs, stats, snrs = image_points
+
+        if self._image_processing.save_psf:
+            self._ip_psfs[ind] = psfs
+        if self._image_processing.return_stats:
+            self._ip_stats[ind] = stats
+            self._ip_snrs[ind] = snrs
+
+    def _mask_extended_bodies(self, ind: int, image: OpNavImage):
+        """
+        This discards extracted points of interest that are inside of the extended bodies in the :attr:`scene`.
+
+        :param ind: The index of the image
+        :param image: The image the points of interest were extracted from
+        """
+
+        if self.scene is None or self._ip_extracted_image_points[ind] is None:
+            return
+
+        self.scene.update(image)
+
+        for target in self.scene.target_objs:
+
+            # check that we're close to the FOV
+            boresight_angle = np.arccos(target.position.ravel()[-1] /
+                                        np.linalg.norm(target.position)) * 180 / np.pi
+
+            if boresight_angle <= 1.25 * self.camera.model.field_of_view:
+
+                # get the limbs
+                limbs = target.shape.find_limbs(target.position/np.linalg.norm(target.position), _SCAN_VECTORS)
+
+                limbs_pix = self.camera.model.project_onto_image(limbs, image=ind, temperature=image.temperature)
+                # make a path for the limb
+                path = Path(limbs_pix.T, closed=True)
+
+                # check if our points are inside of the limb or not
+                interior = path.contains_points(self._ip_extracted_image_points[ind].T)
+
+                # throw out interior points
+                self._ip_extracted_image_points[ind] = self._ip_extracted_image_points[ind][:, ~interior]
+                self._ip_image_illums[ind] = self._ip_image_illums[ind][~interior]
 
-            else:
-                self._matched_catalogue_star_records[ind] = self._star_id.matched_catalogue_star_records
-                self._matched_catalogue_image_points[ind] = self._star_id.matched_catalogue_image_points
-                self._matched_catalogue_unit_vectors_inertial[ind] = self._star_id.matched_catalogue_unit_vectors
-                self._matched_catalogue_unit_vectors_camera[ind] = np.matmul(
-                    image.rotation_inertial_to_camera.matrix, self._matched_catalogue_unit_vectors_inertial[ind]
-                )
-                self._matched_extracted_image_points[ind] = self._star_id.matched_extracted_image_points
-                self._matched_image_illums[ind] = self._ip_image_illums[ind][keep_stars][keep_inliers].copy()
-                camera_inds = np.arange(self._ip_extracted_image_points[ind].shape[1])
-                unmatched_centroid_inds = list({*camera_inds} - {*camera_inds[keep_stars][keep_inliers]})
-                if self._image_processing.save_psf:
-                    self._matched_psfs[ind] = self._ip_psfs[ind][keep_stars][keep_inliers].copy()
-                    self._unmatched_psfs[ind] = self._ip_psfs[ind][unmatched_centroid_inds].copy()
-                if self.use_weights:
-                    self._matched_weights_inertial[ind] = self._star_id.matched_weights_inertial
-                    self._matched_weights_picture[ind] = self._star_id.matched_weights_picture
                 if self._image_processing.return_stats:
-                    stat_array = np.array(self._ip_stats[ind])
-                    snr_array = np.array(self._ip_snrs[ind])
-                    self._matched_ip_stats[ind] = stat_array[keep_stars][keep_inliers]
-                    self._matched_ip_snrs[ind] = snr_array[keep_stars][keep_inliers]
-                    self._unmatched_ip_stats[ind] = stat_array[unmatched_centroid_inds]
-                    self._unmatched_ip_snrs[ind] = snr_array[unmatched_centroid_inds]
+                    self._ip_stats[ind] = np.array(self._ip_stats[ind])[~interior]
+                    self._ip_snrs[ind] = np.array(self._ip_snrs[ind])[~interior]
+                if self._image_processing.save_psf:
+                    self._ip_psfs[ind] = self._ip_psfs[ind][~interior]
+
+    def _store_star_id_results(self, ind: int, image: OpNavImage, keep_stars: Optional[np.ndarray],
+                               keep_inliers: Optional[np.ndarray], results: Dict[str, Any]):
+        """
+        This stores the results of identifying the stars in an image.
+
+        :param ind: The index of the image
+        :param image: The image the stars were identified in
+        :param keep_stars: The first boolean index array returned by :meth:`.StarID.id_stars`
+        :param keep_inliers: The second boolean index array returned by :meth:`.StarID.id_stars`
+        :param results: The attributes of the star identification instance after identifying the stars in the image
+        """
+
+        self._queried_catalogue_star_records[ind] = results['queried_catalogue_star_records']
+        self._queried_catalogue_image_points[ind] = results['queried_catalogue_image_points']
+        self._queried_catalogue_unit_vectors[ind] = results['queried_catalogue_unit_vectors']
+
+        self._unmatched_catalogue_star_records[ind] = results['unmatched_catalogue_star_records']
+        self._unmatched_catalogue_image_points[ind] = results['unmatched_catalogue_image_points']
+        self._unmatched_catalogue_unit_vectors[ind] = results['unmatched_catalogue_unit_vectors']
+        self._unmatched_extracted_image_points[ind] = results['unmatched_extracted_image_points']
+
+        if self.use_weights:
+            self._queried_weights_inertial[ind] = results['queried_weights_inertial']
+            self._queried_weights_picture[ind] = results['queried_weights_picture']
+            self._unmatched_weights_inertial[ind] = results['unmatched_weights_inertial']
+            self._unmatched_weights_picture[ind] = results['unmatched_weights_picture']
+
+        # if we didn't identify any stars then set the matched variables to None
+        if keep_inliers is None:
+            self._matched_catalogue_star_records[ind] = None
+            self._matched_catalogue_image_points[ind] = None
+            self._matched_catalogue_unit_vectors_inertial[ind] = None
+            self._matched_catalogue_unit_vectors_camera[ind] = None
+            self._matched_extracted_image_points[ind] = None
+            self._matched_image_illums[ind] = None
+            self._matched_psfs[ind] = None
+            self._unmatched_psfs[ind] = None
+            self._matched_ip_stats[ind] = None
+            self._matched_ip_snrs[ind] = None
+            self._unmatched_ip_stats[ind] = self._ip_stats[ind]
+            self._unmatched_ip_snrs[ind] = self._ip_snrs[ind]
+            if self.use_weights:
+                self._matched_weights_inertial[ind] = None
+                self._matched_weights_picture[ind] = None
 
-            print('image {} of {} done in {:.4g} seconds'.format(image_count_index, number_of_images,
-                                                                 time.time() - start), flush=True)
-            image_count_index += 1
+        else:
+            self._matched_catalogue_star_records[ind] = results['matched_catalogue_star_records']
+            self._matched_catalogue_image_points[ind] = results['matched_catalogue_image_points']
+            self._matched_catalogue_unit_vectors_inertial[ind] = results['matched_catalogue_unit_vectors']
+            self._matched_catalogue_unit_vectors_camera[ind] = np.matmul(
+                image.rotation_inertial_to_camera.matrix, self._matched_catalogue_unit_vectors_inertial[ind]
+            )
+            self._matched_extracted_image_points[ind] = results['matched_extracted_image_points']
+            self._matched_image_illums[ind] = self._ip_image_illums[ind][keep_stars][keep_inliers].copy()
+            camera_inds = np.arange(self._ip_extracted_image_points[ind].shape[1])
+            unmatched_centroid_inds = list({*camera_inds} - {*camera_inds[keep_stars][keep_inliers]})
+            if self._image_processing.save_psf:
+                self._matched_psfs[ind] = self._ip_psfs[ind][keep_stars][keep_inliers].copy()
+                self._unmatched_psfs[ind] = self._ip_psfs[ind][unmatched_centroid_inds].copy()
+            if self.use_weights:
+                self._matched_weights_inertial[ind] = results['matched_weights_inertial']
+                self._matched_weights_picture[ind] = results['matched_weights_picture']
+            if self._image_processing.return_stats:
+                stat_array = np.array(self._ip_stats[ind])
+                snr_array = np.array(self._ip_snrs[ind])
+                self._matched_ip_stats[ind] = stat_array[keep_stars][keep_inliers]
+                self._matched_ip_snrs[ind] = snr_array[keep_stars][keep_inliers]
+                self._unmatched_ip_stats[ind] = stat_array[unmatched_centroid_inds]
+                self._unmatched_ip_snrs[ind] = snr_array[unmatched_centroid_inds]
 
     def reproject_stars(self):
         """
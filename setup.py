@@ -87,7 +87,8 @@ setup(name='giant',
       license='NOSA 1.3',
       packages=['giant', 'giant.calibration', 'giant.catalogues', 'giant.ray_tracer', 'giant.ray_tracer.shapes', 'giant.point_spread_functions',
                 'giant.relative_opnav', 'giant.relative_opnav.estimators', 'giant.relative_opnav.estimators.sfn', 
-                'giant.stellar_opnav', "giant.utilities", "giant.scripts", "giant.camera_models", "giant.ufo"],
+                'giant.stellar_opnav', "giant.utilities", "giant.scripts", "giant.camera_models", "giant.ufo",
+                'giant.benchmarks'],
       ext_modules=cythonize(ext_modules, **ext_options),
       install_requires=[
           'pandas',
@@ -115,6 +116,7 @@ setup(name='giant',
               "spc_to_results = giant.scripts.spc_to_results:main",
               "spc_to_feature_catalogue = giant.scripts.spc_to_feature_catalogue:main",
               "tile_shape = giant.scripts.tile_shape:main",
+              "benchmark_ray_tracer = giant.scripts.benchmark_ray_tracer:main",
           ]
       },
       zip_safe=False)
@@ -0,0 +1,132 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from pathlib import Path
+import copy
+
+import numpy as np
+
+from giant import benchmarks
+from giant.ray_tracer.shapes.surface import compute_edge_topology
+
+
+class TestSyntheticShapes(TestCase):
+
+    def test_tessellate_ellipsoid(self):
+
+        vertices, facets = benchmarks.tessellate_ellipsoid([3, 2, 1], 10000)
+
+        self.assertEqual(facets.shape, (10000, 3))
+
+        # all of the vertices are on the ellipsoid
+        np.testing.assert_allclose(((vertices / [3, 2, 1]) ** 2).sum(axis=-1), 1)
+
+        # the surface is closed
+        _, edge_facets = compute_edge_topology(facets)
+        self.assertTrue((edge_facets >= 0).all())
+
+        # the facets are wound so the normals point outward
+        corners = vertices[facets.astype(np.int64)]
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        self.assertTrue(((normals * corners.mean(axis=1)).sum(axis=-1) > 0).all())
+
+    def test_asteroid_mesh(self):
+
+        vertices, facets = benchmarks.asteroid_mesh(4000, seed=3)
+
+        # reproducible for the same seed
+        np.testing.assert_array_equal(vertices, benchmarks.asteroid_mesh(4000, seed=3)[0])
+
+        # different for a different seed
+        self.assertFalse(np.allclose(vertices, benchmarks.asteroid_mesh(4000, seed=4)[0]))
+
+        # irregular compared to the underlying ellipsoid
+        ellipsoid, ellipsoid_facets = benchmarks.tessellate_ellipsoid(num_facets=4000)
+        np.testing.assert_array_equal(facets, ellipsoid_facets)
+        self.assertGreater(np.abs(np.linalg.norm(vertices, axis=-1) / np.linalg.norm(ellipsoid, axis=-1) - 1).max(),
+                           0.02)
+
+    def test_make_surface(self):
+
+        for kind in benchmarks.SHAPE_KINDS:
+            with self.subTest(kind=kind):
+                surface = benchmarks.make_surface(kind, 1000)
+
+                self.assertEqual(surface.num_faces, 1024)
+
+        with self.assertRaises(ValueError):
+            benchmarks.make_surface('cube')
+
+
+class TestRayTracerBenchmarks(TestCase):
+
+    def setUp(self):
+
+        self.config = benchmarks.BenchmarkConfig(shape_kinds=('asteroid',), facet_counts=(400,), image_size=16,
+                                                 num_scan_lines=36, repeats=1)
+
+    def test_run_case(self):
+
+        results = benchmarks.run_case('ellipsoid', 400, self.config)
+
+        self.assertEqual(results['num_facets'], 400)
+
+        for metric in ['build_time', 'trace_rays_per_second', 'illumination_rays_per_second',
+                       'limb_scan_lines_per_second', 'peak_rss_bytes']:
+            self.assertGreater(results[metric], 0)
+
+        config = copy.copy(self.config)
+        config.benchmarks = ('trace',)
+
+        results = benchmarks.run_case('ellipsoid', 400, config)
+
+        self.assertIn('trace_rays_per_second', results)
+        self.assertNotIn('limb_scan_lines_per_second', results)
+
+        config.benchmarks = ('render',)
+
+        with self.assertRaises(ValueError):
+            benchmarks.run_case('ellipsoid', 400, config)
+
+    def test_run_suite(self):
+
+        report = benchmarks.run_suite(self.config)
+
+        self.assertEqual(len(report['results']), 1)
+        self.assertEqual(report['results'][0]['num_threads'], 1)
+        self.assertEqual(report['results'][0]['omp_num_threads'], '1')
+        self.assertEqual(report['results'][0]['giant_num_threads'], 1)
+        self.assertNotIn('error', report['results'][0])
+
+        with TemporaryDirectory() as temp_dir:
+            out_file = Path(temp_dir) / 'report.json'
+
+            benchmarks.save_report(report, out_file)
+
+            loaded = benchmarks.load_report(out_file)
+
+            self.assertEqual(loaded['results'], report['results'])
+            self.assertEqual(loaded['machine'], report['machine'])
+            self.assertEqual(loaded['config']['facet_counts'], [400])
+
+    def test_compare_reports(self):
+
+        baseline = {'results': [{'shape_kind': 'asteroid', 'num_facets': 400, 'num_threads': 1, 'build_time': 1.0,
+                                 'trace_rays_per_second': 100.0, 'peak_rss_bytes': 100},
+                                {'shape_kind': 'asteroid', 'num_facets': 1600, 'num_threads': 1, 'build_time': 1.0}]}
+
+        current = {'results': [{'shape_kind': 'asteroid', 'num_facets': 400, 'num_threads': 1, 'build_time': 2.0,
+                                'trace_rays_per_second': 105.0, 'peak_rss_bytes': 105},
+                               {'shape_kind': 'ellipsoid', 'num_facets': 400, 'num_threads': 1, 'build_time': 1.0}]}
+
+        comparisons = {comparison['metric']: comparison
+                       for comparison in benchmarks.compare_reports(current, baseline, tolerance=0.1)}
+
+        self.assertEqual(set(comparisons), {'build_time', 'trace_rays_per_second', 'peak_rss_bytes'})
+
+        self.assertTrue(comparisons['build_time']['regression'])
+        self.assertAlmostEqual(comparisons['build_time']['change'], -0.5)
+
+        self.assertFalse(comparisons['trace_rays_per_second']['regression'])
+        self.assertAlmostEqual(comparisons['trace_rays_per_second']['change'], 0.05)
+
+        self.assertFalse(comparisons['peak_rss_bytes']['regression'])
@@ -70,6 +70,61 @@ class TestFFTCorrelator(TestCase):
         self.assertAlmostEqual(cor_surf.max(), 1, places=4)
 
 
+class TestFFTCorrelator2D(TestCase):
+    def test_correlate_batch(self):
+        rng = np.random.RandomState(12)
+
+        img = rng.randn(40, 35)
+        temps = [img[20:27, 15:27], img[3:8, 4:13], img[10:17, 20:32], img[30:34, 1:4]]
+
+        correlator = gimp.FFTCorrelator2D(batch_size=1)
+
+        cor_surfs = correlator.correlate_batch(img, temps)
+
+        self.assertEqual(len(correlator), 1)
+
+        for temp, cor_surf in zip(temps, cor_surfs):
+            np.testing.assert_allclose(cor_surf, gimp.fft_correlator_2d(img, temp), atol=1e-10)
+
+            np.testing.assert_allclose(correlator(img, temp), cor_surf, atol=1e-10)
+
+        # the spectrum for each fft size and the local statistics for each template shape should be cached
+        self.assertEqual(len(correlator), 1)
+
+        self.assertEqual(len(correlator._entries[id(img)]['inverse_stds']), 3)
+
+        np.testing.assert_array_equal(gimp.FFTCorrelator2D().correlate_batch(img, temps)[1], cor_surfs[1])
+
+    def test_cache(self):
+        rng = np.random.RandomState(13)
+
+        imgs = [rng.randn(30, 30) for _ in range(3)]
+        temp = imgs[0][20:27, 15:27].copy()
+
+        correlator = gimp.FFTCorrelator2D(max_entries=2)
+
+        for img in imgs:
+            correlator(img, temp)
+
+        self.assertEqual(len(correlator), 2)
+        self.assertNotIn(id(imgs[0]), correlator._entries)
+
+        self.assertEqual(len(deepcopy(correlator)), 0)
+
+        # modifying an image in place requires clearing the cache
+        imgs[2][:] = imgs[0]
+        correlator.clear()
+
+        self.assertEqual(len(correlator), 0)
+
+        cor_surf = correlator(imgs[2], temp)
+
+        np.testing.assert_array_equal(np.unravel_index(cor_surf.argmax(), cor_surf.shape), [23, 21])
+
+        with self.assertRaises(ValueError):
+            gimp.FFTCorrelator2D(max_entries=0)
+
+
 class TestSpatialCorrelator(TestCase):
     def test_spatialcorrelator(self):
         # TODO: test a couple other coefficients as well
@@ -175,6 +230,41 @@ class TestImageProcessing(TestCase):
         # 0.5 is the maximum standard deviation that can be computed given the test image
         self.assertLessEqual(noise, 0.5)
 
+    def test_flatten_image_and_get_noise_level_local(self):
+        ip = gimp.ImageProcessing(image_flattening_noise_approximation='LOCAL', flattening_kernel_size=3)
+
+        rows, cols = np.mgrid[:40, :45]
+
+        rng = np.random.RandomState(51)
+        noise_level = np.where(cols < 21, 2., 6.)
+
+        test = 100 + 0.5*cols - 0.25*rows + noise_level*rng.randn(*rows.shape)
+
+        flat, noise_map = ip.flatten_image_and_get_noise_level(test)
+
+        self.assertEqual(noise_map.shape, test.shape)
+
+        # compare the flattening against fitting each tile individually
+        expected = test.copy()
+        for row_start in range(0, 40, 7):
+            for col_start in range(0, 45, 7):
+                tile = (slice(row_start, row_start + 7), slice(col_start, col_start + 7))
+                h_matrix = np.vstack([np.ones(rows[tile].size), cols[tile].ravel(), rows[tile].ravel()]).T
+                solution = np.linalg.lstsq(h_matrix, test[tile].ravel(), rcond=None)[0]
+                expected[tile] -= (h_matrix@solution).reshape(test[tile].shape)
+
+                # the noise is constant within each tile
+                self.assertTrue((noise_map[tile] == noise_map[tile][0, 0]).all())
+
+        expected = expected.astype(np.float32)
+        expected -= gimp.cv2.medianBlur(expected.copy(), 5)
+
+        np.testing.assert_allclose(flat, expected, atol=1e-3)
+
+        # the noise estimates should be close to the noise we added (the median blur removes some of it)
+        self.assertLess(np.median(noise_map[:, :21]), np.median(noise_map[:, 21:]))
+        np.testing.assert_allclose(np.median(noise_map[:, 21:])/np.median(noise_map[:, :21]), 3, rtol=0.25)
+
     def test_corners_to_roi(self):
         im = np.random.randn(500, 600)
         corn_row = [5.5, 3, 6.5, 8.9]
@@ -211,11 +301,65 @@ class TestImageProcessing(TestCase):
 
             self.assertFalse(poi)
 
+    def test_find_poi_in_roi_tiles(self):
+        rng = np.random.RandomState(23)
+
+        rows, cols = np.mgrid[:300, :350]
+        image = 100 + 0.1*cols + 3*rng.randn(*rows.shape)
+
+        # put a star on the tile boundaries and a few more scattered around
+        for row, col in [(63.2, 63.7), (127.5, 200.1), (10.3, 340.2), (250.8, 20.4), (190.1, 191.9)]:
+            image += 500*np.exp(-((rows - row)**2 + (cols - col)**2)/2)
+
+        ip = gimp.ImageProcessing(image_flattening_noise_approximation='LOCAL', flattening_kernel_size=4,
+                                  return_stats=True, poi_max_size=100)
+
+        full = ip.find_poi_in_roi(image)
+
+        tiled_ip = deepcopy(ip)
+        tiled_ip.poi_tile_size = 64
+        tiled_ip.poi_num_threads = 3
+
+        tiled = tiled_ip.find_poi_in_roi(image)
+
+        self.assertGreaterEqual(len(full[0]), 5)
+
+        for expected, actual in zip(full, tiled):
+            np.testing.assert_array_equal(np.array(actual), np.array(expected))
+
+        with self.subTest(region=(slice(50, 200), slice(40, 260))):
+            region = ip.corners_to_roi([50, 200], [40, 260])
+
+            np.testing.assert_array_equal(tiled_ip.find_poi_in_roi(image, region=region)[0],
+                                          ip.find_poi_in_roi(image, region=region)[0])
+
     def test_refine_locations(self):
         refined_locs, _ = self.ip.refine_locations(self.image, np.array([[25, 55], [520, 810]]))
 
         np.testing.assert_array_almost_equal(refined_locs.T, [[25, 55], [520.2, 810.9]], decimal=2)
 
+    def test_refine_locations_batch(self):
+        class SingleFit:
+            # hides fit_batch so that every point is fit individually
+            def __init__(self, psf):
+                self.psf = psf
+
+            def fit(self, x, y, z):
+                return self.psf.fit(x, y, z)
+
+        subs = np.array([[25, 55], [520, 810], [1, 810], [25, 56]])
+
+        ip = deepcopy(self.ip)
+        ip.save_psf = True
+        batch_locs, batch_illums, batch_psfs = ip.refine_locations(self.image, subs)
+
+        ip.centroiding = SingleFit(ip.centroiding)
+        single_locs, single_illums, single_psfs = ip.refine_locations(self.image, subs)
+
+        np.testing.assert_allclose(batch_locs, single_locs, atol=1e-8)
+        np.testing.assert_array_equal(batch_illums, single_illums)
+        self.assertEqual(len(batch_psfs), len(single_psfs))
+
     def test_locate_subpixel_poi_in_roi(self):
         self.ip.poi_min_size = 5
         self.ip.poi_max_size = 200
@@ -120,6 +120,39 @@ class TestGaussian(TestCase):
                 self.assertAlmostEqual(expected, actual,
                                        delta=self.sigma_expected*np.sqrt(cov[i, i]))
 
+    def test_fit_batch(self) -> None:
+
+        x_stack = np.stack([self.x, self.x + 3, self.x])
+        y_stack = np.stack([self.y, self.y, self.y - 2])
+        z_stack = np.stack([self.perturbed, self.perturbed, self.perturbed])
+
+        self.Class.save_residuals = True
+        fits = [self.Class.fit(x, y, z) for x, y, z in zip(x_stack, y_stack, z_stack)]
+
+        batch = self.Class.fit_batch(x_stack, y_stack, z_stack, return_psfs=True)
+        self.Class.save_residuals = False
+
+        self.assertTrue(batch.success.all())
+
+        for ind, fit in enumerate(fits):
+            with self.subTest(stamp=ind):
+                np.testing.assert_allclose(batch.centroids[ind], fit.centroid, atol=1e-8)
+
+                for s_ind, s in enumerate(self.state_order):
+                    self.assertAlmostEqual(batch.states[ind, s_ind], getattr(fit, s),
+                                           delta=1e-6*max(abs(getattr(fit, s)), 1))
+
+                np.testing.assert_allclose(batch.covariances[ind], fit.covariance, rtol=1e-5, atol=1e-10)
+                np.testing.assert_allclose(batch.residual_std[ind], fit.residual_std, rtol=1e-6)
+
+                self.assertIsInstance(batch.psfs[ind], self.Class)
+                np.testing.assert_allclose(batch.psfs[ind].centroid, fit.centroid, atol=1e-8)
+
+        np.testing.assert_allclose(batch.centroids[1], batch.centroids[0] + [3, 0], atol=1e-6)
+        np.testing.assert_allclose(batch.centroids[2], batch.centroids[0] + [0, -2], atol=1e-6)
+
+        self.assertIsNone(self.Class.fit_batch(x_stack, y_stack, z_stack).psfs)
+
     def test_generate_kernel(self) -> None:
 
         size = 3
@@ -1,10 +1,12 @@
 from unittest import TestCase, skip
+from tempfile import TemporaryDirectory
+from pathlib import Path
 import copy
 
 import numpy as np
 
 from giant import rotations as at
-from giant.ray_tracer import kdtree, shapes, rays
+from giant.ray_tracer import kdtree, flat_kdtree, shapes, rays
 
 
 class TestKDTree(TestCase):
@@ -497,3 +499,717 @@ class TestKDNode(TestCase):
         # TODO: figure out how to implement this
         pass
 
+
+
+def tessellate_sphere(radius, n_lat, n_lon, center=(0, 0, 0)):
+
+    lat = np.linspace(-np.pi / 2, np.pi / 2, n_lat)
+    lon = np.linspace(0, 2 * np.pi, n_lon, endpoint=False)
+
+    lat, lon = np.meshgrid(lat, lon, indexing='ij')
+
+    vertices = radius * np.stack([np.cos(lat) * np.cos(lon),
+                                  np.cos(lat) * np.sin(lon),
+                                  np.sin(lat)], axis=-1).reshape(-1, 3) + np.asarray(center)
+
+    facets = []
+    for i in range(n_lat - 1):
+        for j in range(n_lon):
+            a = i * n_lon + j
+            b = i * n_lon + (j + 1) % n_lon
+            facets.append([a, b, b + n_lon])
+            facets.append([a, b + n_lon, a + n_lon])
+
+    return vertices, np.array(facets)
+
+
+def clustered_spheres():
+
+    # a coarse sphere with a small densely tessellated sphere next to it so the facet density is non-uniform
+    verts, facets = tessellate_sphere(1, 20, 40)
+    dense_verts, dense_facets = tessellate_sphere(0.05, 15, 30, center=(1.5, 0, 0))
+
+    surface = shapes.Triangle64(np.vstack([verts, dense_verts]), 1,
+                                np.vstack([facets, dense_facets + verts.shape[0]]))
+
+    # offset the grid so that no ray strikes exactly on a shared facet edge
+    grid = np.linspace(-1.1, 1.1, 15) + 0.0123
+    starts = np.array([[5, y, z] for y in grid for z in grid]).T
+    directions = np.array([[-1, 0, 0]], dtype=np.float64).T.repeat(starts.shape[1], axis=1)
+
+    return surface, rays.Rays(starts, directions)
+
+
+def leaf_sizes(node):
+
+    if node.has_surface:
+        return [node.surface.num_faces]
+
+    return leaf_sizes(node.left) + leaf_sizes(node.right)
+
+
+class TestKDTreeSAH(TestCase):
+
+    def setUp(self):
+
+        self.surface, self.rays = clustered_spheres()
+
+    def test_build(self):
+
+        tree = kdtree.KDTree(self.surface, max_depth=18)
+
+        tree.build(print_progress=False, split_method=kdtree.SplitMethods.SAH)
+
+        leaves = leaf_sizes(tree.root)
+
+        # every facet ends up in exactly one leaf
+        self.assertEqual(sum(leaves), self.surface.num_faces)
+        self.assertGreater(len(leaves), 1)
+
+    def test_cost(self):
+
+        median_tree = kdtree.KDTree(self.surface, max_depth=18)
+        median_tree.build(print_progress=False)
+
+        sah_tree = kdtree.KDTree(self.surface, max_depth=18)
+        sah_tree.build(print_progress=False, split_method="sah")
+
+        self.assertLess(kdtree.compute_sah_cost(sah_tree), kdtree.compute_sah_cost(median_tree))
+
+    def test_trace(self):
+
+        tree = kdtree.KDTree(self.surface, max_depth=18)
+
+        tree.build(print_progress=False, split_method=kdtree.SplitMethods.SAH)
+
+        tree_ints = tree.trace(self.rays)
+        surf_ints = self.surface.trace(self.rays)
+
+        np.testing.assert_array_equal(tree_ints["check"], surf_ints["check"])
+        self.assertTrue(tree_ints["check"].any())
+
+        hits = surf_ints["check"]
+
+        np.testing.assert_array_almost_equal(tree_ints["intersect"][hits], surf_ints["intersect"][hits])
+        np.testing.assert_array_almost_equal(tree_ints["normal"][hits], surf_ints["normal"][hits])
+
+
+class TestKDTreeBuildParallel(TestCase):
+
+    def setUp(self):
+
+        self.surface, self.rays = clustered_spheres()
+
+    def test_build(self):
+
+        for split_method in kdtree.SplitMethods:
+
+            with self.subTest(split_method=split_method):
+
+                tree = kdtree.KDTree(self.surface, max_depth=10)
+
+                stats = tree.build_parallel(force=False, print_progress=False, split_method=split_method)
+
+                leaves = leaf_sizes(tree.root)
+
+                self.assertEqual(sum(leaves), self.surface.num_faces)
+                self.assertEqual(stats.num_leaves, len(leaves))
+                self.assertEqual(stats.max_leaf_size, max(leaves))
+                self.assertEqual(stats.num_nodes, 2 * len(leaves) - 1)
+                self.assertGreaterEqual(stats.build_time, 0)
+                self.assertGreater(stats.peak_memory, 0)
+
+                self.assertEqual(tree.root.order, int(np.log10(max(leaves))))
+                self.assertEqual(tree.bounding_box, self.surface.bounding_box)
+
+    def test_median_split(self):
+
+        tree = kdtree.KDTree(self.surface, max_depth=3)
+
+        tree.build_parallel(print_progress=False)
+
+        # the median split puts half of the facets on each side
+        self.assertEqual(leaf_sizes(tree.root), [self.surface.num_faces // 4] * 4)
+
+    def test_trace(self):
+
+        for split_method in kdtree.SplitMethods:
+
+            with self.subTest(split_method=split_method):
+
+                tree = kdtree.KDTree(self.surface, max_depth=18)
+
+                tree.build_parallel(print_progress=False, split_method=split_method)
+
+                tree_ints = tree.trace(self.rays)
+                surf_ints = self.surface.trace(self.rays)
+
+                np.testing.assert_array_equal(tree_ints["check"], surf_ints["check"])
+
+                hits = surf_ints["check"]
+
+                np.testing.assert_array_almost_equal(tree_ints["intersect"][hits], surf_ints["intersect"][hits])
+                np.testing.assert_array_almost_equal(tree_ints["normal"][hits], surf_ints["normal"][hits])
+
+
+class TestFlatKDTree(TestCase):
+
+    def setUp(self):
+
+        self.surface, self.rays = clustered_spheres()
+
+    def check_trace(self, tree_ints, surf_ints):
+
+        np.testing.assert_array_equal(tree_ints["check"], surf_ints["check"])
+        self.assertTrue(tree_ints["check"].any())
+
+        hits = surf_ints["check"]
+
+        np.testing.assert_array_almost_equal(tree_ints["distance"][hits], surf_ints["distance"][hits])
+        np.testing.assert_array_almost_equal(tree_ints["intersect"][hits], surf_ints["intersect"][hits])
+        np.testing.assert_array_almost_equal(tree_ints["normal"][hits], surf_ints["normal"][hits])
+        np.testing.assert_array_almost_equal(tree_ints["albedo"][hits], surf_ints["albedo"][hits])
+
+    def test_from_surface(self):
+
+        for split_method in kdtree.SplitMethods:
+
+            with self.subTest(split_method=split_method):
+
+                tree = flat_kdtree.FlatKDTree.from_surface(self.surface, max_depth=18, split_method=split_method)
+
+                tree_ints = tree.trace(self.rays)
+                surf_ints = self.surface.trace(self.rays)
+
+                self.check_trace(tree_ints, surf_ints)
+
+                # the facet map takes us back to the original facets
+                hits = surf_ints["check"]
+                np.testing.assert_array_equal(tree.facet_map[tree_ints["facet"][hits]], surf_ints["facet"][hits])
+
+    def test_from_kdtree(self):
+
+        tree = kdtree.KDTree(self.surface, max_depth=18)
+        tree.build(print_progress=False)
+        tree.rotate([0.1, -0.2, 0.3])
+        tree.translate([1, 2, 3])
+
+        flat = flat_kdtree.FlatKDTree.from_kdtree(tree)
+
+        self.assertEqual(flat.num_faces, self.surface.num_faces)
+        self.assertEqual(flat.num_nodes, 2 * len(leaf_sizes(tree.root)) - 1)
+
+        trays = copy.copy(self.rays)
+        trays.rotate([0.1, -0.2, 0.3])
+        trays.translate(np.array([1, 2, 3]))
+
+        tree_ints = tree.trace(trays)
+        flat_ints = flat.trace(trays)
+
+        self.check_trace(flat_ints, tree_ints)
+
+        hits = tree_ints["check"]
+        np.testing.assert_array_equal(flat.facet_map[flat_ints["facet"][hits]], tree_ints["facet"][hits])
+
+    def test_rotate_translate(self):
+
+        tree = flat_kdtree.FlatKDTree.from_surface(self.surface, max_depth=12)
+
+        rotation = at.Rotation([0.1, -0.2, 0.3])
+        translation = np.array([1, 2, 3])
+
+        tree.rotate(rotation)
+        tree.translate(translation)
+
+        surface = copy.deepcopy(self.surface)
+        surface.rotate(rotation)
+        surface.translate(translation)
+
+        trays = copy.copy(self.rays)
+        trays.rotate(rotation)
+        trays.translate(translation)
+
+        self.check_trace(tree.trace(trays), surface.trace(trays))
+
+    def test_save_load(self):
+
+        tree = flat_kdtree.FlatKDTree.from_surface(self.surface, max_depth=12)
+        tree.rotate([0.1, -0.2, 0.3])
+        tree.translate([1, 2, 3])
+
+        trays = copy.copy(self.rays)
+        trays.rotate([0.1, -0.2, 0.3])
+        trays.translate(np.array([1, 2, 3]))
+
+        expected = tree.trace(trays)
+
+        with TemporaryDirectory() as tmp:
+
+            filename = Path(tmp) / 'tree.fkd'
+
+            tree.save(filename)
+
+            for memory_map in [True, False]:
+
+                with self.subTest(memory_map=memory_map):
+
+                    loaded = flat_kdtree.FlatKDTree.load(filename, memory_map=memory_map)
+
+                    np.testing.assert_array_equal(loaded.node_bounds, tree.node_bounds)
+                    np.testing.assert_array_equal(loaded.facets, tree.facets)
+                    np.testing.assert_array_equal(loaded.facet_map, tree.facet_map)
+                    np.testing.assert_array_almost_equal(loaded.position, tree.position)
+                    self.assertEqual(loaded.bounding_box, tree.bounding_box)
+
+                    results = loaded.trace(trays)
+
+                    np.testing.assert_array_equal(results["check"], expected["check"])
+                    np.testing.assert_array_equal(results["facet"], expected["facet"])
+                    np.testing.assert_array_almost_equal(results["intersect"][expected["check"]],
+                                                         expected["intersect"][expected["check"]])
+
+                    del loaded
+
+    def test_load_invalid(self):
+
+        tree = flat_kdtree.FlatKDTree.from_surface(self.surface, max_depth=4)
+
+        with TemporaryDirectory() as tmp:
+
+            filename = Path(tmp) / 'tree.fkd'
+
+            tree.save(filename)
+
+            data = bytearray(filename.read_bytes())
+
+            # bump the version
+            data[8] += 1
+            filename.write_bytes(bytes(data))
+
+            with self.assertRaisesRegex(ValueError, 'version'):
+                flat_kdtree.FlatKDTree.load(filename, memory_map=False)
+
+            # break the magic
+            data[:8] = b'NOTATREE'
+            filename.write_bytes(bytes(data))
+
+            with self.assertRaisesRegex(ValueError, 'not a flat kdtree'):
+                flat_kdtree.FlatKDTree.load(filename, memory_map=False)
+
+
+    def test_trace_float32(self):
+
+        tree = flat_kdtree.FlatKDTree.from_surface(self.surface, max_depth=12)
+        tree.rotate([0.1, -0.2, 0.3])
+        tree.translate([1, 2, 3])
+
+        trays = copy.copy(self.rays)
+        trays.rotate([0.1, -0.2, 0.3])
+        trays.translate(np.array([1, 2, 3]))
+
+        trays32 = rays.Rays32(trays.start, trays.direction)
+
+        expected = tree.trace(trays)
+        results = tree.trace(trays32)
+
+        self.assertEqual(results.dtype, rays.INTERSECT32_DTYPE)
+
+        np.testing.assert_array_equal(results["check"], expected["check"])
+        self.assertTrue(results["check"].any())
+
+        hits = expected["check"]
+
+        np.testing.assert_array_equal(results["facet"][hits], expected["facet"][hits])
+        np.testing.assert_allclose(results["intersect"][hits], expected["intersect"][hits], atol=1e-4)
+        np.testing.assert_allclose(results["normal"][hits], expected["normal"][hits], atol=1e-5)
+        np.testing.assert_allclose(results["distance"][hits], expected["distance"][hits], atol=1e-4)
+
+        np.testing.assert_array_equal(tree.is_occluded(trays32), hits)
+
+        # ignoring the struck facets should let the rays pass through to the back of the sphere
+        trays32.ignore = np.where(hits, results["facet"], -1)
+
+        behind = tree.trace(trays32)
+
+        np.testing.assert_array_equal(behind["check"], hits)
+        self.assertTrue((behind["distance"][hits] > results["distance"][hits]).all())
+
+    def test_float32_watertight(self):
+
+        vertices, facets = tessellate_sphere(1, 30, 60)
+
+        tree = flat_kdtree.FlatKDTree.from_surface(shapes.Triangle64(vertices, 1, facets), max_depth=10)
+
+        # aim directly at each vertex and the middle of each edge on the near side of the sphere, where the rays are
+        # shared by multiple facets and could slip between them if the intersection was not watertight
+        start = np.array([0, 0, 10.])
+        targets = np.vstack([vertices, (vertices[facets[:, 0]] + vertices[facets[:, 1]]) / 2])
+        targets = targets[targets[:, 2] > 0.2]
+
+        directions = (targets - start).T
+
+        results = tree.trace(rays.Rays32(start, directions))
+
+        self.assertTrue(results["check"].all())
+
+        self.assertTrue(tree.is_occluded(rays.Rays32(start, directions)).all())
+
+
+class TestKDTreePacketTrace(TestCase):
+
+    def setUp(self):
+
+        self.surface, _ = clustered_spheres()
+
+        self.tree = kdtree.KDTree(self.surface, max_depth=18)
+        self.tree.build_parallel(print_progress=False)
+
+        # a camera like bundle of rays all starting from the same point
+        grid = np.linspace(-0.25, 0.25, 37) + 0.00123
+        directions = np.array([[-1, y, z] for y in grid for z in grid]).T
+        directions /= np.linalg.norm(directions, axis=0, keepdims=True)
+
+        self.rays = rays.Rays(np.array([5., 0.1, 0.05]), directions)
+
+    def check_trace(self, packet_ints, single_ints):
+
+        np.testing.assert_array_equal(packet_ints["check"], single_ints["check"])
+        self.assertTrue(packet_ints["check"].any())
+        self.assertFalse(packet_ints["check"].all())
+
+        np.testing.assert_array_equal(packet_ints["facet"], single_ints["facet"])
+        np.testing.assert_array_almost_equal(packet_ints["distance"], single_ints["distance"])
+        np.testing.assert_array_almost_equal(packet_ints["intersect"], single_ints["intersect"])
+        np.testing.assert_array_almost_equal(packet_ints["normal"], single_ints["normal"])
+        np.testing.assert_array_almost_equal(packet_ints["albedo"], single_ints["albedo"])
+
+    def test_trace(self):
+
+        single_ints = self.tree.trace(self.rays, packet_size=1)
+
+        for packet_size in [4, 8, 16]:
+
+            for omp in [True, False]:
+
+                with self.subTest(packet_size=packet_size, omp=omp):
+
+                    self.check_trace(self.tree.trace(self.rays, omp=omp, packet_size=packet_size), single_ints)
+
+    def test_trace_transformed(self):
+
+        self.tree.rotate([0.1, -0.2, 0.3])
+        self.tree.translate(np.array([1, 2, 3]))
+
+        trays = copy.copy(self.rays)
+        trays.rotate([0.1, -0.2, 0.3])
+        trays.translate(np.array([1, 2, 3]))
+
+        self.check_trace(self.tree.trace(trays), self.tree.trace(trays, packet_size=1))
+
+    def test_ignore(self):
+
+        first = self.tree.trace(self.rays, packet_size=1)
+
+        self.rays.ignore = first["facet"]
+
+        self.check_trace(self.tree.trace(self.rays), self.tree.trace(self.rays, packet_size=1))
+
+        # the ignored facets are not struck again
+        second = self.tree.trace(self.rays)
+        hits = second["check"] & first["check"]
+        self.assertTrue((second["facet"][hits] != first["facet"][hits]).all())
+
+    def test_packet_size(self):
+
+        for packet_size in [0, 17]:
+            with self.subTest(packet_size=packet_size):
+                with self.assertRaises(ValueError):
+                    self.tree.trace(self.rays, packet_size=packet_size)
+
+
+class TestOcclusion(TestCase):
+
+    def setUp(self):
+
+        self.surface, self.rays = clustered_spheres()
+
+    def shadow_rays(self, shape):
+
+        # shadow rays leaving from the surface toward a light source, ignoring the facet they start on
+        intersects = shape.trace(self.rays)
+        hits = intersects["check"]
+
+        starts = intersects["intersect"][hits].T
+        directions = np.array([[3, 4, 2]]).T - starts
+
+        return rays.Rays(starts, directions, ignore=intersects["facet"][hits])
+
+    def test_surface(self):
+
+        shadow_rays = self.shadow_rays(self.surface)
+
+        occluded = self.surface.is_occluded(shadow_rays)
+
+        self.assertTrue(occluded.any())
+        self.assertFalse(occluded.all())
+
+        np.testing.assert_array_equal(occluded, self.surface.trace(shadow_rays)["check"])
+
+    def test_kdtree(self):
+
+        expected = self.surface.is_occluded(self.shadow_rays(self.surface))
+
+        tree = kdtree.KDTree(self.surface, max_depth=18)
+        tree.build_parallel(print_progress=False)
+
+        flat = flat_kdtree.FlatKDTree.from_kdtree(tree)
+
+        for shape in [tree, flat]:
+
+            with self.subTest(shape=type(shape).__name__):
+
+                shadow_rays = self.shadow_rays(shape)
+
+                np.testing.assert_array_equal(shape.is_occluded(shadow_rays), expected)
+                np.testing.assert_array_equal(shape.is_occluded(shadow_rays, omp=False), expected)
+
+    def test_kdtree_transformed(self):
+
+        tree = kdtree.KDTree(self.surface, max_depth=18)
+        tree.build_parallel(print_progress=False)
+
+        flat = flat_kdtree.FlatKDTree.from_kdtree(tree)
+
+        for shape in [tree, flat]:
+            shape.rotate([0.1, -0.2, 0.3])
+            shape.translate(np.array([1, 2, 3]))
+
+        trays = copy.copy(self.rays)
+        trays.rotate([0.1, -0.2, 0.3])
+        trays.translate(np.array([1, 2, 3]))
+
+        for shape in [tree, flat]:
+
+            with self.subTest(shape=type(shape).__name__):
+
+                np.testing.assert_array_equal(shape.is_occluded(trays), shape.trace(trays)["check"])
+
+
+class TestTraceOut(TestCase):
+
+    def setUp(self):
+
+        self.surface, self.rays = clustered_spheres()
+
+        self.tree = kdtree.KDTree(self.surface, max_depth=18)
+        self.tree.build_parallel(print_progress=False)
+
+        self.flat = flat_kdtree.FlatKDTree.from_kdtree(self.tree)
+
+    def check_trace(self, workspace, expected):
+
+        self.assertEqual(len(workspace), expected.size)
+        self.assertTrue(expected["check"].any())
+
+        np.testing.assert_array_equal(workspace.check, expected["check"])
+        np.testing.assert_array_equal(workspace.facet, expected["facet"])
+        np.testing.assert_array_almost_equal(workspace.distance, expected["distance"])
+        np.testing.assert_array_almost_equal(workspace.intersect, expected["intersect"])
+        np.testing.assert_array_almost_equal(workspace.normal, expected["normal"])
+        np.testing.assert_array_almost_equal(workspace.albedo, expected["albedo"])
+
+    def test_trace(self):
+
+        for shape in [self.surface, self.tree, self.flat]:
+
+            with self.subTest(shape=type(shape).__name__):
+
+                workspace = rays.TraceWorkspace()
+
+                self.assertIs(shape.trace(self.rays, out=workspace), workspace)
+
+                self.check_trace(workspace, shape.trace(self.rays))
+
+    def test_trace_transformed(self):
+
+        for shape in [self.tree, self.flat]:
+            shape.rotate([0.1, -0.2, 0.3])
+            shape.translate(np.array([1, 2, 3]))
+
+        trays = copy.copy(self.rays)
+        trays.rotate([0.1, -0.2, 0.3])
+        trays.translate(np.array([1, 2, 3]))
+
+        original_start = trays.start.copy()
+
+        # a camera like bundle so that the tree is traced in packets
+        grid = np.linspace(-0.25, 0.25, 21) + 0.00123
+        directions = np.array([[-1, y, z] for y in grid for z in grid]).T
+        bundle = rays.Rays(np.array([5., 0.1, 0.05]), directions)
+        bundle.rotate([0.1, -0.2, 0.3])
+        bundle.translate(np.array([1, 2, 3]))
+
+        workspace = rays.TraceWorkspace()
+
+        for shape in [self.tree, self.flat]:
+
+            for trace_rays in [trays, bundle]:
+
+                for omp in [True, False]:
+
+                    with self.subTest(shape=type(shape).__name__, num_rays=trace_rays.num_rays, omp=omp):
+
+                        expected = shape.trace(trace_rays, omp=omp)
+
+                        shape.trace(trace_rays, omp=omp, out=workspace)
+
+                        self.check_trace(workspace, expected)
+
+                        # the results match tracing the transformed surface directly
+                        surface = copy.deepcopy(self.surface)
+                        surface.rotate([0.1, -0.2, 0.3])
+                        surface.translate(np.array([1, 2, 3]))
+
+                        np.testing.assert_array_equal(workspace.check, surface.trace(trace_rays)["check"])
+
+        # the rays are not modified by tracing
+        np.testing.assert_array_equal(trays.start, original_start)
+
+    def test_reuse(self):
+
+        workspace = rays.TraceWorkspace()
+
+        self.tree.trace(self.rays, out=workspace)
+
+        capacity = workspace.capacity
+        buffer = workspace.intersect
+
+        subset = self.rays[:self.rays.num_rays // 2]
+
+        self.tree.trace(subset, out=workspace)
+
+        # the buffers are reused for fewer rays
+        self.assertEqual(workspace.capacity, capacity)
+        self.assertTrue(np.shares_memory(buffer, workspace.intersect))
+
+        self.check_trace(workspace, self.tree.trace(subset))
+
+        converted = workspace.to_intersect_array()
+
+        self.assertEqual(converted.dtype, rays.INTERSECT_DTYPE)
+        self.assertFalse(np.shares_memory(converted["intersect"], workspace.intersect))
+        np.testing.assert_array_equal(converted["check"], workspace.check)
+        np.testing.assert_array_equal(converted["intersect"], workspace.intersect)
+
+
+class TestSilhouetteLimbs(TestCase):
+
+    def setUp(self):
+
+        verts, facets = tessellate_sphere(1, 30, 60)
+        small_verts, small_facets = tessellate_sphere(0.6, 15, 30, center=(0.9, 0.5, 0.3))
+
+        self.surface = shapes.Triangle64(np.vstack([verts, small_verts]), 1,
+                                         np.vstack([facets, small_facets + verts.shape[0]]))
+
+        self.tree = kdtree.KDTree(self.surface, max_depth=10)
+        self.tree.build(force=True, print_progress=False)
+
+        self.tree.rotate(at.Rotation([0.2, -0.4, 0.1]))
+        self.tree.translate([0.1, 0.2, 10])
+
+        self.observer = np.array([0.3, -0.2, 1.0])
+
+        center = np.array([0.1, 0.2, 10]) - self.observer
+        self.scan_center_dir = center / np.linalg.norm(center)
+
+        perp_x = np.cross(self.scan_center_dir, [1, 0, 0])
+        perp_x /= np.linalg.norm(perp_x)
+        perp_y = np.cross(self.scan_center_dir, perp_x)
+
+        angles = np.linspace(0, 2 * np.pi, 180, endpoint=False) + 0.001
+
+        self.scan_dirs = np.outer(perp_x, np.cos(angles)) + np.outer(perp_y, np.sin(angles))
+
+    def test_compute_edge_topology(self):
+
+        tetrahedron = np.array([[0, 1, 2], [0, 3, 1], [1, 3, 2], [2, 3, 0]])
+
+        edges, edge_facets = shapes.surface.compute_edge_topology(tetrahedron)
+
+        self.assertEqual(edges.shape, (6, 2))
+        self.assertTrue((edges[:, 0] < edges[:, 1]).all())
+        self.assertTrue((edge_facets >= 0).all())
+
+        for edge, (facet_a, facet_b) in zip(edges, edge_facets):
+            self.assertIn(edge[0], tetrahedron[facet_a])
+            self.assertIn(edge[1], tetrahedron[facet_a])
+            self.assertIn(edge[0], tetrahedron[facet_b])
+            self.assertIn(edge[1], tetrahedron[facet_b])
+
+        # an open surface has boundary edges with only a single facet
+        edges, edge_facets = shapes.surface.compute_edge_topology([[0, 1, 2]])
+
+        self.assertEqual(edges.shape, (3, 2))
+        np.testing.assert_array_equal(edge_facets[:, 1], -1)
+
+    def test_matches_traced(self):
+
+        traced = shapes.surface.find_limbs_surface(self.tree, self.scan_center_dir, self.scan_dirs, self.observer)
+        silhouette = shapes.surface.find_limbs_silhouette(self.tree, self.scan_center_dir, self.scan_dirs,
+                                                          self.observer)
+
+        self.assertFalse(np.isnan(silhouette).any())
+
+        # the depth of a grazing limb is poorly determined by tracing, so compare the directions to the limbs
+        traced /= np.linalg.norm(traced, axis=0, keepdims=True)
+        silhouette_dirs = silhouette / np.linalg.norm(silhouette, axis=0, keepdims=True)
+
+        np.testing.assert_allclose(silhouette_dirs, traced, atol=1e-6)
+
+        # rays just outside of the limbs miss the surface and rays just inside hit it
+        perps = self.scan_dirs - np.outer(self.scan_center_dir, self.scan_center_dir @ self.scan_dirs)
+        perps /= np.linalg.norm(perps, axis=0, keepdims=True)
+
+        outside = rays.Rays(self.observer, silhouette_dirs + 1e-6 * perps)
+        inside = rays.Rays(self.observer, silhouette_dirs - 1e-6 * perps)
+
+        self.assertFalse(self.tree.trace(outside)["check"].any())
+        self.assertTrue(self.tree.trace(inside)["check"].all())
+
+    def test_occluded_silhouette(self):
+
+        verts, facets = tessellate_sphere(1, 30, 60)
+
+        # a small sphere completely hidden behind the large one adds interior silhouette edges
+        hidden_verts, hidden_facets = tessellate_sphere(0.3, 15, 30, center=(0, 0, 3))
+
+        surface = shapes.Triangle64(np.vstack([verts, hidden_verts]), 1,
+                                    np.vstack([facets, hidden_facets + verts.shape[0]]))
+
+        alone = shapes.Triangle64(verts, 1, facets)
+
+        observer = np.array([0, 0, -10.0])
+
+        angles = np.linspace(0, 2 * np.pi, 36, endpoint=False) + 0.001
+        scan_dirs = np.vstack([np.cos(angles), np.sin(angles), np.zeros(angles.size)])
+
+        limbs = shapes.surface.find_limbs_silhouette(surface, [0, 0, 1], scan_dirs, observer)
+
+        np.testing.assert_allclose(limbs, shapes.surface.find_limbs_silhouette(alone, [0, 0, 1], scan_dirs, observer))
+
+    def test_find_limbs(self):
+
+        # surfaces use the silhouette when their tessellation is available
+        np.testing.assert_array_equal(self.tree.find_limbs(self.scan_center_dir, self.scan_dirs, self.observer),
+                                      shapes.surface.find_limbs_silhouette(self.tree, self.scan_center_dir,
+                                                                           self.scan_dirs, self.observer))
+
+        # untransformed surfaces work the same way
+        np.testing.assert_allclose(
+            self.surface.find_limbs(self.tree.rotation.matrix @ self.scan_center_dir,
+                                    self.tree.rotation.matrix @ self.scan_dirs,
+                                    self.tree.rotation.matrix @ (self.observer - np.array([0.1, 0.2, 10]))),
+            self.tree.rotation.matrix @ self.tree.find_limbs(self.scan_center_dir, self.scan_dirs, self.observer),
+            atol=1e-10
+        )
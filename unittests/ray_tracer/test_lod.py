@@ -0,0 +1,232 @@
+from unittest import TestCase
+import copy
+
+import numpy as np
+
+from giant import rotations as at
+from giant.camera_models import PinholeModel
+from giant.ray_tracer import kdtree, shapes
+from giant.ray_tracer.rays import Rays, compute_rays
+from giant.ray_tracer.scene import Scene, SceneObject
+from giant.ray_tracer.render import render_template
+from giant.ray_tracer.lod import LODShape, decimate_surface, compute_resolution
+
+
+def tessellate_sphere(radius, n_lat, n_lon, center=(0, 0, 0)):
+
+    lat = np.linspace(-np.pi / 2, np.pi / 2, n_lat)
+    lon = np.linspace(0, 2 * np.pi, n_lon, endpoint=False)
+
+    lat, lon = np.meshgrid(lat, lon, indexing='ij')
+
+    vertices = radius * np.stack([np.cos(lat) * np.cos(lon),
+                                  np.cos(lat) * np.sin(lon),
+                                  np.sin(lat)], axis=-1).reshape(-1, 3) + np.asarray(center)
+
+    facets = []
+    for i in range(n_lat - 1):
+        for j in range(n_lon):
+            a = i * n_lon + j
+            b = i * n_lon + (j + 1) % n_lon
+            facets.append([a, b, b + n_lon])
+            facets.append([a, b + n_lon, a + n_lon])
+
+    return vertices, np.array(facets)
+
+
+class TestDecimateSurface(TestCase):
+
+    def setUp(self):
+
+        verts, facets = tessellate_sphere(1, 60, 120)
+
+        self.surface = shapes.Triangle64(verts, np.linspace(0.8, 1.2, verts.shape[0]), facets)
+
+    def test_decimate(self):
+
+        resolution = compute_resolution(self.surface)
+
+        decimated = decimate_surface(self.surface, 4 * resolution)
+
+        self.assertLess(decimated.facets.shape[0], self.surface.facets.shape[0] / 5)
+        self.assertGreater(decimated.facets.shape[0], 100)
+
+        # the vertices stay close to the sphere
+        np.testing.assert_allclose(np.linalg.norm(decimated.vertices, axis=-1), 1, atol=4 * resolution)
+
+        # the albedos are averaged so they stay in range
+        self.assertEqual(decimated.albedos.size, decimated.vertices.shape[0])
+        self.assertTrue(((decimated.albedos >= 0.8) & (decimated.albedos <= 1.2)).all())
+
+        # no degenerate or duplicate facets
+        self.assertTrue((np.diff(np.sort(decimated.facets, axis=-1), axis=-1) > 0).all())
+        self.assertEqual(np.unique(np.sort(decimated.facets, axis=-1), axis=0).shape[0], decimated.facets.shape[0])
+
+        # the facets still face outward
+        centers = decimated.vertices[decimated.facets].mean(axis=1)
+        valid = np.isfinite(decimated.normals).all(axis=-1)
+        self.assertGreater(((decimated.normals * centers).sum(axis=-1)[valid] > 0).mean(), 0.99)
+
+    def test_moved_tree(self):
+
+        tree = kdtree.KDTree(self.surface, max_depth=12)
+        tree.build_parallel(print_progress=False)
+        tree.rotate([0.1, -0.2, 0.3])
+        tree.translate([1, 2, 3])
+
+        decimated = decimate_surface(tree, 4 * compute_resolution(tree))
+
+        # the decimated surface is in the current frame of the tree
+        np.testing.assert_allclose(decimated.vertices.mean(axis=0), [1, 2, 3], atol=0.05)
+
+    def test_invalid(self):
+
+        with self.assertRaises(ValueError):
+            decimate_surface(self.surface, 0)
+
+        with self.assertRaises(ValueError):
+            decimate_surface(self.surface, 100)
+
+        with self.assertRaises(ValueError):
+            decimate_surface(shapes.Ellipsoid(np.zeros(3), principal_axes=np.ones(3)), 0.1)
+
+
+class TestLODShape(TestCase):
+
+    def setUp(self):
+
+        verts, facets = tessellate_sphere(1, 80, 160)
+
+        self.tree = kdtree.KDTree(shapes.Triangle64(verts, 1.0, facets), max_depth=16)
+        self.tree.build_parallel(print_progress=False)
+
+        self.lod = LODShape.from_shape(self.tree, num_levels=4, min_faces=100)
+
+        self.model = PinholeModel(focal_length=10, kx=20, ky=20, px=50, py=50, n_rows=100, n_cols=100)
+
+        sun_direction = np.array([-0.6, 0.2, -0.77])
+        sun_direction /= np.linalg.norm(sun_direction)
+
+        self.sun = SceneObject(shapes.Point(np.array([0, 0, 40]) + 1e4 * sun_direction))
+
+    def test_creation(self):
+
+        self.assertEqual(len(self.lod.levels), 4)
+        self.assertIs(self.lod.levels[0], self.tree)
+        self.assertEqual(self.lod.active_level, 0)
+        self.assertIs(self.lod.shape, self.tree)
+
+        # each level is coarser than the last
+        self.assertTrue((np.diff(self.lod.resolutions) > 0).all())
+
+        # the facet numbers of every level must fit in a scene
+        self.assertEqual(self.lod.order, max(level.order for level in self.lod.levels))
+
+        with self.assertRaises(ValueError):
+            LODShape([])
+
+        with self.assertRaises(ValueError):
+            LODShape([self.tree], resolutions=[1, 2])
+
+        with self.assertRaises(ValueError):
+            LODShape.from_shape(self.tree, reduction=1)
+
+        with self.assertRaises(ValueError):
+            self.lod.active_level = 4
+
+        # the hierarchy stops before the levels get too small
+        self.assertEqual(len(LODShape.from_shape(self.tree, num_levels=10, min_faces=5000).levels), 2)
+
+    def test_select(self):
+
+        self.assertEqual(self.lod.select(0), 0)
+        self.assertEqual(self.lod.select(np.nan), 0)
+        self.assertEqual(self.lod.select(1e6), 3)
+
+        level = self.lod.select(2.1 * self.lod.resolutions[1])
+
+        self.assertEqual(level, 1)
+        self.assertEqual(self.lod.active_level, 1)
+        self.assertIs(self.lod.shape, self.lod.levels[1])
+
+    def test_trace(self):
+
+        self.lod.rotate(at.Rotation([0.1, -0.2, 0.3]))
+        self.lod.translate([0, 0, 20])
+
+        rays = Rays(np.zeros(3), np.array([[0, 0.01, 0.02], [0, -0.01, 0.01], [1, 1, 1]]))
+
+        for level in range(len(self.lod.levels)):
+            with self.subTest(level=level):
+                self.lod.active_level = level
+
+                results = self.lod.trace(rays)
+
+                np.testing.assert_array_equal(results, self.lod.levels[level].trace(rays))
+                self.assertTrue(results["check"].all())
+
+                # every level moved with the shape
+                np.testing.assert_allclose(np.linalg.norm(results["intersect"] - [0, 0, 20], axis=-1), 1,
+                                           atol=2 * self.lod.resolutions[level])
+
+                np.testing.assert_array_equal(self.lod.is_occluded(rays), [True, True, True])
+
+                # limb finding uses the active level
+                limbs = self.lod.find_limbs(np.array([0, 0, 1.0]), np.array([[1.0, 0, 0], [0, 1, 0]]).T)
+
+                np.testing.assert_allclose(np.linalg.norm(limbs - np.array([[0], [0], [20]]), axis=0), 1,
+                                           atol=2 * self.lod.resolutions[level])
+
+        lod = copy.deepcopy(self.lod)
+
+        self.assertEqual(lod.active_level, self.lod.active_level)
+        self.assertEqual(len(lod.levels), len(self.lod.levels))
+
+    def test_select_level_of_detail(self):
+
+        target = SceneObject(self.lod)
+        target.change_position([0, 0, 40])
+
+        # the body is about 10 pixels across so each pixel covers about 0.2 units
+        level = target.select_level_of_detail(self.model)
+
+        self.assertGreater(level, 0)
+        self.assertLessEqual(self.lod.resolutions[level], 0.5 * 0.2)
+
+        # up close the full resolution shape is needed
+        target.change_position([0, 0, 2])
+
+        self.assertEqual(target.select_level_of_detail(self.model), 0)
+
+        # objects without a level of detail are left alone
+        self.assertIsNone(SceneObject(shapes.Ellipsoid(np.array([0, 0, 5]),
+                                                       principal_axes=np.ones(3))).select_level_of_detail(self.model))
+
+    def test_render(self):
+
+        target = SceneObject(self.lod)
+        target.change_position([0, 0, 40])
+
+        scene = Scene(target_objs=[target], light_obj=self.sun)
+
+        self.lod.active_level = 0
+
+        rows, cols = (42, 58), (42, 58)
+
+        expected, _ = render_template(scene, self.model, rows, cols, grid_size=3)
+
+        scene.select_levels_of_detail(self.model)
+
+        self.assertGreater(self.lod.active_level, 0)
+
+        template, _ = render_template(scene, self.model, rows, cols, grid_size=3)
+
+        # clustering the vertices shrinks the coarse levels very slightly
+        self.assertLess(abs(template.sum() / expected.sum() - 1), 0.02)
+        self.assertGreater(np.corrcoef(template.ravel(), expected.ravel())[0, 1], 0.995)
+
+        # the scene traces the active level too
+        trace_rays, _ = compute_rays(self.model, rows, cols)
+
+        np.testing.assert_array_equal(scene.trace(trace_rays)["check"],
+                                      self.lod.shape.trace(trace_rays)["check"])
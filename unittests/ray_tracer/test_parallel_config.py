@@ -0,0 +1,114 @@
+from unittest import TestCase
+from unittest.mock import patch
+import os
+
+import numpy as np
+
+from giant.ray_tracer import parallel_config, shapes, rays
+from giant.ray_tracer.kdtree import KDTree
+
+
+class TestParallelConfig(TestCase):
+
+    def setUp(self):
+
+        self.num_threads = parallel_config.get_num_threads()
+        self.schedule = parallel_config.get_schedule()
+
+    def tearDown(self):
+
+        parallel_config.set_num_threads(None)
+        parallel_config.set_schedule(*self.schedule)
+
+    def test_num_threads(self):
+
+        parallel_config.set_num_threads(3)
+
+        self.assertEqual(parallel_config.get_num_threads(), 3)
+
+        parallel_config.set_num_threads(None)
+
+        self.assertGreaterEqual(parallel_config.get_num_threads(), 1)
+
+        with self.assertRaises(ValueError):
+            parallel_config.set_num_threads(-1)
+
+    def test_schedule(self):
+
+        parallel_config.set_schedule('Dynamic', 16)
+
+        self.assertEqual(parallel_config.get_schedule(), ('dynamic', 16))
+
+        parallel_config.set_schedule()
+
+        self.assertEqual(parallel_config.get_schedule(), ('default', 0))
+
+        with self.assertRaises(ValueError):
+            parallel_config.set_schedule('fastest')
+
+        with self.assertRaises(ValueError):
+            parallel_config.set_schedule('static', -2)
+
+    def test_parallel_config(self):
+
+        parallel_config.set_num_threads(2)
+        parallel_config.set_schedule('guided', 4)
+
+        with parallel_config.parallel_config(num_threads=1, chunk_size=32):
+            self.assertEqual(parallel_config.get_num_threads(), 1)
+            self.assertEqual(parallel_config.get_schedule(), ('guided', 32))
+
+        self.assertEqual(parallel_config.get_num_threads(), 2)
+        self.assertEqual(parallel_config.get_schedule(), ('guided', 4))
+
+        with self.assertRaises(RuntimeError):
+            with parallel_config.parallel_config(schedule='static'):
+                raise RuntimeError('failed')
+
+        self.assertEqual(parallel_config.get_schedule(), ('guided', 4))
+
+    def test_configure_from_environment(self):
+
+        with patch.dict(os.environ, {'GIANT_NUM_THREADS': '5', 'GIANT_SCHEDULE': 'dynamic, 8'}):
+            parallel_config.configure_from_environment()
+
+        self.assertEqual(parallel_config.get_num_threads(), 5)
+        self.assertEqual(parallel_config.get_schedule(), ('dynamic', 8))
+
+        with patch.dict(os.environ, {'GIANT_NUM_THREADS': 'many', 'GIANT_SCHEDULE': 'static'}):
+            with self.assertWarns(UserWarning):
+                parallel_config.configure_from_environment()
+
+        self.assertEqual(parallel_config.get_num_threads(), 5)
+        self.assertEqual(parallel_config.get_schedule(), ('static', 0))
+
+    def test_kernels_consistent(self):
+
+        rng = np.random.default_rng(5)
+
+        vertices = rng.normal(size=(300, 3))
+        vertices /= np.linalg.norm(vertices, axis=-1, keepdims=True)
+
+        facets = rng.integers(0, 300, size=(500, 3))
+
+        directions = rng.normal(size=(3, 400))
+        directions /= np.linalg.norm(directions, axis=0, keepdims=True)
+
+        trace_rays = rays.Rays(np.zeros(3), directions)
+
+        results = []
+
+        for num_threads, schedule, chunk_size in [(1, 'default', 0), (4, 'static', 7), (3, 'dynamic', 1),
+                                                  (2, 'guided', 0), (4, 'auto', 0)]:
+            with parallel_config.parallel_config(num_threads, schedule, chunk_size):
+                surface = shapes.Triangle64(vertices, 1.0, facets)
+                tree = KDTree(surface, max_depth=4)
+                tree.build(print_progress=False)
+
+                results.append((surface.normals.copy(), tree.trace(trace_rays)))
+
+        for normals, intersects in results[1:]:
+            np.testing.assert_array_equal(normals, results[0][0])
+            np.testing.assert_array_equal(intersects['check'], results[0][1]['check'])
+            np.testing.assert_allclose(intersects['intersect'], results[0][1]['intersect'])
+            np.testing.assert_allclose(intersects['normal'], results[0][1]['normal'])
@@ -0,0 +1,232 @@
+from unittest import TestCase
+
+import numpy as np
+
+from giant import rotations as at
+from giant.camera_models import PinholeModel
+from giant.ray_tracer import kdtree, flat_kdtree, shapes, illumination
+from giant.ray_tracer.scene import Scene, SceneObject, ShapeInstance
+from giant.ray_tracer.render import render_template
+from giant.ray_tracer.raster import rasterize_template, triangulate
+
+
+def tessellate_sphere(radius, n_lat, n_lon, center=(0, 0, 0)):
+
+    lat = np.linspace(-np.pi / 2, np.pi / 2, n_lat)
+    lon = np.linspace(0, 2 * np.pi, n_lon, endpoint=False)
+
+    lat, lon = np.meshgrid(lat, lon, indexing='ij')
+
+    vertices = radius * np.stack([np.cos(lat) * np.cos(lon),
+                                  np.cos(lat) * np.sin(lon),
+                                  np.sin(lat)], axis=-1).reshape(-1, 3) + np.asarray(center)
+
+    facets = []
+    for i in range(n_lat - 1):
+        for j in range(n_lon):
+            a = i * n_lon + j
+            b = i * n_lon + (j + 1) % n_lon
+            facets.append([a, b, b + n_lon])
+            facets.append([a, b + n_lon, a + n_lon])
+
+    return vertices, np.array(facets)
+
+
+class TestTriangulate(TestCase):
+
+    def setUp(self):
+
+        verts, facets = tessellate_sphere(1, 10, 20)
+
+        self.surface = shapes.Triangle64(verts, np.linspace(0.8, 1.2, verts.shape[0]), facets)
+
+    def test_surface(self):
+
+        vertices, facets, normals, albedos = triangulate(self.surface)
+
+        np.testing.assert_array_equal(vertices, self.surface.vertices)
+        np.testing.assert_array_equal(facets, self.surface.facets)
+        np.testing.assert_array_equal(normals, self.surface.normals)
+        np.testing.assert_array_equal(albedos, self.surface.albedos[self.surface.facets])
+
+    def test_kdtree(self):
+
+        tree = kdtree.KDTree(self.surface, max_depth=10)
+        tree.build_parallel(print_progress=False)
+        tree.rotate([0.1, -0.2, 0.3])
+        tree.translate([1, 2, 3])
+
+        expected_vertices = at.Rotation([0.1, -0.2, 0.3]).matrix @ self.surface.vertices.T + [[1], [2], [3]]
+
+        for shape in [tree, flat_kdtree.FlatKDTree.from_kdtree(tree)]:
+            with self.subTest(shape=type(shape).__name__):
+                vertices, facets, normals, albedos = triangulate(shape)
+
+                # the trees may reorder the facets but every facet must land on the moved sphere
+                centers = vertices[facets].mean(axis=1) - [1, 2, 3]
+
+                np.testing.assert_allclose(np.sort(vertices[facets].reshape(-1, 3), axis=0),
+                                           np.sort(expected_vertices.T[self.surface.facets].reshape(-1, 3), axis=0),
+                                           atol=1e-10)
+
+                # the normals point outward (ignoring the degenerate facets at the poles)
+                valid = np.isfinite(normals).all(axis=-1)
+                self.assertTrue(((normals * centers).sum(axis=-1)[valid] > 0).all())
+
+                self.assertEqual(albedos.shape, facets.shape)
+
+    def test_shape_instance(self):
+
+        instance = ShapeInstance(self.surface)
+        instance.rotate(at.Rotation([0, 0, np.pi / 2]))
+        instance.translate([0, 0, 5])
+
+        vertices, facets, normals, _ = triangulate(instance)
+
+        expected = self.surface.vertices @ at.Rotation([0, 0, np.pi / 2]).matrix.T + [0, 0, 5]
+
+        np.testing.assert_allclose(vertices, expected, atol=1e-12)
+        np.testing.assert_allclose(normals, self.surface.normals @ at.Rotation([0, 0, np.pi / 2]).matrix.T,
+                                   atol=1e-12)
+
+    def test_ellipsoid(self):
+
+        ellipsoid = shapes.Ellipsoid(np.array([1, 2, 3]), principal_axes=np.array([3, 2, 1]),
+                                     orientation=at.Rotation([0.2, 0.1, -0.3]).matrix)
+
+        vertices, facets, normals, albedos = triangulate(ellipsoid, resolution=32)
+
+        # every vertex is on the surface of the ellipsoid
+        principal = (vertices - [1, 2, 3]) @ ellipsoid.orientation
+
+        np.testing.assert_allclose(((principal / [3, 2, 1]) ** 2).sum(axis=-1), 1)
+
+        # every facet faces outward
+        centers = vertices[facets].mean(axis=1) - [1, 2, 3]
+        self.assertTrue(((normals * centers).sum(axis=-1) > 0).all())
+
+        np.testing.assert_array_equal(albedos, 1)
+
+    def test_invalid(self):
+
+        with self.assertRaises(ValueError):
+            triangulate(shapes.Point([0, 0, 0]))
+
+
+class TestRasterizeTemplate(TestCase):
+
+    def setUp(self):
+
+        self.model = PinholeModel(focal_length=10, kx=20, ky=20, px=50, py=50, n_rows=100, n_cols=100)
+
+        self.rows = (22, 78)
+        self.cols = (25, 80)
+
+        # a body with a boulder sitting on it so that the body shadows itself
+        sun_direction = np.array([-0.6, 0.2, -0.77])
+        sun_direction /= np.linalg.norm(sun_direction)
+
+        body_verts, body_facets = tessellate_sphere(1, 40, 80)
+        boulder_verts, boulder_facets = tessellate_sphere(0.25, 10, 20, center=1.2 * np.array([-0.6, 0.5, -0.6]))
+
+        verts = np.vstack([body_verts, boulder_verts])
+        facets = np.vstack([body_facets, boulder_facets + body_verts.shape[0]])
+
+        self.tree = kdtree.KDTree(shapes.Triangle64(verts, np.linspace(0.8, 1.2, verts.shape[0]), facets),
+                                  max_depth=18)
+        self.tree.build_parallel(print_progress=False)
+        self.tree.rotate([0.1, -0.2, 0.3])
+        self.tree.translate(np.array([0.1, -0.2, 10]))
+
+        self.sun = SceneObject(shapes.Point(np.array([0.1, -0.2, 10]) + 1e4 * sun_direction))
+
+        # a small moon between the sun and the body so that it casts a shadow on the body
+        self.moon = shapes.Ellipsoid(np.array([0.1, -0.2, 10]) + 1.6 * sun_direction,
+                                     principal_axes=np.array([0.3, 0.25, 0.2]),
+                                     orientation=at.Rotation([0.2, 0.1, -0.3]).matrix)
+
+    def check_render(self, scene, brdf, grid_size=3, **kwargs):
+
+        expected, expected_bounds = render_template(scene, self.model, self.rows, self.cols, grid_size=grid_size,
+                                                    illumination_model=brdf)
+
+        template, bounds = rasterize_template(scene, self.model, self.rows, self.cols, grid_size=grid_size,
+                                              illumination_model=brdf, **kwargs)
+
+        self.assertGreater(expected.max(), 0)
+
+        np.testing.assert_array_equal(bounds[0], expected_bounds[0])
+        np.testing.assert_array_equal(bounds[1], expected_bounds[1])
+
+        # the shadow and limb edges are resolved slightly differently so only compare the overall template
+        self.assertAlmostEqual(template.sum() / expected.sum(), 1, places=2)
+        self.assertGreater(np.corrcoef(template.ravel(), expected.ravel())[0, 1], 0.999)
+
+        return template, expected
+
+    def test_surface(self):
+
+        scene = Scene(target_objs=[SceneObject(self.tree)], light_obj=self.sun)
+
+        for grid_size in [1, 3]:
+            for omp in [True, False]:
+                with self.subTest(grid_size=grid_size, omp=omp):
+                    self.check_render(scene, illumination.McEwenIllumination(), grid_size=grid_size, tile_rows=7,
+                                      omp=omp)
+
+    def test_shadows(self):
+
+        flat = flat_kdtree.FlatKDTree.from_kdtree(self.tree)
+
+        for shape in [self.tree, flat]:
+            scene = Scene(target_objs=[SceneObject(shape), SceneObject(self.moon)], light_obj=self.sun)
+
+            with self.subTest(shape=type(shape).__name__):
+                template, expected = self.check_render(scene, illumination.McEwenIllumination())
+
+                unshadowed, _ = rasterize_template(Scene(target_objs=[SceneObject(shape)], light_obj=self.sun),
+                                                   self.model, self.rows, self.cols, grid_size=3)
+
+                # the moon and the boulder both cast shadows
+                shadowed = (unshadowed > 0.5 * unshadowed.max()) & (template < 0.05 * unshadowed.max())
+                self.assertGreater(shadowed.sum(), 10)
+                self.assertTrue((expected[shadowed] < 0.05 * unshadowed.max()).mean() > 0.9)
+
+    def test_ellipsoid(self):
+
+        scene = Scene(target_objs=[SceneObject(shapes.Ellipsoid(np.array([0.1, -0.2, 10]),
+                                                                principal_axes=np.array([1, 0.8, 0.7])))],
+                      light_obj=self.sun)
+
+        self.check_render(scene, illumination.LambertianIllumination())
+
+    def test_coverage(self):
+
+        scene = Scene(target_objs=[SceneObject(self.tree)], light_obj=self.sun)
+
+        template, bounds, coverage = rasterize_template(scene, self.model, self.rows, self.cols, grid_size=2,
+                                                        return_coverage=True)
+
+        self.assertEqual(coverage.shape, template.shape)
+        self.assertEqual(coverage.dtype, bool)
+
+        # the body is about 40 pixels across so the middle is fully covered and the corners are empty
+        self.assertTrue(coverage[28, 27])
+        self.assertFalse(coverage[0, 0])
+        self.assertFalse(coverage[-1, -1])
+
+        # every fully covered pixel is inside the rendered body
+        self.assertTrue((template[coverage] >= 0).all())
+        self.assertTrue((template[~coverage & (template > 0)].size < 0.2 * coverage.sum()))
+
+    def test_missing_objects(self):
+
+        with self.assertRaises(ValueError):
+            rasterize_template(Scene(target_objs=[SceneObject(self.tree)]), self.model, self.rows, self.cols)
+
+        with self.assertRaises(ValueError):
+            rasterize_template(Scene(light_obj=self.sun), self.model, self.rows, self.cols)
+
+        with self.assertRaises(ValueError):
+            rasterize_template(Scene(target_objs=[SceneObject(self.tree)], light_obj=self.sun), self.model,
+                               self.rows, self.cols, tile_rows=0)
@@ -2,6 +2,8 @@ import unittest
 from unittest import TestCase
 import giant.ray_tracer.rays as g_rays
 import giant.rotations as at
+from giant.ray_tracer.shapes import Triangle64
+from giant.ray_tracer.kdtree import KDTree
 import numpy as np
 import copy
 
@@ -167,3 +169,224 @@ class TestRay(TestCase):
 
         np.testing.assert_array_equal(ray_copy._start, self.rays_start + self.rays_start,
                                       err_msg="Matrix Translation")
+
+    def test_shallow_copy_translate(self):
+
+        ray_copy = copy.copy(self.rays)
+
+        ray_copy.translate(self.ray_start)
+
+        # translating a shallow copy shouldn't change the original rays
+        np.testing.assert_array_equal(self.rays._start, self.rays_start)
+        np.testing.assert_array_equal(ray_copy._start, self.rays_start + self.ray_start[..., np.newaxis])
+
+
+class TestRays32(TestCase):
+
+    def setUp(self):
+
+        self.rays_start = np.array([[1, 3], [4, 5], [6, 7]])
+        self.rays_direction = np.array([[4, 5], [5, 6], [7, 8]])
+        self.rays = g_rays.Rays32(self.rays_start, self.rays_direction, ignore=[1, 2])
+
+        self.rotation = at.Rotation([np.pi, np.pi / 2, np.pi / 4])
+
+    def test_creation(self):
+
+        self.assertEqual(self.rays.start.dtype, np.float32)
+        self.assertEqual(self.rays.direction.dtype, np.float32)
+        self.assertEqual(self.rays.inv_direction.dtype, np.float32)
+
+        np.testing.assert_array_equal(self.rays.start, self.rays_start)
+
+    def test_rotate_translate(self):
+
+        ray_copy = copy.copy(self.rays)
+
+        ray_copy.rotate(self.rotation)
+        ray_copy.translate(np.array([1, 2, 3]))
+
+        self.assertEqual(ray_copy.start.dtype, np.float32)
+        self.assertEqual(ray_copy.direction.dtype, np.float32)
+
+        np.testing.assert_allclose(ray_copy.start,
+                                   self.rotation.matrix @ self.rays_start + np.array([[1], [2], [3]]), rtol=1e-6)
+        np.testing.assert_allclose(ray_copy.direction, self.rotation.matrix @ self.rays_direction, rtol=1e-6)
+
+    def test_getitem_iter(self):
+
+        self.assertIsInstance(self.rays[1:], g_rays.Rays32)
+        self.assertEqual(self.rays[1:].ignore, [2])
+
+        for ray in self.rays:
+            self.assertIsInstance(ray, g_rays.Rays32)
+            self.assertEqual(ray.start.dtype, np.float32)
+
+
+class TestRayBatch(TestCase):
+
+    def setUp(self):
+
+        self.directions = np.array([[0, 0.1, -0.1, 0.05], [0, 0.1, -0.2, 0.1], [-1, -1, -1, -1]], dtype=np.float64)
+        self.ignore = [[0], [], [0, 1], [1]]
+        self.batch = g_rays.RayBatch(np.array([0, 0, 1.]), self.directions, ignore=self.ignore)
+
+        self.rotation = at.Rotation([np.pi, np.pi / 2, np.pi / 4])
+
+    def test_creation(self):
+
+        self.assertEqual(self.batch.num_rays, 4)
+        self.assertTrue(self.batch.shares_origin)
+
+        # the inputs are used directly instead of being copied
+        self.assertTrue(np.shares_memory(self.batch.direction, self.directions))
+
+        np.testing.assert_array_equal(self.batch.start, np.broadcast_to([[0], [0], [1]], (3, 4)))
+        np.testing.assert_array_equal(self.batch.inv_direction, 1 / self.directions)
+
+        with self.assertRaises(ValueError):
+            g_rays.RayBatch(np.zeros((3, 2)), self.directions)
+
+        with self.assertRaises(ValueError):
+            g_rays.RayBatch(np.zeros(3), self.directions, ignore=[1, 2])
+
+    def test_ignore(self):
+
+        np.testing.assert_array_equal(self.batch.ignore_indptr, [0, 1, 1, 3, 4])
+        np.testing.assert_array_equal(self.batch.ignore_indices, [0, 0, 1, 1])
+
+        np.testing.assert_array_equal(self.batch.ignore, [[0, -1], [-1, -1], [0, 1], [1, -1]])
+
+        # a block of ignores is stored as is and converted to CSR on request
+        block = np.array([[3, -1], [-1, -1], [4, 5], [6, -1]])
+        batch = g_rays.RayBatch(np.zeros(3), self.directions, ignore=block)
+
+        self.assertIs(batch.ignore, block)
+        np.testing.assert_array_equal(batch.ignore_indptr, [0, 1, 1, 3, 4])
+        np.testing.assert_array_equal(batch.ignore_indices, [3, 4, 5, 6])
+
+        batch.ignore = 7
+        np.testing.assert_array_equal(batch.ignore, [[7]] * 4)
+
+        batch.ignore = np.arange(4)
+        np.testing.assert_array_equal(batch.ignore, np.arange(4).reshape(-1, 1))
+
+        batch = g_rays.RayBatch.from_csr(np.zeros(3), self.directions, [0, 0, 2, 2, 3], [1, 2, 3])
+        np.testing.assert_array_equal(batch.ignore, [[-1, -1], [1, 2], [-1, -1], [3, -1]])
+
+    def test_getitem(self):
+
+        sub = self.batch[1:3]
+
+        self.assertIsInstance(sub, g_rays.RayBatch)
+        self.assertEqual(sub.num_rays, 2)
+        self.assertTrue(np.shares_memory(sub.direction, self.directions))
+        self.assertTrue(np.shares_memory(sub.ignore_indices, self.batch.ignore_indices))
+        np.testing.assert_array_equal(sub.ignore, [[-1, -1], [0, 1]])
+
+        masked = self.batch[np.array([True, False, True, True])]
+
+        self.assertEqual(masked.num_rays, 3)
+        np.testing.assert_array_equal(masked.direction, self.directions[:, [0, 2, 3]])
+        np.testing.assert_array_equal(masked.ignore_indptr, [0, 1, 3, 4])
+        np.testing.assert_array_equal(masked.ignore_indices, [0, 0, 1, 1])
+
+        single = self.batch[-2]
+
+        self.assertEqual(single.num_rays, 1)
+        np.testing.assert_array_equal(single.direction, self.directions[:, 2])
+        np.testing.assert_array_equal(single.ignore, [[0, 1]])
+
+        for ind, ray in enumerate(self.batch):
+            np.testing.assert_array_equal(ray.direction, self.directions[:, ind])
+            np.testing.assert_array_equal(ray.ignore.ravel()[ray.ignore.ravel() >= 0], self.ignore[ind])
+
+        with self.assertRaises(IndexError):
+            self.batch[4]
+
+    def test_rotate_translate(self):
+
+        batch_copy = copy.copy(self.batch)
+
+        batch_copy.rotate(self.rotation)
+        batch_copy.translate([1, 2, 3])
+
+        np.testing.assert_allclose(batch_copy.direction, self.rotation.matrix @ self.directions)
+        np.testing.assert_allclose(batch_copy.start[:, 0], self.rotation.matrix @ [0, 0, 1] + [1, 2, 3])
+
+        # the original is unchanged
+        np.testing.assert_array_equal(self.batch.direction, self.directions)
+
+    def test_trace(self):
+
+        # two parallel facets, one at z=0 and one at z=-1
+        vertices = np.array([[-1, -1, 0], [1, -1, 0], [0, 1, 0], [-1, -1, -1], [1, -1, -1], [0, 1, -1]],
+                            dtype=np.float64)
+        triangles = Triangle64(vertices, 1, np.array([[0, 1, 2], [3, 4, 5]]))
+
+        tree = KDTree(triangles)
+        tree.build(force=True)
+
+        for shape in [triangles, tree]:
+            with self.subTest(shape=type(shape).__name__):
+
+                # get the full ids of the top and bottom facets for this shape
+                top = shape.trace(g_rays.Rays(np.array([0, 0, 1.]), self.directions[:, 0]))["facet"].item()
+                bottom = shape.trace(g_rays.Rays(np.array([0, 0, 1.]), self.directions[:, 0],
+                                                 ignore=[top]))["facet"].item()
+
+                ignore = [[top if ind == 0 else bottom for ind in row] for row in self.ignore]
+
+                rays = g_rays.Rays(np.array([0, 0, 1.]), self.directions, ignore=ignore)
+
+                expected = shape.trace(rays)
+                result = shape.trace(g_rays.RayBatch.from_rays(rays))
+
+                np.testing.assert_array_equal(expected["check"], [True, True, False, True])
+                np.testing.assert_array_equal(result["check"], expected["check"])
+                np.testing.assert_array_equal(result["facet"], expected["facet"])
+                np.testing.assert_allclose(result["intersect"][result["check"]],
+                                           expected["intersect"][expected["check"]])
+
+
+class TestTraceWorkspace(TestCase):
+
+    def test_reset(self):
+
+        workspace = g_rays.TraceWorkspace(4)
+
+        self.assertEqual(workspace.capacity, 4)
+        self.assertEqual(len(workspace), 0)
+
+        workspace.reset(3)
+
+        self.assertEqual(len(workspace), 3)
+        self.assertEqual(workspace.intersect.shape, (3, 3))
+        self.assertEqual(workspace.start.shape, (3, 3))
+
+        self.assertFalse(workspace.check.any())
+        np.testing.assert_array_equal(workspace.distance, np.inf)
+        np.testing.assert_array_equal(workspace.facet, -1)
+        self.assertTrue(np.isnan(workspace.normal).all())
+
+        # writing to the hit buffer is reflected in the check view
+        workspace.hit[1] = 1
+        np.testing.assert_array_equal(workspace["check"], [False, True, False])
+
+        with self.assertRaises(KeyError):
+            workspace["start"]
+
+    def test_reserve(self):
+
+        workspace = g_rays.TraceWorkspace(4)
+
+        workspace.reserve(2)
+        self.assertEqual(workspace.capacity, 4)
+
+        # grow by at least a factor of 2
+        workspace.reset(5)
+        self.assertEqual(workspace.capacity, 8)
+
+        workspace.reset(20)
+        self.assertEqual(workspace.capacity, 20)
+        self.assertEqual(len(workspace), 20)
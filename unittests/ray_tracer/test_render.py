@@ -0,0 +1,197 @@
+from unittest import TestCase
+
+import numpy as np
+
+from giant import rotations as at
+from giant.camera_models import PinholeModel
+from giant.ray_tracer import kdtree, flat_kdtree, shapes, illumination
+from giant.ray_tracer.rays import compute_rays
+from giant.ray_tracer.scene import Scene, SceneObject
+from giant.ray_tracer.render import render_template
+
+
+def tessellate_sphere(radius, n_lat, n_lon, center=(0, 0, 0)):
+
+    lat = np.linspace(-np.pi / 2, np.pi / 2, n_lat)
+    lon = np.linspace(0, 2 * np.pi, n_lon, endpoint=False)
+
+    lat, lon = np.meshgrid(lat, lon, indexing='ij')
+
+    vertices = radius * np.stack([np.cos(lat) * np.cos(lon),
+                                  np.cos(lat) * np.sin(lon),
+                                  np.sin(lat)], axis=-1).reshape(-1, 3) + np.asarray(center)
+
+    facets = []
+    for i in range(n_lat - 1):
+        for j in range(n_lon):
+            a = i * n_lon + j
+            b = i * n_lon + (j + 1) % n_lon
+            facets.append([a, b, b + n_lon])
+            facets.append([a, b + n_lon, a + n_lon])
+
+    return vertices, np.array(facets)
+
+
+class TestRenderTemplate(TestCase):
+
+    def setUp(self):
+
+        self.model = PinholeModel(focal_length=10, kx=20, ky=20, px=50, py=50, n_rows=100, n_cols=100)
+
+        self.rows = (22, 78)
+        self.cols = (25, 80)
+
+        verts, facets = tessellate_sphere(1, 20, 40)
+
+        self.surface = shapes.Triangle64(verts, np.linspace(0.8, 1.2, facets.shape[0]), facets)
+
+        self.tree = kdtree.KDTree(self.surface, max_depth=18)
+        self.tree.build_parallel(print_progress=False)
+        self.tree.rotate([0.1, -0.2, 0.3])
+        self.tree.translate(np.array([0.1, -0.2, 10]))
+
+        # the sun is off to the side of the camera so that most of the lit side of the body is visible
+        sun_direction = np.array([-0.6, 0.2, -0.77])
+        sun_direction /= np.linalg.norm(sun_direction)
+
+        self.sun = SceneObject(shapes.Point(np.array([0.1, -0.2, 10]) + 1e4 * sun_direction))
+
+        # a small moon between the sun and the body so that it casts a shadow on the body
+        self.moon = shapes.Ellipsoid(np.array([0.1, -0.2, 10]) + 1.6 * sun_direction,
+                                     principal_axes=np.array([0.3, 0.25, 0.2]),
+                                     orientation=at.Rotation([0.2, 0.1, -0.3]).matrix)
+
+    def render_expected(self, scene, brdf, grid_size):
+
+        trace_rays, uv = compute_rays(self.model, self.rows, self.cols, grid_size=grid_size)
+
+        illums = brdf(scene.get_illumination_inputs(trace_rays))
+
+        bounds = (uv.min(axis=1).round(), uv.max(axis=1).round())
+
+        template = np.zeros(((bounds[1] - bounds[0]) + 1)[::-1].astype(int))
+
+        subs = (uv - bounds[0].reshape(2, 1)).round().astype(int)
+
+        np.add.at(template, (subs[1], subs[0]), illums.ravel())
+
+        return template, bounds
+
+    def check_render(self, scene, brdf, grid_size=3, **kwargs):
+
+        expected, expected_bounds = self.render_expected(scene, brdf, grid_size)
+
+        template, bounds = render_template(scene, self.model, self.rows, self.cols, grid_size=grid_size,
+                                           illumination_model=brdf, **kwargs)
+
+        self.assertGreater(expected.max(), 0)
+
+        np.testing.assert_array_equal(bounds[0], expected_bounds[0])
+        np.testing.assert_array_equal(bounds[1], expected_bounds[1])
+
+        np.testing.assert_allclose(template, expected, atol=1e-10)
+
+    def test_surface(self):
+
+        scene = Scene(target_objs=[SceneObject(self.tree)], light_obj=self.sun)
+
+        for grid_size in [1, 2, 3]:
+            for omp in [True, False]:
+                with self.subTest(grid_size=grid_size, omp=omp):
+                    self.check_render(scene, illumination.McEwenIllumination(), grid_size=grid_size, tile_rows=7,
+                                      omp=omp)
+
+    def test_shadows(self):
+
+        flat = flat_kdtree.FlatKDTree.from_kdtree(self.tree)
+
+        for shape in [self.tree, flat]:
+            scene = Scene(target_objs=[SceneObject(shape), SceneObject(self.moon)], light_obj=self.sun)
+
+            with self.subTest(shape=type(shape).__name__):
+                self.check_render(scene, illumination.McEwenIllumination(), tile_rows=10)
+
+    def test_ellipsoid(self):
+
+        scene = Scene(target_objs=[SceneObject(shapes.Ellipsoid(np.array([0.1, -0.2, 10]),
+                                                                principal_axes=np.array([1, 0.8, 0.7])))],
+                      light_obj=self.sun)
+
+        self.check_render(scene, illumination.LambertianIllumination())
+
+    def test_illumination_models(self):
+
+        scene = Scene(target_objs=[SceneObject(self.tree), SceneObject(self.moon)], light_obj=self.sun)
+
+        class ScaledLambertian(illumination.LambertianIllumination):
+
+            def __call__(self, illum_inputs):
+                return 2 * super().__call__(illum_inputs)
+
+        for brdf in [illumination.LambertianIllumination(global_albedo=0.5),
+                     illumination.LommelSeeligerIllumination(),
+                     illumination.McEwenIllumination(),
+                     illumination.GaskellIllumination(global_albedo=2),
+                     illumination.AshikhminShirleyDiffuseIllumination(),
+                     ScaledLambertian()]:
+
+            with self.subTest(brdf=type(brdf).__name__):
+                self.check_render(scene, brdf, grid_size=2)
+
+    def test_missing_objects(self):
+
+        with self.assertRaises(ValueError):
+            render_template(Scene(target_objs=[SceneObject(self.tree)]), self.model, self.rows, self.cols)
+
+        with self.assertRaises(ValueError):
+            render_template(Scene(light_obj=self.sun), self.model, self.rows, self.cols)
+
+    def test_adaptive(self):
+
+        scene = Scene(target_objs=[SceneObject(self.tree), SceneObject(self.moon)], light_obj=self.sun)
+
+        brdf = illumination.McEwenIllumination()
+
+        # with a single ray per pixel there is nothing to refine
+        full, bounds = render_template(scene, self.model, self.rows, self.cols, illumination_model=brdf)
+        adaptive, adaptive_bounds = render_template(scene, self.model, self.rows, self.cols, illumination_model=brdf,
+                                                    adaptive=True)
+
+        np.testing.assert_allclose(adaptive, full, atol=1e-10)
+
+        for grid_size in [3, 4]:
+            for omp in [True, False]:
+                with self.subTest(grid_size=grid_size, omp=omp):
+                    full, bounds = render_template(scene, self.model, self.rows, self.cols, grid_size=grid_size,
+                                                   illumination_model=brdf, omp=omp)
+
+                    adaptive, adaptive_bounds = render_template(scene, self.model, self.rows, self.cols,
+                                                                grid_size=grid_size, illumination_model=brdf,
+                                                                omp=omp, adaptive=True, tile_rows=9)
+
+                    np.testing.assert_array_equal(adaptive_bounds[0], bounds[0])
+                    np.testing.assert_array_equal(adaptive_bounds[1], bounds[1])
+
+                    # the edges are rendered with the full grid so only the smooth interior differs slightly
+                    np.testing.assert_allclose(adaptive, full, atol=0.01 * full.max())
+                    self.assertAlmostEqual(adaptive.sum() / full.sum(), 1, places=3)
+
+                    # the empty space around the targets stays empty
+                    np.testing.assert_array_equal(adaptive == 0, full == 0)
+
+    def test_adaptive_external_brdf(self):
+
+        scene = Scene(target_objs=[SceneObject(self.moon)], light_obj=self.sun)
+
+        class ScaledLambertian(illumination.LambertianIllumination):
+
+            def __call__(self, illum_inputs):
+                return 2 * super().__call__(illum_inputs)
+
+        full, _ = render_template(scene, self.model, self.rows, self.cols, grid_size=3,
+                                  illumination_model=illumination.LambertianIllumination())
+
+        adaptive, _ = render_template(scene, self.model, self.rows, self.cols, grid_size=3,
+                                      illumination_model=ScaledLambertian(), adaptive=True)
+
+        np.testing.assert_allclose(adaptive, 2 * full, atol=0.02 * full.max())
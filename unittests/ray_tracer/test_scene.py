@@ -6,6 +6,7 @@ import numpy as np
 
 from giant import rotations as at
 from giant.ray_tracer import scene, shapes, rays, INTERSECT_DTYPE
+from giant.image import OpNavImage
 
 import os
 
@@ -422,6 +423,95 @@ class TestScene(TestCase):
         np.testing.assert_array_equal(results["normal"], [[0, 0, 1], [np.nan]*3, [0, 0, 1]])
         np.testing.assert_array_equal(results["visible"], [True, False, True])
 
+    def test_is_occluded(self):
+
+        tri1 = np.array([[-5, -4, -4.5],
+                         [0, 0, 1],
+                         [0, 0, 0]])
+
+        tri2 = tri1+np.array([[2.5, 0, 0]]).T
+
+        tri3 = tri2+np.array([[2.5, 0, 0]]).T
+
+        tri4 = tri3+np.array([[2.5, 0, 0]]).T
+
+        triangles = shapes.Triangle64(np.hstack([tri1, tri2, tri3, tri4]).T,1, np.arange(12).reshape(-1, 3))
+
+        triangles2 = copy.deepcopy(triangles)
+
+        triangles2.translate([0, 0, 3.5])
+
+        sc = scene.Scene([scene.SceneObject(triangles), scene.SceneObject(triangles2)])
+
+        ray = rays.Rays([[0, 0, 0, 0],
+                         [0, 0, 0, 0],
+                         [4, -4, 2, 2]],
+                        [[0, 0, 0, 0],
+                        [0, 0, 0, 0],
+                        [-1, 1, -1, 1]])
+
+        np.testing.assert_array_equal(sc.is_occluded(ray), [True, True, True, True])
+
+        # ignore the facet on the top object for the first ray and both facets for the last ray
+        ray.ignore = [[12], [-1], [-1], [2, 12]]
+
+        np.testing.assert_array_equal(sc.is_occluded(ray), [True, True, True, False])
+
+        np.testing.assert_array_equal(sc.is_occluded(ray[1:]), [True, True, False])
+
+    def test_trace_multiple_objects(self):
+
+        class CountingShape:
+
+            def __init__(self, shape):
+                self.shape = shape
+                self.bounding_box = shape.bounding_box
+                self.traced = 0
+
+            def translate(self, translation):
+                self.shape.translate(translation)
+
+            def rotate(self, rotation):
+                self.shape.rotate(rotation)
+
+            def trace(self, trace_rays):
+                self.traced += trace_rays.num_rays
+                return self.shape.trace(trace_rays)
+
+        near = shapes.Ellipsoid(center=[0, 0, 10], principal_axes=[2, 2, 2])
+        far = CountingShape(shapes.Ellipsoid(center=[0, 0, 20], principal_axes=[1, 1, 1]))
+        side = shapes.Ellipsoid(center=[10, 0, 20], principal_axes=[1, 1, 1])
+
+        # put the far object first so that the order has to be determined by the bounding boxes
+        sc = scene.Scene([scene.SceneObject(far), scene.SceneObject(near), scene.SceneObject(side)])
+
+        directions = np.array([[0, 0, 1], [0.5, 0, 20], [10, 0, 20], [0, 10, 1]], dtype=np.float64).T
+        directions /= np.linalg.norm(directions, axis=0, keepdims=True)
+
+        trace_rays = rays.Rays(np.zeros(3), directions)
+
+        res = sc.trace(trace_rays)
+
+        np.testing.assert_array_equal(res["check"], [True, True, True, False])
+
+        sizer = 10 ** (sc.order + 1)
+        np.testing.assert_array_equal(res["facet"][:3] // sizer, [1, 1, 2])
+
+        np.testing.assert_allclose(res["intersect"][0], [0, 0, 8])
+        np.testing.assert_allclose(res["intersect"][2], side.trace(trace_rays[2])["intersect"].ravel())
+
+        # the far object is hidden behind the near object so it should never have been traced
+        self.assertEqual(far.traced, 0)
+
+        # ignoring the near object should expose the far object
+        trace_rays.ignore = [[1 * sizer + near.id], [-1], [-1], [-1]]
+
+        res = sc.trace(trace_rays)
+
+        np.testing.assert_array_equal(res["facet"][:3] // sizer, [0, 1, 2])
+        np.testing.assert_allclose(res["intersect"][0], [0, 0, 19])
+        self.assertEqual(far.traced, 1)
+
     def test_get_first(self):
 
         trace_rays = rays.Rays([[0] * 50, [0] * 50, [0] * 50], [[-1] * 50, [0] * 50, [0] * 50])
@@ -490,6 +580,177 @@ class TestScene(TestCase):
         np.testing.assert_array_equal(res2, result)
 
 
+class TestShapeInstance(TestCase):
+
+    def setUp(self):
+
+        tri1 = np.array([[-5, -4, -4.5],
+                         [0, 0, 1],
+                         [0, 0, 0]])
+
+        tri2 = tri1+np.array([[2.5, 0, 0]]).T
+
+        tri3 = tri2+np.array([[2.5, 0, 0]]).T
+
+        tri4 = tri3+np.array([[2.5, 0, 0]]).T
+
+        self.triangles = shapes.Triangle64(np.hstack([tri1, tri2, tri3, tri4]).T, 1, np.arange(12).reshape(-1, 3))
+
+    def test_trace(self):
+
+        rotation = at.Rotation([0.1, -0.2, 0.3])
+        translation = np.array([0.5, -0.25, 10])
+
+        moved = copy.deepcopy(self.triangles)
+        moved.rotate(rotation)
+        moved.translate(translation)
+
+        instance = scene.ShapeInstance(self.triangles, rotation=rotation, position=translation)
+
+        # the shared shape shouldn't be modified
+        self.assertTrue(instance.shape is self.triangles)
+        self.assertEqual(instance.shape, shapes.Triangle64(self.triangles.vertices, 1, self.triangles.facets))
+
+        # aim at the center of each facet and then add a ray that misses everything
+        directions = np.hstack([moved.vertices[moved.facets].mean(axis=1).T, [[0], [0], [-1]]])
+
+        trace_rays = rays.Rays(np.zeros(3), directions)
+
+        expected = moved.trace(trace_rays)
+        res = instance.trace(trace_rays)
+
+        np.testing.assert_array_equal(expected["check"], [True, True, True, True, False])
+
+        np.testing.assert_array_equal(res["check"], expected["check"])
+        np.testing.assert_array_equal(res["facet"], expected["facet"])
+        np.testing.assert_allclose(res["intersect"][res["check"]], expected["intersect"][expected["check"]])
+        np.testing.assert_allclose(res["normal"][res["check"]], expected["normal"][expected["check"]])
+
+        np.testing.assert_array_equal(instance.is_occluded(trace_rays), expected["check"])
+
+        np.testing.assert_allclose(instance.bounding_box.vertices, moved.bounding_box.vertices)
+
+        # attributes of the shape should be available through the instance
+        self.assertEqual(instance.num_faces, self.triangles.num_faces)
+
+    def test_scene(self):
+
+        first = scene.SceneObject(scene.ShapeInstance(self.triangles))
+        second = scene.SceneObject(scene.ShapeInstance(self.triangles))
+
+        first.change_position([0, 0, 5])
+        second.change_position([0, 0, 10])
+
+        sc = scene.Scene([second, first])
+
+        trace_rays = rays.Rays(np.zeros(3), np.array([[-4.5, 0.1, 5], [-4.5, 0.1, 4]]).T)
+
+        res = sc.trace(trace_rays)
+
+        np.testing.assert_array_equal(res["check"], [True, False])
+        np.testing.assert_allclose(res["intersect"][0], [-4.5, 0.1, 5])
+        self.assertEqual(res["facet"][0] // 10 ** (sc.order + 1), 1)
+
+        # the shared shape shouldn't have moved
+        np.testing.assert_array_equal(self.triangles.bounding_box.min_sides, [-5, 0, 0])
+
+
+class TestSceneUpdateCache(TestCase):
+
+    def setUp(self):
+
+        self.calls = 0
+
+        def pos_fun(date):
+            self.calls += 1
+            return np.array([1., 2., 3.]) * date.day
+
+        def frame_fun(date):
+            return at.Rotation([0.1 * date.day, 0, 0])
+
+        self.target = scene.SceneObject(shapes.Ellipsoid(principal_axes=[1, 1, 1]), position_function=pos_fun,
+                                        orientation_function=frame_fun, corrections=scene.CorrectionsType.NONE)
+        self.light = scene.SceneObject(shapes.Point([0, 0, 0]), position_function=lambda date: np.array([5., 0, 0]),
+                                       orientation_function=lambda date: at.Rotation([0, 0, 0]),
+                                       corrections=scene.CorrectionsType.NONE)
+
+        self.images = []
+        for day in (1, 2):
+            image = OpNavImage(np.zeros((2, 2)), observation_date=datetime.datetime(2017, 2, day))
+            image.position = np.array([0., 0., -10.])
+            image.velocity = np.zeros(3)
+            image.rotation_inertial_to_camera = at.Rotation([0, 0.2, 0])
+            self.images.append(image)
+
+    def test_update(self):
+
+        sc = scene.Scene(self.target, light_obj=self.light)
+
+        sc.update(self.images[0])
+        self.assertEqual(self.calls, 1)
+
+        position = self.target.position.copy()
+        orientation = copy.deepcopy(self.target.orientation)
+        center = self.target.shape.center.copy()
+
+        # updating for the same image shouldn't recompute the position
+        sc.update(self.images[0])
+        self.assertEqual(self.calls, 1)
+
+        sc.update(self.images[1])
+        self.assertEqual(self.calls, 2)
+
+        # going back to the first image should restore the cached state
+        sc.update(self.images[0])
+        self.assertEqual(self.calls, 2)
+
+        np.testing.assert_allclose(self.target.position, position)
+        np.testing.assert_allclose(self.target.orientation.q, orientation.q)
+        np.testing.assert_allclose(self.target.shape.center, center)
+
+        # the cached state should match placing the object from scratch
+        sc.update_cache_size = 0
+        sc.update(self.images[0])
+        self.assertEqual(self.calls, 3)
+
+        np.testing.assert_allclose(self.target.position, position)
+        np.testing.assert_allclose(self.target.shape.center, center)
+
+    def test_clear_update_cache(self):
+
+        sc = scene.Scene(self.target, light_obj=self.light)
+
+        sc.update(self.images[0])
+        sc.clear_update_cache(self.target)
+
+        sc.update(self.images[0])
+        self.assertEqual(self.calls, 2)
+
+        # changing the camera state for the image should not reuse the cached state
+        self.images[0].position = np.array([0., 0., -20.])
+
+        sc.update(self.images[0])
+        self.assertEqual(self.calls, 3)
+
+        sc.clear_update_cache()
+
+        sc.update(self.images[0])
+        self.assertEqual(self.calls, 4)
+
+    def test_eviction(self):
+
+        sc = scene.Scene(self.target, light_obj=self.light, update_cache_size=2)
+
+        sc.update(self.images[0])
+        sc.update(self.images[1])
+
+        self.assertEqual(len(sc._update_cache), 2)
+
+        # the first image was evicted so it needs to be recomputed
+        sc.update(self.images[0])
+        self.assertEqual(self.calls, 3)
+
+
 class TestCorrectLightTime(TestCase):
     
     def setUp(self):
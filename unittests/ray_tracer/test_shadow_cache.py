@@ -0,0 +1,182 @@
+from unittest import TestCase
+
+import numpy as np
+
+from giant import rotations as at
+from giant.camera_models import PinholeModel
+from giant.ray_tracer import kdtree, shapes, illumination
+from giant.ray_tracer.rays import compute_rays
+from giant.ray_tracer.scene import Scene, SceneObject
+from giant.ray_tracer.render import render_template
+from giant.ray_tracer.shadow_cache import ShadowCache
+
+
+def tessellate_sphere(radius, n_lat, n_lon, center=(0, 0, 0)):
+
+    lat = np.linspace(-np.pi / 2, np.pi / 2, n_lat)
+    lon = np.linspace(0, 2 * np.pi, n_lon, endpoint=False)
+
+    lat, lon = np.meshgrid(lat, lon, indexing='ij')
+
+    vertices = radius * np.stack([np.cos(lat) * np.cos(lon),
+                                  np.cos(lat) * np.sin(lon),
+                                  np.sin(lat)], axis=-1).reshape(-1, 3) + np.asarray(center)
+
+    facets = []
+    for i in range(n_lat - 1):
+        for j in range(n_lon):
+            a = i * n_lon + j
+            b = i * n_lon + (j + 1) % n_lon
+            facets.append([a, b, b + n_lon])
+            facets.append([a, b + n_lon, a + n_lon])
+
+    return vertices, np.array(facets)
+
+
+class TestShadowCache(TestCase):
+
+    def setUp(self):
+
+        self.model = PinholeModel(focal_length=10, kx=20, ky=20, px=50, py=50, n_rows=100, n_cols=100)
+
+        self.rows = (22, 78)
+        self.cols = (25, 80)
+
+        # a body with a boulder sitting on it so that the body shadows itself
+        sun_direction = np.array([-0.6, 0.2, -0.77])
+        sun_direction /= np.linalg.norm(sun_direction)
+
+        body_verts, body_facets = tessellate_sphere(1, 40, 80)
+        boulder_verts, boulder_facets = tessellate_sphere(0.25, 10, 20, center=1.2 * np.array([-0.6, 0.5, -0.6]))
+
+        verts = np.vstack([body_verts, boulder_verts])
+        facets = np.vstack([body_facets, boulder_facets + body_verts.shape[0]])
+
+        self.tree = kdtree.KDTree(shapes.Triangle64(verts, 1.0, facets), max_depth=18)
+        self.tree.build_parallel(print_progress=False)
+
+        self.sun = SceneObject(shapes.Point(np.array([0.1, -0.2, 10]) + 1e4 * sun_direction))
+
+        self.target = SceneObject(self.tree, shadow_cache=ShadowCache(tolerance=1e-3))
+        self.target.change_position([0.1, -0.2, 10])
+
+        self.scene = Scene(target_objs=[self.target], light_obj=self.sun)
+
+        self.trace_rays, _ = compute_rays(self.model, self.rows, self.cols, grid_size=2)
+
+    def test_creation(self):
+
+        with self.assertRaises(ValueError):
+            ShadowCache(tolerance=0)
+
+        with self.assertRaises(ValueError):
+            ShadowCache(max_entries=0)
+
+    def test_illumination_inputs(self):
+
+        cached = self.scene.get_illumination_inputs(self.trace_rays)
+
+        cache = self.target.shadow_cache
+
+        self.assertEqual(len(cache), 1)
+        self.assertGreater(cache.traced_facets, 0)
+
+        self.target.shadow_cache = None
+
+        expected, intersects = self.scene.get_illumination_inputs(self.trace_rays, return_intersects=True)
+
+        # make sure the boulder actually shadows some of the lit side of the body
+        incidence = self.sun.shape.location - intersects["intersect"]
+        incidence /= np.linalg.norm(incidence, axis=-1, keepdims=True)
+
+        lit = intersects["check"] & ((intersects["normal"] * incidence).sum(axis=-1) > 0.2)
+        self.assertTrue((lit & ~expected["visible"]).any())
+
+        # the shadows are resolved at the facet level so they only differ from the exact shadows at the edges
+        self.assertGreater((cached["visible"] == expected["visible"]).mean(), 0.98)
+
+        both = cached["visible"] & expected["visible"]
+
+        np.testing.assert_array_equal(cached["incidence"][both], expected["incidence"][both])
+
+    def test_reuse(self):
+
+        first = self.scene.get_illumination_inputs(self.trace_rays)
+
+        cache = self.target.shadow_cache
+
+        traced = cache.traced_facets
+
+        # the same geometry is a pure lookup
+        np.testing.assert_array_equal(self.scene.get_illumination_inputs(self.trace_rays)["visible"],
+                                      first["visible"])
+        self.assertEqual(cache.traced_facets, traced)
+
+        # a small rotation of the body within the tolerance reuses the entry
+        self.target.rotate(at.Rotation([0, 0, 1e-4]))
+
+        self.scene.get_illumination_inputs(self.trace_rays)
+
+        self.assertEqual(len(cache), 1)
+        self.assertLessEqual(cache.traced_facets - traced, 10)
+
+        # a larger rotation needs a new entry
+        self.target.rotate(at.Rotation([0, 0, 0.1]))
+
+        self.scene.get_illumination_inputs(self.trace_rays)
+
+        self.assertEqual(len(cache), 2)
+        self.assertGreater(cache.traced_facets - traced, 100)
+
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+
+    def test_other_objects(self):
+
+        sun_direction = self.sun.shape.location - np.array([0.1, -0.2, 10])
+        sun_direction /= np.linalg.norm(sun_direction)
+
+        # a moon between the sun and the body still casts a shadow for every ray
+        moon = SceneObject(shapes.Ellipsoid(np.array([0.1, -0.2, 10]) + 1.6 * sun_direction,
+                                            principal_axes=np.array([0.3, 0.25, 0.2])))
+
+        self.scene.target_objs = [self.target, moon]
+
+        cached = self.scene.get_illumination_inputs(self.trace_rays)
+
+        self.target.shadow_cache = None
+
+        expected = self.scene.get_illumination_inputs(self.trace_rays)
+
+        self.assertGreater((cached["visible"] == expected["visible"]).mean(), 0.98)
+
+        self.scene.target_objs = [self.target]
+
+        only_body = self.scene.get_illumination_inputs(self.trace_rays)
+
+        self.assertTrue((only_body["visible"] & ~cached["visible"]).sum() > 10)
+
+    def test_render_template(self):
+
+        brdf = illumination.McEwenIllumination()
+
+        template, _ = render_template(self.scene, self.model, self.rows, self.cols, grid_size=2,
+                                      illumination_model=brdf)
+
+        traced = self.target.shadow_cache.traced_facets
+
+        # the scene uses the entry the renderer created so the results match exactly
+        trace_rays, uv = compute_rays(self.model, self.rows, self.cols, grid_size=2)
+
+        illums = brdf(self.scene.get_illumination_inputs(trace_rays))
+
+        self.assertEqual(self.target.shadow_cache.traced_facets, traced)
+
+        expected = np.zeros_like(template)
+
+        subs = (uv - uv.min(axis=1, keepdims=True).round()).round().astype(int)
+
+        np.add.at(expected, (subs[1], subs[0]), illums.ravel())
+
+        np.testing.assert_allclose(template, expected, atol=1e-10)
@@ -630,6 +630,25 @@ class TestTriangle(TestCase):
         self.assertEqual(results[2]["facet"], -1)
 
 
+    def test_is_occluded(self):
+
+        multi_ray = g_rays.Rays([[0, 0, 100, -1],
+                                 [0, 0, 100, 0],
+                                 [1, -1, 100, 0]],
+                                [[0, 0, 1, 1],
+                                 [0, 0, 1, 0],
+                                 [-1, 1, 1, 0]])
+
+        np.testing.assert_array_equal(self.multi_triangles.is_occluded(multi_ray), [True, True, False, True])
+        np.testing.assert_array_equal(self.multi_triangles.is_occluded(multi_ray, omp=False),
+                                      self.multi_triangles.trace(multi_ray)["check"])
+
+        # the last ray only strikes the second facet so ignoring it means nothing is struck
+        multi_ray.ignore = [-1, -1, -1, 1]
+
+        np.testing.assert_array_equal(self.multi_triangles.is_occluded(multi_ray), [True, True, False, False])
+
+
 class TestTriangle32(TestCase):
     def setUp(self):
 
@@ -1255,6 +1274,25 @@ class TestTriangle32(TestCase):
         self.assertEqual(results[2]["facet"], -1)
 
 
+    def test_is_occluded(self):
+
+        multi_ray = g_rays.Rays([[0, 0, 100, -1],
+                                 [0, 0, 100, 0],
+                                 [1, -1, 100, 0]],
+                                [[0, 0, 1, 1],
+                                 [0, 0, 1, 0],
+                                 [-1, 1, 1, 0]])
+
+        np.testing.assert_array_equal(self.multi_triangles.is_occluded(multi_ray), [True, True, False, True])
+        np.testing.assert_array_equal(self.multi_triangles.is_occluded(multi_ray, omp=False),
+                                      self.multi_triangles.trace(multi_ray)["check"])
+
+        # the last ray only strikes the second facet so ignoring it means nothing is struck
+        multi_ray.ignore = [-1, -1, -1, 1]
+
+        np.testing.assert_array_equal(self.multi_triangles.is_occluded(multi_ray), [True, True, False, False])
+
+
 class TestAxisAlignedBoundingBox(TestCase):
     def setUp(self):
         self.min_sides = [-1, -2, -3]
@@ -1641,8 +1679,23 @@ class TestEllipsoid(TestCase):
                 np.testing.assert_array_almost_equal(shape.ellipsoid_matrix, self.ellipsoid_matrix_ellipse)
 
     def test_bounding_box(self):
-        # TODO: figure out this test..
-        pass
+        ellipse = g_shapes.Ellipsoid(self.off_center, principal_axes=self.principal_axes_ellipse,
+                                     orientation=at.Rotation([0.3, -0.5, 0.7]).matrix)
+
+        # sample the surface of the ellipsoid
+        lat, lon = np.meshgrid(np.linspace(-np.pi / 2, np.pi / 2, 181), np.linspace(0, 2 * np.pi, 361))
+        body = np.vstack([np.cos(lat.ravel()) * np.cos(lon.ravel()),
+                          np.cos(lat.ravel()) * np.sin(lon.ravel()),
+                          np.sin(lat.ravel())]) * self.principal_axes_ellipse.reshape(3, 1)
+
+        surface = ellipse.orientation @ body + self.off_center.reshape(3, 1)
+
+        # the box contains the ellipsoid and is tight against it
+        np.testing.assert_array_less(ellipse.bounding_box.min_sides - 1e-10, surface.min(axis=-1))
+        np.testing.assert_array_less(surface.max(axis=-1), ellipse.bounding_box.max_sides + 1e-10)
+
+        np.testing.assert_allclose(ellipse.bounding_box.min_sides, surface.min(axis=-1), atol=1e-2)
+        np.testing.assert_allclose(ellipse.bounding_box.max_sides, surface.max(axis=-1), atol=1e-2)
 
     def test_compute_intersect(self):
         sphere = g_shapes.Ellipsoid(self.origin, ellipsoid_matrix=self.ellipsoid_matrix_sphere,
@@ -2835,3 +2888,89 @@ class TestEllipsoid(TestCase):
 
             # negative numeric since the pert is actually to camera position, no center like it should
             np.testing.assert_allclose(jac_ana, -jac_num, atol=1e-8, rtol=1e-4)
+
+    def test_is_occluded(self):
+
+        ellipse = g_shapes.Ellipsoid(self.off_center, principal_axes=self.principal_axes_ellipse,
+                                     orientation=self.orientation.matrix)
+
+        rng = np.random.default_rng(5)
+
+        starts = self.off_center.reshape(3, 1) + rng.normal(scale=20, size=(3, 200))
+        directions = self.off_center.reshape(3, 1) + rng.normal(scale=5, size=(3, 200)) - starts
+
+        multi_ray = g_rays.Rays(starts, directions)
+
+        occluded = ellipse.is_occluded(multi_ray)
+
+        self.assertTrue(occluded.any())
+        self.assertFalse(occluded.all())
+        np.testing.assert_array_equal(occluded, ellipse.trace(multi_ray)["check"])
+
+        # rays starting inside strike the surface on the way out
+        np.testing.assert_array_equal(ellipse.is_occluded(g_rays.Rays(self.off_center, [[1, 0], [0, 1], [0, 0]])),
+                                      [True, True])
+
+        # rays pointing away from the ellipsoid don't strike it
+        np.testing.assert_array_equal(ellipse.is_occluded(g_rays.Rays(self.off_center + 100,
+                                                                      [[1, 0], [0, 1], [0, 0]])),
+                                      [False, False])
+
+        # rays that ignore the ellipsoid don't strike it
+        multi_ray.ignore = np.full(200, ellipse.id)
+        self.assertFalse(ellipse.is_occluded(multi_ray).any())
+
+    def test_intersect_batch(self):
+
+        ellipse = g_shapes.Ellipsoid(self.off_center, principal_axes=self.principal_axes_ellipse,
+                                     orientation=self.orientation.matrix)
+
+        rng = np.random.default_rng(11)
+
+        starts = self.off_center.reshape(3, 1) + rng.normal(scale=20, size=(3, 500))
+        directions = self.off_center.reshape(3, 1) + rng.normal(scale=5, size=(3, 500)) - starts
+        directions /= np.linalg.norm(directions, axis=0, keepdims=True)
+
+        # the starts of the first 50 rays are inside of the ellipsoid
+        starts[:, :50] = self.off_center.reshape(3, 1)
+
+        multi_ray = g_rays.Rays(starts, directions)
+
+        rel_starts = starts - self.off_center.reshape(3, 1)
+        a_coef = (directions * (ellipse.ellipsoid_matrix @ directions)).sum(axis=0)
+        b_coef = 2 * (directions * (ellipse.ellipsoid_matrix @ rel_starts)).sum(axis=0)
+        c_coef = (rel_starts * (ellipse.ellipsoid_matrix @ rel_starts)).sum(axis=0) - 1
+
+        with np.errstate(invalid='ignore'):
+            near, far = g_shapes.ellipsoid.quadratic_equation(a_coef, b_coef, c_coef)
+
+        distance = np.where(near >= 0, near, np.where(far >= 0, far, np.nan))
+
+        expected = (starts + distance * directions).T
+
+        intersects = ellipse.intersect(multi_ray)
+
+        self.assertTrue(np.isnan(intersects).any())
+        self.assertFalse(np.isnan(intersects[:50]).any())
+        np.testing.assert_allclose(intersects, expected, atol=1e-10)
+
+        # every intersect should be on the surface
+        hits = ~np.isnan(intersects).any(axis=1)
+        rel_hits = intersects[hits] - self.off_center.reshape(1, 3)
+        np.testing.assert_allclose((rel_hits * (rel_hits @ ellipse.ellipsoid_matrix)).sum(axis=-1), 1)
+
+        with self.subTest(ignore='array'):
+            multi_ray.ignore = np.where(np.arange(500) % 2 == 0, ellipse.id, -1)
+
+            intersects = ellipse.intersect(multi_ray)
+
+            self.assertTrue(np.isnan(intersects[::2]).all())
+            np.testing.assert_allclose(intersects[1::2], expected[1::2], atol=1e-10)
+
+        with self.subTest(ignore='ragged'):
+            multi_ray.ignore = [[ellipse.id, -1] if ind % 2 == 0 else [-1] for ind in range(500)]
+
+            intersects = ellipse.intersect(multi_ray)
+
+            self.assertTrue(np.isnan(intersects[::2]).all())
+            np.testing.assert_allclose(intersects[1::2], expected[1::2], atol=1e-10)
@@ -219,6 +219,55 @@ class TestRelNav(TestCase):
         np.testing.assert_equal(ul, eul)
         np.testing.assert_equal(lr, elr)
 
+    def test_render_template(self):
+
+        self.xcorr.rays = None
+
+        template, (ul, lr) = self.xcorr.render_template(0, self.target_obj, temperature=0)
+
+        # render the same rays through the multistep pipeline
+        (rays, _), _ = self.xcorr.compute_rays(self.target_obj, temperature=0)
+        self.xcorr.rays = rays
+
+        expected, (eul, elr) = self.xcorr.render_template(0, self.target_obj, temperature=0)
+
+        np.testing.assert_array_equal(ul, eul)
+        np.testing.assert_array_equal(lr, elr)
+        np.testing.assert_allclose(template, expected, atol=1e-10)
+
+    def test_render_template_adaptive(self):
+
+        self.xcorr.rays = None
+        self.xcorr.grid_size = 3
+
+        expected, (eul, elr) = self.xcorr.render_template(0, self.target_obj, temperature=0)
+
+        self.xcorr.adaptive_grid = True
+
+        template, (ul, lr) = self.xcorr.render_template(0, self.target_obj, temperature=0)
+
+        np.testing.assert_array_equal(ul, eul)
+        np.testing.assert_array_equal(lr, elr)
+        np.testing.assert_allclose(template, expected, atol=0.01 * expected.max())
+
+    def test_render_template_rasterize(self):
+
+        self.xcorr.rays = None
+        self.xcorr.grid_size = 3
+
+        expected, (eul, elr) = self.xcorr.render_template(0, self.target_obj, temperature=0)
+
+        self.xcorr.rasterize = True
+
+        template, (ul, lr) = self.xcorr.render_template(0, self.target_obj, temperature=0)
+
+        np.testing.assert_array_equal(ul, eul)
+        np.testing.assert_array_equal(lr, elr)
+
+        # the ellipsoid is tessellated so only the limb differs slightly
+        self.assertAlmostEqual(template.sum() / expected.sum(), 1, places=2)
+        self.assertGreater(np.corrcoef(template.ravel(), expected.ravel())[0, 1], 0.999)
+
     def test_estimate(self):
 
         self.xcorr.rays = None
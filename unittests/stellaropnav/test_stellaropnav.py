@@ -1,9 +1,116 @@
 from unittest import TestCase
+from datetime import datetime
 import numpy as np
+import pandas as pd
 from giant import stellar_opnav as sopnav
+from giant.camera import Camera
+from giant.camera_models import PinholeModel
+from giant.image import OpNavImage
+from giant.rotations import Rotation
+from giant.catalogues.meta_catalogue import Catalogue, GIANT_COLUMNS
+from giant.catalogues.utilities import radec_to_unit, unit_to_radec
+
+
+class MemoryCatalogue(Catalogue):
+
+    def __init__(self, stars):
+
+        super().__init__(include_proper_motion=False)
+
+        self.stars = stars
+
+    def query_catalogue(self, ids=None, min_ra=0, max_ra=360, min_dec=-90, max_dec=90, min_mag=-4, max_mag=20,
+                        search_center=None, search_radius=None, new_epoch=None):
+
+        if ids is not None:
+            return self.stars.loc[ids]
+
+        stars = self.stars[(self.stars.mag >= min_mag) & (self.stars.mag <= max_mag)]
+
+        center = radec_to_unit(*np.deg2rad(search_center)).ravel()
+        units = radec_to_unit(np.deg2rad(stars.ra.values), np.deg2rad(stars.dec.values))
+
+        return stars[np.rad2deg(np.arccos(np.clip(center @ units, -1, 1))) <= search_radius]
+
 
 class TestStellarOpnav(TestCase):
 
     def test_init(self):
 
         pass
+
+    @staticmethod
+    def load_camera():
+
+        rng = np.random.RandomState(3)
+
+        units = rng.normal(size=(3, 400))
+        units /= np.linalg.norm(units, axis=0)
+
+        data = {column: np.zeros(400) for column in GIANT_COLUMNS}
+        data['ra'], data['dec'] = np.rad2deg(unit_to_radec(units))
+        data['mag'] = rng.uniform(1, 6, 400)
+        data['distance'] = 5.428047027e15 * np.ones(400)
+        data['epoch'] = 2000. * np.ones(400)
+
+        stars = pd.DataFrame(data, columns=GIANT_COLUMNS)
+
+        model = PinholeModel(kx=500, ky=500, px=127.5, py=127.5, focal_length=1, n_rows=256, n_cols=256)
+
+        rows, cols = np.mgrid[:256, :256]
+
+        images = []
+        for day in range(1, 5):
+            rotation = Rotation(rng.normal(size=3))
+
+            camera_units = rotation.matrix @ units
+            pixels = model.project_onto_image(camera_units)
+            visible = (camera_units[2] > 0) & (pixels >= 3).all(axis=0) & (pixels <= 252).all(axis=0)
+
+            image = rng.normal(100, 2, (256, 256))
+            for (x, y), mag in zip(pixels[:, visible].T, stars.mag.values[visible]):
+                image += 2000 * 10 ** (-0.4 * (mag - 1)) * np.exp(-((cols - x) ** 2 + (rows - y) ** 2) / 1.28)
+
+            image = OpNavImage(image, observation_date=datetime(2020, 1, day), temperature=0, exposure_type='long')
+            image.rotation_inertial_to_camera = rotation
+            image.position = np.zeros(3)
+            image.velocity = np.zeros(3)
+
+            images.append(image)
+
+        return Camera(images=images, model=model, parse_data=False), MemoryCatalogue(stars)
+
+    def test_id_stars_parallel(self):
+
+        camera, catalogue = self.load_camera()
+
+        results = []
+        for num_workers, parallel_backend in [(1, 'thread'), (3, 'thread'), (2, 'process')]:
+            stellar = sopnav.StellarOpNav(camera, star_id_kwargs={'catalogue': catalogue, 'max_magnitude': 6,
+                                                                  'tolerance': 5},
+                                          image_processing_kwargs={'poi_threshold': 10},
+                                          num_workers=num_workers, parallel_backend=parallel_backend)
+            stellar.id_stars()
+
+            results.append(stellar)
+
+        self.assertTrue(all(points is not None for points in results[0].matched_extracted_image_points))
+
+        for stellar in results[1:]:
+            self.assertFalse(any(stellar.process_stars))
+
+            for ind in range(4):
+                np.testing.assert_array_equal(stellar.ip_extracted_image_points[ind],
+                                              results[0].ip_extracted_image_points[ind])
+                np.testing.assert_array_equal(stellar.matched_extracted_image_points[ind],
+                                              results[0].matched_extracted_image_points[ind])
+                np.testing.assert_array_equal(stellar.unmatched_extracted_image_points[ind],
+                                              results[0].unmatched_extracted_image_points[ind])
+                pd.testing.assert_frame_equal(stellar.matched_catalogue_star_records[ind],
+                                              results[0].matched_catalogue_star_records[ind])
+
+        stellar = sopnav.StellarOpNav(camera, star_id_kwargs={'catalogue': catalogue}, num_workers=2,
+                                      parallel_backend='fork')
+
+        with self.assertRaises(ValueError):
+            stellar.id_stars()